@@ -0,0 +1,70 @@
+"""添加交易月度汇总表
+
+Revision ID: 3f6c2a9d1e47
+Revises: bd368dd8de8b
+Create Date: 2025-06-10 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c2a9d1e47'
+down_revision = 'bd368dd8de8b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    # 1. 创建月度汇总表（复用transactions表已有的枚举类型）
+    op.create_table(
+        'transaction_monthly_rollups',
+        sa.Column('user_id', sa.UUID(), nullable=False, comment='用户ID'),
+        sa.Column('card_id', sa.UUID(), nullable=False, comment='信用卡ID'),
+        sa.Column('year', sa.Integer(), nullable=False, comment='交易年份'),
+        sa.Column('month', sa.Integer(), nullable=False, comment='交易月份，1-12'),
+        sa.Column('transaction_type', postgresql.ENUM(name='transactiontype', create_type=False), nullable=False, comment='交易类型'),
+        sa.Column('category', postgresql.ENUM(name='transactioncategory', create_type=False), nullable=False, comment='交易分类'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, comment='交易笔数'),
+        sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False, comment='交易金额合计'),
+        sa.Column('points_earned', sa.Numeric(precision=14, scale=2), nullable=False, comment='获得积分合计'),
+        sa.Column('id', sa.UUID(), nullable=False, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, comment='更新时间'),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, comment='软删除标记'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'user_id', 'card_id', 'year', 'month', 'transaction_type', 'category',
+            name='uq_transaction_monthly_rollups_key'
+        )
+    )
+    with op.batch_alter_table('transaction_monthly_rollups', schema=None) as batch_op:
+        batch_op.create_index('idx_transaction_monthly_rollups_user_month', ['user_id', 'year', 'month'], unique=False)
+
+    # 2. 从现有交易记录回填汇总数据
+    connection = op.get_bind()
+    connection.execute(sa.text("""
+        INSERT INTO transaction_monthly_rollups (
+            id, user_id, card_id, year, month, transaction_type, category,
+            transaction_count, total_amount, points_earned, created_at, updated_at, is_deleted
+        )
+        SELECT gen_random_uuid(), user_id, card_id,
+               EXTRACT(YEAR FROM transaction_date)::INTEGER,
+               EXTRACT(MONTH FROM transaction_date)::INTEGER,
+               transaction_type, COALESCE(category, 'OTHER'),
+               COUNT(*), COALESCE(SUM(amount), 0), COALESCE(SUM(points_earned), 0),
+               NOW(), NOW(), FALSE
+        FROM transactions
+        GROUP BY 2, 3, 4, 5, 6, 7
+    """))
+
+
+def downgrade() -> None:
+    """回滚数据库架构"""
+    with op.batch_alter_table('transaction_monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_index('idx_transaction_monthly_rollups_user_month')
+
+    op.drop_table('transaction_monthly_rollups')
@@ -0,0 +1,76 @@
+"""添加交易搜索分词索引
+
+Revision ID: e8b4d1c7a2f5
+Revises: 3f6c2a9d1e47
+Create Date: 2025-06-11 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4d1c7a2f5'
+down_revision = '3f6c2a9d1e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    # 1. 添加搜索分词列
+    op.add_column(
+        'transactions',
+        sa.Column('search_tokens', postgresql.ARRAY(sa.Text()), nullable=True,
+                  comment='搜索分词（单字和相邻双字），用于关键词和商户搜索的GIN索引')
+    )
+
+    # 2. 分词函数：小写后按空白切分，每段生成单字和相邻双字，中文无需分词词典
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION transaction_search_tokens(source TEXT) RETURNS TEXT[] AS $$
+            SELECT COALESCE(array_agg(DISTINCT substr(word, position, size)), '{}')
+            FROM regexp_split_to_table(lower(COALESCE(source, '')), '\s+') AS word,
+                 generate_series(1, 2) AS size,
+                 generate_series(1, char_length(word)) AS position
+            WHERE word <> '' AND position + size - 1 <= char_length(word)
+        $$ LANGUAGE sql IMMUTABLE
+    """)
+
+    # 3. 触发器：写入或修改商户名称、描述、备注、地点时维护分词
+    op.execute("""
+        CREATE OR REPLACE FUNCTION transactions_search_tokens_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_tokens := transaction_search_tokens(
+                concat_ws(' ', NEW.merchant_name, NEW.description, NEW.notes, NEW.location)
+            );
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_transactions_search_tokens
+        BEFORE INSERT OR UPDATE OF merchant_name, description, notes, location ON transactions
+        FOR EACH ROW EXECUTE FUNCTION transactions_search_tokens_update()
+    """)
+
+    # 4. 回填已有交易记录后再建索引，避免逐行维护索引
+    op.execute("""
+        UPDATE transactions
+        SET search_tokens = transaction_search_tokens(
+            concat_ws(' ', merchant_name, description, notes, location)
+        )
+    """)
+    op.create_index(
+        'idx_transactions_search_tokens', 'transactions', ['search_tokens'],
+        unique=False, postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """回滚数据库架构"""
+    op.drop_index('idx_transactions_search_tokens', table_name='transactions', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS trg_transactions_search_tokens ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS transactions_search_tokens_update()")
+    op.execute("DROP FUNCTION IF EXISTS transaction_search_tokens(TEXT)")
+    op.drop_column('transactions', 'search_tokens')
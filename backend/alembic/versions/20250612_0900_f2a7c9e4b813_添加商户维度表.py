@@ -0,0 +1,78 @@
+"""添加商户维度表
+
+Revision ID: f2a7c9e4b813
+Revises: e8b4d1c7a2f5
+Create Date: 2025-06-12 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c9e4b813'
+down_revision = 'e8b4d1c7a2f5'
+branch_labels = None
+depends_on = None
+
+# 与 services.merchant_service.normalize_merchant_name 一致：
+# NFKC规范化、合并连续空白、去除首尾空白、转为小写
+NORMALIZED_MERCHANT_NAME = r"""
+    left(lower(btrim(regexp_replace(normalize(merchant_name, NFKC), '\s+', ' ', 'g'))), 200)
+"""
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    # 1. 创建商户表
+    op.create_table(
+        'merchants',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='主键ID'),
+        sa.Column('normalized_name', sa.String(length=200), nullable=False, comment='规范化商户名称'),
+        sa.Column('name', sa.String(length=200), nullable=False, comment='商户显示名称，取首次出现时的写法'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now(), comment='创建时间'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('normalized_name')
+    )
+
+    # 2. 交易记录添加商户ID
+    op.add_column(
+        'transactions',
+        sa.Column('merchant_id', sa.Integer(), nullable=True, comment='商户ID，关联merchants表，由商户名称规范化后解析')
+    )
+    op.create_foreign_key(
+        'transactions_merchant_id_fkey', 'transactions', 'merchants', ['merchant_id'], ['id']
+    )
+
+    # 3. 回填商户表和交易记录的商户ID，显示名称取每个商户最早出现的写法
+    op.execute(f"""
+        INSERT INTO merchants (normalized_name, name)
+        SELECT DISTINCT ON (normalized_name) normalized_name, btrim(regexp_replace(merchant_name, '\\s+', ' ', 'g'))
+        FROM (
+            SELECT {NORMALIZED_MERCHANT_NAME} AS normalized_name, merchant_name, created_at
+            FROM transactions
+            WHERE merchant_name IS NOT NULL
+        ) AS names
+        WHERE normalized_name <> ''
+        ORDER BY normalized_name, created_at
+    """)
+    op.execute(f"""
+        UPDATE transactions
+        SET merchant_id = merchants.id
+        FROM merchants
+        WHERE transactions.merchant_name IS NOT NULL
+          AND merchants.normalized_name = {NORMALIZED_MERCHANT_NAME}
+    """)
+
+    # 4. 商户索引改为整数列
+    op.drop_index('idx_transactions_merchant', table_name='transactions')
+    op.create_index('idx_transactions_merchant', 'transactions', ['merchant_id'], unique=False)
+
+
+def downgrade() -> None:
+    """回滚数据库架构"""
+    op.drop_index('idx_transactions_merchant', table_name='transactions')
+    op.create_index('idx_transactions_merchant', 'transactions', ['merchant_name'], unique=False)
+    op.drop_constraint('transactions_merchant_id_fkey', 'transactions', type_='foreignkey')
+    op.drop_column('transactions', 'merchant_id')
+    op.drop_table('merchants')
@@ -0,0 +1,67 @@
+"""添加商户月度汇总表
+
+Revision ID: b5e1d8a4c7f2
+Revises: f2a7c9e4b813
+Create Date: 2025-06-12 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1d8a4c7f2'
+down_revision = 'f2a7c9e4b813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    # 1. 创建商户月度汇总表
+    op.create_table(
+        'transaction_merchant_monthly_rollups',
+        sa.Column('user_id', sa.UUID(), nullable=False, comment='用户ID'),
+        sa.Column('merchant_id', sa.Integer(), nullable=False, comment='商户ID，关联merchants表'),
+        sa.Column('year', sa.Integer(), nullable=False, comment='交易年份'),
+        sa.Column('month', sa.Integer(), nullable=False, comment='交易月份，1-12'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, comment='消费笔数'),
+        sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False, comment='消费金额合计'),
+        sa.Column('id', sa.UUID(), nullable=False, comment='主键ID'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, comment='创建时间'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, comment='更新时间'),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False, comment='软删除标记'),
+        sa.ForeignKeyConstraint(['merchant_id'], ['merchants.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'user_id', 'merchant_id', 'year', 'month',
+            name='uq_transaction_merchant_monthly_rollups_key'
+        )
+    )
+    with op.batch_alter_table('transaction_merchant_monthly_rollups', schema=None) as batch_op:
+        batch_op.create_index('idx_transaction_merchant_monthly_rollups_user_month', ['user_id', 'year', 'month'], unique=False)
+
+    # 2. 从现有消费交易回填汇总数据
+    connection = op.get_bind()
+    connection.execute(sa.text("""
+        INSERT INTO transaction_merchant_monthly_rollups (
+            id, user_id, merchant_id, year, month,
+            transaction_count, total_amount, created_at, updated_at, is_deleted
+        )
+        SELECT gen_random_uuid(), user_id, merchant_id,
+               EXTRACT(YEAR FROM transaction_date)::INTEGER,
+               EXTRACT(MONTH FROM transaction_date)::INTEGER,
+               COUNT(*), COALESCE(SUM(amount), 0),
+               NOW(), NOW(), FALSE
+        FROM transactions
+        WHERE transaction_type = 'EXPENSE' AND merchant_id IS NOT NULL
+        GROUP BY 2, 3, 4, 5
+    """))
+
+
+def downgrade() -> None:
+    """回滚数据库架构"""
+    with op.batch_alter_table('transaction_merchant_monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_index('idx_transaction_merchant_monthly_rollups_user_month')
+
+    op.drop_table('transaction_merchant_monthly_rollups')
@@ -0,0 +1,72 @@
+"""按查询模式调整索引
+
+交易查询总是 user_id = ? 并按 transaction_date DESC, id DESC 排序，信用卡查询总是
+user_id = ? AND is_deleted = false 并按 created_at DESC 排序。建立与之对应的复合索引和
+部分索引，删除被覆盖的索引和低基数列（类型、分类、状态等）上只拖慢写入的索引。
+
+索引在 autocommit 块中以 CONCURRENTLY 方式创建和删除，不阻塞线上读写。
+
+Revision ID: c7f4a2e9d136
+Revises: b5e1d8a4c7f2
+Create Date: 2025-06-13 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f4a2e9d136'
+down_revision = 'b5e1d8a4c7f2'
+branch_labels = None
+depends_on = None
+
+# 调整前的索引：(索引名, 表名, 列)
+LEGACY_INDEXES = [
+    ('idx_transactions_card_id', 'transactions', ['card_id']),
+    ('idx_transactions_user_id', 'transactions', ['user_id']),
+    ('idx_transactions_date', 'transactions', ['transaction_date']),
+    ('idx_transactions_type', 'transactions', ['transaction_type']),
+    ('idx_transactions_category', 'transactions', ['category']),
+    ('idx_transactions_status', 'transactions', ['status']),
+    ('idx_transactions_user_date', 'transactions', ['user_id', 'transaction_date']),
+    ('idx_credit_cards_user_id', 'credit_cards', ['user_id']),
+    ('idx_credit_cards_bank_name', 'credit_cards', ['bank_name']),
+    ('idx_credit_cards_card_type', 'credit_cards', ['card_type']),
+    ('idx_credit_cards_status', 'credit_cards', ['status']),
+    ('idx_credit_cards_is_active_deleted', 'credit_cards', ['is_active', 'is_deleted']),
+]
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    with op.get_context().autocommit_block():
+        # 1. 先建新索引，保证删除旧索引期间查询始终有可用索引
+        op.create_index(
+            'idx_transactions_user_date_id', 'transactions',
+            ['user_id', sa.text('transaction_date DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'idx_credit_cards_user_created', 'credit_cards',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False, postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+        # 2. 删除被覆盖的索引和低基数列索引
+        for index_name, table_name, _ in LEGACY_INDEXES:
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """回滚数据库架构"""
+    with op.get_context().autocommit_block():
+        for index_name, table_name, columns in LEGACY_INDEXES:
+            op.create_index(
+                index_name, table_name, columns,
+                unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+        op.drop_index('idx_credit_cards_user_created', table_name='credit_cards', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_transactions_user_date_id', table_name='transactions', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,116 @@
+"""交易表按年分区
+
+将 transactions 改为按 transaction_date 的年度范围分区表：
+- 分区名为 transactions_yYYYY，未覆盖的年份落入默认分区 transactions_default
+- 分区表主键必须包含分区键，主键改为 (id, transaction_date)
+- ensure_transaction_partitions(start_year, end_year) 创建缺失的年度分区，
+  应用启动时和 ``python start.py partitions ensure`` 会调用它预先创建未来年份的分区
+
+迁移会复制全部交易数据，数据量大时应在维护窗口执行。
+
+Revision ID: d4b8e6f2a913
+Revises: c7f4a2e9d136
+Create Date: 2025-06-14 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8e6f2a913'
+down_revision = 'c7f4a2e9d136'
+branch_labels = None
+depends_on = None
+
+# 与 db_models.transactions.TRANSACTION_PARTITION_FUNCTION 一致
+TRANSACTION_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_transaction_partitions(start_year INTEGER, end_year INTEGER)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    partition_year INTEGER;
+    partition_name TEXT;
+    range_start TIMESTAMP;
+    range_end TIMESTAMP;
+BEGIN
+    FOR partition_year IN start_year..end_year LOOP
+        partition_name := 'transactions_y' || partition_year;
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        range_start := make_timestamp(partition_year, 1, 1, 0, 0, 0);
+        range_end := make_timestamp(partition_year + 1, 1, 1, 0, 0, 0);
+        EXECUTE 'CREATE TABLE ' || quote_ident(partition_name)
+            || ' (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)';
+        IF to_regclass('transactions_default') IS NOT NULL THEN
+            EXECUTE 'WITH moved AS (DELETE FROM transactions_default'
+                || ' WHERE transaction_date >= $1 AND transaction_date < $2 RETURNING *)'
+                || ' INSERT INTO ' || quote_ident(partition_name) || ' SELECT * FROM moved'
+            USING range_start, range_end;
+        END IF;
+        EXECUTE 'ALTER TABLE transactions ATTACH PARTITION ' || quote_ident(partition_name)
+            || ' FOR VALUES FROM (' || quote_literal(range_start) || ') TO (' || quote_literal(range_end) || ')';
+        RETURN NEXT partition_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _create_constraints_and_indexes(primary_key: str) -> None:
+    """在新建的 transactions 表上重建主键、外键、索引和搜索分词触发器"""
+    op.execute(f"ALTER TABLE transactions ADD CONSTRAINT transactions_pkey PRIMARY KEY ({primary_key})")
+    op.create_foreign_key('transactions_card_id_fkey', 'transactions', 'credit_cards', ['card_id'], ['id'])
+    op.create_foreign_key('transactions_user_id_fkey', 'transactions', 'users', ['user_id'], ['id'])
+    op.create_foreign_key('transactions_merchant_id_fkey', 'transactions', 'merchants', ['merchant_id'], ['id'])
+    op.execute("CREATE INDEX idx_transactions_user_date_id ON transactions (user_id, transaction_date DESC, id DESC)")
+    op.execute("CREATE INDEX idx_transactions_card_date ON transactions (card_id, transaction_date)")
+    op.execute("CREATE INDEX idx_transactions_merchant ON transactions (merchant_id)")
+    op.execute("CREATE INDEX idx_transactions_search_tokens ON transactions USING gin (search_tokens)")
+    op.execute("""
+        CREATE TRIGGER trg_transactions_search_tokens
+        BEFORE INSERT OR UPDATE OF merchant_name, description, notes, location ON transactions
+        FOR EACH ROW EXECUTE FUNCTION transactions_search_tokens_update()
+    """)
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    # 1. 原表改名，按相同结构创建分区表
+    op.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+    op.execute("""
+        CREATE TABLE transactions (LIKE transactions_unpartitioned INCLUDING DEFAULTS INCLUDING COMMENTS)
+        PARTITION BY RANGE (transaction_date)
+    """)
+
+    # 2. 创建默认分区，以及覆盖已有数据（最多回溯10年）到未来2年的年度分区
+    op.execute(TRANSACTION_PARTITION_FUNCTION)
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+    op.execute("""
+        SELECT ensure_transaction_partitions(
+            GREATEST(
+                COALESCE((SELECT EXTRACT(YEAR FROM MIN(transaction_date))::INTEGER FROM transactions_unpartitioned),
+                         EXTRACT(YEAR FROM NOW())::INTEGER),
+                EXTRACT(YEAR FROM NOW())::INTEGER - 10
+            ),
+            EXTRACT(YEAR FROM NOW())::INTEGER + 2
+        )
+    """)
+
+    # 3. 复制数据（新表尚无触发器，搜索分词原样复制）后删除原表
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_unpartitioned")
+    op.execute("DROP TABLE transactions_unpartitioned")
+
+    # 4. 重建主键（包含分区键）、外键、索引和触发器，分区自动继承
+    _create_constraints_and_indexes("id, transaction_date")
+
+
+def downgrade() -> None:
+    """回滚数据库架构（已解除挂载的分区不会并回）"""
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute("""
+        CREATE TABLE transactions (LIKE transactions_partitioned INCLUDING DEFAULTS INCLUDING COMMENTS)
+    """)
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_partitioned")
+    op.execute("DROP TABLE transactions_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS ensure_transaction_partitions(INTEGER, INTEGER)")
+
+    _create_constraints_and_indexes("id")
@@ -0,0 +1,162 @@
+"""年费减免检查函数只统计有效消费
+
+check_annual_fee_waiver 原先统计考核年度内全部交易（含退款、还款、未完成和已取消的交易），
+且 BETWEEN DATE 'YYYY-01-01' AND DATE 'YYYY-12-31' 漏掉了12月31日零点之后的交易。
+改为只统计 [当年1月1日, 次年1月1日) 内已完成的消费交易，与
+AnnualFeeService.evaluate_annual_fee_waivers 和交易写入时的进度更新口径一致。
+年费类型统一转为小写比较，兼容按枚举名称（大写）存储的 fee_type。
+
+Revision ID: a6e3c8d1f027
+Revises: d4b8e6f2a913
+Create Date: 2025-06-15 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e3c8d1f027'
+down_revision = 'd4b8e6f2a913'
+branch_labels = None
+depends_on = None
+
+# 与 postgresql/init.sql 中的函数定义一致
+CHECK_ANNUAL_FEE_WAIVER_FUNCTION = """
+CREATE OR REPLACE FUNCTION check_annual_fee_waiver(
+    p_card_id UUID,
+    p_fee_year INTEGER
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_rule_id UUID;
+    v_fee_type VARCHAR(20);
+    v_waiver_value DECIMAL(15,2);
+    v_current_progress DECIMAL(15,2) := 0;
+    v_start_date DATE;
+    v_end_date DATE;
+BEGIN
+    -- 获取年费规则（ORM建表时枚举按名称存储为大写，统一转为小写比较）
+    SELECT r.id, lower(r.fee_type::TEXT), r.waiver_condition_value
+    INTO v_rule_id, v_fee_type, v_waiver_value
+    FROM credit_cards c
+    JOIN annual_fee_rules r ON c.annual_fee_rule_id = r.id
+    WHERE c.id = p_card_id;
+    
+    -- 如果是刚性年费，直接返回FALSE
+    IF v_fee_type = 'rigid' THEN
+        RETURN FALSE;
+    END IF;
+    
+    -- 计算考核周期 [当年1月1日, 次年1月1日)，只统计已完成的消费交易
+    v_start_date := make_date(p_fee_year, 1, 1);
+    v_end_date := make_date(p_fee_year + 1, 1, 1);
+    
+    -- 根据不同类型计算当前进度
+    IF v_fee_type = 'transaction_count' THEN
+        -- 计算刷卡次数
+        SELECT COUNT(*)
+        INTO v_current_progress
+        FROM transactions
+        WHERE card_id = p_card_id
+        AND transaction_type = 'EXPENSE'
+        AND status = 'COMPLETED'
+        AND transaction_date >= v_start_date
+        AND transaction_date < v_end_date;
+        
+    ELSIF v_fee_type = 'transaction_amount' THEN
+        -- 计算刷卡金额
+        SELECT COALESCE(SUM(amount), 0)
+        INTO v_current_progress
+        FROM transactions
+        WHERE card_id = p_card_id
+        AND transaction_type = 'EXPENSE'
+        AND status = 'COMPLETED'
+        AND transaction_date >= v_start_date
+        AND transaction_date < v_end_date;
+        
+    ELSIF v_fee_type = 'points_exchange' THEN
+        -- 积分兑换逻辑（这里假设用户主动兑换，需要额外的积分表来跟踪）
+        v_current_progress := v_waiver_value; -- 临时逻辑，实际需要积分系统
+    END IF;
+    
+    -- 更新年费记录的当前进度
+    UPDATE annual_fee_records 
+    SET current_progress = v_current_progress,
+        waiver_condition_met = (v_current_progress >= v_waiver_value)
+    WHERE card_id = p_card_id AND fee_year = p_fee_year;
+    
+    RETURN v_current_progress >= v_waiver_value;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_CHECK_ANNUAL_FEE_WAIVER_FUNCTION = """
+CREATE OR REPLACE FUNCTION check_annual_fee_waiver(
+    p_card_id UUID,
+    p_fee_year INTEGER
+) RETURNS BOOLEAN AS $$
+DECLARE
+    v_rule_id UUID;
+    v_fee_type VARCHAR(20);
+    v_waiver_value DECIMAL(15,2);
+    v_current_progress DECIMAL(15,2) := 0;
+    v_start_date DATE;
+    v_end_date DATE;
+BEGIN
+    -- 获取年费规则
+    SELECT r.id, r.fee_type, r.waiver_condition_value
+    INTO v_rule_id, v_fee_type, v_waiver_value
+    FROM credit_cards c
+    JOIN annual_fee_rules r ON c.annual_fee_rule_id = r.id
+    WHERE c.id = p_card_id;
+    
+    -- 如果是刚性年费，直接返回FALSE
+    IF v_fee_type = 'rigid' THEN
+        RETURN FALSE;
+    END IF;
+    
+    -- 计算考核周期
+    v_start_date := DATE(p_fee_year || '-01-01');
+    v_end_date := DATE(p_fee_year || '-12-31');
+    
+    -- 根据不同类型计算当前进度
+    IF v_fee_type = 'transaction_count' THEN
+        -- 计算刷卡次数
+        SELECT COUNT(*)
+        INTO v_current_progress
+        FROM transactions
+        WHERE card_id = p_card_id
+        AND transaction_date BETWEEN v_start_date AND v_end_date;
+        
+    ELSIF v_fee_type = 'transaction_amount' THEN
+        -- 计算刷卡金额
+        SELECT COALESCE(SUM(amount), 0)
+        INTO v_current_progress
+        FROM transactions
+        WHERE card_id = p_card_id
+        AND transaction_date BETWEEN v_start_date AND v_end_date;
+        
+    ELSIF v_fee_type = 'points_exchange' THEN
+        -- 积分兑换逻辑（这里假设用户主动兑换，需要额外的积分表来跟踪）
+        v_current_progress := v_waiver_value; -- 临时逻辑，实际需要积分系统
+    END IF;
+    
+    -- 更新年费记录的当前进度
+    UPDATE annual_fee_records 
+    SET current_progress = v_current_progress,
+        waiver_condition_met = (v_current_progress >= v_waiver_value)
+    WHERE card_id = p_card_id AND fee_year = p_fee_year;
+    
+    RETURN v_current_progress >= v_waiver_value;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """升级数据库架构"""
+    op.execute(CHECK_ANNUAL_FEE_WAIVER_FUNCTION)
+
+
+def downgrade() -> None:
+    """回滚数据库架构"""
+    op.execute(PREVIOUS_CHECK_ANNUAL_FEE_WAIVER_FUNCTION)
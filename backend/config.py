@@ -47,9 +47,39 @@ class Settings:
     SQL_DEBUG: bool = os.getenv("SQL_DEBUG", "false").lower() == "true"
     
     # 数据库连接池配置
+    # 连接池模式：queue（进程内连接池）或 pgbouncer（NullPool，由事务模式的PgBouncer复用连接）
+    DB_POOL_PROFILE: str = os.getenv("DB_POOL_PROFILE", "queue").lower()
     DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
     DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
     DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    # 检出连接前检查连接是否可用：间隔为0时每次检出都检查，否则只检查空闲超过该秒数的连接
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_PRE_PING_INTERVAL: int = int(os.getenv("DB_POOL_PRE_PING_INTERVAL", "30"))
+    
+    # 异步数据库连接（asyncpg），为空时由DATABASE_URL自动转换
+    DATABASE_ASYNC_URL: str = os.getenv("DATABASE_ASYNC_URL", "")
+    
+    # 每个引擎缓存的已编译SQL条数（SQLAlchemy默认500），查询条件组合较多时应适当调大
+    DB_QUERY_CACHE_SIZE: int = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+    # asyncpg 每个连接缓存的服务端预编译语句数；psycopg2 不支持服务端预编译，同步引擎不受影响
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "256"))
+    
+    # 只读副本，多个用逗号分隔；为空时统计类接口也读主库
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    # 副本连接失败后暂停使用的秒数，到期后重新检查连接
+    DB_REPLICA_EJECT_SECONDS: int = int(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+    # 用户写入后继续从主库读取的秒数，避免副本延迟导致读不到刚写入的数据
+    DB_PRIMARY_PIN_SECONDS: int = int(os.getenv("DB_PRIMARY_PIN_SECONDS", "5"))
+    # 固定标记写入 REDIS_URL 在多进程间共享，关闭后只在写入的进程内生效
+    DB_PRIMARY_PIN_REDIS_ENABLED: bool = os.getenv("DB_PRIMARY_PIN_REDIS_ENABLED", "true").lower() == "true"
+    
+    # 交易表按年分区：启动时预先创建当前年份及之后若干年的分区
+    TRANSACTION_PARTITION_FUTURE_YEARS: int = int(os.getenv("TRANSACTION_PARTITION_FUTURE_YEARS", "2"))
+    
+    # ==================== 并发配置 ====================
+    # async def 接口中同步调用（数据库、CPU密集型计算）使用的线程数上限
+    SYNC_WORKER_THREADS: int = int(os.getenv("SYNC_WORKER_THREADS", "40"))
     
     # ==================== JWT配置 ====================
     JWT_SECRET_KEY: str = os.getenv(
@@ -64,6 +94,9 @@ class Settings:
     # ==================== 密码配置 ====================
     PASSWORD_MIN_LENGTH: int = int(os.getenv("PASSWORD_MIN_LENGTH", "8"))
     PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+    # 密码哈希工作池：并行计算的线程数和最大排队数，超出时返回429
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
     
     # ==================== 验证码配置 ====================
     VERIFICATION_CODE_LENGTH: int = int(os.getenv("VERIFICATION_CODE_LENGTH", "6"))
@@ -94,6 +127,17 @@ class Settings:
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     REDIS_EXPIRE_SECONDS: int = int(os.getenv("REDIS_EXPIRE_SECONDS", "3600"))
     
+    # ==================== 用户缓存配置 ====================
+    # 认证用户资料缓存（进程内TTL/LRU），启用Redis时作为二级缓存在多进程间共享
+    USER_CACHE_ENABLED: bool = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    USER_CACHE_REDIS_ENABLED: bool = os.getenv("USER_CACHE_REDIS_ENABLED", "false").lower() == "true"
+    
+    # ==================== 商户缓存配置 ====================
+    # 商户规范化名称 -> 商户ID 的进程内驻留缓存，商户ID一经分配不再变化，只按LRU淘汰
+    MERCHANT_CACHE_MAX_SIZE: int = int(os.getenv("MERCHANT_CACHE_MAX_SIZE", "50000"))
+    
     # ==================== 文件上传配置 ====================
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
@@ -109,6 +153,34 @@ class Settings:
     LOG_FILE: str = os.getenv("LOG_FILE", "logs/app.log")
     LOG_MAX_SIZE: int = int(os.getenv("LOG_MAX_SIZE", "10485760"))  # 10MB
     LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # 经队列由后台线程写日志，请求处理中不做阻塞的文件写入
+    LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    # 日志队列长度，队列满时丢弃新日志
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # 按日志器名称前缀抽样INFO日志，如 "services=0.1,access=1"，未列出的日志器全部保留
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "")
+    
+    # ==================== 监控配置 ====================
+    # 是否开放 /metrics 接口（Prometheus 文本格式），默认关闭
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    # 抓取 /metrics 使用的 Bearer 令牌；未设置时只允许管理员用户的访问令牌
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    # 每个请求的SQL查询预算：off 不记录，log 超出时记录警告，raise 超出时抛出异常（开发和测试环境）
+    QUERY_BUDGET_MODE: str = os.getenv("QUERY_BUDGET_MODE", "log")
+    QUERY_BUDGET_DEFAULT: int = int(os.getenv("QUERY_BUDGET_DEFAULT", "30"))
+    # 按路由单独设置的预算，如 "GET /api/cards/{card_id}=5,POST /api/transactions/=8"
+    QUERY_BUDGETS: str = os.getenv("QUERY_BUDGETS", "")
+    # 同一形状的语句在一个请求中执行超过该次数时记录疑似N+1查询
+    QUERY_REPEAT_THRESHOLD: int = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+    
+    # 性能分析：管理员请求带 X-Profile: 1 请求头或 __profile=1 参数时采样该请求
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_INTERVAL_MS: float = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+    # 后台低频采样整个进程，定期把热点调用栈写入 PROFILE_DIR
+    PROFILING_BACKGROUND_ENABLED: bool = os.getenv("PROFILING_BACKGROUND_ENABLED", "false").lower() == "true"
+    PROFILING_BACKGROUND_INTERVAL_MS: float = float(os.getenv("PROFILING_BACKGROUND_INTERVAL_MS", "100"))
+    PROFILING_FLUSH_SECONDS: float = float(os.getenv("PROFILING_FLUSH_SECONDS", "60"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "logs/profiles")
     
     # ==================== 业务配置 ====================
     DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
@@ -127,6 +199,11 @@ class Settings:
             return ["*"]
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def database_replica_urls_list(self) -> list:
+        """获取只读副本连接URL列表"""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
     @property
     def allowed_extensions_list(self) -> list:
         """获取允许的文件扩展名列表"""
@@ -172,6 +249,56 @@ def validate_config():
     if not settings.DATABASE_URL:
         errors.append("DATABASE_URL 未配置")
     
+    # 检查并发配置
+    if settings.SYNC_WORKER_THREADS < 1:
+        errors.append("SYNC_WORKER_THREADS 必须大于0")
+    
+    # 检查密码哈希配置
+    if not 4 <= settings.PASSWORD_HASH_ROUNDS <= 31:
+        errors.append("PASSWORD_HASH_ROUNDS 必须在4到31之间")
+    if settings.PASSWORD_HASH_WORKERS < 1 or settings.PASSWORD_HASH_MAX_QUEUE < 0:
+        errors.append("PASSWORD_HASH_WORKERS 必须大于0，PASSWORD_HASH_MAX_QUEUE 不能为负数")
+    
+    # 检查用户缓存配置
+    if settings.USER_CACHE_TTL_SECONDS < 1 or settings.USER_CACHE_MAX_SIZE < 1:
+        errors.append("USER_CACHE_TTL_SECONDS 和 USER_CACHE_MAX_SIZE 必须大于0")
+    
+    # 检查数据库连接池配置
+    if settings.DB_POOL_PROFILE not in ("queue", "pgbouncer"):
+        errors.append("DB_POOL_PROFILE 必须为 queue 或 pgbouncer")
+    if settings.DB_POOL_SIZE < 1 or settings.DB_MAX_OVERFLOW < -1 or settings.DB_POOL_TIMEOUT < 1:
+        errors.append("DB_POOL_SIZE、DB_POOL_TIMEOUT 必须大于0，DB_MAX_OVERFLOW 不能小于-1")
+    if settings.DB_POOL_PRE_PING_INTERVAL < 0:
+        errors.append("DB_POOL_PRE_PING_INTERVAL 不能为负数")
+    if settings.DB_QUERY_CACHE_SIZE < 0 or settings.DB_PREPARED_STATEMENT_CACHE_SIZE < 0:
+        errors.append("DB_QUERY_CACHE_SIZE 和 DB_PREPARED_STATEMENT_CACHE_SIZE 不能为负数")
+    
+    # 检查只读副本配置
+    if settings.DB_REPLICA_EJECT_SECONDS < 1 or settings.DB_PRIMARY_PIN_SECONDS < 0:
+        errors.append("DB_REPLICA_EJECT_SECONDS 必须大于0，DB_PRIMARY_PIN_SECONDS 不能为负数")
+    
+    # 检查交易分区配置
+    if settings.TRANSACTION_PARTITION_FUTURE_YEARS < 0:
+        errors.append("TRANSACTION_PARTITION_FUTURE_YEARS 不能为负数")
+    
+    # 检查商户缓存配置
+    if settings.MERCHANT_CACHE_MAX_SIZE < 1:
+        errors.append("MERCHANT_CACHE_MAX_SIZE 必须大于0")
+    
+    # 检查日志配置
+    if settings.LOG_MAX_SIZE < 0 or settings.LOG_BACKUP_COUNT < 0 or settings.LOG_QUEUE_SIZE < 1:
+        errors.append("LOG_MAX_SIZE 和 LOG_BACKUP_COUNT 不能为负数，LOG_QUEUE_SIZE 必须大于0")
+    
+    # 检查查询预算配置
+    if settings.QUERY_BUDGET_MODE not in ("off", "log", "raise"):
+        errors.append("QUERY_BUDGET_MODE 必须为 off、log 或 raise")
+    if settings.QUERY_BUDGET_DEFAULT < 0 or settings.QUERY_REPEAT_THRESHOLD < 1:
+        errors.append("QUERY_BUDGET_DEFAULT 不能为负数，QUERY_REPEAT_THRESHOLD 必须大于0")
+    
+    # 检查性能分析配置
+    if min(settings.PROFILING_INTERVAL_MS, settings.PROFILING_BACKGROUND_INTERVAL_MS, settings.PROFILING_FLUSH_SECONDS) <= 0:
+        errors.append("PROFILING_INTERVAL_MS、PROFILING_BACKGROUND_INTERVAL_MS 和 PROFILING_FLUSH_SECONDS 必须大于0")
+    
     # 检查JWT密钥
     if settings.JWT_SECRET_KEY == "your-super-secret-jwt-key-change-in-production-2024" and settings.is_production():
         errors.append("生产环境必须设置安全的 JWT_SECRET_KEY")
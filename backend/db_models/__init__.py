@@ -8,9 +8,10 @@
 from .base import Base, BaseModel
 from .cards import CreditCard
 from .annual_fee import AnnualFeeRule, AnnualFeeRecord
+from .merchants import Merchant
 from .reminders import Reminder
 from .recommendations import Recommendation
-from .transactions import Transaction
+from .transactions import Transaction, TransactionMonthlyRollup, TransactionMerchantMonthlyRollup
 from .users import User, VerificationCode, WechatBinding, UserSession, LoginLog
 
 __all__ = [
@@ -19,9 +20,12 @@ __all__ = [
     "CreditCard", 
     "AnnualFeeRule",
     "AnnualFeeRecord",
+    "Merchant",
     "Reminder",
     "Recommendation",
     "Transaction",
+    "TransactionMonthlyRollup",
+    "TransactionMerchantMonthlyRollup",
     "User",
     "VerificationCode", 
     "WechatBinding",
@@ -4,7 +4,7 @@
 定义信用卡相关的SQLAlchemy ORM模型。
 """
 
-from sqlalchemy import Column, String, Numeric, Integer, Date, Boolean, ForeignKey, Index
+from sqlalchemy import Column, String, Numeric, Integer, Date, Boolean, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -139,14 +139,15 @@ class CreditCard(BaseModel):
     reminders = relationship("Reminder", back_populates="card")
     transactions = relationship("Transaction", back_populates="card")
 
-    # 索引定义
+    # 索引定义：列表查询总是 user_id = ? AND is_deleted = false 并按创建时间倒序，
+    # 使用部分索引只收录未删除的卡片（见迁移 c7f4a2e9d136）
     __table_args__ = (
-        Index("idx_credit_cards_user_id", "user_id"),
-        Index("idx_credit_cards_bank_name", "bank_name"),
-        Index("idx_credit_cards_card_type", "card_type"),
-        Index("idx_credit_cards_status", "status"),
+        Index(
+            "idx_credit_cards_user_created",
+            "user_id", text("created_at DESC"),
+            postgresql_where=text("is_deleted = false")
+        ),
         Index("idx_credit_cards_expiry", "expiry_year", "expiry_month"),
-        Index("idx_credit_cards_is_active_deleted", "is_active", "is_deleted"),
     )
 
     def __repr__(self):
@@ -0,0 +1,51 @@
+"""
+商户数据库模型
+
+定义商户维度表，将交易中自由填写的商户名称规范化后映射为整数ID。
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class Merchant(Base):
+    """
+    商户数据库模型
+
+    定义merchants表结构。同一商户的不同写法（大小写、全角半角、多余空白）
+    规范化后对应同一条记录，交易通过 merchant_id 关联，统计按整数ID分组。
+    商户只增不删，因此不继承 BaseModel：使用自增整数主键，没有软删除标记。
+    """
+    __tablename__ = "merchants"
+
+    id = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=True,
+        comment="主键ID"
+    )
+
+    normalized_name = Column(
+        String(200),
+        nullable=False,
+        unique=True,
+        comment="规范化商户名称，见 services.merchant_service.normalize_merchant_name"
+    )
+
+    name = Column(
+        String(200),
+        nullable=False,
+        comment="商户显示名称，取首次出现时的写法"
+    )
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=func.now(),
+        nullable=False,
+        comment="创建时间"
+    )
+
+    def __repr__(self):
+        return f"<Merchant(id={self.id}, name={self.name})>"
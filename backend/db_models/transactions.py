@@ -4,8 +4,8 @@
 定义交易记录相关的SQLAlchemy ORM模型。
 """
 
-from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Text, Enum as SQLEnum, Index, Boolean, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Text, Enum as SQLEnum, Index, Boolean, Integer, UniqueConstraint, DDL, event, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum
@@ -86,6 +86,10 @@ class Transaction(BaseModel):
     交易记录数据库模型
     
     定义transactions表结构，存储信用卡交易记录信息。
+    
+    表按 transaction_date 以年为单位进行范围分区（transactions_yYYYY），未覆盖的年份
+    落入默认分区 transactions_default。分区表的主键必须包含分区键，因此主键为
+    (id, transaction_date)。分区由 TransactionPartitionService 创建和解除挂载。
     """
     __tablename__ = "transactions"
 
@@ -119,9 +123,10 @@ class Transaction(BaseModel):
     
     transaction_date = Column(
         DateTime, 
+        primary_key=True,
         nullable=False,
         default=datetime.now,
-        comment="交易时间"
+        comment="交易时间，同时是分区键"
     )
     
     # 交易描述
@@ -130,6 +135,12 @@ class Transaction(BaseModel):
         comment="商户名称"
     )
     
+    merchant_id = Column(
+        Integer, 
+        ForeignKey("merchants.id"), 
+        comment="商户ID，关联merchants表，由商户名称规范化后解析"
+    )
+    
     description = Column(
         String(500), 
         comment="交易描述"
@@ -187,22 +198,25 @@ class Transaction(BaseModel):
         Text, 
         comment="备注信息"
     )
+    
+    # 搜索分词，由数据库触发器根据商户名称、描述、备注、地点维护
+    search_tokens = Column(
+        ARRAY(Text),
+        comment="搜索分词（单字和相邻双字），用于关键词和商户搜索的GIN索引"
+    )
 
     # 关联关系
     card = relationship("CreditCard", back_populates="transactions")
     user = relationship("User", back_populates="transactions")
 
-    # 索引定义
+    # 索引定义：查询总是以 user_id 或 card_id 为前缀并按交易时间倒序，
+    # 类型、分类、状态等低基数列不单独建索引（见迁移 c7f4a2e9d136）
     __table_args__ = (
-        Index("idx_transactions_card_id", "card_id"),
-        Index("idx_transactions_user_id", "user_id"),
-        Index("idx_transactions_date", "transaction_date"),
-        Index("idx_transactions_type", "transaction_type"),
-        Index("idx_transactions_category", "category"),
-        Index("idx_transactions_status", "status"),
+        Index("idx_transactions_user_date_id", "user_id", text("transaction_date DESC"), text("id DESC")),
         Index("idx_transactions_card_date", "card_id", "transaction_date"),
-        Index("idx_transactions_user_date", "user_id", "transaction_date"),
-        Index("idx_transactions_merchant", "merchant_name"),
+        Index("idx_transactions_merchant", "merchant_id"),
+        Index("idx_transactions_search_tokens", "search_tokens", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (transaction_date)"},
     )
 
     def __repr__(self):
@@ -232,4 +246,232 @@ class Transaction(BaseModel):
         return (
             self.transaction_type == TransactionType.EXPENSE and 
             self.status == TransactionStatus.COMPLETED
-        ) 
\ No newline at end of file
+        )
+
+
+# ==================== 交易搜索分词 ====================
+# 将文本转为小写后按空白切分，每段生成单字和相邻双字（与 pg_bigm 思路一致），
+# 中文无需分词词典即可支持任意子串搜索；查询时要求关键词的全部双字都在分词数组中，
+# 由GIN索引过滤候选行，再用ILIKE精确匹配。迁移 e8b4d1c7a2f5 使用相同的定义。
+TRANSACTION_SEARCH_TOKENS_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION transaction_search_tokens(source TEXT) RETURNS TEXT[] AS $$
+    SELECT COALESCE(array_agg(DISTINCT substr(word, position, size)), '{}')
+    FROM regexp_split_to_table(lower(COALESCE(source, '')), '\s+') AS word,
+         generate_series(1, 2) AS size,
+         generate_series(1, char_length(word)) AS position
+    WHERE word <> '' AND position + size - 1 <= char_length(word)
+$$ LANGUAGE sql IMMUTABLE
+"""
+
+TRANSACTION_SEARCH_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION transactions_search_tokens_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_tokens := transaction_search_tokens(
+        concat_ws(' ', NEW.merchant_name, NEW.description, NEW.notes, NEW.location)
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRANSACTION_SEARCH_TRIGGER = """
+CREATE TRIGGER trg_transactions_search_tokens
+BEFORE INSERT OR UPDATE OF merchant_name, description, notes, location ON transactions
+FOR EACH ROW EXECUTE FUNCTION transactions_search_tokens_update()
+"""
+
+# ==================== 交易表分区 ====================
+# 按年创建分区 transactions_yYYYY，已存在的年份跳过，返回新建的分区名。
+# 默认分区中已有该年份的数据时，先移入新表再挂载，否则挂载会因范围冲突失败。
+# 迁移 d4b8e6f2a913 使用相同的定义。
+TRANSACTION_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_transaction_partitions(start_year INTEGER, end_year INTEGER)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    partition_year INTEGER;
+    partition_name TEXT;
+    range_start TIMESTAMP;
+    range_end TIMESTAMP;
+BEGIN
+    FOR partition_year IN start_year..end_year LOOP
+        partition_name := 'transactions_y' || partition_year;
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        range_start := make_timestamp(partition_year, 1, 1, 0, 0, 0);
+        range_end := make_timestamp(partition_year + 1, 1, 1, 0, 0, 0);
+        EXECUTE 'CREATE TABLE ' || quote_ident(partition_name)
+            || ' (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)';
+        IF to_regclass('transactions_default') IS NOT NULL THEN
+            EXECUTE 'WITH moved AS (DELETE FROM transactions_default'
+                || ' WHERE transaction_date >= $1 AND transaction_date < $2 RETURNING *)'
+                || ' INSERT INTO ' || quote_ident(partition_name) || ' SELECT * FROM moved'
+            USING range_start, range_end;
+        END IF;
+        EXECUTE 'ALTER TABLE transactions ATTACH PARTITION ' || quote_ident(partition_name)
+            || ' FOR VALUES FROM (' || quote_literal(range_start) || ') TO (' || quote_literal(range_end) || ')';
+        RETURN NEXT partition_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRANSACTION_DEFAULT_PARTITION = """
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT
+"""
+
+for _statement in (
+    TRANSACTION_SEARCH_TOKENS_FUNCTION,
+    TRANSACTION_SEARCH_TRIGGER_FUNCTION,
+    TRANSACTION_SEARCH_TRIGGER,
+    TRANSACTION_PARTITION_FUNCTION,
+    TRANSACTION_DEFAULT_PARTITION,
+):
+    event.listen(
+        Transaction.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql")
+    )
+
+
+class TransactionMonthlyRollup(BaseModel):
+    """
+    交易月度汇总数据库模型
+    
+    定义transaction_monthly_rollups表结构，按 (用户, 信用卡, 年, 月, 交易类型, 分类)
+    预聚合交易笔数、金额和积分，供统计接口按月读取，避免扫描全部交易记录。
+    由 TransactionRollupService 在交易增删改的同一事务内增量维护，可通过
+    ``python start.py rebuild-rollups`` 全量重建。未设置分类的交易计入 other。
+    """
+    __tablename__ = "transaction_monthly_rollups"
+
+    user_id = Column(
+        UUID(as_uuid=True), 
+        nullable=False, 
+        comment="用户ID"
+    )
+    
+    card_id = Column(
+        UUID(as_uuid=True), 
+        nullable=False, 
+        comment="信用卡ID"
+    )
+    
+    year = Column(
+        Integer, 
+        nullable=False, 
+        comment="交易年份"
+    )
+    
+    month = Column(
+        Integer, 
+        nullable=False, 
+        comment="交易月份，1-12"
+    )
+    
+    transaction_type = Column(
+        SQLEnum(TransactionType), 
+        nullable=False, 
+        comment="交易类型"
+    )
+    
+    category = Column(
+        SQLEnum(TransactionCategory), 
+        nullable=False, 
+        comment="交易分类"
+    )
+    
+    transaction_count = Column(
+        Integer, 
+        nullable=False, 
+        default=0,
+        comment="交易笔数"
+    )
+    
+    total_amount = Column(
+        Numeric(14, 2), 
+        nullable=False, 
+        default=0,
+        comment="交易金额合计"
+    )
+    
+    points_earned = Column(
+        Numeric(14, 2), 
+        nullable=False, 
+        default=0,
+        comment="获得积分合计"
+    )
+
+    # 索引定义
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "card_id", "year", "month", "transaction_type", "category",
+            name="uq_transaction_monthly_rollups_key"
+        ),
+        Index("idx_transaction_monthly_rollups_user_month", "user_id", "year", "month"),
+    )
+
+    def __repr__(self):
+        return f"<TransactionMonthlyRollup(user_id={self.user_id}, {self.year}-{self.month:02d}, type={self.transaction_type}, count={self.transaction_count})>"
+
+
+class TransactionMerchantMonthlyRollup(BaseModel):
+    """
+    商户月度消费汇总数据库模型
+    
+    定义transaction_merchant_monthly_rollups表结构，按 (用户, 商户, 年, 月) 预聚合
+    消费交易（expense）的笔数和金额，供商户消费排行接口读取，查询开销只与商户数量相关。
+    与 TransactionMonthlyRollup 一样由 TransactionRollupService 在交易增删改的同一事务内
+    增量维护，并随 ``python start.py rebuild-rollups`` 全量重建。未关联商户的交易不计入。
+    """
+    __tablename__ = "transaction_merchant_monthly_rollups"
+
+    user_id = Column(
+        UUID(as_uuid=True), 
+        nullable=False, 
+        comment="用户ID"
+    )
+    
+    merchant_id = Column(
+        Integer, 
+        ForeignKey("merchants.id"), 
+        nullable=False, 
+        comment="商户ID，关联merchants表"
+    )
+    
+    year = Column(
+        Integer, 
+        nullable=False, 
+        comment="交易年份"
+    )
+    
+    month = Column(
+        Integer, 
+        nullable=False, 
+        comment="交易月份，1-12"
+    )
+    
+    transaction_count = Column(
+        Integer, 
+        nullable=False, 
+        default=0,
+        comment="消费笔数"
+    )
+    
+    total_amount = Column(
+        Numeric(14, 2), 
+        nullable=False, 
+        default=0,
+        comment="消费金额合计"
+    )
+
+    # 索引定义
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "merchant_id", "year", "month",
+            name="uq_transaction_merchant_monthly_rollups_key"
+        ),
+        Index("idx_transaction_merchant_monthly_rollups_user_month", "user_id", "year", "month"),
+    )
+
+    def __repr__(self):
+        return f"<TransactionMerchantMonthlyRollup(user_id={self.user_id}, merchant_id={self.merchant_id}, {self.year}-{self.month:02d}, count={self.transaction_count})>"
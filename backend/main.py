@@ -1,16 +1,26 @@
 import logging
+import secrets
+import time
 import pytz
 from datetime import datetime
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from utils.response import ResponseUtil
 from models.response import ApiResponse
 from routers import annual_fee, cards, reminders, recommendations, auth, transactions
-from database import create_database, get_db_health
+from database import create_database, ensure_transaction_partitions, get_db_health, dispose_async_engine
 from config import settings, validate_config, get_environment_info
+from utils.cache import user_profile_cache
+from utils.password_hasher import password_hasher
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics, request_metrics, route_template
+from utils.query_recorder import query_budget
+from utils.profiler import PROFILE_HEADER, RequestProfile, background_profiler, profiling_requested
+from utils.concurrency import get_thread_pool_stats, run_sync
 
 # 配置日志
 from utils.logger import init_logging, LogConfig
@@ -42,6 +52,13 @@ async def lifespan(app: FastAPI):
         create_database()
         logger.info("数据库初始化完成")
         
+        # 预先创建交易表未来年份的分区
+        ensure_transaction_partitions()
+        
+        # 后台低频性能采样
+        if settings.PROFILING_BACKGROUND_ENABLED:
+            background_profiler.start()
+        
         # 打印环境信息
         env_info = get_environment_info()
         logger.info(f"环境信息: {env_info}")
@@ -55,6 +72,8 @@ async def lifespan(app: FastAPI):
     
     # 关闭事件
     logger.info("信用卡管理系统正在关闭...")
+    background_profiler.stop()
+    await dispose_async_engine()
 
 
 app = FastAPI(
@@ -134,51 +153,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def bearer_token(request: Request) -> Optional[str]:
+    """取出请求头中的 Bearer 令牌"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+async def start_request_profile(request: Request) -> Optional[RequestProfile]:
+    """
+    为带有性能分析标记的管理员请求开始采样，非管理员请求返回None
+    """
+    token = bearer_token(request)
+    if token is None:
+        return None
+    if await run_sync(auth.get_admin_user_from_token, token) is None:
+        return None
+    return RequestProfile(request)
+
+
+async def metrics_access_allowed(request: Request) -> bool:
+    """/metrics 只允许携带 METRICS_TOKEN 或管理员访问令牌的请求"""
+    token = bearer_token(request)
+    if token is None:
+        return False
+    if settings.METRICS_TOKEN and secrets.compare_digest(token, settings.METRICS_TOKEN):
+        return True
+    return await run_sync(auth.get_admin_user_from_token, token) is not None
+
+
 # 添加请求日志中间件
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """
     请求日志中间件
     
-    记录所有HTTP请求的详细信息
+    每个请求完成后检查查询预算，记录一行访问日志（方法、路径、状态码、耗时、SQL执行次数、客户端地址），
+    并记录 /metrics 输出的请求指标；开启 PROFILING_ENABLED 时对带标记的管理员请求做性能分析
     """
-    start_time = datetime.now()
-    
-    # 记录请求开始
-    LogConfig.log_request(
-        method=request.method,
-        url=str(request.url),
-        status_code=0,  # 请求开始时还没有状态码
-    )
+    start_time = time.perf_counter()
+    status_code = 500
+    query_stats = request_metrics.begin(request.method)
+    profile = None
     
     try:
+        # 管理员请求的性能分析（未开启时不做任何处理）
+        if settings.PROFILING_ENABLED and profiling_requested(request):
+            profile = await start_request_profile(request)
+        
         # 处理请求
         response = await call_next(request)
+        query_budget.check(request, route_template(request))
+        status_code = response.status_code
         
-        # 计算处理时间
-        duration = (datetime.now() - start_time).total_seconds()
-        
-        # 记录请求完成
-        LogConfig.log_request(
-            method=request.method,
-            url=str(request.url),
-            status_code=response.status_code,
-            duration=duration
-        )
-        
+        if profile is not None:
+            profile_path = await run_sync(profile.finish)
+            profile = None
+            if profile_path is not None:
+                response.headers[PROFILE_HEADER] = profile_path.name
         return response
         
     except Exception as e:
         # 记录请求异常
-        duration = (datetime.now() - start_time).total_seconds()
         LogConfig.log_error(e, f"处理请求时发生异常: {request.method} {request.url}")
+        raise
+        
+    finally:
+        if profile is not None:
+            await run_sync(profile.finish)
+        duration = time.perf_counter() - start_time
+        request_metrics.finish(request.method, route_template(request), status_code, duration, query_stats)
         LogConfig.log_request(
             method=request.method,
-            url=str(request.url),
-            status_code=500,
-            duration=duration
+            path=request.url.path,
+            status_code=status_code,
+            duration=duration,
+            query=request.url.query,
+            client=request.client.host if request.client else None,
+            db_queries=query_stats.count,
+            db_duration=query_stats.seconds
         )
-        raise
 
 # 全局异常处理器
 @app.exception_handler(Exception)
@@ -190,9 +245,10 @@ async def global_exception_handler(request: Request, exc: Exception):
     """
     LogConfig.log_error(exc, f"全局异常处理器: {request.method} {request.url}")
     
-    return ResponseUtil.error(
-        message="服务器内部错误",
-        code=500
+    # 异常处理器需要返回 Response 对象
+    return JSONResponse(
+        status_code=500,
+        content=ResponseUtil.error(message="服务器内部错误", code=500).model_dump(mode="json")
     )
 
 # 挂载路由模块
@@ -245,13 +301,14 @@ async def health_check():
     current_time = datetime.now(TIMEZONE)
     
     try:
-        # 检查数据库连接
-        db_health = get_db_health()
+        # 检查数据库和Redis连接，阻塞调用放到线程池执行
+        db_health = await run_sync(get_db_health)
+        redis_status = await run_sync(user_profile_cache.redis_status)
         
         # 检查各个组件状态
         checks = {
             "database": db_health.get("database", "unknown"),
-            "redis": "not_configured",  # Redis暂未实现
+            "redis": redis_status,
             "config": "ok"
         }
         
@@ -263,6 +320,12 @@ async def health_check():
             "service": "credit-card-management",
             "timestamp": current_time.isoformat(),
             "checks": checks,
+            # 副本不可用时读请求回退到主库，不影响整体健康状态
+            "database_replicas": db_health.get("replicas", []),
+            "database_pools": db_health.get("pools", {}),
+            "sync_thread_pool": get_thread_pool_stats(),
+            "user_cache": user_profile_cache.stats(),
+            "password_hasher": password_hasher.stats(),
             "environment": get_environment_info()
         }
         
@@ -276,6 +339,26 @@ async def health_check():
         logger.error(f"健康检查失败: {str(e)}")
         return ResponseUtil.server_error(message=f"服务健康检查失败: {str(e)}")
 
+if settings.METRICS_ENABLED:
+    @app.get(
+        "/metrics",
+        tags=["系统"],
+        summary="运行指标",
+        response_class=Response,
+        response_description="Prometheus 文本格式的运行指标"
+    )
+    async def metrics(request: Request):
+        """
+        运行指标
+        
+        以 Prometheus 文本格式输出当前进程的请求耗时直方图（含 p50/p95/p99 估算）、正在处理的请求数、
+        SQL执行次数和耗时、连接池检出等待、用户缓存命中率和密码哈希工作池排队深度。
+        需要以 Bearer 方式携带 METRICS_TOKEN 或管理员访问令牌。
+        """
+        if not await metrics_access_allowed(request):
+            return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 # 路由已分模块管理，具体实现请查看 routers/ 目录下的各模块文件
 
 if __name__ == "__main__":
@@ -338,4 +338,14 @@ class AnnualFeeStatistics(BaseModel):
     paid_fees: Decimal = Field(..., description="已支付年费金额")
     pending_fees: Decimal = Field(..., description="待处理年费金额")
     overdue_fees: Decimal = Field(..., description="逾期年费金额")
-    waiver_rate: float = Field(..., description="年费减免率，百分比形式")  # 减免率 
\ No newline at end of file
+    waiver_rate: float = Field(..., description="年费减免率，百分比形式")  # 减免率
+
+
+class AnnualFeePortfolioStatistics(AnnualFeeStatistics):
+    """
+    全平台年度年费统计模型
+    
+    按年费年份汇总所有用户的年费数据，用于运营看板。
+    """
+    fee_year: int = Field(..., description="年费年份")
+    total_users: int = Field(..., description="有年费记录的用户数") 
\ No newline at end of file
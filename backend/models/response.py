@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Any, Generic, Optional, TypeVar
 from pydantic import BaseModel, Field
 
@@ -106,4 +107,92 @@ class ApiPagedResponse(BaseModel, Generic[T]):
         default_factory=datetime.now, 
         description="响应时间戳",
         json_schema_extra={"example": "2024-01-15T10:30:00.000Z"}
-    ) 
\ No newline at end of file
+    )
+
+
+class TotalCountMode(str, Enum):
+    """游标分页的总数计算方式"""
+    NONE = "none"            # 不计算总数
+    EXACT = "exact"          # 精确计数（COUNT）
+    ESTIMATED = "estimated"  # 根据执行计划估算
+
+
+class CursorPaginationInfo(BaseModel):
+    """
+    游标分页信息模型
+    
+    用于无限滚动等场景，通过 next_cursor 获取下一页，总数为可选项。
+    """
+    size: int = Field(
+        ..., 
+        description="每页大小",
+        json_schema_extra={"example": 20}
+    )
+    next_cursor: Optional[str] = Field(
+        None, 
+        description="下一页游标，为null表示没有更多数据",
+        json_schema_extra={"example": "WyIyMDI0LTAxLTE1VDEwOjMwOjAwKzAwOjAwIiwiLi4uIl0"}
+    )
+    has_more: bool = Field(
+        ..., 
+        description="是否还有下一页",
+        json_schema_extra={"example": True}
+    )
+    total: Optional[int] = Field(
+        None, 
+        description="总记录数，未请求时为null",
+        json_schema_extra={"example": 150}
+    )
+    total_is_estimated: bool = Field(
+        False, 
+        description="总记录数是否为估算值",
+        json_schema_extra={"example": False}
+    )
+
+
+class CursorPagedResponse(BaseModel, Generic[T]):
+    """
+    游标分页响应数据模型
+    
+    包含当前页数据列表和游标分页信息。
+    """
+    items: list[T] = Field(
+        ..., 
+        description="当前页的数据列表"
+    )
+    pagination: CursorPaginationInfo = Field(
+        ..., 
+        description="游标分页信息"
+    )
+
+
+class ApiCursorPagedResponse(BaseModel, Generic[T]):
+    """
+    统一游标分页API响应格式
+    
+    用于支持游标翻页的列表接口。
+    """
+    success: bool = Field(
+        ..., 
+        description="请求是否成功",
+        json_schema_extra={"example": True}
+    )
+    code: int = Field(
+        ..., 
+        description="HTTP状态码",
+        json_schema_extra={"example": 200}
+    )
+    message: str = Field(
+        ..., 
+        description="响应消息",
+        json_schema_extra={"example": "获取列表成功"}
+    )
+    data: Optional[CursorPagedResponse[T]] = Field(
+        None, 
+        description="游标分页响应数据，包含items数组和pagination信息"
+    )
+    timestamp: datetime = Field(
+        default_factory=datetime.now, 
+        description="响应时间戳",
+        json_schema_extra={"example": "2024-01-15T10:30:00.000Z"}
+    )
@@ -6,7 +6,8 @@
 
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from enum import Enum
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator, ConfigDict
@@ -191,6 +192,16 @@ class TransactionUpdate(BaseModel):
     )
 
 
+class TransactionImportRequest(BaseModel):
+    """批量导入交易记录请求模型"""
+    transactions: List[Dict[str, Any]] = Field(
+        ..., 
+        description="交易记录列表，每条记录字段同创建交易记录接口；逐条校验，无效记录不影响其他记录导入",
+        min_length=1,
+        max_length=5000
+    )
+
+
 # ==================== 响应模型 ====================
 
 class Transaction(TransactionBase):
@@ -205,6 +216,11 @@ class Transaction(TransactionBase):
         description="用户ID",
         json_schema_extra={"example": "489f8b55-5e75-4f18-982f-fca23b9d3ee4"}
     )
+    merchant_id: Optional[int] = Field(
+        None, 
+        description="商户ID，由商户名称规范化后解析，未填写商户名称时为空",
+        json_schema_extra={"example": 1024}
+    )
     created_at: datetime = Field(
         ..., 
         description="创建时间",
@@ -238,6 +254,43 @@ class TransactionWithCard(Transaction):
     )
 
 
+class TransactionImportError(BaseModel):
+    """批量导入中单条记录的错误信息"""
+    index: int = Field(
+        ..., 
+        description="记录在请求列表中的下标，从0开始",
+        json_schema_extra={"example": 3}
+    )
+    error: str = Field(
+        ..., 
+        description="错误原因",
+        json_schema_extra={"example": "信用卡不存在或不属于该用户"}
+    )
+
+
+class TransactionImportResult(BaseModel):
+    """批量导入交易记录结果模型"""
+    total: int = Field(
+        ..., 
+        description="提交的记录数",
+        json_schema_extra={"example": 1000}
+    )
+    success_count: int = Field(
+        ..., 
+        description="成功导入的记录数",
+        json_schema_extra={"example": 998}
+    )
+    error_count: int = Field(
+        ..., 
+        description="导入失败的记录数",
+        json_schema_extra={"example": 2}
+    )
+    errors: List[TransactionImportError] = Field(
+        default_factory=list, 
+        description="导入失败的记录及原因"
+    )
+
+
 # ==================== 查询参数模型 ====================
 
 class TransactionQueryParams(BaseModel):
@@ -289,6 +342,12 @@ class TransactionQueryParams(BaseModel):
     )
 
 
+class TransactionExportFormat(str, Enum):
+    """交易记录导出格式"""
+    CSV = "csv"        # 逗号分隔值，首行为表头
+    NDJSON = "ndjson"  # 每行一个JSON对象
+
+
 # ==================== 统计模型 ====================
 
 class TransactionStatistics(BaseModel):
@@ -396,6 +455,158 @@ class MonthlyTransactionTrend(BaseModel):
     )
 
 
+class TrendGranularity(str, Enum):
+    """交易趋势统计粒度"""
+    DAY = "day"          # 按天
+    WEEK = "week"        # 按周，周一为一周的开始
+    MONTH = "month"      # 按月
+    QUARTER = "quarter"  # 按季度
+
+
+class TransactionTrendPoint(BaseModel):
+    """交易趋势数据点模型"""
+    period_start: datetime = Field(
+        ..., 
+        description="统计周期的开始时间",
+        json_schema_extra={"example": "2024-06-01T00:00:00"}
+    )
+    transaction_count: int = Field(
+        ..., 
+        description="交易笔数",
+        json_schema_extra={"example": 25}
+    )
+    total_amount: Decimal = Field(
+        ..., 
+        description="总金额",
+        json_schema_extra={"example": 2580.50}
+    )
+    expense_amount: Decimal = Field(
+        ..., 
+        description="支出金额",
+        json_schema_extra={"example": 2380.30}
+    )
+    income_amount: Decimal = Field(
+        ..., 
+        description="收入金额",
+        json_schema_extra={"example": 200.20}
+    )
+
+
+class MerchantSuggestion(BaseModel):
+    """商户名称自动补全建议模型"""
+    merchant_name: str = Field(
+        ..., 
+        description="商户名称",
+        json_schema_extra={"example": "星巴克咖啡"}
+    )
+    transaction_count: int = Field(
+        ..., 
+        description="该商户的交易笔数",
+        json_schema_extra={"example": 12}
+    )
+    last_transaction_date: datetime = Field(
+        ..., 
+        description="最近一次交易时间",
+        json_schema_extra={"example": "2024-06-08T14:30:00"}
+    )
+
+
+class MerchantSpendingStatistics(BaseModel):
+    """商户消费统计模型（含环比）"""
+    merchant_id: int = Field(
+        ..., 
+        description="商户ID",
+        json_schema_extra={"example": 1024}
+    )
+    merchant_name: str = Field(
+        ..., 
+        description="商户名称",
+        json_schema_extra={"example": "星巴克咖啡"}
+    )
+    transaction_count: int = Field(
+        ..., 
+        description="本期消费笔数",
+        json_schema_extra={"example": 12}
+    )
+    total_amount: Decimal = Field(
+        ..., 
+        description="本期消费金额",
+        json_schema_extra={"example": 456.00}
+    )
+    percentage: float = Field(
+        ..., 
+        description="占本期总消费金额的百分比",
+        json_schema_extra={"example": 8.5}
+    )
+    previous_transaction_count: int = Field(
+        ..., 
+        description="上期消费笔数",
+        json_schema_extra={"example": 8}
+    )
+    previous_total_amount: Decimal = Field(
+        ..., 
+        description="上期消费金额",
+        json_schema_extra={"example": 300.00}
+    )
+    count_change: int = Field(
+        ..., 
+        description="消费笔数变化（本期 - 上期）",
+        json_schema_extra={"example": 4}
+    )
+    amount_change: Decimal = Field(
+        ..., 
+        description="消费金额变化（本期 - 上期）",
+        json_schema_extra={"example": 156.00}
+    )
+    amount_change_rate: Optional[float] = Field(
+        None, 
+        description="消费金额环比变化百分比，上期无消费时为空",
+        json_schema_extra={"example": 52.0}
+    )
+
+
+class MerchantRanking(BaseModel):
+    """商户消费排行模型"""
+    period_start: str = Field(
+        ..., 
+        description="本期起始月份，格式YYYY-MM",
+        json_schema_extra={"example": "2024-04"}
+    )
+    period_end: str = Field(
+        ..., 
+        description="本期结束月份，格式YYYY-MM",
+        json_schema_extra={"example": "2024-06"}
+    )
+    previous_period_start: str = Field(
+        ..., 
+        description="上期起始月份，格式YYYY-MM",
+        json_schema_extra={"example": "2024-01"}
+    )
+    previous_period_end: str = Field(
+        ..., 
+        description="上期结束月份，格式YYYY-MM",
+        json_schema_extra={"example": "2024-03"}
+    )
+    total_amount: Decimal = Field(
+        ..., 
+        description="本期消费总金额（仅统计已关联商户的消费）",
+        json_schema_extra={"example": 5360.00}
+    )
+    merchant_count: int = Field(
+        ..., 
+        description="本期有消费的商户数",
+        json_schema_extra={"example": 36}
+    )
+    top_by_amount: List[MerchantSpendingStatistics] = Field(
+        ..., 
+        description="按消费金额排名的商户"
+    )
+    top_by_count: List[MerchantSpendingStatistics] = Field(
+        ..., 
+        description="按消费笔数排名的商户"
+    )
+
+
 # ==================== 工具函数 ====================
 
 def get_transaction_type_display(transaction_type: TransactionType) -> str:
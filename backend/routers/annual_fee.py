@@ -5,7 +5,7 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, get_read_db
 from utils.response import ResponseUtil
 from models.response import ApiResponse, ApiPagedResponse
 from models.annual_fee import (
@@ -15,12 +15,16 @@ from models.annual_fee import (
     AnnualFeeRule,
     AnnualFeeRuleCreate,
     AnnualFeeRuleUpdate,
+    AnnualFeePortfolioStatistics,
     AnnualFeeStatistics,
     AnnualFeeWaiverCheck,
     FeeType,
     WaiverStatus,
 )
+from models.users import UserProfile
+from routers.auth import get_current_admin_user
 from services.annual_fee_service import AnnualFeeService
+from utils.concurrency import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,11 @@ def get_annual_fee_service(db: Session = Depends(get_db)) -> AnnualFeeService:
     return AnnualFeeService(db)
 
 
+def get_annual_fee_read_service(db: Session = Depends(get_read_db)) -> AnnualFeeService:
+    """获取只读年费服务实例，供统计接口从只读副本读取"""
+    return AnnualFeeService(db)
+
+
 # ==================== 年费规则相关接口 ====================
 
 @router.post(
@@ -59,7 +68,7 @@ async def create_annual_fee_rule(
     logger.info(f"创建年费规则请求 - fee_type: {rule_data.fee_type}, base_fee: {rule_data.base_fee}")
     
     try:
-        rule = service.create_annual_fee_rule(rule_data)
+        rule = await run_sync(service.create_annual_fee_rule, rule_data)
         logger.info(f"年费规则创建成功 - rule_id: {rule.id}")
         return ResponseUtil.created(data=rule, message="年费规则创建成功")
     except Exception as e:
@@ -92,7 +101,8 @@ async def get_annual_fee_rules(
     - fee_type: 年费类型过滤，可选值：rigid、transaction_count、transaction_amount、points_exchange
     """
     skip = ResponseUtil.calculate_skip(page, page_size)
-    rules, total = service.get_annual_fee_rules(
+    rules, total = await run_sync(
+        service.get_annual_fee_rules,
         skip=skip, 
         limit=page_size, 
         fee_type=fee_type,
@@ -126,7 +136,7 @@ async def get_annual_fee_rule(
     参数:
     - rule_id: 年费规则的UUID
     """
-    rule = service.get_annual_fee_rule(rule_id)
+    rule = await run_sync(service.get_annual_fee_rule, rule_id)
     if not rule:
         return ResponseUtil.not_found(message="年费规则不存在")
     return ResponseUtil.success(data=rule, message="获取年费规则详情成功")
@@ -139,7 +149,7 @@ async def update_annual_fee_rule(
     service: AnnualFeeService = Depends(get_annual_fee_service)
 ):
     """更新年费规则"""
-    rule = service.update_annual_fee_rule(rule_id, rule_data)
+    rule = await run_sync(service.update_annual_fee_rule, rule_id, rule_data)
     if not rule:
         return ResponseUtil.not_found(message="年费规则不存在")
     return ResponseUtil.success(data=rule, message="年费规则更新成功")
@@ -151,7 +161,7 @@ async def delete_annual_fee_rule(
     service: AnnualFeeService = Depends(get_annual_fee_service)
 ):
     """删除年费规则"""
-    success = service.delete_annual_fee_rule(rule_id)
+    success = await run_sync(service.delete_annual_fee_rule, rule_id)
     if not success:
         return ResponseUtil.not_found(message="年费规则不存在")
     return ResponseUtil.deleted(message="年费规则删除成功")
@@ -166,7 +176,7 @@ async def create_annual_fee_record(
 ):
     """创建年费记录"""
     try:
-        record = service.create_annual_fee_record(record_data)
+        record = await run_sync(service.create_annual_fee_record, record_data)
         return ResponseUtil.created(data=record, message="年费记录创建成功")
     except Exception as e:
         return ResponseUtil.error(message=f"创建年费记录失败: {str(e)}")
@@ -180,7 +190,7 @@ async def create_annual_fee_record_auto(
 ):
     """使用数据库函数自动创建年费记录"""
     try:
-        record_id = service.create_annual_fee_record_auto(card_id, fee_year)
+        record_id = await run_sync(service.create_annual_fee_record_auto, card_id, fee_year)
         return ResponseUtil.created(
             data={"record_id": record_id}, 
             message="年费记录自动创建成功"
@@ -219,7 +229,8 @@ async def get_annual_fee_records(
     - waiver_status: 减免状态，可选值：pending、waived、paid、overdue
     """
     skip = ResponseUtil.calculate_skip(page, page_size)
-    records, total = service.get_annual_fee_records(
+    records, total = await run_sync(
+        service.get_annual_fee_records,
         card_id=card_id,
         fee_year=fee_year,
         waiver_status=waiver_status,
@@ -242,7 +253,7 @@ async def get_annual_fee_record(
     service: AnnualFeeService = Depends(get_annual_fee_service)
 ):
     """根据ID获取年费记录详情"""
-    record = service.get_annual_fee_record(record_id)
+    record = await run_sync(service.get_annual_fee_record, record_id)
     if not record:
         return ResponseUtil.not_found(message="年费记录不存在")
     return ResponseUtil.success(data=record, message="获取年费记录详情成功")
@@ -255,7 +266,7 @@ async def update_annual_fee_record(
     service: AnnualFeeService = Depends(get_annual_fee_service)
 ):
     """更新年费记录"""
-    record = service.update_annual_fee_record(record_id, record_data)
+    record = await run_sync(service.update_annual_fee_record, record_id, record_data)
     if not record:
         return ResponseUtil.not_found(message="年费记录不存在")
     return ResponseUtil.success(data=record, message="年费记录更新成功")
@@ -263,6 +274,21 @@ async def update_annual_fee_record(
 
 # ==================== 年费减免检查接口 ====================
 
+# 用户级路由需放在 /waiver-check/{card_id}/{fee_year} 之前，否则 "user" 会被当作卡片ID解析
+@router.get("/waiver-check/user/{user_id}", response_model=ApiResponse[List[AnnualFeeWaiverCheck]], summary="检查用户所有卡的年费减免条件")
+async def check_all_annual_fee_waivers(
+    user_id: UUID,
+    year: Optional[int] = Query(None, description="年份，默认为当前年份"),
+    service: AnnualFeeService = Depends(get_annual_fee_service)
+):
+    """检查用户所有信用卡的年费减免条件"""
+    try:
+        results = await run_sync(service.check_all_annual_fee_waivers, user_id, year)
+        return ResponseUtil.success(data=results, message="用户所有卡片年费减免条件检查完成")
+    except Exception as e:
+        return ResponseUtil.server_error(message=f"检查用户年费减免条件失败: {str(e)}")
+
+
 @router.get("/waiver-check/{card_id}/{fee_year}", response_model=ApiResponse[AnnualFeeWaiverCheck], summary="检查年费减免条件")
 async def check_annual_fee_waiver(
     card_id: UUID,
@@ -271,7 +297,7 @@ async def check_annual_fee_waiver(
 ):
     """检查指定信用卡的年费减免条件"""
     try:
-        result = service.check_annual_fee_waiver(card_id, fee_year)
+        result = await run_sync(service.check_annual_fee_waiver, card_id, fee_year)
         return ResponseUtil.success(data=result, message="年费减免条件检查完成")
     except ValueError as e:
         return ResponseUtil.not_found(message=str(e))
@@ -279,31 +305,35 @@ async def check_annual_fee_waiver(
         return ResponseUtil.server_error(message=f"检查年费减免条件失败: {str(e)}")
 
 
-@router.get("/waiver-check/user/{user_id}", response_model=ApiResponse[List[AnnualFeeWaiverCheck]], summary="检查用户所有卡的年费减免条件")
-async def check_all_annual_fee_waivers(
-    user_id: UUID,
-    year: Optional[int] = Query(None, description="年份，默认为当前年份"),
-    service: AnnualFeeService = Depends(get_annual_fee_service)
+# ==================== 年费统计接口 ====================
+
+@router.get(
+    "/statistics/portfolio",
+    response_model=ApiResponse[List[AnnualFeePortfolioStatistics]],
+    summary="获取全平台年度年费统计（管理员）"
+)
+async def get_portfolio_annual_fee_statistics(
+    year: Optional[int] = Query(None, description="年份，默认返回所有年份"),
+    admin_user: UserProfile = Depends(get_current_admin_user),
+    service: AnnualFeeService = Depends(get_annual_fee_read_service)
 ):
-    """检查用户所有信用卡的年费减免条件"""
+    """按年份汇总所有用户的年费统计信息，供运营看板使用"""
     try:
-        results = service.check_all_annual_fee_waivers(user_id, year)
-        return ResponseUtil.success(data=results, message="用户所有卡片年费减免条件检查完成")
+        statistics = await run_sync(service.get_portfolio_annual_fee_statistics, year)
+        return ResponseUtil.success(data=statistics, message="获取全平台年费统计成功")
     except Exception as e:
-        return ResponseUtil.server_error(message=f"检查用户年费减免条件失败: {str(e)}")
-
+        return ResponseUtil.server_error(message=f"获取全平台年费统计失败: {str(e)}")
 
-# ==================== 年费统计接口 ====================
 
 @router.get("/statistics/{user_id}", response_model=ApiResponse[AnnualFeeStatistics], summary="获取年费统计信息")
 async def get_annual_fee_statistics(
     user_id: UUID,
     year: Optional[int] = Query(None, description="年份，默认为当前年份"),
-    service: AnnualFeeService = Depends(get_annual_fee_service)
+    service: AnnualFeeService = Depends(get_annual_fee_read_service)
 ):
     """获取用户的年费统计信息"""
     try:
-        statistics = service.get_annual_fee_statistics(user_id, year)
+        statistics = await run_sync(service.get_annual_fee_statistics, user_id, year)
         return ResponseUtil.success(data=statistics, message="获取年费统计信息成功")
     except Exception as e:
         return ResponseUtil.server_error(message=f"获取年费统计信息失败: {str(e)}")
@@ -324,7 +354,7 @@ async def batch_create_annual_fee_records(
         
         for card_id in card_ids:
             try:
-                record_id = service.create_annual_fee_record_auto(card_id, fee_year)
+                record_id = await run_sync(service.create_annual_fee_record_auto, card_id, fee_year)
                 results.append({"card_id": card_id, "record_id": record_id})
             except Exception as e:
                 errors.append({"card_id": card_id, "error": str(e)})
@@ -356,21 +386,14 @@ async def batch_check_annual_fee_waivers(
 ):
     """批量检查多张信用卡的年费减免条件"""
     try:
-        results = []
-        error_count = 0
-        
-        for card_id in card_ids:
-            try:
-                waiver_check = service.check_annual_fee_waiver(card_id, fee_year)
-                results.append(waiver_check)
-            except Exception:
-                # 跳过有错误的卡片
-                error_count += 1
-                continue
+        results, missing_card_ids = await run_sync(
+            service.evaluate_annual_fee_waivers, fee_year, card_ids=card_ids
+        )
         
         message = f"批量检查完成：成功{len(results)}个"
-        if error_count > 0:
-            message += f"，跳过{error_count}个异常卡片"
+        if missing_card_ids:
+            skipped = "、".join(str(card_id) for card_id in missing_card_ids)
+            message += f"，跳过{len(missing_card_ids)}个无年费规则或年费记录的卡片: {skipped}"
             
         return ResponseUtil.success(data=results, message=message)
     except Exception as e:
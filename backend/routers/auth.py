@@ -6,7 +6,7 @@
 
 import logging
 from datetime import timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -31,6 +31,9 @@ from models.users import (
 from models.response import ApiResponse
 from services.auth_service import AuthService
 from utils.auth import AuthUtils, IPUtils
+from utils.cache import user_profile_cache
+from utils.concurrency import run_sync
+from utils.password_hasher import PasswordHasherBusyError
 from utils.response import ResponseUtil
 
 logger = logging.getLogger(__name__)
@@ -42,7 +45,7 @@ router = APIRouter(prefix="/auth", tags=["用户认证"])
 security = HTTPBearer()
 
 # 导入数据库依赖
-from database import get_db
+from database import SessionLocal, get_db, set_session_user
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -71,6 +74,14 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # 记录请求用户，本请求提交写入后该用户的只读请求短时间内读主库
+    set_session_user(db, user_id)
+    
+    # 优先从缓存读取用户资料，资料变更时由服务层失效
+    user = user_profile_cache.get(user_id)
+    if user:
+        return user
+    
     auth_service = AuthService(db)
     user = auth_service.get_user_profile(user_id)
     
@@ -81,9 +92,59 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user_profile_cache.set(user)
     return user
 
 
+def get_current_admin_user(
+    current_user: UserProfile = Depends(get_current_user)
+) -> UserProfile:
+    """
+    获取当前登录的管理员用户
+    
+    用于仅限管理员访问的运维接口，非管理员返回403。
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="需要管理员权限",
+        )
+    
+    return current_user
+
+
+def get_admin_user_from_token(token: str) -> Optional[UserProfile]:
+    """
+    按访问令牌获取管理员用户
+    
+    用于中间件等无法使用依赖注入的场景（如请求性能分析），
+    令牌无效、用户不存在或不是管理员时返回None。
+    """
+    payload = AuthUtils.verify_access_token(token)
+    user_id = payload.get("sub") if payload else None
+    if not user_id:
+        return None
+    
+    user = user_profile_cache.get(user_id)
+    if user is None:
+        with SessionLocal() as db:
+            user = AuthService(db).get_user_profile(user_id)
+        if user is None:
+            return None
+        user_profile_cache.set(user)
+    return user if user.is_admin else None
+
+
+def password_hasher_busy_exception(e: PasswordHasherBusyError) -> HTTPException:
+    """密码哈希工作池已满时返回429，提示客户端稍后重试"""
+    logger.warning(f"密码哈希工作池繁忙 - {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
+
 # ==================== 用户注册相关 ====================
 
 @router.post(
@@ -111,7 +172,9 @@ async def register(
         auth_service = AuthService(db)
         ip_address = IPUtils.get_client_ip(request)
         
-        user_profile = auth_service.register_user(register_data, ip_address)
+        await run_sync(auth_service.validate_registration, register_data)
+        password_hash = await AuthUtils.hash_password_async(register_data.password)
+        user_profile = await run_sync(auth_service.create_registered_user, register_data, password_hash)
         
         logger.info(f"用户注册成功 - username: {register_data.username}")
         return ResponseUtil.success(
@@ -119,6 +182,8 @@ async def register(
             message="注册成功"
         )
         
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"用户注册失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -154,7 +219,9 @@ async def login_with_username_password(
         auth_service = AuthService(db)
         ip_address = IPUtils.get_client_ip(request)
         
-        login_response = auth_service.login_with_username_password(login_data, ip_address)
+        user = await run_sync(auth_service.get_user_for_username_login, login_data.username)
+        password_check = await AuthUtils.verify_and_update_password_async(login_data.password, user.password_hash)
+        login_response = await run_sync(auth_service.complete_password_login, user, password_check, ip_address)
         
         logger.info(f"用户名密码登录成功 - username: {login_data.username}")
         return ResponseUtil.success(
@@ -162,6 +229,8 @@ async def login_with_username_password(
             message="登录成功"
         )
         
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"用户名密码登录失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -193,7 +262,9 @@ async def login_with_phone_password(
         auth_service = AuthService(db)
         ip_address = IPUtils.get_client_ip(request)
         
-        login_response = auth_service.login_with_phone_password(login_data, ip_address)
+        user = await run_sync(auth_service.get_user_for_phone_login, login_data.phone)
+        password_check = await AuthUtils.verify_and_update_password_async(login_data.password, user.password_hash)
+        login_response = await run_sync(auth_service.complete_password_login, user, password_check, ip_address)
         
         logger.info(f"手机号密码登录成功 - phone: {login_data.phone}")
         return ResponseUtil.success(
@@ -201,6 +272,8 @@ async def login_with_phone_password(
             message="登录成功"
         )
         
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"手机号密码登录失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -233,7 +306,7 @@ async def login_with_phone_code(
         auth_service = AuthService(db)
         ip_address = IPUtils.get_client_ip(request)
         
-        login_response = auth_service.login_with_phone_code(login_data, ip_address)
+        login_response = await run_sync(auth_service.login_with_phone_code, login_data, ip_address)
         
         logger.info(f"手机号验证码登录成功 - phone: {login_data.phone}")
         return ResponseUtil.success(
@@ -241,6 +314,8 @@ async def login_with_phone_code(
             message="登录成功"
         )
         
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"手机号验证码登录失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -273,7 +348,7 @@ async def login_with_wechat(
         auth_service = AuthService(db)
         ip_address = IPUtils.get_client_ip(request)
         
-        login_response = auth_service.login_with_wechat(login_data, ip_address)
+        login_response = await run_sync(auth_service.login_with_wechat, login_data, ip_address)
         
         logger.info(f"微信登录成功 - code: {login_data.code}")
         return ResponseUtil.success(
@@ -281,6 +356,8 @@ async def login_with_wechat(
             message="登录成功"
         )
         
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"微信登录失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -315,7 +392,7 @@ async def send_verification_code(
         auth_service = AuthService(db)
         ip_address = IPUtils.get_client_ip(request)
         
-        success = auth_service.send_verification_code(send_data, ip_address)
+        success = await run_sync(auth_service.send_verification_code, send_data, ip_address)
         
         if success:
             logger.info(f"验证码发送成功 - {send_data.phone_or_email}")
@@ -357,7 +434,8 @@ async def verify_verification_code(
     try:
         auth_service = AuthService(db)
         
-        is_valid = auth_service.verify_code(
+        is_valid = await run_sync(
+            auth_service.verify_code,
             verify_data.phone_or_email,
             verify_data.code,
             verify_data.code_type
@@ -428,7 +506,7 @@ async def update_user_profile(
     try:
         auth_service = AuthService(db)
         
-        updated_user = auth_service.update_user_profile(current_user.id, update_data)
+        updated_user = await run_sync(auth_service.update_user_profile, current_user.id, update_data)
         
         if updated_user:
             logger.info(f"用户资料更新成功 - user_id: {current_user.id}")
@@ -467,7 +545,13 @@ async def change_password(
     try:
         auth_service = AuthService(db)
         
-        success = auth_service.change_password(current_user.id, change_data)
+        password_hash = await run_sync(auth_service.get_password_hash, current_user.id)
+        success = False
+        if password_hash is not None:
+            if not await AuthUtils.verify_password_async(change_data.old_password, password_hash):
+                raise ValueError("当前密码错误")
+            new_password_hash = await AuthUtils.hash_password_async(change_data.new_password)
+            success = await run_sync(auth_service.update_password_hash, current_user.id, new_password_hash)
         
         if success:
             logger.info(f"密码修改成功 - user_id: {current_user.id}")
@@ -478,6 +562,8 @@ async def change_password(
         else:
             return ResponseUtil.error(message="用户不存在")
             
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"密码修改失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -509,7 +595,9 @@ async def reset_password(
     try:
         auth_service = AuthService(db)
         
-        success = auth_service.reset_password(reset_data)
+        user_id = await run_sync(auth_service.verify_password_reset, reset_data)
+        password_hash = await AuthUtils.hash_password_async(reset_data.new_password)
+        success = await run_sync(auth_service.update_password_hash, user_id, password_hash)
         
         if success:
             logger.info(f"密码重置成功 - {reset_data.phone_or_email}")
@@ -520,6 +608,8 @@ async def reset_password(
         else:
             return ResponseUtil.error(message="重置失败")
             
+    except PasswordHasherBusyError as e:
+        raise password_hasher_busy_exception(e)
     except ValueError as e:
         logger.warning(f"密码重置失败 - {str(e)}")
         return ResponseUtil.error(message=str(e))
@@ -568,7 +658,7 @@ async def refresh_access_token(
         
         # 获取用户信息
         auth_service = AuthService(db)
-        user = auth_service.get_user_profile(user_id)
+        user = await run_sync(auth_service.get_user_profile, user_id)
         
         if not user:
             return ResponseUtil.error(message="用户不存在")
@@ -613,6 +703,9 @@ async def logout(
         # TODO: 实现令牌黑名单机制（可选）
         # 如果需要立即失效令牌，可以将令牌加入黑名单
         
+        # 清除用户资料缓存
+        user_profile_cache.invalidate(current_user.id)
+        
         logger.info(f"用户登出 - user_id: {current_user.id}")
         return ResponseUtil.success(
             data={"status": "logged_out"},
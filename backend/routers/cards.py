@@ -3,6 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.response import ApiResponse, ApiPagedResponse
 from models.cards import (
@@ -10,11 +11,12 @@ from models.cards import (
     CardWithAnnualFeeCreate, CardWithAnnualFeeUpdate, CardWithAnnualFee,
     CardSummary, CardSummaryWithAnnualFee
 )
-from services.cards_service import CardsService
+from services.cards_service import AsyncCardsService, CardsService
 from utils.response import ResponseUtil
 from routers.auth import get_current_user
 from models.users import UserProfile
-from database import get_db
+from database import get_async_db, get_db
+from utils.concurrency import run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +28,11 @@ def get_cards_service(db: Session = Depends(get_db)) -> CardsService:
     return CardsService(db)
 
 
+def get_async_cards_service(db: AsyncSession = Depends(get_async_db)) -> AsyncCardsService:
+    """获取异步信用卡服务实例（用于只读接口，不占用线程池）"""
+    return AsyncCardsService(db)
+
+
 @router.get(
     "/", 
     response_model=ApiPagedResponse[CardSummaryWithAnnualFee],
@@ -37,7 +44,7 @@ async def get_cards(
     page_size: int = Query(20, ge=1, le=100, description="每页数量，最大100"),
     keyword: str = Query("", description="模糊搜索关键词，支持银行名称、卡片名称搜索"),
     current_user: UserProfile = Depends(get_current_user),
-    service: CardsService = Depends(get_cards_service)
+    service: AsyncCardsService = Depends(get_async_cards_service)
 ):
     """
     获取信用卡列表（集成年费信息）
@@ -56,7 +63,7 @@ async def get_cards(
         skip = (page - 1) * page_size
         
         # 调用服务层获取数据（集成年费信息）
-        cards, total = service.get_cards_with_annual_fee(
+        cards, total = await service.get_cards_with_annual_fee(
             user_id=current_user.id,
             skip=skip,
             limit=page_size,
@@ -102,7 +109,8 @@ async def get_cards_basic(
         skip = (page - 1) * page_size
         
         # 调用服务层获取数据
-        cards, total = service.get_cards(
+        cards, total = await run_sync(
+            service.get_cards,
             user_id=current_user.id,
             skip=skip,
             limit=page_size,
@@ -142,7 +150,7 @@ async def create_card_basic(
     
     try:
         # 调用服务层创建信用卡
-        card = service.create_card(card_data, current_user.id)
+        card = await run_sync(service.create_card, card_data, current_user.id)
         logger.info("信用卡（基础版）创建成功")
         return ResponseUtil.created(data=card, message="创建信用卡成功")
     except ValueError as e:
@@ -179,7 +187,7 @@ async def create_card(
     
     try:
         # 调用服务层创建信用卡（集成年费）
-        card = service.create_card_with_annual_fee(card_data, current_user.id)
+        card = await run_sync(service.create_card_with_annual_fee, card_data, current_user.id)
         logger.info("信用卡创建成功")
         return ResponseUtil.created(data=card, message="创建信用卡成功")
     except ValueError as e:
@@ -199,7 +207,7 @@ async def create_card(
 async def get_card(
     card_id: UUID,
     current_user: UserProfile = Depends(get_current_user),
-    service: CardsService = Depends(get_cards_service)
+    service: AsyncCardsService = Depends(get_async_cards_service)
 ):
     """
     根据ID获取信用卡详情（集成年费信息）
@@ -210,7 +218,7 @@ async def get_card(
     
     try:
         # 调用服务层获取信用卡详情（集成年费）
-        card = service.get_card_with_annual_fee(card_id, current_user.id)
+        card = await service.get_card_with_annual_fee(card_id, current_user.id)
         if not card:
             logger.warning(f"信用卡不存在: {card_id}")
             return ResponseUtil.not_found(message="信用卡不存在")
@@ -249,7 +257,7 @@ async def update_card(
     
     try:
         # 调用服务层更新信用卡（集成年费）
-        card = service.update_card_with_annual_fee(card_id, current_user.id, card_data)
+        card = await run_sync(service.update_card_with_annual_fee, card_id, current_user.id, card_data)
         if not card:
             logger.warning(f"信用卡不存在: {card_id}")
             return ResponseUtil.not_found(message="信用卡不存在")
@@ -281,7 +289,7 @@ async def delete_card(
     
     try:
         # 调用服务层删除信用卡
-        success = service.delete_card(card_id, current_user.id)
+        success = await run_sync(service.delete_card, card_id, current_user.id)
         if not success:
             logger.warning(f"信用卡不存在: {card_id}")
             return ResponseUtil.not_found(message="信用卡不存在")
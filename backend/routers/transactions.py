@@ -11,17 +11,25 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from database import get_db
-from models.response import ApiResponse, ApiPagedResponse
+from database import get_db, get_read_db
+from models.response import ApiResponse, ApiPagedResponse, ApiCursorPagedResponse, TotalCountMode
 from models.transactions import (
     Transaction,
     TransactionCreate,
     TransactionUpdate,
+    TransactionImportRequest,
+    TransactionImportResult,
+    TransactionExportFormat,
     TransactionStatistics,
     TransactionCategoryStatistics,
     MonthlyTransactionTrend,
+    TransactionTrendPoint,
+    TrendGranularity,
+    MerchantSuggestion,
+    MerchantRanking,
 )
 from db_models.transactions import TransactionType, TransactionCategory, TransactionStatus
 from services.transactions_service import TransactionsService
@@ -83,6 +91,42 @@ def create_transaction(
         raise HTTPException(status_code=500, detail="创建交易记录失败")
 
 
+@router.post(
+    "/import",
+    response_model=ApiResponse[TransactionImportResult],
+    tags=["交易记录"],
+    summary="批量导入交易记录",
+    response_description="返回导入结果及失败记录"
+)
+def import_transactions(
+    import_data: TransactionImportRequest,
+    db: Session = Depends(get_db),
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    批量导入交易记录
+    
+    用于导入银行月度账单等大批量交易，单次最多5000条：
+    - 每条记录字段与创建交易记录接口相同
+    - 逐条校验，无效记录或不属于当前用户的信用卡记录会在errors中返回下标和原因
+    - 有效记录在同一事务中批量写入
+    - 自动计算积分（如果未提供），并按卡更新年费减免进度
+    """
+    try:
+        service = TransactionsService(db)
+        user_id = current_user.id
+        
+        result = service.import_transactions(user_id, import_data.transactions)
+        
+        return ResponseUtil.success(
+            data=result,
+            message=f"批量导入完成，成功{result.success_count}条，失败{result.error_count}条"
+        )
+    except Exception as e:
+        logger.error(f"批量导入交易记录失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="批量导入交易记录失败")
+
+
 @router.get(
     "/",
     response_model=ApiPagedResponse[Transaction],
@@ -119,7 +163,7 @@ def get_transactions(
     - min_amount/max_amount: 按金额范围筛选
     - keyword: 关键词模糊搜索，搜索范围包括商户名称、交易描述、备注、地点
     
-    返回结果按交易时间倒序排列。
+    返回结果按交易时间倒序排列。查询结果的行直接序列化为JSON，不经过响应模型校验。
     """
     try:
         service = TransactionsService(db)
@@ -140,11 +184,13 @@ def get_transactions(
             max_amount=max_amount,
             keyword=keyword,
             skip=skip,
-            limit=page_size
+            limit=page_size,
+            as_rows=True
         )
         
-        return ResponseUtil.paginated(
-            items=transactions,
+        return ResponseUtil.fast_paginated(
+            model=Transaction,
+            rows=transactions,
             total=total,
             page=page,
             page_size=page_size,
@@ -155,6 +201,183 @@ def get_transactions(
         raise HTTPException(status_code=500, detail="获取交易记录列表失败")
 
 
+@router.get(
+    "/cursor",
+    response_model=ApiCursorPagedResponse[Transaction],
+    tags=["交易记录"],
+    summary="游标分页获取交易记录列表",
+    response_description="返回游标分页的交易记录列表"
+)
+def get_transactions_by_cursor(
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor，为空时获取第一页"),
+    page_size: int = Query(20, ge=1, le=100, description="每页数量，最大100"),
+    total_mode: TotalCountMode = Query(TotalCountMode.NONE, description="总数计算方式：none不计算/exact精确计数/estimated估算"),
+    card_id: Optional[UUID] = Query(None, description="信用卡ID过滤"),
+    transaction_type: Optional[TransactionType] = Query(None, description="交易类型过滤"),
+    category: Optional[TransactionCategory] = Query(None, description="交易分类过滤"),
+    status: Optional[TransactionStatus] = Query(None, description="交易状态过滤"),
+    start_date: Optional[datetime] = Query(None, description="开始时间"),
+    end_date: Optional[datetime] = Query(None, description="结束时间"),
+    merchant_name: Optional[str] = Query(None, description="商户名称模糊搜索"),
+    min_amount: Optional[Decimal] = Query(None, ge=0, description="最小金额"),
+    max_amount: Optional[Decimal] = Query(None, ge=0, description="最大金额"),
+    keyword: str = Query("", description="关键词模糊搜索，支持商户名称、交易描述、备注"),
+    db: Session = Depends(get_db),
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    游标分页获取交易记录列表
+    
+    适用于移动端无限滚动场景：
+    - 按交易时间倒序排列，翻页耗时与页码无关
+    - 使用响应中的 next_cursor 请求下一页，为null表示没有更多数据
+    - 默认不计算总数，可通过 total_mode 返回精确总数或估算总数
+    
+    筛选条件与 GET /api/transactions 相同。
+    """
+    try:
+        service = TransactionsService(db)
+        user_id = current_user.id
+        
+        transactions, next_cursor, total = service.get_transactions_by_cursor(
+            user_id=user_id,
+            card_id=card_id,
+            transaction_type=transaction_type,
+            category=category,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            merchant_name=merchant_name,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            keyword=keyword,
+            cursor=cursor,
+            limit=page_size,
+            total_mode=total_mode,
+            as_rows=True
+        )
+        
+        return ResponseUtil.fast_cursor_paginated(
+            model=Transaction,
+            rows=transactions,
+            next_cursor=next_cursor,
+            page_size=page_size,
+            total=total,
+            total_is_estimated=total_mode == TotalCountMode.ESTIMATED,
+            message="获取交易记录列表成功"
+        )
+    except ValueError as e:
+        logger.warning(f"游标分页参数错误: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取交易记录列表失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="获取交易记录列表失败")
+
+
+@router.get(
+    "/export",
+    tags=["交易记录"],
+    summary="导出交易记录",
+    response_description="流式返回CSV或NDJSON格式的交易记录",
+    response_class=StreamingResponse
+)
+def export_transactions(
+    export_format: TransactionExportFormat = Query(TransactionExportFormat.CSV, alias="format", description="导出格式：csv/ndjson"),
+    card_id: Optional[UUID] = Query(None, description="信用卡ID过滤"),
+    transaction_type: Optional[TransactionType] = Query(None, description="交易类型过滤"),
+    category: Optional[TransactionCategory] = Query(None, description="交易分类过滤"),
+    status: Optional[TransactionStatus] = Query(None, description="交易状态过滤"),
+    start_date: Optional[datetime] = Query(None, description="开始时间"),
+    end_date: Optional[datetime] = Query(None, description="结束时间"),
+    merchant_name: Optional[str] = Query(None, description="商户名称模糊搜索"),
+    min_amount: Optional[Decimal] = Query(None, ge=0, description="最小金额"),
+    max_amount: Optional[Decimal] = Query(None, ge=0, description="最大金额"),
+    keyword: str = Query("", description="关键词模糊搜索，支持商户名称、交易描述、备注"),
+    db: Session = Depends(get_db),
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    导出交易记录
+    
+    一次性导出符合筛选条件的全部交易记录（如全年账单），无需分页：
+    - csv: 首行为表头，适合Excel等表格工具打开
+    - ndjson: 每行一个JSON对象，适合程序处理
+    
+    数据边查询边输出，导出大量记录时内存占用保持稳定。
+    筛选条件与 GET /api/transactions 相同，按交易时间倒序排列。
+    """
+    try:
+        service = TransactionsService(db)
+        
+        # 查询在这里执行，失败时还未开始发送导出内容，可以返回错误响应
+        content = service.export_transactions(
+            user_id=current_user.id,
+            export_format=export_format,
+            card_id=card_id,
+            transaction_type=transaction_type,
+            category=category,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            merchant_name=merchant_name,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            keyword=keyword
+        )
+    except Exception as e:
+        logger.error(f"导出交易记录失败: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content=ResponseUtil.server_error(message="导出交易记录失败").model_dump(mode="json")
+        )
+    
+    if export_format == TransactionExportFormat.CSV:
+        media_type = "text/csv; charset=utf-8"
+    else:
+        media_type = "application/x-ndjson; charset=utf-8"
+    filename = f"transactions_{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format.value}"
+    
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get(
+    "/merchants/suggest",
+    response_model=ApiResponse[List[MerchantSuggestion]],
+    tags=["交易记录"],
+    summary="商户名称自动补全",
+    response_description="返回按匹配程度和使用频率排序的商户名称"
+)
+def suggest_merchants(
+    q: str = Query(..., min_length=1, max_length=100, description="商户名称片段"),
+    limit: int = Query(10, ge=1, le=50, description="返回数量，最大50"),
+    db: Session = Depends(get_db),
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    商户名称自动补全
+    
+    从当前用户的历史交易中查找包含输入内容的商户名称：
+    - 完全匹配优先，其次是以输入内容开头的商户，最后是包含输入内容的商户
+    - 同一匹配级别内按交易笔数、最近交易时间排序
+    - 支持中文任意片段匹配，不区分大小写
+    """
+    try:
+        service = TransactionsService(db)
+        suggestions = service.suggest_merchants(current_user.id, q, limit)
+        
+        return ResponseUtil.success(
+            data=suggestions,
+            message="获取商户建议成功"
+        )
+    except Exception as e:
+        logger.error(f"获取商户建议失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="获取商户建议失败")
+
+
 @router.get(
     "/{transaction_id}",
     response_model=ApiResponse[Transaction],
@@ -222,7 +445,7 @@ def update_transaction(
     - 备注等
     
     注意：
-    - 如果修改了影响年费进度的字段（金额、类型、状态），系统会重新计算年费进度
+    - 如果修改了影响年费进度的字段（金额、类型、状态、卡片、日期），系统会重新计算相关卡片和年份的年费进度
     - 只有用户自己的交易记录才能被修改
     """
     try:
@@ -295,7 +518,7 @@ def get_transaction_statistics(
     card_id: Optional[UUID] = Query(None, description="信用卡ID过滤"),
     start_date: Optional[datetime] = Query(None, description="开始时间"),
     end_date: Optional[datetime] = Query(None, description="结束时间"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: UserProfile = Depends(get_current_user)
 ):
     """
@@ -341,7 +564,7 @@ def get_transaction_statistics(
 def get_category_statistics(
     start_date: Optional[datetime] = Query(None, description="开始时间"),
     end_date: Optional[datetime] = Query(None, description="结束时间"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: UserProfile = Depends(get_current_user)
 ):
     """
@@ -384,7 +607,7 @@ def get_category_statistics(
 def get_monthly_trend(
     year: Optional[int] = Query(None, description="年份，默认当前年份"),
     card_id: Optional[UUID] = Query(None, description="信用卡ID过滤"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: UserProfile = Depends(get_current_user)
 ):
     """
@@ -414,4 +637,98 @@ def get_monthly_trend(
         )
     except Exception as e:
         logger.error(f"获取月度趋势失败: {str(e)}")
-        raise HTTPException(status_code=500, detail="获取月度趋势失败") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="获取月度趋势失败") 
+
+
+@router.get(
+    "/statistics/trend",
+    response_model=ApiResponse[List[TransactionTrendPoint]],
+    tags=["交易统计"],
+    summary="获取交易趋势",
+    response_description="返回指定时间范围内按粒度统计的交易趋势数据"
+)
+def get_transaction_trend(
+    start_date: datetime = Query(..., description="开始时间（含）"),
+    end_date: datetime = Query(..., description="结束时间（不含）"),
+    granularity: TrendGranularity = Query(TrendGranularity.MONTH, description="统计粒度：day/week/month/quarter"),
+    card_id: Optional[UUID] = Query(None, description="信用卡ID过滤"),
+    db: Session = Depends(get_read_db),
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    获取交易趋势
+    
+    按天、周、月或季度统计 [start_date, end_date) 范围内的交易数据：
+    - 每个周期的交易笔数
+    - 每个周期的总金额
+    - 每个周期的支出金额
+    - 每个周期的收入金额
+    
+    返回范围内的全部周期，没有交易的周期用0填充，周期按开始时间升序排列。
+    """
+    try:
+        service = TransactionsService(db)
+        
+        trend = service.get_transaction_trend(
+            user_id=current_user.id,
+            start_date=start_date,
+            end_date=end_date,
+            granularity=granularity,
+            card_id=card_id
+        )
+        
+        return ResponseUtil.success(
+            data=trend,
+            message="获取交易趋势成功"
+        )
+    except ValueError as e:
+        logger.warning(f"交易趋势参数错误: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取交易趋势失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="获取交易趋势失败")
+
+
+@router.get(
+    "/statistics/merchants",
+    response_model=ApiResponse[MerchantRanking],
+    tags=["交易统计"],
+    summary="获取商户消费排行",
+    response_description="返回按消费金额和笔数排名的商户及环比变化"
+)
+def get_merchant_ranking(
+    year: Optional[int] = Query(None, ge=2000, le=2100, description="本期结束年份，默认当前年份"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="本期结束月份，默认当前月份"),
+    months: int = Query(1, ge=1, le=12, description="统计周期月数，上期为紧邻其前的相同月数"),
+    limit: int = Query(10, ge=1, le=50, description="每个排行返回的商户数"),
+    db: Session = Depends(get_read_db),
+    current_user: UserProfile = Depends(get_current_user)
+):
+    """
+    获取商户消费排行
+    
+    统计本期各商户的消费（expense）笔数和金额：
+    - 按消费金额排名的前N个商户
+    - 按消费笔数排名的前N个商户
+    - 每个商户与上期相比的笔数、金额变化及金额环比
+    
+    本期为截至指定年月的若干个整月，数据来自商户月度汇总表。
+    """
+    try:
+        service = TransactionsService(db)
+        
+        ranking = service.get_merchant_ranking(
+            user_id=current_user.id,
+            year=year,
+            month=month,
+            months=months,
+            limit=limit
+        )
+        
+        return ResponseUtil.success(
+            data=ranking,
+            message="获取商户消费排行成功"
+        )
+    except Exception as e:
+        logger.error(f"获取商户消费排行失败: {str(e)}")
+        raise HTTPException(status_code=500, detail="获取商户消费排行失败")
@@ -3,7 +3,7 @@ from decimal import Decimal
 from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import and_, extract, func, text
+from sqlalchemy import and_, bindparam, extract, func, select, text, update
 from sqlalchemy.orm import Session
 
 from models.annual_fee import (
@@ -13,11 +13,15 @@ from models.annual_fee import (
     AnnualFeeRule,
     AnnualFeeRuleCreate,
     AnnualFeeRuleUpdate,
+    AnnualFeePortfolioStatistics,
     AnnualFeeStatistics,
     AnnualFeeWaiverCheck,
     FeeType,
     WaiverStatus,
 )
+from db_models.annual_fee import AnnualFeeRecord as AnnualFeeRecordDB, AnnualFeeRule as AnnualFeeRuleDB
+from db_models.cards import CreditCard
+from db_models.transactions import Transaction, TransactionStatus, TransactionType
 
 
 class AnnualFeeService:
@@ -205,137 +209,269 @@ class AnnualFeeService:
 
     def check_annual_fee_waiver(self, card_id: UUID, fee_year: int) -> AnnualFeeWaiverCheck:
         """检查年费减免条件"""
-        try:
-            # 使用数据库函数检查减免条件
-            result = self.db.execute(
-                text("SELECT check_annual_fee_waiver(:card_id, :fee_year)"),
-                {"card_id": card_id, "fee_year": fee_year}
-            )
-            waiver_eligible = result.scalar()
+        results, missing_card_ids = self.evaluate_annual_fee_waivers(fee_year, card_ids=[card_id])
+        if missing_card_ids:
+            raise ValueError(f"Annual fee record not found for card {card_id} and year {fee_year}")
+        return results[0]
 
-            # 获取年费记录和规则信息
-            record = self.db.query(self._get_annual_fee_record_model()).filter(
-                and_(
-                    self._get_annual_fee_record_model().card_id == card_id,
-                    self._get_annual_fee_record_model().fee_year == fee_year,
-                )
-            ).first()
+    def check_all_annual_fee_waivers(self, user_id: UUID, year: Optional[int] = None) -> List[AnnualFeeWaiverCheck]:
+        """检查用户所有信用卡的年费减免条件（未设置年费规则或当年无年费记录的卡片不在结果中）"""
+        if year is None:
+            year = date.today().year
 
-            if not record:
-                raise ValueError(f"Annual fee record not found for card {card_id} and year {fee_year}")
+        results, _ = self.evaluate_annual_fee_waivers(year, user_id=user_id)
+        return results
 
-            # 获取信用卡信息和年费规则
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id
-            ).first()
-            
-            rule = self.db.query(self._get_annual_fee_rule_model()).filter(
-                self._get_annual_fee_rule_model().id == card.annual_fee_rule_id
-            ).first()
+    def evaluate_annual_fee_waivers(
+        self,
+        fee_year: int,
+        user_id: Optional[UUID] = None,
+        card_ids: Optional[List[UUID]] = None,
+    ) -> Tuple[List[AnnualFeeWaiverCheck], List[UUID]]:
+        """
+        批量评估年费减免条件
 
-            # 计算剩余天数
-            today = date.today()
-            days_remaining = (record.due_date - today).days
+        一次查询关联 信用卡→年费规则→年费记录，并按卡汇总考核年度内的有效消费交易，
+        随后在一条批量 UPDATE 中回写各记录的当前进度和是否达标，查询次数与卡片数量无关。
 
-            # 生成进度描述
-            progress_description = self._generate_progress_description(
-                rule.fee_type, record.current_progress, rule.waiver_condition_value
-            )
+        有效消费指考核年度 [当年1月1日, 次年1月1日) 内已完成（COMPLETED）的消费（EXPENSE）交易，
+        退款、还款等其他类型以及未完成、已取消的交易不计入，与交易写入时的
+        _update_annual_fee_progress 口径一致；数据库函数 check_annual_fee_waiver 使用相同口径。
 
-            return AnnualFeeWaiverCheck(
-                card_id=card_id,
-                fee_year=fee_year,
-                waiver_eligible=waiver_eligible,
-                current_progress=record.current_progress,
-                required_progress=rule.waiver_condition_value,
-                progress_description=progress_description,
-                days_remaining=days_remaining,
-            )
-        except Exception as e:
-            raise e
+        Args:
+            fee_year: 年费年份
+            user_id: 评估该用户的全部有效卡片
+            card_ids: 评估指定的卡片
 
-    def check_all_annual_fee_waivers(self, user_id: UUID, year: Optional[int] = None) -> List[AnnualFeeWaiverCheck]:
-        """检查用户所有信用卡的年费减免条件"""
-        if year is None:
-            year = date.today().year
+        Returns:
+            (减免检查结果列表, 指定卡片中已删除或没有年费规则、年费记录的卡片ID列表)
+        """
+        if user_id is None and card_ids is None:
+            raise ValueError("必须指定用户ID或信用卡ID")
 
-        # 获取用户所有信用卡
-        cards = self.db.query(self._get_credit_card_model()).filter(
-            self._get_credit_card_model().user_id == user_id
-        ).all()
+        card_model = self._get_credit_card_model()
+        rule_model = self._get_annual_fee_rule_model()
+        record_model = self._get_annual_fee_record_model()
+        transaction_model = self._get_transaction_model()
 
-        results = []
-        for card in cards:
-            try:
-                waiver_check = self.check_annual_fee_waiver(card.id, year)
-                results.append(waiver_check)
-            except Exception:
-                # 如果某张卡没有年费记录，跳过
-                continue
+        # 已软删除的卡片不参与评估，指定的卡片已删除时计入缺失列表
+        card_criteria = [card_model.is_deleted == False]
+        if user_id is not None:
+            card_criteria.append(card_model.user_id == user_id)
+        if card_ids is not None:
+            card_criteria.append(card_model.id.in_(card_ids))
 
-        return results
+        try:
+            # 考核年度内各卡的有效消费次数和金额
+            progress = select(
+                transaction_model.card_id,
+                func.count().label("transaction_count"),
+                func.coalesce(func.sum(transaction_model.amount), 0).label("transaction_amount"),
+            ).where(
+                transaction_model.card_id.in_(select(card_model.id).where(*card_criteria)),
+                transaction_model.transaction_type == TransactionType.EXPENSE,
+                transaction_model.status == TransactionStatus.COMPLETED,
+                transaction_model.transaction_date >= datetime(fee_year, 1, 1),
+                transaction_model.transaction_date < datetime(fee_year + 1, 1, 1),
+            ).group_by(transaction_model.card_id).subquery()
+
+            rows = self.db.execute(
+                select(
+                    card_model.id.label("card_id"),
+                    rule_model.fee_type,
+                    rule_model.waiver_condition_value,
+                    record_model.id.label("record_id"),
+                    record_model.current_progress,
+                    record_model.due_date,
+                    progress.c.transaction_count,
+                    progress.c.transaction_amount,
+                )
+                .select_from(card_model)
+                .join(rule_model, rule_model.id == card_model.annual_fee_rule_id)
+                .join(record_model, and_(
+                    record_model.card_id == card_model.id,
+                    record_model.fee_year == fee_year,
+                    record_model.is_deleted == False,
+                ))
+                .outerjoin(progress, progress.c.card_id == card_model.id)
+                .where(*card_criteria)
+                .order_by(card_model.created_at.desc(), card_model.id)
+            ).all()
+
+            today = date.today()
+            results = []
+            progress_updates = []
+            for row in rows:
+                current_progress = self._calculate_waiver_progress(row)
+                required_progress = row.waiver_condition_value
+                waiver_eligible = (
+                    row.fee_type != FeeType.RIGID
+                    and required_progress is not None
+                    and current_progress >= required_progress
+                )
+
+                if row.fee_type != FeeType.RIGID:
+                    progress_updates.append({
+                        "record_id": row.record_id,
+                        "progress": current_progress,
+                        "condition_met": waiver_eligible,
+                    })
+
+                results.append(AnnualFeeWaiverCheck(
+                    card_id=row.card_id,
+                    fee_year=fee_year,
+                    waiver_eligible=waiver_eligible,
+                    current_progress=current_progress,
+                    required_progress=required_progress,
+                    progress_description=self._generate_progress_description(
+                        row.fee_type, current_progress, required_progress
+                    ),
+                    days_remaining=(row.due_date - today).days,
+                ))
+
+            if progress_updates:
+                record_table = record_model.__table__
+                self.db.execute(
+                    update(record_table)
+                    .where(record_table.c.id == bindparam("record_id"))
+                    .values(
+                        current_progress=bindparam("progress"),
+                        waiver_condition_met=bindparam("condition_met"),
+                    ),
+                    progress_updates
+                )
+                self.db.commit()
+
+            found_card_ids = {row.card_id for row in rows}
+            missing_card_ids = [card_id for card_id in (card_ids or []) if card_id not in found_card_ids]
+            return results, missing_card_ids
+
+        except ValueError:
+            raise
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"评估年费减免条件失败: {str(e)}")
 
     # ==================== 年费统计 ====================
 
     def get_annual_fee_statistics(self, user_id: UUID, year: Optional[int] = None) -> AnnualFeeStatistics:
-        """获取年费统计信息"""
+        """
+        获取年费统计信息
+
+        以单条聚合查询统计用户有效卡片及其当年年费记录，按减免状态条件求和。
+        """
         if year is None:
             year = date.today().year
 
-        # 获取用户所有信用卡
-        cards = self.db.query(self._get_credit_card_model()).filter(
-            self._get_credit_card_model().user_id == user_id
-        ).all()
-        card_ids = [card.id for card in cards]
-
-        if not card_ids:
-            return AnnualFeeStatistics(
-                total_cards=0,
-                total_annual_fees=Decimal("0"),
-                waived_fees=Decimal("0"),
-                paid_fees=Decimal("0"),
-                pending_fees=Decimal("0"),
-                overdue_fees=Decimal("0"),
-                waiver_rate=0.0,
-            )
+        card_model = self._get_credit_card_model()
+        record_model = self._get_annual_fee_record_model()
 
-        # 查询年费记录统计
-        records = self.db.query(self._get_annual_fee_record_model()).filter(
-            and_(
-                self._get_annual_fee_record_model().card_id.in_(card_ids),
-                self._get_annual_fee_record_model().fee_year == year,
-            )
-        ).all()
-
-        total_cards = len(card_ids)
-        total_annual_fees = sum(record.fee_amount for record in records)
-        waived_fees = sum(
-            record.fee_amount for record in records if record.waiver_status == WaiverStatus.WAIVED
-        )
-        paid_fees = sum(
-            record.fee_amount for record in records if record.waiver_status == WaiverStatus.PAID
-        )
-        pending_fees = sum(
-            record.fee_amount for record in records if record.waiver_status == WaiverStatus.PENDING
-        )
-        overdue_fees = sum(
-            record.fee_amount for record in records if record.waiver_status == WaiverStatus.OVERDUE
-        )
-
-        waiver_rate = float(waived_fees / total_annual_fees * 100) if total_annual_fees > 0 else 0.0
-
-        return AnnualFeeStatistics(
-            total_cards=total_cards,
-            total_annual_fees=total_annual_fees,
-            waived_fees=waived_fees,
-            paid_fees=paid_fees,
-            pending_fees=pending_fees,
-            overdue_fees=overdue_fees,
-            waiver_rate=waiver_rate,
-        )
+        try:
+            row = self.db.execute(
+                select(
+                    func.count(func.distinct(card_model.id)).label("total_cards"),
+                    *self._fee_status_aggregates(record_model),
+                )
+                .select_from(card_model)
+                .outerjoin(record_model, and_(
+                    record_model.card_id == card_model.id,
+                    record_model.fee_year == year,
+                    record_model.is_deleted == False,
+                ))
+                .where(card_model.user_id == user_id, card_model.is_deleted == False)
+            ).one()
+
+            return AnnualFeeStatistics(**self._statistics_fields(row))
+        except Exception as e:
+            raise Exception(f"获取年费统计信息失败: {str(e)}")
+
+    def get_portfolio_annual_fee_statistics(self, year: Optional[int] = None) -> List[AnnualFeePortfolioStatistics]:
+        """
+        获取全平台按年份汇总的年费统计
+
+        一次扫描年费记录表，按年费年份分组统计所有用户的有效卡片年费。
+
+        Args:
+            year: 只统计指定年份，为None时返回所有年份
+
+        Returns:
+            List[AnnualFeePortfolioStatistics]: 按年份倒序排列的统计列表
+        """
+        card_model = self._get_credit_card_model()
+        record_model = self._get_annual_fee_record_model()
+
+        criteria = [record_model.is_deleted == False, card_model.is_deleted == False]
+        if year is not None:
+            criteria.append(record_model.fee_year == year)
+
+        try:
+            rows = self.db.execute(
+                select(
+                    record_model.fee_year,
+                    func.count(func.distinct(card_model.user_id)).label("total_users"),
+                    func.count(func.distinct(card_model.id)).label("total_cards"),
+                    *self._fee_status_aggregates(record_model),
+                )
+                .select_from(record_model)
+                .join(card_model, card_model.id == record_model.card_id)
+                .where(*criteria)
+                .group_by(record_model.fee_year)
+                .order_by(record_model.fee_year.desc())
+            ).all()
+
+            return [
+                AnnualFeePortfolioStatistics(
+                    fee_year=row.fee_year,
+                    total_users=row.total_users,
+                    **self._statistics_fields(row)
+                )
+                for row in rows
+            ]
+        except Exception as e:
+            raise Exception(f"获取全平台年费统计失败: {str(e)}")
 
     # ==================== 辅助方法 ====================
 
+    def _fee_status_aggregates(self, record_model) -> list:
+        """年费总额及各减免状态金额的条件求和列"""
+        def fee_sum(*conditions):
+            total = func.sum(record_model.fee_amount)
+            if conditions:
+                total = total.filter(*conditions)
+            return func.coalesce(total, 0)
+
+        return [
+            fee_sum().label("total_annual_fees"),
+            fee_sum(record_model.waiver_status == WaiverStatus.WAIVED).label("waived_fees"),
+            fee_sum(record_model.waiver_status == WaiverStatus.PAID).label("paid_fees"),
+            fee_sum(record_model.waiver_status == WaiverStatus.PENDING).label("pending_fees"),
+            fee_sum(record_model.waiver_status == WaiverStatus.OVERDUE).label("overdue_fees"),
+        ]
+
+    def _statistics_fields(self, row) -> dict:
+        """将聚合结果转换为 AnnualFeeStatistics 字段，并计算减免率"""
+        total_annual_fees = Decimal(row.total_annual_fees)
+        waived_fees = Decimal(row.waived_fees)
+        return {
+            "total_cards": row.total_cards,
+            "total_annual_fees": total_annual_fees,
+            "waived_fees": waived_fees,
+            "paid_fees": Decimal(row.paid_fees),
+            "pending_fees": Decimal(row.pending_fees),
+            "overdue_fees": Decimal(row.overdue_fees),
+            "waiver_rate": float(waived_fees / total_annual_fees * 100) if total_annual_fees > 0 else 0.0,
+        }
+
+    def _calculate_waiver_progress(self, row) -> Decimal:
+        """根据年费类型计算减免进度：刷卡次数、刷卡金额，积分兑换视为已满足，刚性年费保持原值"""
+        if row.fee_type == FeeType.TRANSACTION_COUNT:
+            return Decimal(row.transaction_count or 0)
+        if row.fee_type == FeeType.TRANSACTION_AMOUNT:
+            return Decimal(row.transaction_amount or 0)
+        if row.fee_type == FeeType.POINTS_EXCHANGE:
+            return row.waiver_condition_value or Decimal("0")
+        return row.current_progress or Decimal("0")
+
     def _generate_progress_description(self, fee_type: str, current: Decimal, required: Optional[Decimal]) -> str:
         """生成进度描述"""
         if fee_type == FeeType.RIGID:
@@ -351,25 +487,24 @@ class AnnualFeeService:
 
     def _create_annual_fee_rule_db(self, rule_data: AnnualFeeRuleCreate):
         """创建数据库年费规则对象"""
-        from db_models.annual_fee import AnnualFeeRule as AnnualFeeRuleDB
         return AnnualFeeRuleDB(**rule_data.model_dump())
 
     def _create_annual_fee_record_db(self, record_data: AnnualFeeRecordCreate):
         """创建数据库年费记录对象"""
-        from db_models.annual_fee import AnnualFeeRecord as AnnualFeeRecordDB
         return AnnualFeeRecordDB(**record_data.model_dump())
 
     def _get_annual_fee_rule_model(self):
         """获取年费规则数据库模型"""
-        from db_models.annual_fee import AnnualFeeRule as AnnualFeeRuleDB
         return AnnualFeeRuleDB
 
     def _get_annual_fee_record_model(self):
         """获取年费记录数据库模型"""
-        from db_models.annual_fee import AnnualFeeRecord as AnnualFeeRecordDB
         return AnnualFeeRecordDB
 
     def _get_credit_card_model(self):
         """获取信用卡数据库模型"""
-        from db_models.cards import CreditCard
-        return CreditCard 
\ No newline at end of file
+        return CreditCard
+
+    def _get_transaction_model(self):
+        """获取交易记录数据库模型"""
+        return Transaction 
\ No newline at end of file
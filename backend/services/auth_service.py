@@ -9,7 +9,7 @@ from datetime import datetime, timedelta, UTC
 from typing import Optional, Dict, Any, Tuple, List
 from uuid import UUID
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
 
 from models.users import (
@@ -28,6 +28,16 @@ from models.users import (
     CodeType,
     WechatBindingInfo
 )
+from db_models.users import User, VerificationCode, WechatBinding
+from services.hot_queries import (
+    user_by_email,
+    user_by_id,
+    user_by_phone,
+    user_by_phone_or_email,
+    user_by_username,
+    user_by_username_or_email,
+    usable_verification_code,
+)
 from utils.auth import (
     AuthUtils,
     VerificationCodeUtils,
@@ -35,6 +45,7 @@ from utils.auth import (
     WechatUtils,
     IPUtils
 )
+from utils.cache import user_profile_cache
 
 logger = logging.getLogger(__name__)
 
@@ -64,7 +75,20 @@ class AuthService:
         - ValueError: 用户名、邮箱或手机号已存在
         - ValueError: 验证码无效（如果需要）
         """
-        logger.info(f"用户注册请求 - username: {register_data.username}, email: {register_data.email}")
+        self.validate_registration(register_data)
+        return self.create_registered_user(register_data, AuthUtils.hash_password(register_data.password))
+
+    def validate_registration(self, register_data: UserRegisterRequest) -> None:
+        """
+        注册前检查：用户名、邮箱、手机号是否已存在，提供了手机号时验证验证码
+        
+        检查通过后再计算密码哈希，重复注册等无效请求不占用哈希工作池。
+        
+        异常:
+        - ValueError: 用户名、邮箱或手机号已存在
+        - ValueError: 验证码无效
+        """
+        logger.info("用户注册请求 - username: %s, email: %s", register_data.username, register_data.email)
 
         # 检查用户名、邮箱、手机号是否已存在
         self._check_user_exists(register_data.username, register_data.email, register_data.phone)
@@ -74,11 +98,21 @@ class AuthService:
             if not self.verify_code(register_data.phone, register_data.verification_code, CodeType.REGISTER):
                 raise ValueError("验证码无效或已过期")
 
-        # 创建用户
+    def create_registered_user(self, register_data: UserRegisterRequest, password_hash: str) -> UserProfile:
+        """
+        创建通过注册检查的用户
+        
+        参数:
+        - register_data: 注册数据
+        - password_hash: 密码哈希值
+        
+        返回:
+        - 用户资料信息
+        """
         user_data = {
             "username": register_data.username,
             "email": register_data.email,
-            "password_hash": AuthUtils.hash_password(register_data.password),
+            "password_hash": password_hash,
             "phone": register_data.phone,
             "nickname": register_data.nickname or register_data.username,
             "is_verified": bool(register_data.phone and register_data.verification_code),
@@ -90,7 +124,7 @@ class AuthService:
         self.db.commit()
         self.db.refresh(user)
 
-        logger.info(f"用户注册成功 - user_id: {user.id}, username: {user.username}")
+        logger.info("用户注册成功 - user_id: %s, username: %s", user.id, user.username)
         return UserProfile.model_validate(user)
 
     def _check_user_exists(self, username: str, email: str, phone: Optional[str] = None):
@@ -129,16 +163,64 @@ class AuthService:
         异常:
         - ValueError: 用户不存在或密码错误
         """
-        logger.info(f"用户名密码登录请求 - username: {login_data.username}")
+        logger.info("用户名密码登录请求 - username: %s", login_data.username)
 
-        # 通过用户名或邮箱查找用户
-        user = self._get_user_by_username_or_email(login_data.username)
+        user = self.get_user_for_username_login(login_data.username)
+        password_check = AuthUtils.verify_and_update_password(login_data.password, user.password_hash)
+        return self.complete_password_login(user, password_check, ip_address)
+
+    def get_user_for_username_login(self, username_or_email: str) -> User:
+        """
+        通过用户名或邮箱查找待登录的用户
+        
+        异常:
+        - ValueError: 用户不存在
+        """
+        user = self._get_user_by_username_or_email(username_or_email)
         if not user:
             raise ValueError("用户不存在")
+        return user
+
+    def get_user_for_phone_login(self, phone: str) -> User:
+        """
+        通过手机号查找待登录的用户
+        
+        异常:
+        - ValueError: 手机号未注册
+        """
+        user = self._get_user_by_phone(phone)
+        if not user:
+            raise ValueError("手机号未注册")
+        return user
 
-        # 验证密码
-        if not AuthUtils.verify_password(login_data.password, user.password_hash):
+    def complete_password_login(
+        self,
+        user: User,
+        password_check: Tuple[bool, Optional[str]],
+        ip_address: str
+    ) -> LoginResponse:
+        """
+        根据密码验证结果完成登录
+        
+        密码验证在调用方完成（async 接口在事件循环中等待哈希工作池），
+        哈希成本变更时顺带升级哈希（随登录信息一起提交）。
+        
+        参数:
+        - user: 待登录用户
+        - password_check: verify_and_update_password 的结果 (是否验证通过, 新哈希值或None)
+        - ip_address: 登录IP地址
+        
+        返回:
+        - 登录响应，包含令牌和用户信息
+        
+        异常:
+        - ValueError: 密码错误或账户已被禁用
+        """
+        is_valid, new_hash = password_check
+        if not is_valid:
             raise ValueError("密码错误")
+        if new_hash:
+            user.password_hash = new_hash
 
         # 检查用户状态
         if not user.is_active:
@@ -150,7 +232,7 @@ class AuthService:
         # 生成令牌
         access_token = AuthUtils.create_access_token({"sub": str(user.id), "username": user.username})
 
-        logger.info(f"用户名密码登录成功 - user_id: {user.id}")
+        logger.info("密码登录成功 - user_id: %s", user.id)
         return LoginResponse(
             access_token=access_token,
             token_type="bearer",
@@ -176,28 +258,11 @@ class AuthService:
         异常:
         - ValueError: 手机号不存在或密码错误
         """
-        logger.info(f"手机号密码登录请求 - phone: {login_data.phone}")
-
-        user = self._get_user_by_phone(login_data.phone)
-        if not user:
-            raise ValueError("手机号未注册")
+        logger.info("手机号密码登录请求 - phone: %s", login_data.phone)
 
-        if not AuthUtils.verify_password(login_data.password, user.password_hash):
-            raise ValueError("密码错误")
-
-        if not user.is_active:
-            raise ValueError("账户已被禁用")
-
-        self._update_login_info(user, ip_address)
-        access_token = AuthUtils.create_access_token({"sub": str(user.id), "username": user.username})
-
-        logger.info(f"手机号密码登录成功 - user_id: {user.id}")
-        return LoginResponse(
-            access_token=access_token,
-            token_type="bearer",
-            expires_in=AuthUtils.get_token_expires_in(),
-            user=UserProfile.model_validate(user)
-        )
+        user = self.get_user_for_phone_login(login_data.phone)
+        password_check = AuthUtils.verify_and_update_password(login_data.password, user.password_hash)
+        return self.complete_password_login(user, password_check, ip_address)
 
     def login_with_phone_code(
         self, 
@@ -217,7 +282,7 @@ class AuthService:
         异常:
         - ValueError: 验证码错误或手机号未注册
         """
-        logger.info(f"手机号验证码登录请求 - phone: {login_data.phone}")
+        logger.info("手机号验证码登录请求 - phone: %s", login_data.phone)
 
         # 验证验证码
         if not self.verify_code(login_data.phone, login_data.verification_code, CodeType.LOGIN):
@@ -240,7 +305,7 @@ class AuthService:
             self.db.add(user)
             self.db.commit()
             self.db.refresh(user)
-            logger.info(f"自动注册新用户 - user_id: {user.id}, phone: {login_data.phone}")
+            logger.info("自动注册新用户 - user_id: %s, phone: %s", user.id, login_data.phone)
 
         if not user.is_active:
             raise ValueError("账户已被禁用")
@@ -248,7 +313,7 @@ class AuthService:
         self._update_login_info(user, ip_address)
         access_token = AuthUtils.create_access_token({"sub": str(user.id), "username": user.username})
 
-        logger.info(f"手机号验证码登录成功 - user_id: {user.id}")
+        logger.info("手机号验证码登录成功 - user_id: %s", user.id)
         return LoginResponse(
             access_token=access_token,
             token_type="bearer",
@@ -274,7 +339,7 @@ class AuthService:
         异常:
         - ValueError: 微信授权失败
         """
-        logger.info(f"微信登录请求 - code: {login_data.code[:10]}...")
+        logger.info("微信登录请求 - code: %s...", login_data.code[:10])
 
         # 通过微信授权码获取用户信息
         wechat_info = WechatUtils.exchange_code_for_token(login_data.code)
@@ -299,7 +364,7 @@ class AuthService:
 
         access_token = AuthUtils.create_access_token({"sub": str(user.id), "username": user.username})
 
-        logger.info(f"微信登录成功 - user_id: {user.id}")
+        logger.info("微信登录成功 - user_id: %s", user.id)
         return LoginResponse(
             access_token=access_token,
             token_type="bearer",
@@ -327,7 +392,7 @@ class AuthService:
         异常:
         - ValueError: 发送频率过高
         """
-        logger.info(f"发送验证码请求 - {send_data.phone_or_email}, 类型: {send_data.code_type}")
+        logger.info("发送验证码请求 - %s, 类型: %s", send_data.phone_or_email, send_data.code_type)
 
         # 检查发送频率
         if self._check_code_send_frequency(send_data.phone_or_email, send_data.code_type):
@@ -354,7 +419,7 @@ class AuthService:
         success = self._send_code_via_sms_or_email(send_data.phone_or_email, code, send_data.code_type)
         
         if success:
-            logger.info(f"验证码发送成功 - {send_data.phone_or_email}")
+            logger.info("验证码发送成功 - %s", send_data.phone_or_email)
         else:
             logger.error(f"验证码发送失败 - {send_data.phone_or_email}")
             
@@ -377,15 +442,9 @@ class AuthService:
         返回:
         - 验证是否成功
         """
-        verification_code = self.db.query(self._get_verification_code_model()).filter(
-            and_(
-                self._get_verification_code_model().phone_or_email == phone_or_email,
-                self._get_verification_code_model().code == code,
-                self._get_verification_code_model().code_type == code_type.value,
-                self._get_verification_code_model().is_used == False,
-                self._get_verification_code_model().expires_at > datetime.now(UTC)
-            )
-        ).first()
+        verification_code = self.db.execute(
+            usable_verification_code(phone_or_email, code, code_type.value, datetime.now(UTC))
+        ).scalars().first()
 
         if verification_code:
             # 标记为已使用
@@ -410,16 +469,14 @@ class AuthService:
     def _send_code_via_sms_or_email(self, phone_or_email: str, code: str, code_type: CodeType) -> bool:
         """通过短信或邮件发送验证码"""
         # TODO: 集成实际的短信/邮件服务
-        logger.info(f"模拟发送验证码 - {phone_or_email}: {code} (类型: {code_type.value})")
+        logger.info("模拟发送验证码 - %s: %s (类型: %s)", phone_or_email, code, code_type.value)
         return True
 
     # ==================== 用户信息管理 ====================
 
     def get_user_profile(self, user_id: UUID) -> Optional[UserProfile]:
         """获取用户资料"""
-        user = self.db.query(self._get_user_model()).filter(
-            self._get_user_model().id == user_id
-        ).first()
+        user = self.db.execute(user_by_id(user_id)).scalars().first()
         return UserProfile.model_validate(user) if user else None
 
     def update_user_profile(
@@ -437,9 +494,7 @@ class AuthService:
         返回:
         - 更新后的用户资料
         """
-        user = self.db.query(self._get_user_model()).filter(
-            self._get_user_model().id == user_id
-        ).first()
+        user = self.db.execute(user_by_id(user_id)).scalars().first()
         
         if not user:
             return None
@@ -449,8 +504,9 @@ class AuthService:
 
         self.db.commit()
         self.db.refresh(user)
+        user_profile_cache.invalidate(user_id)
         
-        logger.info(f"用户资料更新成功 - user_id: {user_id}")
+        logger.info("用户资料更新成功 - user_id: %s", user_id)
         return UserProfile.model_validate(user)
 
     def change_password(
@@ -471,22 +527,37 @@ class AuthService:
         异常:
         - ValueError: 当前密码错误
         """
-        user = self.db.query(self._get_user_model()).filter(
-            self._get_user_model().id == user_id
-        ).first()
-        
-        if not user:
+        password_hash = self.get_password_hash(user_id)
+        if password_hash is None:
             return False
 
         # 验证当前密码
-        if not AuthUtils.verify_password(change_data.old_password, user.password_hash):
+        if not AuthUtils.verify_password(change_data.old_password, password_hash):
             raise ValueError("当前密码错误")
 
-        # 更新密码
-        user.password_hash = AuthUtils.hash_password(change_data.new_password)
+        return self.update_password_hash(user_id, AuthUtils.hash_password(change_data.new_password))
+
+    def get_password_hash(self, user_id: UUID) -> Optional[str]:
+        """获取用户当前的密码哈希，用户不存在时返回None"""
+        user = self.db.execute(user_by_id(user_id)).scalars().first()
+        return user.password_hash if user else None
+
+    def update_password_hash(self, user_id: UUID, password_hash: str) -> bool:
+        """
+        更新用户密码哈希
+        
+        返回:
+        - 更新是否成功（用户不存在时为False）
+        """
+        user = self.db.execute(user_by_id(user_id)).scalars().first()
+        if not user:
+            return False
+
+        user.password_hash = password_hash
         self.db.commit()
+        user_profile_cache.invalidate(user_id)
         
-        logger.info(f"密码修改成功 - user_id: {user_id}")
+        logger.info("密码更新成功 - user_id: %s", user_id)
         return True
 
     def reset_password(self, reset_data: ResetPasswordRequest) -> bool:
@@ -499,6 +570,19 @@ class AuthService:
         返回:
         - 重置是否成功
         
+        异常:
+        - ValueError: 验证码错误或用户不存在
+        """
+        user_id = self.verify_password_reset(reset_data)
+        return self.update_password_hash(user_id, AuthUtils.hash_password(reset_data.new_password))
+
+    def verify_password_reset(self, reset_data: ResetPasswordRequest) -> UUID:
+        """
+        验证重置密码请求的验证码并查找用户
+        
+        返回:
+        - 待重置密码的用户ID
+        
         异常:
         - ValueError: 验证码错误或用户不存在
         """
@@ -514,13 +598,7 @@ class AuthService:
         user = self._get_user_by_phone_or_email(reset_data.phone_or_email)
         if not user:
             raise ValueError("用户不存在")
-
-        # 更新密码
-        user.password_hash = AuthUtils.hash_password(reset_data.new_password)
-        self.db.commit()
-        
-        logger.info(f"密码重置成功 - user_id: {user.id}")
-        return True
+        return user.id
 
     # ==================== 微信相关 ====================
 
@@ -539,42 +617,28 @@ class AuthService:
         user.last_login_ip = ip_address
         user.login_count = str(int(user.login_count or "0") + 1)
         self.db.commit()
+        # 登录信息属于用户资料的一部分
+        user_profile_cache.invalidate(user.id)
 
     def _get_user_by_username(self, username: str):
         """通过用户名查找用户"""
-        return self.db.query(self._get_user_model()).filter(
-            self._get_user_model().username == username
-        ).first()
+        return self.db.execute(user_by_username(username)).scalars().first()
 
     def _get_user_by_email(self, email: str):
         """通过邮箱查找用户"""
-        return self.db.query(self._get_user_model()).filter(
-            self._get_user_model().email == email
-        ).first()
+        return self.db.execute(user_by_email(email)).scalars().first()
 
     def _get_user_by_phone(self, phone: str):
         """通过手机号查找用户"""
-        return self.db.query(self._get_user_model()).filter(
-            self._get_user_model().phone == phone
-        ).first()
+        return self.db.execute(user_by_phone(phone)).scalars().first()
 
     def _get_user_by_username_or_email(self, username_or_email: str):
         """通过用户名或邮箱查找用户"""
-        return self.db.query(self._get_user_model()).filter(
-            or_(
-                self._get_user_model().username == username_or_email,
-                self._get_user_model().email == username_or_email
-            )
-        ).first()
+        return self.db.execute(user_by_username_or_email(username_or_email)).scalars().first()
 
     def _get_user_by_phone_or_email(self, phone_or_email: str):
         """通过手机号或邮箱查找用户"""
-        return self.db.query(self._get_user_model()).filter(
-            or_(
-                self._get_user_model().phone == phone_or_email,
-                self._get_user_model().email == phone_or_email
-            )
-        ).first()
+        return self.db.execute(user_by_phone_or_email(phone_or_email)).scalars().first()
 
     def _get_user_by_wechat_openid(self, openid: str):
         """通过微信OpenID查找用户"""
@@ -583,9 +647,7 @@ class AuthService:
         ).first()
         
         if binding:
-            return self.db.query(self._get_user_model()).filter(
-                self._get_user_model().id == binding.user_id
-            ).first()
+            return self.db.execute(user_by_id(binding.user_id)).scalars().first()
         return None
 
     def _create_user_from_wechat(self, wechat_info: Dict[str, Any], user_info: Optional[Dict] = None):
@@ -642,30 +704,24 @@ class AuthService:
     # 数据库模型相关方法的实际实现
     def _create_user_db(self, user_data: Dict[str, Any]):
         """创建用户数据库对象"""
-        from db_models.users import User
         return User(**user_data)
 
     def _create_verification_code_db(self, code_data: Dict[str, Any]):
         """创建验证码数据库对象"""
-        from db_models.users import VerificationCode
         return VerificationCode(**code_data)
 
     def _create_wechat_binding_db(self, binding_data: Dict[str, Any]):
         """创建微信绑定数据库对象"""
-        from db_models.users import WechatBinding
         return WechatBinding(**binding_data)
 
     def _get_user_model(self):
         """获取用户数据库模型"""
-        from db_models.users import User
         return User
 
     def _get_verification_code_model(self):
         """获取验证码数据库模型"""
-        from db_models.users import VerificationCode
         return VerificationCode
 
     def _get_wechat_binding_model(self):
         """获取微信绑定数据库模型"""
-        from db_models.users import WechatBinding
         return WechatBinding 
\ No newline at end of file
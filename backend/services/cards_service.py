@@ -8,7 +8,8 @@ import logging
 from typing import List, Optional, Tuple, Dict, Any
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -18,13 +19,128 @@ from models.cards import (
     CardSummary, CardSummaryWithAnnualFee, CardStatus, CardType
 )
 from models.annual_fee import AnnualFeeRuleCreate, FeeType
+from db_models.annual_fee import AnnualFeeRecord, AnnualFeeRule
+from db_models.cards import CreditCard
 from services.annual_fee_service import AnnualFeeService
+from services.hot_queries import owned_card
 from utils.response import ResponseUtil
 
 logger = logging.getLogger(__name__)
 
 
-class CardsService:
+class CardQueryMixin:
+    """
+    信用卡查询语句与响应构建
+    
+    同步服务 CardsService 与异步服务 AsyncCardsService 共用，
+    只构建查询语句和响应模型，不直接访问数据库会话。
+    """
+
+    def _cards_with_annual_fee_statement(self, user_id: UUID, keyword: str = ""):
+        """
+        构建信用卡关联年费规则和当年年费记录的查询语句
+        
+        同步与异步服务共用，返回 (CreditCard, AnnualFeeRule, AnnualFeeRecord) 行。
+        """
+        card_model = self._get_credit_card_model()
+        
+        # 左连接年费规则和记录
+        statement = select(
+            card_model,
+            AnnualFeeRule,
+            AnnualFeeRecord
+        ).outerjoin(
+            AnnualFeeRule, 
+            card_model.annual_fee_rule_id == AnnualFeeRule.id
+        ).outerjoin(
+            AnnualFeeRecord,
+            (AnnualFeeRecord.card_id == card_model.id) & 
+            (AnnualFeeRecord.fee_year == datetime.now().year)
+        ).where(
+            card_model.user_id == user_id,
+            card_model.is_deleted == False
+        )
+        
+        # 模糊搜索
+        if keyword.strip():
+            statement = statement.where(or_(
+                card_model.bank_name.ilike(f"%{keyword}%"),
+                card_model.card_name.ilike(f"%{keyword}%"),
+                card_model.notes.ilike(f"%{keyword}%")
+            ))
+        
+        return statement
+
+    def _build_card_summary_with_annual_fee(self, card, rule, record) -> CardSummaryWithAnnualFee:
+        """根据信用卡、年费规则和年费记录构建列表摘要"""
+        return CardSummaryWithAnnualFee(
+            id=card.id,
+            bank_name=card.bank_name,
+            card_name=card.card_name,
+            card_type=card.card_type,
+            credit_limit=card.credit_limit,
+            used_amount=card.used_amount,
+            available_amount=card.available_amount,
+            status=card.status,
+            card_color=card.card_color,
+            has_annual_fee=rule is not None,
+            annual_fee_amount=rule.base_fee if rule else None,
+            fee_type_display=self._get_fee_type_display(rule.fee_type) if rule else None,
+            current_year_fee_status=record.waiver_status if record else None
+        )
+
+    def _build_card_with_annual_fee(self, card, rule, record) -> CardWithAnnualFee:
+        """根据信用卡、年费规则和年费记录构建详情"""
+        from models.annual_fee import AnnualFeeRule as AnnualFeeRuleModel
+        
+        if rule:
+            annual_fee_rule_data = AnnualFeeRuleModel(
+                id=rule.id,
+                fee_type=rule.fee_type,
+                base_fee=rule.base_fee,
+                waiver_condition_value=rule.waiver_condition_value,
+                points_per_yuan=rule.points_per_yuan,
+                annual_fee_month=rule.annual_fee_month,
+                annual_fee_day=rule.annual_fee_day,
+                description=rule.description,
+                created_at=rule.created_at
+            )
+            next_fee_due_date = None
+            if rule.annual_fee_month and rule.annual_fee_day:
+                try:
+                    current_year = datetime.now().year
+                    next_fee_due_date = date(current_year, rule.annual_fee_month, rule.annual_fee_day)
+                except ValueError:
+                    if rule.annual_fee_month == 2 and rule.annual_fee_day == 29:
+                        next_fee_due_date = date(current_year, 2, 28)
+        else:
+            annual_fee_rule_data = None
+            next_fee_due_date = None
+        
+        return CardWithAnnualFee(
+            **Card.model_validate(card).model_dump(),
+            annual_fee_rule=annual_fee_rule_data,
+            has_annual_fee=rule is not None,
+            current_year_fee_status=record.waiver_status if record else None,
+            next_fee_due_date=next_fee_due_date
+        )
+
+    def _get_credit_card_model(self):
+        """获取信用卡数据库模型"""
+        return CreditCard
+    
+    def _get_fee_type_display(self, fee_type) -> str:
+        """获取年费类型的中文显示名称"""
+        type_display = {
+            "rigid": "刚性年费",
+            "transaction_count": "刷卡次数减免",
+            "transaction_amount": "刷卡金额减免",
+            "points_exchange": "积分兑换减免"
+        }
+        return type_display.get(fee_type, "未知类型")
+
+
+class CardsService(CardQueryMixin):
     """
     信用卡服务类
     
@@ -57,7 +173,7 @@ class CardsService:
             Exception: 创建失败
         """
         try:
-            logger.info(f"创建信用卡: {card_data.bank_name} - {card_data.card_name}")
+            logger.info("创建信用卡: %s - %s", card_data.bank_name, card_data.card_name)
             
             # 检查卡号是否已存在
             existing_card = self.db.query(self._get_credit_card_model()).filter(
@@ -81,7 +197,7 @@ class CardsService:
             self.db.commit()
             self.db.refresh(db_card)
             
-            logger.info(f"信用卡创建成功: {db_card.id}")
+            logger.info("信用卡创建成功: %s", db_card.id)
             return Card.model_validate(db_card)
             
         except ValueError:
@@ -111,7 +227,7 @@ class CardsService:
             Exception: 创建失败
         """
         try:
-            logger.info(f"创建信用卡（含年费）: {card_data.bank_name} - {card_data.card_name}")
+            logger.info("创建信用卡（含年费）: %s - %s", card_data.bank_name, card_data.card_name)
             
             # 检查卡号是否已存在
             existing_card = self.db.query(self._get_credit_card_model()).filter(
@@ -191,7 +307,7 @@ class CardsService:
                 next_fee_due_date=annual_fee_rule.get_annual_due_date(datetime.now().year) if annual_fee_rule else None
             )
             
-            logger.info(f"信用卡（含年费）创建成功: {db_card.id}")
+            logger.info("信用卡（含年费）创建成功: %s", db_card.id)
             return card_response
             
         except ValueError:
@@ -227,7 +343,7 @@ class CardsService:
             Tuple[List[Card], int]: 信用卡列表和总数
         """
         try:
-            logger.info(f"获取信用卡列表: user_id={user_id}, keyword='{keyword}'")
+            logger.info("获取信用卡列表: user_id=%s, keyword='%s'", user_id, keyword)
             
             query = self.db.query(self._get_credit_card_model()).filter(
                 self._get_credit_card_model().user_id == user_id,
@@ -261,7 +377,7 @@ class CardsService:
                 self._get_credit_card_model().created_at.desc()
             ).offset(skip).limit(limit).all()
             
-            logger.info(f"找到 {len(cards)} 张信用卡，总计 {total} 张")
+            logger.info("找到 %s 张信用卡，总计 %s 张", len(cards), total)
             return [Card.model_validate(card) for card in cards], total
             
         except Exception as e:
@@ -288,66 +404,29 @@ class CardsService:
             Tuple[List[CardSummaryWithAnnualFee], int]: 信用卡列表和总数
         """
         try:
-            logger.info(f"获取信用卡列表（含年费）: user_id={user_id}, keyword='{keyword}'")
-            
-            # 导入年费模型
-            from db_models.annual_fee import AnnualFeeRule, AnnualFeeRecord
-            
-            # 左连接年费规则和记录
-            query = self.db.query(
-                self._get_credit_card_model(),
-                AnnualFeeRule,
-                AnnualFeeRecord
-            ).outerjoin(
-                AnnualFeeRule, 
-                self._get_credit_card_model().annual_fee_rule_id == AnnualFeeRule.id
-            ).outerjoin(
-                AnnualFeeRecord,
-                (AnnualFeeRecord.card_id == self._get_credit_card_model().id) & 
-                (AnnualFeeRecord.fee_year == datetime.now().year)
-            ).filter(
-                self._get_credit_card_model().user_id == user_id,
-                self._get_credit_card_model().is_deleted == False
-            )
+            logger.info("获取信用卡列表（含年费）: user_id=%s, keyword='%s'", user_id, keyword)
             
-            # 模糊搜索
-            if keyword.strip():
-                search_filter = or_(
-                    self._get_credit_card_model().bank_name.ilike(f"%{keyword}%"),
-                    self._get_credit_card_model().card_name.ilike(f"%{keyword}%"),
-                    self._get_credit_card_model().notes.ilike(f"%{keyword}%")
-                )
-                query = query.filter(search_filter)
+            statement = self._cards_with_annual_fee_statement(user_id, keyword)
             
             # 获取总数
-            total = query.count()
+            total = self.db.execute(
+                select(func.count()).select_from(statement.subquery())
+            ).scalar_one()
             
             # 分页查询
-            results = query.order_by(
-                self._get_credit_card_model().created_at.desc()
-            ).offset(skip).limit(limit).all()
+            results = self.db.execute(
+                statement.order_by(
+                    self._get_credit_card_model().created_at.desc()
+                ).offset(skip).limit(limit)
+            ).all()
             
             # 构建响应数据
-            card_summaries = []
-            for card, rule, record in results:
-                card_summary = CardSummaryWithAnnualFee(
-                    id=card.id,
-                    bank_name=card.bank_name,
-                    card_name=card.card_name,
-                    card_type=card.card_type,
-                    credit_limit=card.credit_limit,
-                    used_amount=card.used_amount,
-                    available_amount=card.available_amount,
-                    status=card.status,
-                    card_color=card.card_color,
-                    has_annual_fee=rule is not None,
-                    annual_fee_amount=rule.base_fee if rule else None,
-                    fee_type_display=self._get_fee_type_display(rule.fee_type) if rule else None,
-                    current_year_fee_status=record.waiver_status if record else None
-                )
-                card_summaries.append(card_summary)
+            card_summaries = [
+                self._build_card_summary_with_annual_fee(card, rule, record)
+                for card, rule, record in results
+            ]
             
-            logger.info(f"找到 {len(card_summaries)} 张信用卡（含年费），总计 {total} 张")
+            logger.info("找到 %s 张信用卡（含年费），总计 %s 张", len(card_summaries), total)
             return card_summaries, total
             
         except Exception as e:
@@ -366,13 +445,9 @@ class CardsService:
             Optional[Card]: 信用卡信息
         """
         try:
-            logger.info(f"获取信用卡详情: {card_id}")
+            logger.info("获取信用卡详情: %s", card_id)
             
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id,
-                self._get_credit_card_model().user_id == user_id,
-                self._get_credit_card_model().is_deleted == False
-            ).first()
+            card = self.db.execute(owned_card(card_id, user_id)).scalars().first()
             
             if not card:
                 logger.warning(f"信用卡不存在: {card_id}")
@@ -400,70 +475,19 @@ class CardsService:
             Optional[CardWithAnnualFee]: 信用卡信息（包含年费）
         """
         try:
-            logger.info(f"获取信用卡详情（含年费）: {card_id}")
-            
-            # 导入年费模型
-            from db_models.annual_fee import AnnualFeeRule, AnnualFeeRecord
-            from models.annual_fee import AnnualFeeRule as AnnualFeeRuleModel
-            
-            # 左连接年费规则和记录
-            result = self.db.query(
-                self._get_credit_card_model(),
-                AnnualFeeRule,
-                AnnualFeeRecord
-            ).outerjoin(
-                AnnualFeeRule, 
-                self._get_credit_card_model().annual_fee_rule_id == AnnualFeeRule.id
-            ).outerjoin(
-                AnnualFeeRecord,
-                (AnnualFeeRecord.card_id == self._get_credit_card_model().id) & 
-                (AnnualFeeRecord.fee_year == datetime.now().year)
-            ).filter(
-                self._get_credit_card_model().id == card_id,
-                self._get_credit_card_model().user_id == user_id,
-                self._get_credit_card_model().is_deleted == False
+            logger.info("获取信用卡详情（含年费）: %s", card_id)
+            
+            result = self.db.execute(
+                self._cards_with_annual_fee_statement(user_id).where(
+                    self._get_credit_card_model().id == card_id
+                )
             ).first()
             
             if not result or not result[0]:
                 logger.warning(f"信用卡不存在: {card_id}")
                 return None
             
-            card, rule, record = result
-            
-            # 构建响应数据
-            if rule:
-                annual_fee_rule_data = AnnualFeeRuleModel(
-                    id=rule.id,
-                    fee_type=rule.fee_type,
-                    base_fee=rule.base_fee,
-                    waiver_condition_value=rule.waiver_condition_value,
-                    points_per_yuan=rule.points_per_yuan,
-                    annual_fee_month=rule.annual_fee_month,
-                    annual_fee_day=rule.annual_fee_day,
-                    description=rule.description,
-                    created_at=rule.created_at
-                )
-                next_fee_due_date = None
-                if rule.annual_fee_month and rule.annual_fee_day:
-                    try:
-                        current_year = datetime.now().year
-                        next_fee_due_date = date(current_year, rule.annual_fee_month, rule.annual_fee_day)
-                    except ValueError:
-                        if rule.annual_fee_month == 2 and rule.annual_fee_day == 29:
-                            next_fee_due_date = date(current_year, 2, 28)
-            else:
-                annual_fee_rule_data = None
-                next_fee_due_date = None
-            
-            card_response = CardWithAnnualFee(
-                **Card.model_validate(card).model_dump(),
-                annual_fee_rule=annual_fee_rule_data,
-                has_annual_fee=rule is not None,
-                current_year_fee_status=record.waiver_status if record else None,
-                next_fee_due_date=next_fee_due_date
-            )
-                
-            return card_response
+            return self._build_card_with_annual_fee(*result)
             
         except Exception as e:
             logger.error(f"获取信用卡详情（含年费）失败: {str(e)}")
@@ -487,13 +511,9 @@ class CardsService:
             Optional[Card]: 更新后的信用卡信息
         """
         try:
-            logger.info(f"更新信用卡: {card_id}")
+            logger.info("更新信用卡: %s", card_id)
             
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id,
-                self._get_credit_card_model().user_id == user_id,
-                self._get_credit_card_model().is_deleted == False
-            ).first()
+            card = self.db.execute(owned_card(card_id, user_id)).scalars().first()
             
             if not card:
                 logger.warning(f"信用卡不存在: {card_id}")
@@ -512,7 +532,7 @@ class CardsService:
             self.db.commit()
             self.db.refresh(card)
             
-            logger.info(f"信用卡更新成功: {card_id}")
+            logger.info("信用卡更新成功: %s", card_id)
             return Card.model_validate(card)
             
         except Exception as e:
@@ -538,13 +558,9 @@ class CardsService:
             Optional[CardWithAnnualFee]: 更新后的信用卡信息（包含年费）
         """
         try:
-            logger.info(f"更新信用卡（含年费）: {card_id}")
+            logger.info("更新信用卡（含年费）: %s", card_id)
             
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id,
-                self._get_credit_card_model().user_id == user_id,
-                self._get_credit_card_model().is_deleted == False
-            ).first()
+            card = self.db.execute(owned_card(card_id, user_id)).scalars().first()
             
             if not card:
                 logger.warning(f"信用卡不存在: {card_id}")
@@ -653,7 +669,7 @@ class CardsService:
                 next_fee_due_date=annual_fee_rule.get_annual_due_date(datetime.now().year) if annual_fee_rule else None
             )
             
-            logger.info(f"信用卡（含年费）更新成功: {card_id}")
+            logger.info("信用卡（含年费）更新成功: %s", card_id)
             return card_response
             
         except Exception as e:
@@ -673,13 +689,9 @@ class CardsService:
             bool: 删除是否成功
         """
         try:
-            logger.info(f"删除信用卡: {card_id}")
+            logger.info("删除信用卡: %s", card_id)
             
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id,
-                self._get_credit_card_model().user_id == user_id,
-                self._get_credit_card_model().is_deleted == False
-            ).first()
+            card = self.db.execute(owned_card(card_id, user_id)).scalars().first()
             
             if not card:
                 logger.warning(f"信用卡不存在: {card_id}")
@@ -693,7 +705,7 @@ class CardsService:
             card.is_deleted = True
             self.db.commit()
             
-            logger.info(f"信用卡删除成功: {card_id}")
+            logger.info("信用卡删除成功: %s", card_id)
             return True
             
         except Exception as e:
@@ -703,22 +715,102 @@ class CardsService:
 
     def _create_card_db(self, card_data: dict):
         """创建信用卡数据库记录"""
-        # 这里应该导入实际的CreditCard模型
-        # 为了避免循环导入，使用动态导入
-        from db_models.cards import CreditCard
         return CreditCard(**card_data)
 
-    def _get_credit_card_model(self):
-        """获取信用卡数据库模型"""
-        from db_models.cards import CreditCard
-        return CreditCard
+
+class AsyncCardsService(CardQueryMixin):
+    """
+    信用卡异步服务类
     
-    def _get_fee_type_display(self, fee_type) -> str:
-        """获取年费类型的中文显示名称"""
-        type_display = {
-            "rigid": "刚性年费",
-            "transaction_count": "刷卡次数减免",
-            "transaction_amount": "刷卡金额减免",
-            "points_exchange": "积分兑换减免"
-        }
-        return type_display.get(fee_type, "未知类型") 
\ No newline at end of file
+    基于 AsyncSession 提供信用卡查询，供 async def 接口直接 await，
+    数据库IO期间不占用事件循环。
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        初始化信用卡异步服务
+        
+        Args:
+            db: 异步数据库会话
+        """
+        self.db = db
+
+    async def get_cards_with_annual_fee(
+        self, 
+        user_id: UUID,
+        skip: int = 0, 
+        limit: int = 100, 
+        keyword: str = ""
+    ) -> Tuple[List[CardSummaryWithAnnualFee], int]:
+        """
+        获取信用卡列表（包含年费信息）
+        
+        Args:
+            user_id: 用户ID
+            skip: 跳过记录数
+            limit: 限制记录数
+            keyword: 搜索关键词
+            
+        Returns:
+            Tuple[List[CardSummaryWithAnnualFee], int]: 信用卡列表和总数
+        """
+        try:
+            logger.info("获取信用卡列表（含年费）: user_id=%s, keyword='%s'", user_id, keyword)
+            
+            statement = self._cards_with_annual_fee_statement(user_id, keyword)
+            
+            total = (await self.db.execute(
+                select(func.count()).select_from(statement.subquery())
+            )).scalar_one()
+            
+            results = (await self.db.execute(
+                statement.order_by(
+                    self._get_credit_card_model().created_at.desc()
+                ).offset(skip).limit(limit)
+            )).all()
+            
+            card_summaries = [
+                self._build_card_summary_with_annual_fee(card, rule, record)
+                for card, rule, record in results
+            ]
+            
+            logger.info("找到 %s 张信用卡（含年费），总计 %s 张", len(card_summaries), total)
+            return card_summaries, total
+            
+        except Exception as e:
+            logger.error(f"获取信用卡列表（含年费）失败: {str(e)}")
+            raise Exception(f"获取信用卡列表（含年费）失败: {str(e)}")
+
+    async def get_card_with_annual_fee(
+        self, 
+        card_id: UUID, 
+        user_id: UUID
+    ) -> Optional[CardWithAnnualFee]:
+        """
+        获取单张信用卡详情（包含年费信息）
+        
+        Args:
+            card_id: 信用卡ID
+            user_id: 用户ID
+            
+        Returns:
+            Optional[CardWithAnnualFee]: 信用卡信息（包含年费）
+        """
+        try:
+            logger.info("获取信用卡详情（含年费）: %s", card_id)
+            
+            result = (await self.db.execute(
+                self._cards_with_annual_fee_statement(user_id).where(
+                    self._get_credit_card_model().id == card_id
+                )
+            )).first()
+            
+            if not result or not result[0]:
+                logger.warning(f"信用卡不存在: {card_id}")
+                return None
+            
+            return self._build_card_with_annual_fee(*result)
+            
+        except Exception as e:
+            logger.error(f"获取信用卡详情（含年费）失败: {str(e)}")
+            raise Exception(f"获取信用卡详情（含年费）失败: {str(e)}")
@@ -0,0 +1,91 @@
+"""
+热点查询语句
+
+几乎每个请求都会执行的主键/唯一键查询（信用卡和交易归属校验、用户资料、登录查找、验证码校验）
+使用 lambda_stmt 构建：首次调用时生成语句结构和缓存键并按 lambda 的代码位置缓存，之后的调用
+只提取闭包中的变量作为绑定参数，省去每次重新构建查询对象和计算缓存键的Python开销；
+编译后的SQL由引擎的编译缓存（DB_QUERY_CACHE_SIZE）复用。
+
+lambda 中引用的局部变量会成为绑定参数，调用方只应传入简单值（UUID、字符串、时间等）。
+"""
+
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import lambda_stmt, or_, select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from db_models.cards import CreditCard
+from db_models.transactions import Transaction
+from db_models.users import User, VerificationCode
+
+
+# ==================== 归属校验 ====================
+
+def owned_card(card_id: UUID, user_id: UUID) -> StatementLambdaElement:
+    """用户名下未删除的信用卡"""
+    return lambda_stmt(lambda: select(CreditCard).where(
+        CreditCard.id == card_id,
+        CreditCard.user_id == user_id,
+        CreditCard.is_deleted == False
+    ))
+
+
+def owned_transaction(transaction_id: UUID, user_id: UUID) -> StatementLambdaElement:
+    """用户名下未删除的交易记录"""
+    return lambda_stmt(lambda: select(Transaction).where(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id,
+        Transaction.is_deleted == False
+    ))
+
+
+# ==================== 用户查找 ====================
+
+def user_by_id(user_id: UUID) -> StatementLambdaElement:
+    """按ID查找用户"""
+    return lambda_stmt(lambda: select(User).where(User.id == user_id))
+
+
+def user_by_username(username: str) -> StatementLambdaElement:
+    """按用户名查找用户"""
+    return lambda_stmt(lambda: select(User).where(User.username == username))
+
+
+def user_by_email(email: str) -> StatementLambdaElement:
+    """按邮箱查找用户"""
+    return lambda_stmt(lambda: select(User).where(User.email == email))
+
+
+def user_by_phone(phone: str) -> StatementLambdaElement:
+    """按手机号查找用户"""
+    return lambda_stmt(lambda: select(User).where(User.phone == phone))
+
+
+def user_by_username_or_email(username_or_email: str) -> StatementLambdaElement:
+    """按用户名或邮箱查找用户"""
+    return lambda_stmt(lambda: select(User).where(
+        or_(User.username == username_or_email, User.email == username_or_email)
+    ).limit(1))
+
+
+def user_by_phone_or_email(phone_or_email: str) -> StatementLambdaElement:
+    """按手机号或邮箱查找用户"""
+    return lambda_stmt(lambda: select(User).where(
+        or_(User.phone == phone_or_email, User.email == phone_or_email)
+    ).limit(1))
+
+
+# ==================== 验证码 ====================
+
+def usable_verification_code(
+    phone_or_email: str, code: str, code_type: str, now: datetime
+) -> StatementLambdaElement:
+    """未使用且未过期的验证码"""
+    return lambda_stmt(lambda: select(VerificationCode).where(
+        VerificationCode.phone_or_email == phone_or_email,
+        VerificationCode.code == code,
+        VerificationCode.code_type == code_type,
+        VerificationCode.is_used == False,
+        VerificationCode.expires_at > now
+    ).limit(1))
@@ -0,0 +1,130 @@
+"""
+商户服务
+
+将交易中自由填写的商户名称规范化，并解析为 merchants 表的整数ID。
+
+解析结果缓存在进程内驻留缓存中（规范化名称 -> 商户ID），常见商户无需查询数据库。
+新建商户的ID先暂存在会话中，事务提交后才写入驻留缓存，回滚时丢弃，
+避免缓存中出现未提交（随后被回滚）的商户ID。
+"""
+
+import logging
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from db_models.merchants import Merchant
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 商户名称最大长度，与 merchants / transactions 表字段一致
+MERCHANT_NAME_MAX_LENGTH = 200
+
+# 会话 info 中暂存本事务新解析商户ID的键
+_PENDING_KEY = "pending_merchant_ids"
+
+# 商户ID驻留缓存：商户ID一经分配不再变化，不设过期时间，只按LRU淘汰
+merchant_id_cache: TTLCache[int] = TTLCache(settings.MERCHANT_CACHE_MAX_SIZE, float("inf"))
+
+
+def normalize_merchant_name(name: Optional[str]) -> Optional[str]:
+    """
+    规范化商户名称
+
+    依次进行 NFKC 规范化（全角转半角）、合并连续空白、去除首尾空白、转为小写。
+    迁移 f2a7c9e4b813 中回填历史数据的SQL表达式与此保持一致。
+
+    Returns:
+        规范化后的名称，名称为空时返回None
+    """
+    if name is None:
+        return None
+
+    normalized = " ".join(unicodedata.normalize("NFKC", name).split()).lower()
+    return normalized[:MERCHANT_NAME_MAX_LENGTH] or None
+
+
+class MerchantService:
+    """商户服务类"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def resolve_id(self, name: Optional[str]) -> Optional[int]:
+        """
+        解析单个商户名称对应的商户ID，商户不存在时自动创建
+
+        Returns:
+            商户ID，名称为空时返回None
+        """
+        normalized = normalize_merchant_name(name)
+        if normalized is None:
+            return None
+        return self.resolve_ids([name])[normalized]
+
+    def resolve_ids(self, names: Iterable[Optional[str]]) -> Dict[str, int]:
+        """
+        批量解析商户名称对应的商户ID，不存在的商户在当前事务中一次创建
+
+        Args:
+            names: 原始商户名称，可包含None和重复值
+
+        Returns:
+            Dict[str, int]: 规范化名称 -> 商户ID
+        """
+        display_names: Dict[str, str] = {}
+        for name in names:
+            normalized = normalize_merchant_name(name)
+            if normalized is not None and normalized not in display_names:
+                display_names[normalized] = " ".join(name.split())[:MERCHANT_NAME_MAX_LENGTH]
+
+        pending = self.db.info.get(_PENDING_KEY, {})
+        resolved: Dict[str, int] = {}
+        missing: Dict[str, str] = {}
+        for normalized, display_name in display_names.items():
+            merchant_id = pending.get(normalized) or merchant_id_cache.get(normalized)
+            if merchant_id is None:
+                missing[normalized] = display_name
+            else:
+                resolved[normalized] = merchant_id
+
+        if missing:
+            # 按名称排序插入，并发导入时以相同顺序加锁，避免死锁；
+            # 已存在的商户通过 ON CONFLICT DO UPDATE 同样返回ID
+            stmt = pg_insert(Merchant).values([
+                {"normalized_name": normalized, "name": display_name}
+                for normalized, display_name in sorted(missing.items())
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Merchant.normalized_name],
+                set_={"normalized_name": stmt.excluded.normalized_name}
+            ).returning(Merchant.normalized_name, Merchant.id)
+
+            created = dict(self.db.execute(stmt).all())
+            self.db.info.setdefault(_PENDING_KEY, {}).update(created)
+            resolved.update(created)
+            logger.debug("解析商户ID: 缓存命中 %s 个，查询 %s 个", len(display_names) - len(missing), len(missing))
+
+        return resolved
+
+
+# ==================== 驻留缓存维护 ====================
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_merchant_ids(session: Session) -> None:
+    """事务提交后将新解析的商户ID写入驻留缓存"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for normalized, merchant_id in pending.items():
+            merchant_id_cache.set(normalized, merchant_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_merchant_ids(session: Session, previous_transaction) -> None:
+    """事务回滚时丢弃暂存的商户ID"""
+    session.info.pop(_PENDING_KEY, None)
@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from models.recommendations import Recommendation, RecommendationCreate, RecommendationUpdate
+from db_models.recommendations import Recommendation as RecommendationDB
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +31,7 @@ class RecommendationsService:
     ) -> Tuple[List[Recommendation], int]:
         """获取推荐列表"""
         try:
-            logger.info(f"获取推荐列表: user_id={user_id}, keyword='{keyword}'")
+            logger.info("获取推荐列表: user_id=%s, keyword='%s'", user_id, keyword)
             
             query = self.db.query(self._get_recommendation_model()).filter(
                 self._get_recommendation_model().user_id == user_id,
@@ -149,10 +150,8 @@ class RecommendationsService:
 
     def _create_recommendation_db(self, rec_data: dict):
         """创建推荐数据库记录"""
-        from db_models.recommendations import Recommendation
-        return Recommendation(**rec_data)
+        return RecommendationDB(**rec_data)
 
     def _get_recommendation_model(self):
         """获取推荐数据库模型"""
-        from db_models.recommendations import Recommendation
-        return Recommendation 
\ No newline at end of file
+        return RecommendationDB 
\ No newline at end of file
@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from models.reminders import Reminder, ReminderCreate, ReminderUpdate
+from db_models.reminders import Reminder as ReminderDB
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +32,7 @@ class RemindersService:
     ) -> Tuple[List[Reminder], int]:
         """获取还款提醒列表"""
         try:
-            logger.info(f"获取还款提醒列表: user_id={user_id}, keyword='{keyword}'")
+            logger.info("获取还款提醒列表: user_id=%s, keyword='%s'", user_id, keyword)
             
             query = self.db.query(self._get_reminder_model()).filter(
                 self._get_reminder_model().user_id == user_id,
@@ -173,10 +174,8 @@ class RemindersService:
 
     def _create_reminder_db(self, reminder_data: dict):
         """创建还款提醒数据库记录"""
-        from db_models.reminders import Reminder
-        return Reminder(**reminder_data)
+        return ReminderDB(**reminder_data)
 
     def _get_reminder_model(self):
         """获取还款提醒数据库模型"""
-        from db_models.reminders import Reminder
-        return Reminder 
\ No newline at end of file
+        return ReminderDB 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+交易表分区服务
+
+transactions 表按 transaction_date 以年为单位进行范围分区（transactions_yYYYY），
+未覆盖的年份落入默认分区 transactions_default。本服务负责预先创建未来年份的分区、
+查看分区情况，以及解除旧分区的挂载以便归档。
+
+分区对 TransactionsService 透明：按年份或日期范围过滤的查询由 PostgreSQL 自动裁剪到对应分区。
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 分区表名前缀，分区名为 transactions_y2024 形式
+PARTITION_PREFIX = "transactions_y"
+
+
+def partition_name_for_year(year: int) -> str:
+    """获取指定年份的分区表名"""
+    return f"{PARTITION_PREFIX}{year}"
+
+
+class TransactionPartitionService:
+    """交易表分区服务类"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ensure_partitions(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[str]:
+        """
+        创建缺失的年度分区
+
+        默认分区中已有对应年份的数据会一并移入新分区。
+
+        Args:
+            start_year: 起始年份，默认当前年份
+            end_year: 结束年份（含），默认当前年份加 TRANSACTION_PARTITION_FUTURE_YEARS
+
+        Returns:
+            List[str]: 新建的分区表名
+        """
+        try:
+            current_year = datetime.now().year
+            start_year = start_year or current_year
+            end_year = end_year or current_year + settings.TRANSACTION_PARTITION_FUTURE_YEARS
+
+            created = list(self.db.execute(
+                text("SELECT ensure_transaction_partitions(:start_year, :end_year)"),
+                {"start_year": start_year, "end_year": end_year}
+            ).scalars())
+            self.db.commit()
+
+            if created:
+                logger.info("创建交易分区: %s", ', '.join(created))
+            return created
+
+        except Exception as e:
+            logger.error(f"创建交易分区失败: {str(e)}")
+            self.db.rollback()
+            raise Exception(f"创建交易分区失败: {str(e)}")
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """
+        获取当前挂载的分区
+
+        Returns:
+            List[Dict]: 分区名、分区范围和估算行数
+        """
+        rows = self.db.execute(text("""
+            SELECT child.relname AS name,
+                   pg_get_expr(child.relpartbound, child.oid) AS bounds,
+                   GREATEST(child.reltuples, 0)::BIGINT AS estimated_rows
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'transactions'
+            ORDER BY child.relname
+        """)).mappings().all()
+        return [dict(row) for row in rows]
+
+    def detach_partition(self, year: int) -> str:
+        """
+        解除指定年份分区的挂载
+
+        分区解除后成为独立的普通表，不再出现在交易查询中，可用 pg_dump 导出后删除。
+        月度汇总表中该年份的数据保持不变；此后执行 rebuild-rollups 会将其移除。
+
+        Args:
+            year: 分区年份
+
+        Returns:
+            str: 解除挂载的分区表名
+        """
+        name = partition_name_for_year(year)
+        try:
+            if name not in {partition["name"] for partition in self.list_partitions()}:
+                raise ValueError(f"分区 {name} 不存在或未挂载")
+
+            self.db.execute(text(f'ALTER TABLE transactions DETACH PARTITION "{name}"'))
+            self.db.commit()
+
+            logger.info("交易分区已解除挂载: %s", name)
+            return name
+
+        except Exception as e:
+            logger.error(f"解除交易分区挂载失败: {str(e)}")
+            self.db.rollback()
+            raise Exception(f"解除交易分区挂载失败: {str(e)}")
@@ -0,0 +1,262 @@
+"""
+交易月度汇总服务
+
+维护 transaction_monthly_rollups 和 transaction_merchant_monthly_rollups 预聚合表，
+供交易统计和商户消费排行接口按月读取。
+汇总数据在交易增删改的同一事务内增量更新，也支持全量重建（用于历史数据回填）。
+"""
+
+import calendar
+import logging
+from datetime import datetime, time
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Integer, cast, delete, extract, false, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from db_models.transactions import (
+    Transaction as TransactionDB,
+    TransactionCategory,
+    TransactionMerchantMonthlyRollup,
+    TransactionMonthlyRollup,
+    TransactionType,
+)
+
+logger = logging.getLogger(__name__)
+
+# 月份键：(年, 月)
+MonthKey = Tuple[int, int]
+
+
+def month_range_for_period(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Optional[Tuple[Optional[MonthKey], Optional[MonthKey]]]:
+    """
+    将时间范围转换为整月范围
+
+    只有当开始时间为某月1日零点、结束时间为某月最后一天的 time.max（23:59:59.999999，
+    交易时间列的最大精度）时，该范围才能由月度汇总表精确回答；结束时间为23:59:59等更早时刻时，
+    明细查询的 transaction_date <= end_date 会排除最后一秒内的交易，不能用整月汇总代替。带时区的时间与交易时间列（无时区）的比较
+    依赖数据库会话时区，同样不使用汇总表。
+
+    Returns:
+        (起始月份, 结束月份)，为None的一端表示不限；范围不是整月时返回None
+    """
+    start_month = None
+    end_month = None
+
+    if start_date is not None:
+        if start_date.tzinfo is not None or start_date.day != 1 or start_date.time() != time.min:
+            return None
+        start_month = (start_date.year, start_date.month)
+
+    if end_date is not None:
+        last_day = calendar.monthrange(end_date.year, end_date.month)[1]
+        if end_date.tzinfo is not None or end_date.day != last_day or end_date.time() != time.max:
+            return None
+        end_month = (end_date.year, end_date.month)
+
+    return start_month, end_month
+
+
+class TransactionRollupService:
+    """交易月度汇总服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_transactions(self, transaction_ids: Iterable[UUID], sign: int = 1) -> None:
+        """
+        将指定交易计入（sign=1）或移出（sign=-1）月度汇总和商户月度汇总
+
+        直接从 transactions 表读取交易当前的年月、类型和分类，按汇总键分组后
+        以 INSERT ... ON CONFLICT DO UPDATE 累加，与交易写入处于同一事务，由调用方提交。
+        移出交易需在删除或修改交易记录之前调用。
+
+        Args:
+            transaction_ids: 交易记录ID列表
+            sign: 1表示计入，-1表示移出
+        """
+        transaction_ids = list(transaction_ids)
+        if not transaction_ids:
+            return
+
+        # 确保待写入的交易记录已刷新到数据库
+        self.db.flush()
+
+        criteria = TransactionDB.id.in_(transaction_ids)
+        self.db.execute(self._upsert_from_select(self._rollup_source(sign, criteria)))
+        self.db.execute(self._merchant_upsert_from_select(self._merchant_rollup_source(sign, criteria)))
+
+        if sign < 0:
+            # 清理已无交易的汇总行
+            user_ids = select(TransactionDB.user_id).where(criteria)
+            for rollup_model in (TransactionMonthlyRollup, TransactionMerchantMonthlyRollup):
+                self.db.execute(
+                    delete(rollup_model).where(
+                        rollup_model.user_id.in_(user_ids),
+                        rollup_model.transaction_count <= 0
+                    )
+                )
+
+    def rebuild(self, user_id: Optional[UUID] = None) -> int:
+        """
+        从交易记录全量重建月度汇总和商户月度汇总
+
+        用于首次上线回填或修复数据，在单个事务中删除并重新生成汇总行。
+
+        Args:
+            user_id: 只重建指定用户，为None时重建全部用户
+
+        Returns:
+            int: 重建后的汇总行数
+        """
+        try:
+            logger.info("重建交易月度汇总: %s", '用户' + str(user_id) if user_id else '全部用户')
+
+            criteria = []
+            for rollup_model in (TransactionMonthlyRollup, TransactionMerchantMonthlyRollup):
+                delete_stmt = delete(rollup_model)
+                if user_id:
+                    delete_stmt = delete_stmt.where(rollup_model.user_id == user_id)
+                self.db.execute(delete_stmt)
+            if user_id:
+                criteria.append(TransactionDB.user_id == user_id)
+
+            self.db.execute(self._upsert_from_select(self._rollup_source(1, *criteria)))
+            self.db.execute(self._merchant_upsert_from_select(self._merchant_rollup_source(1, *criteria)))
+            self.db.commit()
+
+            count_query = self.db.query(func.count(TransactionMonthlyRollup.id))
+            if user_id:
+                count_query = count_query.filter(TransactionMonthlyRollup.user_id == user_id)
+            rows = count_query.scalar()
+
+            logger.info("交易月度汇总重建完成，共 %s 行", rows)
+            return rows
+
+        except Exception as e:
+            logger.error(f"重建交易月度汇总失败: {str(e)}")
+            self.db.rollback()
+            raise Exception(f"重建交易月度汇总失败: {str(e)}")
+
+    # ==================== 辅助方法 ====================
+
+    def _rollup_source(self, sign: int, *criteria):
+        """
+        按汇总键分组统计交易的查询，列顺序与 _upsert_from_select 的目标列一致
+
+        Args:
+            sign: 1表示计入，-1表示移出
+            criteria: 交易筛选条件
+        """
+        group_columns = (
+            TransactionDB.user_id,
+            TransactionDB.card_id,
+            cast(extract('year', TransactionDB.transaction_date), Integer),
+            cast(extract('month', TransactionDB.transaction_date), Integer),
+            TransactionDB.transaction_type,
+            func.coalesce(
+                TransactionDB.category,
+                literal(TransactionCategory.OTHER, TransactionDB.category.type)
+            ),
+        )
+        return select(
+            func.gen_random_uuid(),
+            *group_columns,
+            func.count() * sign,
+            func.coalesce(func.sum(TransactionDB.amount), 0) * sign,
+            func.coalesce(func.sum(TransactionDB.points_earned), 0) * sign,
+            func.now(),
+            func.now(),
+            false(),
+        ).where(*criteria).group_by(*group_columns)
+
+    def _upsert_from_select(self, source):
+        """构建从查询结果累加到汇总表的 INSERT ... ON CONFLICT 语句"""
+        rollup = TransactionMonthlyRollup.__table__
+        stmt = pg_insert(rollup).from_select(
+            [
+                rollup.c.id,
+                rollup.c.user_id,
+                rollup.c.card_id,
+                rollup.c.year,
+                rollup.c.month,
+                rollup.c.transaction_type,
+                rollup.c.category,
+                rollup.c.transaction_count,
+                rollup.c.total_amount,
+                rollup.c.points_earned,
+                rollup.c.created_at,
+                rollup.c.updated_at,
+                rollup.c.is_deleted,
+            ],
+            source
+        )
+        return stmt.on_conflict_do_update(
+            constraint="uq_transaction_monthly_rollups_key",
+            set_={
+                "transaction_count": rollup.c.transaction_count + stmt.excluded.transaction_count,
+                "total_amount": rollup.c.total_amount + stmt.excluded.total_amount,
+                "points_earned": rollup.c.points_earned + stmt.excluded.points_earned,
+                "updated_at": func.now(),
+            }
+        )
+
+    def _merchant_rollup_source(self, sign: int, *criteria):
+        """
+        按 (用户, 商户, 年, 月) 分组统计消费交易的查询，列顺序与 _merchant_upsert_from_select 的目标列一致
+
+        Args:
+            sign: 1表示计入，-1表示移出
+            criteria: 交易筛选条件
+        """
+        group_columns = (
+            TransactionDB.user_id,
+            TransactionDB.merchant_id,
+            cast(extract('year', TransactionDB.transaction_date), Integer),
+            cast(extract('month', TransactionDB.transaction_date), Integer),
+        )
+        return select(
+            func.gen_random_uuid(),
+            *group_columns,
+            func.count() * sign,
+            func.coalesce(func.sum(TransactionDB.amount), 0) * sign,
+            func.now(),
+            func.now(),
+            false(),
+        ).where(
+            TransactionDB.transaction_type == TransactionType.EXPENSE,
+            TransactionDB.merchant_id.isnot(None),
+            *criteria
+        ).group_by(*group_columns)
+
+    def _merchant_upsert_from_select(self, source):
+        """构建从查询结果累加到商户月度汇总表的 INSERT ... ON CONFLICT 语句"""
+        rollup = TransactionMerchantMonthlyRollup.__table__
+        stmt = pg_insert(rollup).from_select(
+            [
+                rollup.c.id,
+                rollup.c.user_id,
+                rollup.c.merchant_id,
+                rollup.c.year,
+                rollup.c.month,
+                rollup.c.transaction_count,
+                rollup.c.total_amount,
+                rollup.c.created_at,
+                rollup.c.updated_at,
+                rollup.c.is_deleted,
+            ],
+            source
+        )
+        return stmt.on_conflict_do_update(
+            constraint="uq_transaction_merchant_monthly_rollups_key",
+            set_={
+                "transaction_count": rollup.c.transaction_count + stmt.excluded.transaction_count,
+                "total_amount": rollup.c.total_amount + stmt.excluded.total_amount,
+                "updated_at": func.now(),
+            }
+        )
@@ -4,28 +4,164 @@
 提供交易记录的业务逻辑处理，包括CRUD操作、统计分析、年费进度更新等功能。
 """
 
+import base64
+import csv
+import io
+import json
 import logging
+import re
 from datetime import datetime, date
 from decimal import Decimal
-from typing import List, Optional, Tuple
-from uuid import UUID
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from uuid import UUID, uuid4
 
-from sqlalchemy import and_, or_, func, extract, desc, literal_column, case
+from pydantic import ValidationError
+from sqlalchemy import (
+    and_, or_, func, desc, literal, literal_column, case, cast, tuple_, select, update, insert, DateTime
+)
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 from models.transactions import (
     Transaction,
     TransactionCreate,
     TransactionUpdate,
+    TransactionImportError,
+    TransactionImportResult,
+    TransactionExportFormat,
     TransactionStatistics,
     TransactionCategoryStatistics,
     MonthlyTransactionTrend,
+    TransactionTrendPoint,
+    TrendGranularity,
+    MerchantSuggestion,
+    MerchantSpendingStatistics,
+    MerchantRanking,
     get_transaction_category_display,
 )
-from db_models.transactions import TransactionType, TransactionCategory, TransactionStatus
+from models.response import TotalCountMode
+from models.annual_fee import FeeType
+from db_models.annual_fee import AnnualFeeRecord, AnnualFeeRule
+from db_models.cards import CreditCard
+from db_models.merchants import Merchant
+from db_models.transactions import (
+    Transaction as TransactionDB,
+    TransactionCategory,
+    TransactionMerchantMonthlyRollup,
+    TransactionMonthlyRollup,
+    TransactionStatus,
+    TransactionType,
+)
+from services.merchant_service import MerchantService, normalize_merchant_name
+from services.hot_queries import owned_card, owned_transaction
+from services.transaction_rollup_service import TransactionRollupService, month_range_for_period
+from utils.response import row_serializer
 
 logger = logging.getLogger(__name__)
 
+# 支出类与收入类交易类型
+EXPENSE_TYPES = [TransactionType.EXPENSE, TransactionType.WITHDRAWAL, TransactionType.FEE]
+INCOME_TYPES = [TransactionType.PAYMENT, TransactionType.REFUND]
+
+# 导出的交易字段（按导出列顺序）
+EXPORT_FIELDS = (
+    "id", "card_id", "transaction_type", "amount", "transaction_date", "merchant_name",
+    "description", "category", "status", "points_earned", "points_rate", "reference_number",
+    "location", "is_installment", "installment_count", "notes", "created_at",
+)
+
+# 列表接口按行序列化时查询的交易字段（与 Transaction 响应模型字段顺序一致）
+TRANSACTION_FIELDS = row_serializer(Transaction).fields
+
+# 导出时每批从服务端游标读取的行数
+EXPORT_BATCH_SIZE = 1000
+
+# 各趋势粒度对应的 date_trunc 精度、周期间隔和周期天数下限（用于估算周期数）
+TREND_PERIODS = {
+    TrendGranularity.DAY: ("day", "1 day", 1),
+    TrendGranularity.WEEK: ("week", "1 week", 7),
+    TrendGranularity.MONTH: ("month", "1 month", 28),
+    TrendGranularity.QUARTER: ("quarter", "3 months", 90),
+}
+
+# 单次趋势查询最多返回的周期数
+TREND_MAX_PERIODS = 1000
+
+# 影响月度汇总的交易字段
+ROLLUP_FIELDS = {"card_id", "transaction_type", "amount", "transaction_date", "category", "points_earned", "merchant_id"}
+
+# 影响年费减免进度的交易字段
+ANNUAL_FEE_FIELDS = {"card_id", "transaction_type", "amount", "status", "transaction_date"}
+
+
+class ExplainJson(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) 包装的查询
+
+    作为普通语句执行，内层查询的参数照常绑定（经过各列类型的绑定处理），
+    不需要把参数渲染为字面量。
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(ExplainJson, "postgresql")
+def _compile_explain_json(element: ExplainJson, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def search_query_tokens(keyword: str) -> List[str]:
+    """
+    计算关键词对应的搜索分词
+
+    切分方式与数据库函数 transaction_search_tokens 一致：按空白（及LIKE通配符）切分后，
+    取每段的相邻双字，单字段取单字。包含关键词的文本，其分词数组必然包含这些分词。
+    """
+    tokens = set()
+    for segment in re.split(r"[\s%_]+", keyword.lower()):
+        if len(segment) == 1:
+            tokens.add(segment)
+        tokens.update(segment[i:i + 2] for i in range(len(segment) - 1))
+    return sorted(tokens)
+
+
+def encode_transaction_cursor(transaction_date: datetime, transaction_id: UUID) -> str:
+    """将 (transaction_date, id) 编码为不透明的游标字符串"""
+    payload = json.dumps([transaction_date.isoformat(), str(transaction_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_transaction_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    解析游标字符串
+    
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        transaction_date, transaction_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(transaction_date), UUID(transaction_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+
+def _export_value(value: Any) -> Any:
+    """将导出字段值转换为CSV/JSON可写的基本类型"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
 
 class TransactionsService:
     """交易记录服务"""
@@ -47,16 +183,10 @@ class TransactionsService:
             Transaction: 创建的交易记录
         """
         try:
-            logger.info(f"创建交易记录: 用户{user_id}, 卡片{transaction_data.card_id}")
+            logger.info("创建交易记录: 用户%s, 卡片%s", user_id, transaction_data.card_id)
             
             # 验证信用卡是否属于该用户
-            card = self.db.query(self._get_credit_card_model()).filter(
-                and_(
-                    self._get_credit_card_model().id == transaction_data.card_id,
-                    self._get_credit_card_model().user_id == user_id,
-                    self._get_credit_card_model().is_deleted == False
-                )
-            ).first()
+            card = self.db.execute(owned_card(transaction_data.card_id, user_id)).scalars().first()
             
             if not card:
                 raise ValueError("信用卡不存在或不属于该用户")
@@ -64,6 +194,9 @@ class TransactionsService:
             # 创建交易记录
             transaction_dict = transaction_data.model_dump()
             transaction_dict['user_id'] = user_id
+            transaction_dict['merchant_id'] = MerchantService(self.db).resolve_id(
+                transaction_dict.get('merchant_name')
+            )
             
             # 自动计算积分（如果未提供）
             if transaction_dict.get('points_earned') is None:
@@ -74,15 +207,24 @@ class TransactionsService:
             
             db_transaction = self._create_transaction_db(transaction_dict)
             self.db.add(db_transaction)
-            self.db.commit()
-            self.db.refresh(db_transaction)
+            self.db.flush()
+            
+            # 同一事务内更新月度汇总
+            TransactionRollupService(self.db).apply_transactions([db_transaction.id])
             
-            # 如果是消费交易，更新年费进度
+            # 如果是消费交易，同一事务内更新年费进度
             if (transaction_data.transaction_type == TransactionType.EXPENSE and 
                 transaction_data.status == TransactionStatus.COMPLETED):
-                self._update_annual_fee_progress(transaction_data.card_id, transaction_data.amount)
+                self._update_annual_fee_progress(
+                    transaction_data.card_id,
+                    transaction_data.amount,
+                    transaction_data.transaction_date.year
+                )
+            
+            self.db.commit()
+            self.db.refresh(db_transaction)
             
-            logger.info(f"交易记录创建成功: {db_transaction.id}")
+            logger.info("交易记录创建成功: %s", db_transaction.id)
             return Transaction.model_validate(db_transaction)
             
         except Exception as e:
@@ -90,6 +232,96 @@ class TransactionsService:
             self.db.rollback()
             raise Exception(f"创建交易记录失败: {str(e)}")
 
+    def import_transactions(self, user_id: UUID, rows: List[Dict[str, Any]]) -> TransactionImportResult:
+        """
+        批量导入交易记录
+        
+        适用于导入银行月度账单等大批量数据：
+        - 逐条校验数据格式，无效记录记入错误列表，不影响其他记录
+        - 每张信用卡只校验一次归属
+        - 整批解析商户ID（驻留缓存未命中的商户一次写入）
+        - 整批计算积分，通过多行INSERT一次写入
+        - 月度汇总按批更新，年费进度在最后按卡重新计算一次
+        - 所有有效记录在同一事务中提交
+        
+        Args:
+            user_id: 用户ID
+            rows: 原始交易数据列表
+            
+        Returns:
+            TransactionImportResult: 导入结果，包含逐条错误信息
+        """
+        logger.info("批量导入交易记录: 用户%s, 共 %s 条", user_id, len(rows))
+        
+        errors: List[TransactionImportError] = []
+        validated: List[Tuple[int, TransactionCreate]] = []
+        for index, row in enumerate(rows):
+            try:
+                validated.append((index, TransactionCreate.model_validate(row)))
+            except ValidationError as e:
+                errors.append(TransactionImportError(index=index, error=self._format_validation_error(e)))
+        
+        try:
+            # 每张信用卡只校验一次归属
+            card_model = self._get_credit_card_model()
+            card_ids = {transaction.card_id for _, transaction in validated}
+            owned_card_ids = set()
+            if card_ids:
+                owned_card_ids = {
+                    card_id for (card_id,) in self.db.query(card_model.id).filter(
+                        card_model.id.in_(card_ids),
+                        card_model.user_id == user_id,
+                        card_model.is_deleted == False
+                    )
+                }
+            
+            values = []
+            for index, transaction in validated:
+                if transaction.card_id not in owned_card_ids:
+                    errors.append(TransactionImportError(index=index, error="信用卡不存在或不属于该用户"))
+                    continue
+                values.append({**transaction.model_dump(), "id": uuid4(), "user_id": user_id})
+            
+            # 整批计算未提供的积分，与单条创建使用同一积分规则
+            for value in values:
+                if value["points_earned"] is None:
+                    value["points_earned"] = self._calculate_points(
+                        value["amount"], value["points_rate"] or Decimal("1.0")
+                    )
+            
+            if values:
+                merchant_ids = MerchantService(self.db).resolve_ids(value["merchant_name"] for value in values)
+                for value in values:
+                    value["merchant_id"] = merchant_ids.get(normalize_merchant_name(value["merchant_name"]))
+                
+                self.db.execute(insert(self._get_transaction_model()), values)
+                TransactionRollupService(self.db).apply_transactions(value["id"] for value in values)
+                
+                # 有效消费涉及的信用卡和年份，按卡按年重新计算一次年费进度
+                fee_card_years = {
+                    (value["card_id"], value["transaction_date"].year) for value in values
+                    if value["transaction_type"] == TransactionType.EXPENSE
+                    and value["status"] == TransactionStatus.COMPLETED
+                }
+                for card_id, fee_year in fee_card_years:
+                    self._recalculate_annual_fee_progress(card_id, fee_year)
+                
+                self.db.commit()
+            
+        except Exception as e:
+            logger.error(f"批量导入交易记录失败: {str(e)}")
+            self.db.rollback()
+            raise Exception(f"批量导入交易记录失败: {str(e)}")
+        
+        errors.sort(key=lambda error: error.index)
+        logger.info("批量导入完成: 成功 %s 条，失败 %s 条", len(values), len(errors))
+        return TransactionImportResult(
+            total=len(rows),
+            success_count=len(values),
+            error_count=len(errors),
+            errors=errors
+        )
+
     def get_transactions(
         self,
         user_id: UUID,
@@ -105,7 +337,8 @@ class TransactionsService:
         keyword: str = "",
         skip: int = 0,
         limit: int = 100,
-    ) -> Tuple[List[Transaction], int]:
+        as_rows: bool = False,
+    ) -> Tuple[Union[List[Transaction], List[Sequence[Any]]], int]:
         """
         获取交易记录列表
         
@@ -125,70 +358,231 @@ class TransactionsService:
             keyword: 关键词模糊搜索
             skip: 跳过的记录数
             limit: 返回的记录数限制
+            as_rows: 只查询 TRANSACTION_FIELDS 并返回行元组，供 ResponseUtil.fast_paginated 直接序列化
         """
         try:
-            logger.info(f"获取交易记录列表: 用户{user_id}")
-            
-            query = self.db.query(self._get_transaction_model()).filter(
-                self._get_transaction_model().user_id == user_id
+            logger.info("获取交易记录列表: 用户%s", user_id)
+            
+            query = self._build_transactions_query(
+                user_id=user_id,
+                card_id=card_id,
+                transaction_type=transaction_type,
+                category=category,
+                status=status,
+                start_date=start_date,
+                end_date=end_date,
+                merchant_name=merchant_name,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                keyword=keyword,
             )
             
-            # 基础过滤条件
-            if card_id:
-                query = query.filter(self._get_transaction_model().card_id == card_id)
-            if transaction_type:
-                query = query.filter(self._get_transaction_model().transaction_type == transaction_type)
-            if category:
-                query = query.filter(self._get_transaction_model().category == category)
-            if status:
-                query = query.filter(self._get_transaction_model().status == status)
-            if start_date:
-                query = query.filter(self._get_transaction_model().transaction_date >= start_date)
-            if end_date:
-                query = query.filter(self._get_transaction_model().transaction_date <= end_date)
-            if min_amount:
-                query = query.filter(self._get_transaction_model().amount >= min_amount)
-            if max_amount:
-                query = query.filter(self._get_transaction_model().amount <= max_amount)
-            if merchant_name:
-                query = query.filter(self._get_transaction_model().merchant_name.ilike(f"%{merchant_name}%"))
-            
-            # 关键词模糊搜索
-            if keyword:
-                keyword_filter = f"%{keyword}%"
-                query = query.filter(
-                    or_(
-                        self._get_transaction_model().merchant_name.ilike(keyword_filter),
-                        self._get_transaction_model().description.ilike(keyword_filter),
-                        self._get_transaction_model().notes.ilike(keyword_filter),
-                        self._get_transaction_model().location.ilike(keyword_filter)
-                    )
-                )
-            
             # 获取总数
             total = query.count()
             
+            if as_rows:
+                query = self._with_transaction_fields(query)
+            
             # 获取分页数据，按交易时间倒序
             transactions = query.order_by(
                 desc(self._get_transaction_model().transaction_date),
                 desc(self._get_transaction_model().created_at)
             ).offset(skip).limit(limit).all()
             
-            logger.info(f"找到 {len(transactions)} 条交易记录，总计 {total} 条")
+            logger.info("找到 %s 条交易记录，总计 %s 条", len(transactions), total)
+            if as_rows:
+                return transactions, total
             return [Transaction.model_validate(transaction) for transaction in transactions], total
             
         except Exception as e:
             logger.error(f"获取交易记录列表失败: {str(e)}")
             raise Exception(f"获取交易记录列表失败: {str(e)}")
 
+    def get_transactions_by_cursor(
+        self,
+        user_id: UUID,
+        card_id: Optional[UUID] = None,
+        transaction_type: Optional[TransactionType] = None,
+        category: Optional[TransactionCategory] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        merchant_name: Optional[str] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: str = "",
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        total_mode: TotalCountMode = TotalCountMode.NONE,
+        as_rows: bool = False,
+    ) -> Tuple[Union[List[Transaction], List[Sequence[Any]]], Optional[str], Optional[int]]:
+        """
+        基于游标（keyset）获取交易记录列表
+        
+        按 (transaction_date, id) 倒序排列，使用上一页最后一条记录的位置作为游标，
+        翻页耗时不随页码增长。总数默认不计算，可按需返回精确值或执行计划估算值。
+        
+        Args:
+            cursor: 上一页返回的游标，为空时从第一条开始
+            limit: 返回的记录数限制
+            total_mode: 总数计算方式（none/exact/estimated）
+            as_rows: 只查询 TRANSACTION_FIELDS 并返回行元组
+            其余参数同 get_transactions
+            
+        Returns:
+            Tuple[List[Transaction], Optional[str], Optional[int]]: 交易记录、下一页游标（无更多数据时为None）、总数
+            
+        Raises:
+            ValueError: 游标格式无效
+        """
+        position = decode_transaction_cursor(cursor) if cursor else None
+        
+        try:
+            logger.info("游标获取交易记录列表: 用户%s", user_id)
+            transaction_model = self._get_transaction_model()
+            
+            query = self._build_transactions_query(
+                user_id=user_id,
+                card_id=card_id,
+                transaction_type=transaction_type,
+                category=category,
+                status=status,
+                start_date=start_date,
+                end_date=end_date,
+                merchant_name=merchant_name,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                keyword=keyword,
+            )
+            
+            total = None
+            if total_mode == TotalCountMode.EXACT:
+                total = query.count()
+            elif total_mode == TotalCountMode.ESTIMATED:
+                total = self._estimate_row_count(query)
+            
+            if position:
+                query = query.filter(
+                    tuple_(transaction_model.transaction_date, transaction_model.id) < tuple_(*position)
+                )
+            
+            if as_rows:
+                query = self._with_transaction_fields(query)
+            
+            # 多取一条用于判断是否还有下一页
+            rows = query.order_by(
+                desc(transaction_model.transaction_date),
+                desc(transaction_model.id)
+            ).limit(limit + 1).all()
+            
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_transaction_cursor(rows[-1].transaction_date, rows[-1].id)
+            
+            logger.info("找到 %s 条交易记录，是否有下一页: %s", len(rows), next_cursor is not None)
+            if as_rows:
+                return rows, next_cursor, total
+            return [Transaction.model_validate(transaction) for transaction in rows], next_cursor, total
+            
+        except Exception as e:
+            logger.error(f"游标获取交易记录列表失败: {str(e)}")
+            raise Exception(f"获取交易记录列表失败: {str(e)}")
+
+    def export_transactions(
+        self,
+        user_id: UUID,
+        export_format: TransactionExportFormat = TransactionExportFormat.CSV,
+        card_id: Optional[UUID] = None,
+        transaction_type: Optional[TransactionType] = None,
+        category: Optional[TransactionCategory] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        merchant_name: Optional[str] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: str = "",
+    ) -> Iterator[str]:
+        """
+        流式导出交易记录
+        
+        使用服务端游标按批读取（yield_per），逐批生成CSV或NDJSON文本块，
+        内存占用与导出总量无关。只查询导出字段并直接序列化元组，不构造ORM对象和Pydantic模型。
+        筛选条件与 get_transactions 相同，按交易时间倒序导出。
+        
+        查询在调用时立即执行，查询或连接失败在此抛出，调用方可以在开始发送响应前返回错误；
+        返回的迭代器只负责逐批序列化结果。
+        
+        Returns:
+            Iterator[str]: 导出内容文本块
+        """
+        try:
+            logger.info("导出交易记录: 用户%s, 格式%s", user_id, export_format.value)
+            transaction_model = self._get_transaction_model()
+            
+            query = self._build_transactions_query(
+                user_id=user_id,
+                card_id=card_id,
+                transaction_type=transaction_type,
+                category=category,
+                status=status,
+                start_date=start_date,
+                end_date=end_date,
+                merchant_name=merchant_name,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                keyword=keyword,
+            ).with_entities(
+                *(getattr(transaction_model, field) for field in EXPORT_FIELDS)
+            ).order_by(
+                desc(transaction_model.transaction_date),
+                desc(transaction_model.id)
+            )
+            
+            result = self.db.execute(
+                query.statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+            )
+        except Exception as e:
+            logger.error(f"导出交易记录失败: {str(e)}")
+            raise Exception(f"导出交易记录失败: {str(e)}")
+        
+        return self._serialize_export(result, export_format)
+
+    def _serialize_export(self, result, export_format: TransactionExportFormat) -> Iterator[str]:
+        """逐批将导出查询结果序列化为CSV或NDJSON文本块，结束或中断时关闭游标"""
+        exported = 0
+        try:
+            if export_format == TransactionExportFormat.CSV:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_FIELDS)
+                for rows in result.partitions(EXPORT_BATCH_SIZE):
+                    writer.writerows(map(_export_value, row) for row in rows)
+                    exported += len(rows)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if exported == 0:
+                    yield buffer.getvalue()
+            else:
+                for rows in result.partitions(EXPORT_BATCH_SIZE):
+                    exported += len(rows)
+                    yield "".join(
+                        json.dumps(
+                            {field: _export_value(value) for field, value in zip(EXPORT_FIELDS, row)},
+                            ensure_ascii=False
+                        ) + "\n"
+                        for row in rows
+                    )
+        finally:
+            result.close()
+            logger.info("交易记录导出结束，共 %s 条", exported)
+
     def get_transaction(self, transaction_id: UUID, user_id: UUID) -> Optional[Transaction]:
         """获取单个交易记录"""
         try:
-            transaction = self.db.query(self._get_transaction_model()).filter(
-                self._get_transaction_model().id == transaction_id,
-                self._get_transaction_model().user_id == user_id,
-                self._get_transaction_model().is_deleted == False
-            ).first()
+            transaction = self.db.execute(owned_transaction(transaction_id, user_id)).scalars().first()
             
             if not transaction:
                 return None
@@ -207,16 +601,14 @@ class TransactionsService:
     ) -> Optional[Transaction]:
         """更新交易记录"""
         try:
-            transaction = self.db.query(self._get_transaction_model()).filter(
-                self._get_transaction_model().id == transaction_id,
-                self._get_transaction_model().user_id == user_id,
-                self._get_transaction_model().is_deleted == False
-            ).first()
+            transaction = self.db.execute(owned_transaction(transaction_id, user_id)).scalars().first()
             
             if not transaction:
                 return None
             
             update_data = transaction_data.model_dump(exclude_unset=True)
+            if 'merchant_name' in update_data:
+                update_data['merchant_id'] = MerchantService(self.db).resolve_id(update_data['merchant_name'])
             
             # 验证信用卡是否属于用户（如果更新了card_id）
             if 'card_id' in update_data and update_data['card_id']:
@@ -229,10 +621,29 @@ class TransactionsService:
                 if not card:
                     raise ValueError("指定的信用卡不存在或不属于当前用户")
             
+            # 影响月度汇总的字段变化时，先移出旧值再计入新值
+            rollup_service = TransactionRollupService(self.db)
+            affects_rollup = bool(ROLLUP_FIELDS.intersection(update_data))
+            if affects_rollup:
+                rollup_service.apply_transactions([transaction.id], sign=-1)
+            
+            # 影响年费进度的字段变化时，原卡片原年份和新卡片新年份都要重新计算
+            affects_annual_fee = bool(ANNUAL_FEE_FIELDS.intersection(update_data))
+            fee_card_years = {(transaction.card_id, transaction.transaction_date.year)}
+            
             for field, value in update_data.items():
                 if hasattr(transaction, field):
                     setattr(transaction, field, value)
             
+            if affects_rollup:
+                rollup_service.apply_transactions([transaction.id])
+            
+            if affects_annual_fee:
+                fee_card_years.add((transaction.card_id, transaction.transaction_date.year))
+                self.db.flush()
+                for card_id, fee_year in fee_card_years:
+                    self._recalculate_annual_fee_progress(card_id, fee_year)
+            
             self.db.commit()
             self.db.refresh(transaction)
             
@@ -255,7 +666,7 @@ class TransactionsService:
             bool: 删除是否成功
         """
         try:
-            logger.info(f"删除交易记录: {transaction_id}")
+            logger.info("删除交易记录: %s", transaction_id)
             
             transaction = self.db.query(self._get_transaction_model()).filter(
                 and_(
@@ -269,15 +680,18 @@ class TransactionsService:
                 return False
             
             card_id = transaction.card_id
+            fee_year = transaction.transaction_date.year
             
-            # 删除交易记录
+            # 删除交易记录，同一事务内从月度汇总中移出
+            TransactionRollupService(self.db).apply_transactions([transaction.id], sign=-1)
             self.db.delete(transaction)
-            self.db.commit()
+            self.db.flush()
             
-            # 重新计算年费进度
-            self._recalculate_annual_fee_progress(card_id)
+            # 同一事务内重新计算交易所在年份的年费进度
+            self._recalculate_annual_fee_progress(card_id, fee_year)
+            self.db.commit()
             
-            logger.info(f"交易记录删除成功: {transaction_id}")
+            logger.info("交易记录删除成功: %s", transaction_id)
             return True
             
         except Exception as e:
@@ -307,52 +721,36 @@ class TransactionsService:
             TransactionStatistics: 统计信息
         """
         try:
-            logger.info(f"获取交易统计: 用户{user_id}")
-            
-            query = self.db.query(self._get_transaction_model()).filter(
-                self._get_transaction_model().user_id == user_id
+            logger.info("获取交易统计: 用户%s", user_id)
+            
+            # 整月范围直接读取月度汇总表，否则回退到交易明细聚合
+            month_range = month_range_for_period(start_date, end_date)
+            if month_range is not None:
+                rows = self._statistics_rows_from_rollup(user_id, card_id, *month_range)
+            else:
+                rows = self._statistics_rows_from_transactions(user_id, card_id, start_date, end_date)
+            
+            # 基础统计（汇总各分类的聚合行）
+            total_transactions = sum(row.transaction_count for row in rows)
+            total_amount = sum(row.total_amount for row in rows)
+            expense_amount = sum(row.expense_amount for row in rows)
+            income_amount = sum(row.income_amount for row in rows)
+            points_earned = sum(row.points_earned for row in rows)
+            
+            # 分类统计（仅统计消费交易），按消费金额降序
+            category_rows = sorted(
+                (row for row in rows if row.category_count > 0),
+                key=lambda row: row.category_amount,
+                reverse=True
             )
-            
-            if card_id:
-                query = query.filter(self._get_transaction_model().card_id == card_id)
-            if start_date:
-                query = query.filter(self._get_transaction_model().transaction_date >= start_date)
-            if end_date:
-                query = query.filter(self._get_transaction_model().transaction_date <= end_date)
-            
-            transactions = query.all()
-            
-            # 基础统计
-            total_transactions = len(transactions)
-            total_amount = sum(t.amount for t in transactions)
-            expense_amount = sum(
-                t.amount for t in transactions 
-                if t.transaction_type in [TransactionType.EXPENSE, TransactionType.WITHDRAWAL, TransactionType.FEE]
-            )
-            income_amount = sum(
-                t.amount for t in transactions 
-                if t.transaction_type in [TransactionType.PAYMENT, TransactionType.REFUND]
-            )
-            points_earned = sum(t.points_earned or 0 for t in transactions)
-            
-            # 分类统计
-            category_stats = {}
-            for transaction in transactions:
-                if transaction.transaction_type == TransactionType.EXPENSE:
-                    category = transaction.category
-                    if category not in category_stats:
-                        category_stats[category] = {"count": 0, "amount": Decimal("0")}
-                    category_stats[category]["count"] += 1
-                    category_stats[category]["amount"] += transaction.amount
-            
             categories = [
                 {
-                    "category": category.value,
-                    "category_display": get_transaction_category_display(category),
-                    "count": stats["count"],
-                    "amount": float(stats["amount"])
+                    "category": row.category.value,
+                    "category_display": get_transaction_category_display(row.category),
+                    "count": row.category_count,
+                    "amount": float(row.category_amount)
                 }
-                for category, stats in category_stats.items()
+                for row in category_rows
             ]
             
             return TransactionStatistics(
@@ -386,27 +784,48 @@ class TransactionsService:
             List[TransactionCategoryStatistics]: 分类统计列表
         """
         try:
-            logger.info(f"获取分类统计: 用户{user_id}")
-            
-            query = self.db.query(
-                self._get_transaction_model().category,
-                func.count().label('transaction_count'),
-                func.sum(self._get_transaction_model().amount).label('total_amount')
-            ).filter(
-                and_(
-                    self._get_transaction_model().user_id == user_id,
-                    self._get_transaction_model().transaction_type == TransactionType.EXPENSE
+            logger.info("获取分类统计: 用户%s", user_id)
+            
+            month_range = month_range_for_period(start_date, end_date)
+            if month_range is not None:
+                # 整月范围直接读取月度汇总表
+                rollup_model = self._get_rollup_model()
+                query = self.db.query(
+                    rollup_model.category,
+                    func.sum(rollup_model.transaction_count).label('transaction_count'),
+                    func.sum(rollup_model.total_amount).label('total_amount')
+                ).filter(
+                    and_(
+                        rollup_model.user_id == user_id,
+                        rollup_model.transaction_type == TransactionType.EXPENSE
+                    )
                 )
-            )
-            
-            if start_date:
-                query = query.filter(self._get_transaction_model().transaction_date >= start_date)
-            if end_date:
-                query = query.filter(self._get_transaction_model().transaction_date <= end_date)
-            
-            results = query.group_by(
-                self._get_transaction_model().category
-            ).order_by(func.sum(self._get_transaction_model().amount).desc()).all()
+                query = self._filter_rollup_months(query, *month_range)
+                
+                results = query.group_by(
+                    rollup_model.category
+                ).order_by(func.sum(rollup_model.total_amount).desc()).all()
+            else:
+                category = self._category_or_other()
+                query = self.db.query(
+                    category,
+                    func.count().label('transaction_count'),
+                    func.sum(self._get_transaction_model().amount).label('total_amount')
+                ).filter(
+                    and_(
+                        self._get_transaction_model().user_id == user_id,
+                        self._get_transaction_model().transaction_type == TransactionType.EXPENSE
+                    )
+                )
+                
+                if start_date:
+                    query = query.filter(self._get_transaction_model().transaction_date >= start_date)
+                if end_date:
+                    query = query.filter(self._get_transaction_model().transaction_date <= end_date)
+                
+                results = query.group_by(
+                    category
+                ).order_by(func.sum(self._get_transaction_model().amount).desc()).all()
             
             # 计算总金额用于百分比计算
             total_amount = sum(result.total_amount for result in results)
@@ -425,7 +844,7 @@ class TransactionsService:
                     percentage=percentage
                 ))
             
-            logger.info(f"分类统计获取成功，共 {len(statistics)} 个分类")
+            logger.info("分类统计获取成功，共 %s 个分类", len(statistics))
             return statistics
             
         except Exception as e:
@@ -453,194 +872,525 @@ class TransactionsService:
             if year is None:
                 year = datetime.now().year
                 
-            logger.info(f"获取月度趋势: 用户{user_id}, 年份{year}")
-            
-            query = self.db.query(
-                extract('month', self._get_transaction_model().transaction_date).label('month'),
-                func.count().label('transaction_count'),
-                func.coalesce(func.sum(
-                    case(
-                        (self._get_transaction_model().transaction_type.in_([
-                            TransactionType.EXPENSE, 
-                            TransactionType.WITHDRAWAL, 
-                            TransactionType.FEE
-                        ]), self._get_transaction_model().amount),
-                        else_=0
-                    )
-                ), 0).label('expense_amount'),
-                func.coalesce(func.sum(
-                    case(
-                        (self._get_transaction_model().transaction_type.in_([
-                            TransactionType.PAYMENT, 
-                            TransactionType.REFUND
-                        ]), self._get_transaction_model().amount),
-                        else_=0
-                    )
-                ), 0).label('income_amount'),
-                func.sum(self._get_transaction_model().amount).label('total_amount')
-            ).filter(
-                and_(
-                    self._get_transaction_model().user_id == user_id,
-                    extract('year', self._get_transaction_model().transaction_date) == year
-                )
+            logger.info("获取月度趋势: 用户%s, 年份%s", user_id, year)
+            
+            # 从月度汇总表读取，最多12个月份分组；generate_series 生成全年12个月，
+            # 没有数据的月份由 LEFT JOIN 得到0
+            rollup_model = self._get_rollup_model()
+            totals = select(
+                rollup_model.month,
+                func.sum(rollup_model.transaction_count).label('transaction_count'),
+                func.sum(rollup_model.total_amount).filter(
+                    rollup_model.transaction_type.in_(EXPENSE_TYPES)
+                ).label('expense_amount'),
+                func.sum(rollup_model.total_amount).filter(
+                    rollup_model.transaction_type.in_(INCOME_TYPES)
+                ).label('income_amount'),
+                func.sum(rollup_model.total_amount).label('total_amount')
+            ).where(
+                rollup_model.user_id == user_id,
+                rollup_model.year == year
             )
             
             if card_id:
-                query = query.filter(self._get_transaction_model().card_id == card_id)
-            
-            results = query.group_by(
-                extract('month', self._get_transaction_model().transaction_date)
-            ).order_by('month').all()
-            
-            # 填充所有月份（没有数据的月份用0填充）
-            trends = []
-            result_dict = {result.month: result for result in results}
-            
-            for month in range(1, 13):
-                result = result_dict.get(month)
-                if result:
-                    trends.append(MonthlyTransactionTrend(
-                        year=year,
-                        month=int(result.month),
-                        transaction_count=result.transaction_count,
-                        total_amount=result.total_amount or 0,
-                        expense_amount=result.expense_amount or 0,
-                        income_amount=result.income_amount or 0
-                    ))
-                else:
-                    trends.append(MonthlyTransactionTrend(
-                        year=year,
-                        month=month,
-                        transaction_count=0,
-                        total_amount=Decimal("0"),
-                        expense_amount=Decimal("0"),
-                        income_amount=Decimal("0")
-                    ))
-            
-            logger.info(f"月度趋势获取成功，共 {len(trends)} 个月")
+                totals = totals.where(rollup_model.card_id == card_id)
+            
+            totals = totals.group_by(rollup_model.month).subquery()
+            months = func.generate_series(1, 12).table_valued("month").render_derived(name="months")
+            
+            results = self.db.execute(
+                select(
+                    months.c.month,
+                    func.coalesce(totals.c.transaction_count, 0).label('transaction_count'),
+                    func.coalesce(totals.c.total_amount, 0).label('total_amount'),
+                    func.coalesce(totals.c.expense_amount, 0).label('expense_amount'),
+                    func.coalesce(totals.c.income_amount, 0).label('income_amount')
+                )
+                .select_from(months.outerjoin(totals, totals.c.month == months.c.month))
+                .order_by(months.c.month)
+            ).all()
+            
+            trends = [
+                MonthlyTransactionTrend(
+                    year=year,
+                    month=result.month,
+                    transaction_count=result.transaction_count,
+                    total_amount=result.total_amount,
+                    expense_amount=result.expense_amount,
+                    income_amount=result.income_amount
+                )
+                for result in results
+            ]
+            
+            logger.info("月度趋势获取成功，共 %s 个月", len(trends))
             return trends
             
         except Exception as e:
             logger.error(f"获取月度趋势失败: {str(e)}")
             raise Exception(f"获取月度趋势失败: {str(e)}")
 
-    # ==================== 年费进度相关 ====================
-
-    def _update_annual_fee_progress(self, card_id: UUID, transaction_amount: Decimal):
+    def get_transaction_trend(
+        self,
+        user_id: UUID,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: TrendGranularity = TrendGranularity.MONTH,
+        card_id: Optional[UUID] = None
+    ) -> List[TransactionTrendPoint]:
         """
-        更新年费减免进度
+        获取任意时间范围、按指定粒度统计的交易趋势
+        
+        时间范围为左闭右开区间 [start_date, end_date)，直接作为 transaction_date 上的范围条件，
+        可使用 (user_id, transaction_date) 索引并裁剪到对应年度分区。按 date_trunc 截断后的周期分组，
+        由 generate_series 生成范围内的全部周期并 LEFT JOIN 聚合结果，没有交易的周期返回0。
+        第一个周期从 start_date 所在周期的开始时间算起。
         
         Args:
-            card_id: 信用卡ID
-            transaction_amount: 交易金额
+            user_id: 用户ID
+            start_date: 开始时间（含）
+            end_date: 结束时间（不含）
+            granularity: 统计粒度（day/week/month/quarter）
+            card_id: 信用卡ID过滤
+            
+        Returns:
+            List[TransactionTrendPoint]: 按周期开始时间升序的趋势数据
+            
+        Raises:
+            ValueError: 时间范围无效或周期数超过 TREND_MAX_PERIODS
         """
+        precision, step, min_days = TREND_PERIODS[granularity]
+        if start_date >= end_date:
+            raise ValueError("结束时间必须晚于开始时间")
+        if (end_date - start_date).days // min_days + 1 > TREND_MAX_PERIODS:
+            raise ValueError(f"统计周期数不能超过{TREND_MAX_PERIODS}个，请缩小时间范围或增大统计粒度")
+        
         try:
-            current_year = date.today().year
+            logger.info("获取交易趋势: 用户%s, %s ~ %s, 粒度%s", user_id, start_date, end_date, granularity.value)
+            transaction_model = self._get_transaction_model()
             
-            # 获取年费记录
-            annual_fee_record = self.db.query(self._get_annual_fee_record_model()).filter(
-                and_(
-                    self._get_annual_fee_record_model().card_id == card_id,
-                    self._get_annual_fee_record_model().fee_year == current_year
+            period_start = func.date_trunc(precision, transaction_model.transaction_date)
+            totals = select(
+                period_start.label('period_start'),
+                func.count().label('transaction_count'),
+                func.sum(transaction_model.amount).label('total_amount'),
+                func.sum(transaction_model.amount).filter(
+                    transaction_model.transaction_type.in_(EXPENSE_TYPES)
+                ).label('expense_amount'),
+                func.sum(transaction_model.amount).filter(
+                    transaction_model.transaction_type.in_(INCOME_TYPES)
+                ).label('income_amount')
+            ).where(
+                transaction_model.user_id == user_id,
+                transaction_model.transaction_date >= start_date,
+                transaction_model.transaction_date < end_date
+            )
+            
+            if card_id:
+                totals = totals.where(transaction_model.card_id == card_id)
+            
+            totals = totals.group_by(period_start).subquery()
+            
+            range_start = cast(literal(start_date), DateTime)
+            range_end = cast(literal(end_date), DateTime)
+            periods = func.generate_series(
+                func.date_trunc(precision, range_start), range_end, cast(literal(step), INTERVAL)
+            ).table_valued("period_start").render_derived(name="periods")
+            
+            results = self.db.execute(
+                select(
+                    periods.c.period_start,
+                    func.coalesce(totals.c.transaction_count, 0).label('transaction_count'),
+                    func.coalesce(totals.c.total_amount, 0).label('total_amount'),
+                    func.coalesce(totals.c.expense_amount, 0).label('expense_amount'),
+                    func.coalesce(totals.c.income_amount, 0).label('income_amount')
                 )
-            ).first()
+                .select_from(periods.outerjoin(totals, totals.c.period_start == periods.c.period_start))
+                .where(periods.c.period_start < range_end)
+                .order_by(periods.c.period_start)
+            ).all()
             
-            if not annual_fee_record:
-                return
+            trends = [
+                TransactionTrendPoint(
+                    period_start=result.period_start,
+                    transaction_count=result.transaction_count,
+                    total_amount=result.total_amount,
+                    expense_amount=result.expense_amount,
+                    income_amount=result.income_amount
+                )
+                for result in results
+            ]
             
-            # 获取年费规则
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id
-            ).first()
+            logger.info("交易趋势获取成功，共 %s 个周期", len(trends))
+            return trends
             
-            if not card or not card.annual_fee_rule_id:
-                return
+        except Exception as e:
+            logger.error(f"获取交易趋势失败: {str(e)}")
+            raise Exception(f"获取交易趋势失败: {str(e)}")
+
+    def get_merchant_ranking(
+        self,
+        user_id: UUID,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        months: int = 1,
+        limit: int = 10
+    ) -> MerchantRanking:
+        """
+        获取商户消费排行
+        
+        本期为截至 year 年 month 月（含）的 months 个整月，上期为紧邻其前的相同月数。
+        只读取商户月度汇总表，一次查询按商户聚合本期和上期数据，开销与商户数量相关，
+        与交易笔数无关。
+        
+        Args:
+            user_id: 用户ID
+            year: 本期结束年份，默认当前年份
+            month: 本期结束月份，默认当前月份（指定往年时默认12月）
+            months: 统计周期月数
+            limit: 每个排行返回的商户数
             
-            rule = self.db.query(self._get_annual_fee_rule_model()).filter(
-                self._get_annual_fee_rule_model().id == card.annual_fee_rule_id
-            ).first()
+        Returns:
+            MerchantRanking: 按金额和按笔数的商户排行
+        """
+        try:
+            now = datetime.now()
+            year = year or now.year
+            month = month or (now.month if year == now.year else 12)
+            
+            logger.info("获取商户消费排行: 用户%s, 截至%s-%02d, %s个月", user_id, year, month, months)
+            
+            # 以 年*12+月-1 作为月份序号计算本期与上期范围
+            def month_of(index: int) -> Tuple[int, int]:
+                key_year, key_month = divmod(index, 12)
+                return key_year, key_month + 1
+            
+            end_index = year * 12 + month - 1
+            start_index = end_index - months + 1
+            period_start, period_end = month_of(start_index), month_of(end_index)
+            previous_start, previous_end = month_of(start_index - months), month_of(start_index - 1)
+            
+            rollup_model = self._get_merchant_rollup_model()
+            merchant_model = self._get_merchant_model()
+            month_key = tuple_(rollup_model.year, rollup_model.month)
+            in_period = month_key >= tuple_(*period_start)
+            
+            results = self.db.query(
+                rollup_model.merchant_id,
+                merchant_model.name.label('merchant_name'),
+                func.coalesce(func.sum(rollup_model.transaction_count).filter(in_period), 0).label('transaction_count'),
+                func.coalesce(func.sum(rollup_model.total_amount).filter(in_period), 0).label('total_amount'),
+                func.coalesce(func.sum(rollup_model.transaction_count).filter(~in_period), 0).label('previous_count'),
+                func.coalesce(func.sum(rollup_model.total_amount).filter(~in_period), 0).label('previous_amount'),
+            ).join(
+                merchant_model, merchant_model.id == rollup_model.merchant_id
+            ).filter(
+                rollup_model.user_id == user_id,
+                month_key >= tuple_(*previous_start),
+                month_key <= tuple_(*period_end)
+            ).group_by(
+                rollup_model.merchant_id, merchant_model.name
+            ).all()
             
-            if not rule:
-                return
+            current = [result for result in results if result.transaction_count > 0]
+            total_amount = sum((result.total_amount for result in current), Decimal("0"))
             
-            # 根据规则类型更新进度
-            from models.annual_fee import FeeType
+            def to_statistics(result) -> MerchantSpendingStatistics:
+                amount_change = result.total_amount - result.previous_amount
+                return MerchantSpendingStatistics(
+                    merchant_id=result.merchant_id,
+                    merchant_name=result.merchant_name,
+                    transaction_count=result.transaction_count,
+                    total_amount=result.total_amount,
+                    percentage=round(float(result.total_amount / total_amount * 100), 2) if total_amount > 0 else 0.0,
+                    previous_transaction_count=result.previous_count,
+                    previous_total_amount=result.previous_amount,
+                    count_change=result.transaction_count - result.previous_count,
+                    amount_change=amount_change,
+                    amount_change_rate=(
+                        round(float(amount_change / result.previous_amount * 100), 2)
+                        if result.previous_amount > 0 else None
+                    )
+                )
             
-            if rule.fee_type == FeeType.TRANSACTION_COUNT:
-                # 刷卡次数：增加1次
-                annual_fee_record.current_progress += 1
-            elif rule.fee_type == FeeType.TRANSACTION_AMOUNT:
-                # 刷卡金额：增加交易金额
-                annual_fee_record.current_progress += transaction_amount
+            by_amount = sorted(current, key=lambda r: (-r.total_amount, -r.transaction_count, r.merchant_name))
+            by_count = sorted(current, key=lambda r: (-r.transaction_count, -r.total_amount, r.merchant_name))
             
-            self.db.commit()
+            return MerchantRanking(
+                period_start=f"{period_start[0]}-{period_start[1]:02d}",
+                period_end=f"{period_end[0]}-{period_end[1]:02d}",
+                previous_period_start=f"{previous_start[0]}-{previous_start[1]:02d}",
+                previous_period_end=f"{previous_end[0]}-{previous_end[1]:02d}",
+                total_amount=total_amount,
+                merchant_count=len(current),
+                top_by_amount=[to_statistics(result) for result in by_amount[:limit]],
+                top_by_count=[to_statistics(result) for result in by_count[:limit]]
+            )
             
         except Exception as e:
-            logger.error(f"更新年费进度失败: {str(e)}")
+            logger.error(f"获取商户消费排行失败: {str(e)}")
+            raise Exception(f"获取商户消费排行失败: {str(e)}")
 
-    def _recalculate_annual_fee_progress(self, card_id: UUID):
-        """
-        重新计算年费减免进度
+    def _statistics_rows_from_transactions(
+        self,
+        user_id: UUID,
+        card_id: Optional[UUID],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ):
+        """从交易明细按分类聚合统计数据"""
+        transaction_model = self._get_transaction_model()
+        
+        # 单次查询按分类聚合，使用FILTER条件聚合同时得到收支拆分、积分和消费分类统计，
+        # 数据库只返回每个分类一行聚合结果，避免加载全部交易记录
+        category = self._category_or_other()
+        query = self.db.query(
+            category,
+            func.count().label('transaction_count'),
+            func.coalesce(func.sum(transaction_model.amount), 0).label('total_amount'),
+            func.coalesce(
+                func.sum(transaction_model.amount).filter(
+                    transaction_model.transaction_type.in_(EXPENSE_TYPES)
+                ), 0
+            ).label('expense_amount'),
+            func.coalesce(
+                func.sum(transaction_model.amount).filter(
+                    transaction_model.transaction_type.in_(INCOME_TYPES)
+                ), 0
+            ).label('income_amount'),
+            func.coalesce(func.sum(transaction_model.points_earned), 0).label('points_earned'),
+            func.count().filter(
+                transaction_model.transaction_type == TransactionType.EXPENSE
+            ).label('category_count'),
+            func.coalesce(
+                func.sum(transaction_model.amount).filter(
+                    transaction_model.transaction_type == TransactionType.EXPENSE
+                ), 0
+            ).label('category_amount'),
+        ).filter(
+            transaction_model.user_id == user_id
+        )
+        
+        if card_id:
+            query = query.filter(transaction_model.card_id == card_id)
+        if start_date:
+            query = query.filter(transaction_model.transaction_date >= start_date)
+        if end_date:
+            query = query.filter(transaction_model.transaction_date <= end_date)
+        
+        return query.group_by(category).all()
+
+    def _category_or_other(self):
+        """交易分类，未分类（NULL）的交易计入“其他”，与月度汇总表的归类一致"""
+        transaction_model = self._get_transaction_model()
+        return func.coalesce(
+            transaction_model.category,
+            literal(TransactionCategory.OTHER, transaction_model.category.type)
+        ).label('category')
+
+    def _statistics_rows_from_rollup(
+        self,
+        user_id: UUID,
+        card_id: Optional[UUID],
+        start_month: Optional[Tuple[int, int]],
+        end_month: Optional[Tuple[int, int]]
+    ):
+        """从月度汇总表按分类聚合统计数据，返回列与 _statistics_rows_from_transactions 一致"""
+        rollup_model = self._get_rollup_model()
+        
+        query = self.db.query(
+            rollup_model.category,
+            func.coalesce(func.sum(rollup_model.transaction_count), 0).label('transaction_count'),
+            func.coalesce(func.sum(rollup_model.total_amount), 0).label('total_amount'),
+            func.coalesce(
+                func.sum(rollup_model.total_amount).filter(
+                    rollup_model.transaction_type.in_(EXPENSE_TYPES)
+                ), 0
+            ).label('expense_amount'),
+            func.coalesce(
+                func.sum(rollup_model.total_amount).filter(
+                    rollup_model.transaction_type.in_(INCOME_TYPES)
+                ), 0
+            ).label('income_amount'),
+            func.coalesce(func.sum(rollup_model.points_earned), 0).label('points_earned'),
+            func.coalesce(
+                func.sum(rollup_model.transaction_count).filter(
+                    rollup_model.transaction_type == TransactionType.EXPENSE
+                ), 0
+            ).label('category_count'),
+            func.coalesce(
+                func.sum(rollup_model.total_amount).filter(
+                    rollup_model.transaction_type == TransactionType.EXPENSE
+                ), 0
+            ).label('category_amount'),
+        ).filter(
+            rollup_model.user_id == user_id
+        )
+        
+        if card_id:
+            query = query.filter(rollup_model.card_id == card_id)
+        query = self._filter_rollup_months(query, start_month, end_month)
         
+        return query.group_by(rollup_model.category).all()
+
+    def _filter_rollup_months(
+        self,
+        query,
+        start_month: Optional[Tuple[int, int]],
+        end_month: Optional[Tuple[int, int]]
+    ):
+        """按 (年, 月) 范围过滤月度汇总查询"""
+        rollup_model = self._get_rollup_model()
+        if start_month:
+            query = query.filter(tuple_(rollup_model.year, rollup_model.month) >= tuple_(*start_month))
+        if end_month:
+            query = query.filter(tuple_(rollup_model.year, rollup_model.month) <= tuple_(*end_month))
+        return query
+
+    # ==================== 商户搜索 ====================
+
+    def suggest_merchants(self, user_id: UUID, prefix: str, limit: int = 10) -> List[MerchantSuggestion]:
+        """
+        商户名称自动补全
+
+        按用户历史交易中的商户名称匹配输入内容，排序规则：
+        完全匹配 > 前缀匹配 > 包含匹配，同级按交易笔数、最近交易时间排序。
+
         Args:
-            card_id: 信用卡ID
+            user_id: 用户ID
+            prefix: 用户输入的商户名称片段
+            limit: 返回数量
+
+        Returns:
+            List[MerchantSuggestion]: 商户建议列表
         """
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+
         try:
-            current_year = date.today().year
-            
-            # 获取年费记录和规则
-            annual_fee_record = self.db.query(self._get_annual_fee_record_model()).filter(
-                and_(
-                    self._get_annual_fee_record_model().card_id == card_id,
-                    self._get_annual_fee_record_model().fee_year == current_year
+            transaction_model = self._get_transaction_model()
+            merchant_name = transaction_model.merchant_name
+            lowered = func.lower(merchant_name)
+            lowered_prefix = prefix.lower()
+
+            match_rank = func.min(case(
+                (lowered == lowered_prefix, 0),
+                (lowered.startswith(lowered_prefix, autoescape=True), 1),
+                else_=2
+            ))
+            transaction_count = func.count()
+            last_transaction_date = func.max(transaction_model.transaction_date)
+
+            rows = self.db.execute(
+                select(
+                    merchant_name,
+                    transaction_count.label("transaction_count"),
+                    last_transaction_date.label("last_transaction_date"),
                 )
-            ).first()
-            
-            if not annual_fee_record:
-                return
-            
-            card = self.db.query(self._get_credit_card_model()).filter(
-                self._get_credit_card_model().id == card_id
-            ).first()
-            
-            if not card or not card.annual_fee_rule_id:
-                return
-            
-            rule = self.db.query(self._get_annual_fee_rule_model()).filter(
-                self._get_annual_fee_rule_model().id == card.annual_fee_rule_id
-            ).first()
-            
-            if not rule:
-                return
-            
-            # 获取当年所有有效消费交易
-            start_of_year = datetime(current_year, 1, 1)
-            end_of_year = datetime(current_year, 12, 31, 23, 59, 59)
-            
-            valid_transactions = self.db.query(self._get_transaction_model()).filter(
-                and_(
-                    self._get_transaction_model().card_id == card_id,
-                    self._get_transaction_model().transaction_type == TransactionType.EXPENSE,
-                    self._get_transaction_model().status == TransactionStatus.COMPLETED,
-                    self._get_transaction_model().transaction_date >= start_of_year,
-                    self._get_transaction_model().transaction_date <= end_of_year
+                .where(
+                    transaction_model.user_id == user_id,
+                    *self._search_token_filter(prefix),
+                    merchant_name.icontains(prefix, autoescape=True),
                 )
+                .group_by(merchant_name)
+                .order_by(match_rank, transaction_count.desc(), last_transaction_date.desc(), merchant_name)
+                .limit(limit)
             ).all()
-            
-            # 根据规则类型重新计算进度
-            from models.annual_fee import FeeType
-            
-            if rule.fee_type == FeeType.TRANSACTION_COUNT:
-                # 刷卡次数
-                annual_fee_record.current_progress = len(valid_transactions)
-            elif rule.fee_type == FeeType.TRANSACTION_AMOUNT:
-                # 刷卡金额
-                annual_fee_record.current_progress = sum(t.amount for t in valid_transactions)
-            
-            self.db.commit()
-            
+
+            return [
+                MerchantSuggestion(
+                    merchant_name=row.merchant_name,
+                    transaction_count=row.transaction_count,
+                    last_transaction_date=row.last_transaction_date,
+                )
+                for row in rows
+            ]
+
         except Exception as e:
-            logger.error(f"重新计算年费进度失败: {str(e)}")
+            logger.error(f"获取商户建议失败: {str(e)}")
+            raise Exception(f"获取商户建议失败: {str(e)}")
+
+    # ==================== 年费进度相关 ====================
+
+    def _update_annual_fee_progress(self, card_id: UUID, transaction_amount: Decimal, fee_year: int):
+        """
+        更新年费减免进度
+        
+        通过单条 UPDATE ... FROM 关联 信用卡→年费规则→交易所在年份的年费记录 并原子累加进度，
+        不单独提交，由调用方与交易写入在同一事务中提交。并发写入同一张卡时由行锁串行化累加。
+        
+        Args:
+            card_id: 信用卡ID
+            transaction_amount: 交易金额
+            fee_year: 交易日期所在年份，补录往年的交易计入当年的年费记录
+        """
+        record_model = self._get_annual_fee_record_model()
+        card_model = self._get_credit_card_model()
+        rule_model = self._get_annual_fee_rule_model()
+        
+        # 刷卡次数：增加1次；刷卡金额：增加交易金额
+        delta = case(
+            (rule_model.fee_type == FeeType.TRANSACTION_COUNT, Decimal("1")),
+            else_=transaction_amount
+        )
+        
+        self.db.execute(
+            update(record_model)
+            .where(
+                record_model.card_id == card_id,
+                record_model.fee_year == fee_year,
+                card_model.id == record_model.card_id,
+                rule_model.id == card_model.annual_fee_rule_id,
+                rule_model.fee_type.in_([FeeType.TRANSACTION_COUNT, FeeType.TRANSACTION_AMOUNT])
+            )
+            .values(current_progress=func.coalesce(record_model.current_progress, 0) + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _recalculate_annual_fee_progress(self, card_id: UUID, fee_year: int):
+        """
+        重新计算年费减免进度
+        
+        以单条 UPDATE ... FROM 语句按考核年度 [当年1月1日, 次年1月1日) 内的有效消费交易重新汇总进度，
+        不单独提交，由调用方与交易写入在同一事务中提交。
+        
+        Args:
+            card_id: 信用卡ID
+            fee_year: 年费年份
+        """
+        transaction_model = self._get_transaction_model()
+        record_model = self._get_annual_fee_record_model()
+        card_model = self._get_credit_card_model()
+        rule_model = self._get_annual_fee_rule_model()
+        
+        # 考核年度内所有有效消费交易
+        valid_transactions = and_(
+            transaction_model.card_id == card_id,
+            transaction_model.transaction_type == TransactionType.EXPENSE,
+            transaction_model.status == TransactionStatus.COMPLETED,
+            transaction_model.transaction_date >= datetime(fee_year, 1, 1),
+            transaction_model.transaction_date < datetime(fee_year + 1, 1, 1)
+        )
+        transaction_count = select(func.count()).where(valid_transactions).scalar_subquery()
+        transaction_amount = select(
+            func.coalesce(func.sum(transaction_model.amount), 0)
+        ).where(valid_transactions).scalar_subquery()
+        
+        self.db.execute(
+            update(record_model)
+            .where(
+                record_model.card_id == card_id,
+                record_model.fee_year == fee_year,
+                card_model.id == record_model.card_id,
+                rule_model.id == card_model.annual_fee_rule_id,
+                rule_model.fee_type.in_([FeeType.TRANSACTION_COUNT, FeeType.TRANSACTION_AMOUNT])
+            )
+            .values(current_progress=case(
+                (rule_model.fee_type == FeeType.TRANSACTION_COUNT, transaction_count),
+                else_=transaction_amount
+            ))
+            .execution_options(synchronize_session=False)
+        )
 
     # ==================== 辅助方法 ====================
 
@@ -659,32 +1409,124 @@ class TransactionsService:
         base_points = amount * Decimal("1.0")
         return base_points * rate
 
+    def _build_transactions_query(
+        self,
+        user_id: UUID,
+        card_id: Optional[UUID] = None,
+        transaction_type: Optional[TransactionType] = None,
+        category: Optional[TransactionCategory] = None,
+        status: Optional[TransactionStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        merchant_name: Optional[str] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: str = "",
+    ):
+        """构建交易记录列表的筛选查询（分页与游标模式共用）"""
+        transaction_model = self._get_transaction_model()
+        query = self.db.query(transaction_model).filter(transaction_model.user_id == user_id)
+        
+        # 基础过滤条件
+        if card_id:
+            query = query.filter(transaction_model.card_id == card_id)
+        if transaction_type:
+            query = query.filter(transaction_model.transaction_type == transaction_type)
+        if category:
+            query = query.filter(transaction_model.category == category)
+        if status:
+            query = query.filter(transaction_model.status == status)
+        if start_date:
+            query = query.filter(transaction_model.transaction_date >= start_date)
+        if end_date:
+            query = query.filter(transaction_model.transaction_date <= end_date)
+        if min_amount:
+            query = query.filter(transaction_model.amount >= min_amount)
+        if max_amount:
+            query = query.filter(transaction_model.amount <= max_amount)
+        if merchant_name:
+            query = query.filter(
+                *self._search_token_filter(merchant_name),
+                transaction_model.merchant_name.ilike(f"%{merchant_name}%")
+            )
+        
+        # 关键词模糊搜索：先由分词GIN索引筛选候选行，再用ILIKE精确匹配
+        if keyword:
+            keyword_filter = f"%{keyword}%"
+            query = query.filter(
+                *self._search_token_filter(keyword),
+                or_(
+                    transaction_model.merchant_name.ilike(keyword_filter),
+                    transaction_model.description.ilike(keyword_filter),
+                    transaction_model.notes.ilike(keyword_filter),
+                    transaction_model.location.ilike(keyword_filter)
+                )
+            )
+        
+        return query
+
+    def _search_token_filter(self, keyword: str) -> list:
+        """搜索分词包含条件（可使用 idx_transactions_search_tokens 索引），关键词无有效分词时为空"""
+        tokens = search_query_tokens(keyword)
+        if not tokens:
+            return []
+        return [self._get_transaction_model().search_tokens.contains(tokens)]
+
+    def _with_transaction_fields(self, query):
+        """只查询 TRANSACTION_FIELDS 列，结果为按字段顺序的行元组"""
+        transaction_model = self._get_transaction_model()
+        return query.with_entities(*(getattr(transaction_model, field) for field in TRANSACTION_FIELDS))
+
+    def _estimate_row_count(self, query) -> int:
+        """
+        使用执行计划估算查询结果行数
+        
+        读取 EXPLAIN 的 Plan Rows，避免对大表执行 COUNT(*)。
+        估算值依赖表统计信息，可能与实际值存在偏差。
+        """
+        plan = self.db.execute(ExplainJson(query.statement)).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _format_validation_error(self, error: ValidationError) -> str:
+        """将数据校验错误格式化为可读信息"""
+        messages = []
+        for item in error.errors():
+            field = ".".join(str(loc) for loc in item["loc"])
+            messages.append(f"{field}: {item['msg']}" if field else item["msg"])
+        return "; ".join(messages)
+
     def _create_transaction_db(self, transaction_data: dict):
         """创建交易记录数据库对象"""
-        from db_models.transactions import Transaction as TransactionDB
         return TransactionDB(**transaction_data)
 
     def _get_transaction_model(self):
         """获取交易记录数据库模型"""
-        from db_models.transactions import Transaction as TransactionDB
         return TransactionDB
 
     def _get_credit_card_model(self):
         """获取信用卡数据库模型"""
-        from db_models.cards import CreditCard
         return CreditCard
 
     def _get_annual_fee_record_model(self):
         """获取年费记录数据库模型"""
-        from db_models.annual_fee import AnnualFeeRecord
         return AnnualFeeRecord
 
     def _get_annual_fee_rule_model(self):
         """获取年费规则数据库模型"""
-        from db_models.annual_fee import AnnualFeeRule
         return AnnualFeeRule
 
+    def _get_rollup_model(self):
+        """获取交易月度汇总数据库模型"""
+        return TransactionMonthlyRollup
+
+    def _get_merchant_model(self):
+        """获取商户数据库模型"""
+        return Merchant
+
+    def _get_merchant_rollup_model(self):
+        """获取商户月度汇总数据库模型"""
+        return TransactionMerchantMonthlyRollup
+
     def _get_card_model(self):
         """获取信用卡数据库模型"""
-        from db_models.cards import CreditCard
         return CreditCard 
\ No newline at end of file
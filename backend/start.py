@@ -88,6 +88,69 @@ def create_migration(message: str):
         return False
 
 
+def rebuild_rollups(user_id: str = None):
+    """
+    重建交易月度汇总
+    
+    从交易记录全量重新生成月度汇总表和商户月度汇总表，用于首次上线回填或数据修复。
+    
+    Args:
+        user_id: 只重建指定用户，为空时重建全部用户
+    """
+    from uuid import UUID
+    from database import SessionLocal
+    from services.transaction_rollup_service import TransactionRollupService
+    
+    logger.info("开始重建交易月度汇总...")
+    
+    db = SessionLocal()
+    try:
+        rows = TransactionRollupService(db).rebuild(UUID(user_id) if user_id else None)
+        logger.info(f"交易月度汇总重建完成，共 {rows} 行")
+        return True
+    except Exception as e:
+        logger.error(f"重建交易月度汇总失败: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+
+def manage_partitions(action: str, start_year: int = None, end_year: int = None, year: int = None):
+    """
+    管理交易表年度分区
+    
+    Args:
+        action: ensure 创建缺失的分区，list 查看分区，detach 解除指定年份分区的挂载
+        start_year: ensure 的起始年份，默认当前年份
+        end_year: ensure 的结束年份，默认当前年份加 TRANSACTION_PARTITION_FUTURE_YEARS
+        year: detach 的分区年份
+    """
+    from database import SessionLocal
+    from services.transaction_partition_service import TransactionPartitionService
+    
+    db = SessionLocal()
+    try:
+        service = TransactionPartitionService(db)
+        if action == "ensure":
+            created = service.ensure_partitions(start_year, end_year)
+            logger.info(f"新建分区: {', '.join(created) if created else '无'}")
+        elif action == "list":
+            for partition in service.list_partitions():
+                logger.info(f"{partition['name']}: {partition['bounds']}，约 {partition['estimated_rows']} 行")
+        elif action == "detach":
+            if year is None:
+                logger.error("解除分区挂载需要指定 --year")
+                return False
+            name = service.detach_partition(year)
+            logger.info(f"分区 {name} 已解除挂载，可导出归档后删除")
+        return True
+    except Exception as e:
+        logger.error(f"管理交易分区失败: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+
 def start_server(
     host: str = "0.0.0.0",
     port: int = 8000,
@@ -122,16 +185,24 @@ def start_server(
                 host=host,
                 port=port,
                 reload=reload,
-                log_level="info"
+                log_level="info",
+                access_log=False
             )
         else:
-            # 生产模式
+            # 生产模式：每个工作进程各自持有连接池
+            if settings.DB_POOL_PROFILE == "queue":
+                per_worker = settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0)
+                logger.info(
+                    f"每个工作进程最多 {per_worker} 个数据库连接，{workers} 个进程共 {per_worker * workers} 个；"
+                    f"连接数接近数据库上限时可使用 DB_POOL_PROFILE=pgbouncer"
+                )
             uvicorn.run(
                 "main:app",
                 host=host,
                 port=port,
                 workers=workers,
-                log_level="info"
+                log_level="info",
+                access_log=False
             )
             
     except Exception as e:
@@ -154,6 +225,17 @@ def main():
     makemigrations_parser = subparsers.add_parser("makemigrations", help="创建数据库迁移")
     makemigrations_parser.add_argument("-m", "--message", required=True, help="迁移描述")
     
+    # rebuild-rollups 命令
+    rollups_parser = subparsers.add_parser("rebuild-rollups", help="重建交易月度汇总")
+    rollups_parser.add_argument("--user-id", default=None, help="只重建指定用户ID")
+    
+    # partitions 命令
+    partitions_parser = subparsers.add_parser("partitions", help="管理交易表年度分区")
+    partitions_parser.add_argument("action", choices=["ensure", "list", "detach"], help="操作")
+    partitions_parser.add_argument("--start-year", type=int, default=None, help="ensure 的起始年份")
+    partitions_parser.add_argument("--end-year", type=int, default=None, help="ensure 的结束年份")
+    partitions_parser.add_argument("--year", type=int, default=None, help="detach 的分区年份")
+    
     # run 命令
     run_parser = subparsers.add_parser("run", help="启动Web服务器")
     run_parser.add_argument("--host", default="0.0.0.0", help="监听主机地址")
@@ -179,6 +261,14 @@ def main():
         success = create_migration(args.message)
         sys.exit(0 if success else 1)
         
+    elif args.command == "rebuild-rollups":
+        success = rebuild_rollups(args.user_id)
+        sys.exit(0 if success else 1)
+        
+    elif args.command == "partitions":
+        success = manage_partitions(args.action, args.start_year, args.end_year, args.year)
+        sys.exit(0 if success else 1)
+        
     elif args.command == "run":
         start_server(
             host=args.host,
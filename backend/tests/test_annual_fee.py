@@ -0,0 +1,239 @@
+"""
+年费接口测试
+
+测试年费减免检查、年费统计等接口。
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from tests.conftest import engine, create_test_transaction, assert_response_success
+from services.annual_fee_service import AnnualFeeService
+
+
+def create_annual_fee_card(
+    client: TestClient,
+    headers: Dict[str, str],
+    card_data: Dict[str, Any],
+    fee_type: str,
+    waiver_condition_value: float = 1000
+) -> str:
+    """创建启用年费管理的信用卡，返回卡片ID"""
+    card_data = dict(card_data)
+    card_data.update({
+        "card_number": f"622{uuid4().int % 10 ** 13:013d}",
+        "annual_fee_enabled": True,
+        "fee_type": fee_type,
+        "base_fee": 200.00,
+        "waiver_condition_value": waiver_condition_value,
+        "annual_fee_month": 12,
+        "annual_fee_day": 31
+    })
+    response = client.post("/api/cards/", json=card_data, headers=headers)
+    return assert_response_success(response)["id"]
+
+
+class TestAnnualFeeWaiverCheck:
+    """年费减免检查测试"""
+
+    def _setup_cards(self, client: TestClient, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]):
+        headers = authenticated_user["headers"]
+        this_year = datetime.now().year
+        amount_card = create_annual_fee_card(client, headers, test_card_data, "transaction_amount")
+        count_card = create_annual_fee_card(client, headers, test_card_data, "transaction_count", 3)
+        rigid_card = create_annual_fee_card(client, headers, test_card_data, "rigid")
+
+        for amount in (600.00, 500.00):
+            create_test_transaction(client, headers, amount_card, {
+                "amount": amount, "transaction_date": f"{this_year}-01-10T10:00:00"
+            })
+        create_test_transaction(client, headers, count_card, {
+            "amount": 50.00, "transaction_date": f"{this_year}-01-10T10:00:00"
+        })
+        # 去年的消费不计入今年的考核
+        create_test_transaction(client, headers, count_card, {
+            "amount": 50.00, "transaction_date": f"{this_year - 1}-12-31T23:00:00"
+        })
+        return amount_card, count_card, rigid_card
+
+    def test_check_all_waivers_for_user(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试一次评估用户所有卡片的减免条件"""
+        amount_card, count_card, rigid_card = self._setup_cards(client, authenticated_user, test_card_data)
+        user_id = authenticated_user["user"]["id"]
+
+        response = client.get(f"/api/annual-fees/waiver-check/user/{user_id}")
+        results = {item["card_id"]: item for item in assert_response_success(response)}
+
+        assert set(results) == {amount_card, count_card, rigid_card}
+        assert results[amount_card]["waiver_eligible"] is True
+        assert float(results[amount_card]["current_progress"]) == 1100.0
+        assert results[count_card]["waiver_eligible"] is False
+        assert results[count_card]["progress_description"] == "已刷卡 1 次，需要 3 次"
+        assert results[rigid_card]["waiver_eligible"] is False
+        assert results[amount_card]["days_remaining"] >= 0
+
+    def test_batch_check_reports_missing_cards(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试批量检查时报告没有年费记录的卡片，而不是静默跳过"""
+        amount_card, count_card, _ = self._setup_cards(client, authenticated_user, test_card_data)
+        missing_card = str(uuid4())
+
+        response = client.post(
+            f"/api/annual-fees/batch/check-waivers?fee_year={datetime.now().year}",
+            json=[amount_card, count_card, missing_card]
+        )
+        results = assert_response_success(response)
+
+        assert [item["card_id"] for item in results].count(amount_card) == 1
+        assert len(results) == 2
+        assert missing_card in response.json()["message"]
+
+    def test_deleted_cards_and_records_not_evaluated(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试已软删除的卡片和年费记录不参与评估，也不回写进度，指定的已删除卡片计入缺失列表"""
+        from uuid import UUID
+        from db_models.annual_fee import AnnualFeeRecord
+        from db_models.cards import CreditCard
+
+        amount_card, count_card, _ = self._setup_cards(client, authenticated_user, test_card_data)
+        fee_year = datetime.now().year
+        db_session.query(CreditCard).filter(CreditCard.id == count_card).update({"is_deleted": True})
+        db_session.query(AnnualFeeRecord).filter(
+            AnnualFeeRecord.card_id == count_card, AnnualFeeRecord.fee_year == fee_year
+        ).update({"current_progress": 99})
+        db_session.flush()
+
+        service = AnnualFeeService(db_session)
+        results, missing = service.evaluate_annual_fee_waivers(
+            fee_year, card_ids=[UUID(amount_card), UUID(count_card)]
+        )
+        assert [str(item.card_id) for item in results] == [amount_card]
+        assert missing == [UUID(count_card)]
+
+        results, _ = service.evaluate_annual_fee_waivers(fee_year, user_id=authenticated_user["user"]["id"])
+        assert count_card not in {str(item.card_id) for item in results}
+
+        record = db_session.query(AnnualFeeRecord).filter(
+            AnnualFeeRecord.card_id == count_card, AnnualFeeRecord.fee_year == fee_year
+        ).one()
+        db_session.refresh(record)
+        assert float(record.current_progress) == 99
+
+        db_session.query(AnnualFeeRecord).filter(
+            AnnualFeeRecord.card_id == amount_card, AnnualFeeRecord.fee_year == fee_year
+        ).update({"is_deleted": True})
+        db_session.flush()
+        results, missing = service.evaluate_annual_fee_waivers(fee_year, card_ids=[UUID(amount_card)])
+        assert results == [] and missing == [UUID(amount_card)]
+
+    def test_only_completed_expenses_count(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试只统计考核年度内已完成的消费：退款、还款、已取消交易不计入，12月31日当天的消费计入"""
+        headers = authenticated_user["headers"]
+        this_year = datetime.now().year
+        amount_card = create_annual_fee_card(client, headers, test_card_data, "transaction_amount")
+        count_card = create_annual_fee_card(client, headers, test_card_data, "transaction_count", 3)
+
+        for card_id in (amount_card, count_card):
+            create_test_transaction(client, headers, card_id, {
+                "amount": 300.00, "transaction_date": f"{this_year}-12-31T23:30:00"
+            })
+            create_test_transaction(client, headers, card_id, {
+                "transaction_type": "refund", "amount": 400.00, "transaction_date": f"{this_year}-03-01T10:00:00"
+            })
+            create_test_transaction(client, headers, card_id, {
+                "transaction_type": "payment", "amount": 500.00, "transaction_date": f"{this_year}-03-02T10:00:00"
+            })
+            create_test_transaction(client, headers, card_id, {
+                "status": "cancelled", "amount": 600.00, "transaction_date": f"{this_year}-03-03T10:00:00"
+            })
+
+        response = client.get(f"/api/annual-fees/waiver-check/user/{authenticated_user['user']['id']}")
+        results = {item["card_id"]: item for item in assert_response_success(response)}
+
+        assert float(results[amount_card]["current_progress"]) == 300.0
+        assert results[amount_card]["waiver_eligible"] is False
+        assert float(results[count_card]["current_progress"]) == 1
+        assert results[count_card]["waiver_eligible"] is False
+
+        # 回写的年费记录进度与检查结果一致
+        response = client.get(f"/api/annual-fees/records?card_id={amount_card}&fee_year={this_year}")
+        records = assert_response_success(response)
+        assert float(records["items"][0]["current_progress"]) == 300.0
+        assert records["items"][0]["waiver_condition_met"] is False
+
+    def test_evaluation_query_count_independent_of_cards(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试批量评估的SQL语句数量与卡片数量无关"""
+        self._setup_cards(client, authenticated_user, test_card_data)
+        statements: List[str] = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            results = AnnualFeeService(db_session).check_all_annual_fee_waivers(
+                authenticated_user["user"]["id"]
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        assert len(results) == 3
+        # 一次评估查询 + 一次批量回写进度
+        assert len([s for s in statements if not s.startswith(("SAVEPOINT", "RELEASE"))]) == 2
+
+
+class TestAnnualFeeStatistics:
+    """年费统计测试"""
+
+    def test_user_statistics_single_aggregate(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试用户年费统计按状态汇总且排除已删除卡片"""
+        from db_models.cards import CreditCard
+
+        headers = authenticated_user["headers"]
+        user_id = authenticated_user["user"]["id"]
+        create_annual_fee_card(client, headers, test_card_data, "transaction_amount")
+        deleted_card = create_annual_fee_card(client, headers, test_card_data, "rigid")
+
+        response = client.get(f"/api/annual-fees/statistics/{user_id}")
+        statistics = assert_response_success(response)
+        assert statistics["total_cards"] == 2
+        assert float(statistics["total_annual_fees"]) == 400.0
+        assert float(statistics["pending_fees"]) == 400.0
+        assert statistics["waiver_rate"] == 0.0
+
+        db_session.query(CreditCard).filter(CreditCard.id == deleted_card).update({"is_deleted": True})
+        db_session.flush()
+        statistics = AnnualFeeService(db_session).get_annual_fee_statistics(user_id)
+        assert statistics.total_cards == 1
+        assert statistics.total_annual_fees == 200
+
+    def test_portfolio_statistics(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试全平台年度统计及管理员权限"""
+        create_annual_fee_card(client, authenticated_user["headers"], test_card_data, "rigid")
+
+        response = client.get("/api/annual-fees/statistics/portfolio", headers=authenticated_user["headers"])
+        assert response.status_code == 403
+
+        this_year = datetime.now().year
+        statistics = AnnualFeeService(db_session).get_portfolio_annual_fee_statistics(this_year)
+        assert len(statistics) == 1
+        assert statistics[0].fee_year == this_year
+        assert statistics[0].total_users >= 1
+        assert statistics[0].total_cards >= 1
+        assert statistics[0].total_annual_fees >= 200
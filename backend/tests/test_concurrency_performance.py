@@ -0,0 +1,91 @@
+"""
+并发性能基准测试
+
+对比 async def 接口中三种数据库访问方式的吞吐量：
+- 直接调用同步会话（阻塞事件循环，请求被串行化）
+- 通过 run_sync 将同步调用移入有界线程池
+- 使用 AsyncSession（asyncpg）
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from tests.conftest import TestingSessionLocal, TestingAsyncSessionLocal
+from utils.concurrency import run_sync
+
+# 每个请求模拟的慢查询耗时（秒）
+QUERY_SECONDS = 0.05
+CONCURRENT_REQUESTS = 10
+
+
+def _slow_query_sync():
+    db = TestingSessionLocal()
+    try:
+        db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": QUERY_SECONDS})
+    finally:
+        db.close()
+
+
+def _create_benchmark_app() -> FastAPI:
+    bench_app = FastAPI()
+
+    @bench_app.get("/blocking")
+    async def blocking():
+        _slow_query_sync()
+        return {"ok": True}
+
+    @bench_app.get("/offloaded")
+    async def offloaded():
+        await run_sync(_slow_query_sync)
+        return {"ok": True}
+
+    @bench_app.get("/async")
+    async def async_session():
+        async with TestingAsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": QUERY_SECONDS})
+        return {"ok": True}
+
+    return bench_app
+
+
+async def _measure_requests_per_second(path: str) -> float:
+    transport = httpx.ASGITransport(app=_create_benchmark_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # 预热，建立连接
+        await client.get(path)
+
+        start_time = time.time()
+        responses = await asyncio.gather(
+            *(client.get(path) for _ in range(CONCURRENT_REQUESTS))
+        )
+        elapsed = time.time() - start_time
+
+    assert all(response.status_code == 200 for response in responses)
+    return CONCURRENT_REQUESTS / elapsed
+
+
+@pytest.mark.slow
+class TestConcurrencyPerformance:
+    """并发吞吐量基准测试"""
+
+    def test_requests_per_second_blocking_vs_non_blocking(self, test_db):
+        """同步调用阻塞事件循环时吞吐量受限于单个查询耗时，移出事件循环后应显著提升"""
+        blocking = asyncio.run(_measure_requests_per_second("/blocking"))
+        offloaded = asyncio.run(_measure_requests_per_second("/offloaded"))
+        async_session = asyncio.run(_measure_requests_per_second("/async"))
+
+        print(
+            f"\n{CONCURRENT_REQUESTS}个并发请求，每个查询{QUERY_SECONDS}秒："
+            f"阻塞 {blocking:.1f} req/s，线程池 {offloaded:.1f} req/s，"
+            f"AsyncSession {async_session:.1f} req/s"
+        )
+
+        # 阻塞方式下请求串行执行，吞吐量不超过 1/QUERY_SECONDS
+        assert blocking <= 1 / QUERY_SECONDS * 1.1
+        assert offloaded > blocking * 3
+        assert async_session > blocking * 3
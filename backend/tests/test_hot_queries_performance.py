@@ -0,0 +1,170 @@
+"""
+热点查询微基准测试
+
+对比热点查询改造前（每次调用用 Query 重新构建语句，并经函数内导入获取模型）和
+改造后（services.hot_queries 中的 lambda_stmt）每次调用的Python开销。
+Python开销 = 单次调用总耗时 - cursor.execute 内的耗时（数据库往返）。
+
+    HOT_QUERY_ITERATIONS=5000 python -m pytest tests/test_hot_queries_performance.py -m slow -s
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Dict, Tuple
+from uuid import UUID
+
+import pytest
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from db_models.users import User, VerificationCode
+from services.hot_queries import owned_card, user_by_id, user_by_username_or_email, usable_verification_code
+from tests.conftest import engine
+
+HOT_QUERY_ITERATIONS = int(os.getenv("HOT_QUERY_ITERATIONS", "2000"))
+
+
+# ==================== 改造前的查询写法 ====================
+
+def _legacy_credit_card_model():
+    from db_models.cards import CreditCard
+    return CreditCard
+
+
+def _legacy_user_model():
+    from db_models.users import User
+    return User
+
+
+def _legacy_verification_code_model():
+    from db_models.users import VerificationCode
+    return VerificationCode
+
+
+def legacy_owned_card(db: Session, card_id: UUID, user_id: UUID):
+    return db.query(_legacy_credit_card_model()).filter(
+        and_(
+            _legacy_credit_card_model().id == card_id,
+            _legacy_credit_card_model().user_id == user_id,
+            _legacy_credit_card_model().is_deleted == False
+        )
+    ).first()
+
+
+def legacy_user_by_id(db: Session, user_id: UUID):
+    return db.query(_legacy_user_model()).filter(_legacy_user_model().id == user_id).first()
+
+
+def legacy_user_by_username_or_email(db: Session, username_or_email: str):
+    return db.query(_legacy_user_model()).filter(
+        or_(
+            _legacy_user_model().username == username_or_email,
+            _legacy_user_model().email == username_or_email
+        )
+    ).first()
+
+
+def legacy_verification_code(db: Session, phone_or_email: str, code: str, code_type: str):
+    return db.query(_legacy_verification_code_model()).filter(
+        and_(
+            _legacy_verification_code_model().phone_or_email == phone_or_email,
+            _legacy_verification_code_model().code == code,
+            _legacy_verification_code_model().code_type == code_type,
+            _legacy_verification_code_model().is_used == False,
+            _legacy_verification_code_model().expires_at > datetime.now(UTC)
+        )
+    ).first()
+
+
+# ==================== 计时 ====================
+
+def measure(db: Session, call: Callable[[], Any], iterations: int) -> Tuple[float, float]:
+    """
+    执行 iterations 次调用
+
+    Returns:
+        (单次调用总耗时, 单次调用Python开销)，单位微秒
+    """
+    database_seconds = 0.0
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["cursor_started_at"] = time.perf_counter()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        nonlocal database_seconds
+        database_seconds += time.perf_counter() - conn.info.pop("cursor_started_at")
+
+    for _ in range(50):
+        call()
+        db.expunge_all()
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call()
+            db.expunge_all()
+        total_seconds = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+        event.remove(engine, "after_cursor_execute", after_execute)
+
+    per_call_us = total_seconds / iterations * 1e6
+    return per_call_us, (total_seconds - database_seconds) / iterations * 1e6
+
+
+@pytest.mark.slow
+class TestHotQueryOverhead:
+    """热点查询Python开销对比"""
+
+    def test_lambda_statements_reduce_per_call_overhead(
+        self, db_session: Session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """打印各热点查询改造前后的单次调用耗时和Python开销，改造后的总开销应更低"""
+        user_id = UUID(authenticated_user["user"]["id"])
+        card_id = UUID(test_card["id"])
+        username = authenticated_user["user"]["username"]
+        db_session.add(VerificationCode(
+            phone_or_email="13800000000", code="123456", code_type="login",
+            expires_at=datetime.now(UTC) + timedelta(minutes=5), is_used=False
+        ))
+        db_session.flush()
+
+        cases = {
+            "信用卡归属校验": (
+                lambda: legacy_owned_card(db_session, card_id, user_id),
+                lambda: db_session.execute(owned_card(card_id, user_id)).scalars().first(),
+            ),
+            "用户资料": (
+                lambda: legacy_user_by_id(db_session, user_id),
+                lambda: db_session.execute(user_by_id(user_id)).scalars().first(),
+            ),
+            "登录查找用户": (
+                lambda: legacy_user_by_username_or_email(db_session, username),
+                lambda: db_session.execute(user_by_username_or_email(username)).scalars().first(),
+            ),
+            "验证码校验": (
+                lambda: legacy_verification_code(db_session, "13800000000", "123456", "login"),
+                lambda: db_session.execute(
+                    usable_verification_code("13800000000", "123456", "login", datetime.now(UTC))
+                ).scalars().first(),
+            ),
+        }
+
+        print(f"\n每个查询执行 {HOT_QUERY_ITERATIONS} 次（微秒/次）")
+        print(f"{'查询':<12}{'改造前总耗时':>12}{'改造前Python':>14}{'改造后总耗时':>12}{'改造后Python':>14}{'Python开销降低':>14}")
+        legacy_overhead_total = lambda_overhead_total = 0.0
+        for label, (legacy_call, lambda_call) in cases.items():
+            assert legacy_call() is not None and lambda_call() is not None
+            legacy_total, legacy_overhead = measure(db_session, legacy_call, HOT_QUERY_ITERATIONS)
+            lambda_total, lambda_overhead = measure(db_session, lambda_call, HOT_QUERY_ITERATIONS)
+            legacy_overhead_total += legacy_overhead
+            lambda_overhead_total += lambda_overhead
+            print(
+                f"{label:<12}{legacy_total:>14.1f}{legacy_overhead:>14.1f}{lambda_total:>14.1f}{lambda_overhead:>14.1f}"
+                f"{(1 - lambda_overhead / legacy_overhead) * 100:>13.1f}%"
+            )
+
+        assert lambda_overhead_total < legacy_overhead_total
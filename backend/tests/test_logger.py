@@ -0,0 +1,122 @@
+"""
+日志管道测试
+
+覆盖日志抽样、非阻塞队列处理器（不在调用方格式化、队列满时丢弃）、后台线程写入轮转日志文件，
+以及每个请求一行的访问日志。
+"""
+
+import logging
+import queue
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from utils.logger import LogConfig, NonBlockingQueueHandler, SamplingFilter
+
+
+def make_record(name: str, level: int = logging.INFO, msg: str = "消息 %s", args: tuple = ("参数",)) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class FormatCounter:
+    """记录被转换为字符串的次数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "formatted"
+
+
+class TestSamplingFilter:
+    """日志抽样测试"""
+
+    def test_samples_info_by_logger_prefix(self):
+        """测试按最长前缀抽样INFO日志，WARNING及以上和未配置的日志器全部保留"""
+        sampling = SamplingFilter(SamplingFilter.parse("services=0.25, services.auth_service=1, access=0"))
+
+        kept = [sampling.filter(make_record("services.cards_service")) for _ in range(8)]
+        assert kept.count(True) == 2
+        assert all(sampling.filter(make_record("services.auth_service")) for _ in range(4))
+        assert not any(sampling.filter(make_record("access")) for _ in range(4))
+        assert sampling.filter(make_record("access", logging.WARNING))
+        assert sampling.filter(make_record("servicesx"))
+        assert sampling.dropped == 10
+
+    def test_parse_rejects_invalid_rates(self):
+        """测试抽样配置格式错误或采样率越界时报错"""
+        assert SamplingFilter.parse("") == {}
+        with pytest.raises(ValueError):
+            SamplingFilter.parse("services")
+        with pytest.raises(ValueError):
+            SamplingFilter.parse("services=1.5")
+
+
+class TestQueuePipeline:
+    """队列日志管道测试"""
+
+    def test_queue_handler_defers_formatting_and_drops_when_full(self):
+        """测试入队时不格式化消息，队列满时丢弃而不阻塞"""
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        counter = FormatCounter()
+
+        handler.handle(make_record("services.cards_service", args=(counter,)))
+        handler.handle(make_record("services.cards_service"))
+        assert counter.calls == 0
+        assert handler.dropped == 1
+
+        record = handler.queue.get_nowait()
+        assert record.getMessage() == "消息 formatted"
+
+    def test_sampled_out_records_are_never_formatted(self, monkeypatch):
+        """测试被抽样丢弃和低于级别的日志不产生格式化开销"""
+        monkeypatch.setattr(settings, "LOG_SAMPLING", "tests.sampled=0")
+        LogConfig.setup_logging(async_mode=True)
+        try:
+            counter = FormatCounter()
+            logging.getLogger("tests.sampled").info("抽样丢弃 %s", counter)
+            logging.getLogger("tests.kept").debug("低于级别 %s", counter)
+            LogConfig.stop_logging()
+            assert counter.calls == 0
+        finally:
+            monkeypatch.undo()
+            LogConfig.setup_logging()
+
+    def test_listener_writes_rotating_file(self, tmp_path, monkeypatch):
+        """测试后台线程写入日志文件，超过大小后轮转"""
+        log_file = tmp_path / "app.log"
+        monkeypatch.setattr(settings, "LOG_FILE", str(log_file))
+        monkeypatch.setattr(settings, "LOG_MAX_SIZE", 2048)
+        monkeypatch.setattr(settings, "LOG_BACKUP_COUNT", 2)
+        LogConfig.setup_logging(async_mode=True)
+        try:
+            assert LogConfig.stats()["async"] is True
+            for index in range(100):
+                logging.getLogger("tests.rotation").info("第 %d 条日志", index)
+            LogConfig.stop_logging()
+
+            assert "第 99 条日志" in log_file.read_text(encoding="utf-8")
+            assert (tmp_path / "app.log.1").exists()
+            assert not (tmp_path / "app.log.3").exists()
+        finally:
+            monkeypatch.undo()
+            LogConfig.setup_logging()
+
+
+class TestAccessLog:
+    """访问日志测试"""
+
+    def test_one_access_line_per_request(self, client: TestClient, authenticated_user: Dict[str, Any], caplog):
+        """测试每个请求完成后只记录一行包含状态码和耗时的访问日志"""
+        with caplog.at_level(logging.INFO, logger="access"):
+            client.get("/api/cards/?page=1", headers=authenticated_user["headers"])
+            client.get("/api/cards/00000000-0000-0000-0000-000000000000", headers=authenticated_user["headers"])
+
+        lines = [record.getMessage() for record in caplog.records if record.name == "access"]
+        assert len(lines) == 2
+        assert lines[0].startswith('method=GET path="/api/cards/" query="page=1" status=200 duration_ms=')
+        assert lines[1].startswith('method=GET path="/api/cards/00000000-0000-0000-0000-000000000000" query="" status=')
+        assert lines[1].endswith("client=testclient")
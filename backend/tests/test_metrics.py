@@ -0,0 +1,106 @@
+"""
+运行指标测试
+
+覆盖 /metrics 接口的 Prometheus 文本输出、按路由模板统计的请求耗时和每个请求的SQL执行次数，
+以及由直方图估算分位数。
+"""
+
+import re
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from config import settings
+from tests.conftest import async_engine, engine
+from utils.metrics import estimate_quantile, request_metrics
+
+
+def metrics_headers() -> Dict[str, str]:
+    """抓取 /metrics 使用的请求头"""
+    return {"Authorization": f"Bearer {settings.METRICS_TOKEN}"}
+
+
+def metric_value(body: str, name: str, labels: str = "") -> float:
+    """从 /metrics 输出中取出一个样本的值"""
+    match = re.search(rf"^{re.escape(name + labels)} (\S+)$", body, re.MULTILINE)
+    assert match, f"缺少指标 {name}{labels}"
+    return float(match.group(1))
+
+
+class TestMetricsEndpoint:
+    """/metrics 接口测试"""
+
+    def test_requires_metrics_token(self, client: TestClient, authenticated_user: Dict[str, Any]):
+        """测试没有令牌或使用普通用户令牌时拒绝访问"""
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong-token"}).status_code == 401
+        assert client.get("/metrics", headers=authenticated_user["headers"]).status_code == 401
+        assert client.get("/metrics", headers=metrics_headers()).status_code == 200
+
+    def test_route_latency_and_query_counts(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试按路由模板统计请求耗时和每个请求的SQL执行次数"""
+        request_metrics.clear()
+        statements: List[str] = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        for test_engine in (engine, async_engine.sync_engine):
+            event.listen(test_engine, "before_cursor_execute", record_statement)
+        try:
+            for _ in range(3):
+                response = client.get(f"/api/cards/{test_card['id']}", headers=authenticated_user["headers"])
+                assert response.status_code == 200
+        finally:
+            for test_engine in (engine, async_engine.sync_engine):
+                event.remove(test_engine, "before_cursor_execute", record_statement)
+
+        response = client.get("/metrics", headers=metrics_headers())
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+        body = response.text
+
+        route = 'method="GET",route="/api/cards/{card_id}"'
+        assert metric_value(body, "http_request_duration_seconds_count", "{" + route + "}") == 3
+        assert metric_value(body, "http_request_duration_seconds_bucket", "{" + route + ',le="+Inf"}') == 3
+        assert metric_value(body, "http_requests_total", "{" + route + ',status="200"}') == 3
+        assert metric_value(body, "http_request_duration_quantile_seconds", "{" + route + ',quantile="0.99"}') > 0
+        assert statements
+        assert metric_value(body, "http_request_db_queries_sum", "{" + route + "}") == len(statements)
+        assert metric_value(body, "http_request_db_query_seconds_sum", "{" + route + "}") > 0
+        assert str(test_card["id"]) not in body
+
+        # /metrics 请求本身正在处理
+        assert metric_value(body, "http_requests_in_flight", '{method="GET"}') == 1
+        assert metric_value(body, "db_queries_total", '{engine="test-async"}') >= len(statements)
+
+    def test_pool_cache_and_hasher_metrics(self, client: TestClient):
+        """测试输出连接池、用户缓存、密码哈希工作池和日志队列指标"""
+        client.get("/api/unknown-path")
+        body = client.get("/metrics", headers=metrics_headers()).text
+
+        assert metric_value(body, "http_requests_total", '{method="GET",route="unmatched",status="404"}') >= 1
+        assert metric_value(body, "db_pool_capacity", '{pool="primary"}') > 0
+        assert 'db_pool_checkout_wait_seconds_bucket{pool="primary",le="+Inf"}' in body
+        assert metric_value(body, "user_cache_lookups_total", '{result="miss"}') >= 0
+        assert 0 <= metric_value(body, "user_cache_hit_ratio") <= 1
+        assert metric_value(body, "password_hasher_queue_depth") == 0
+        assert 'password_hasher_duration_seconds_bucket{operation="hash",le="+Inf"}' in body
+        assert metric_value(body, "log_records_dropped_total", '{reason="queue_full"}') >= 0
+        for line in body.splitlines():
+            assert line.startswith("#") or re.match(r"^[a-z_]+(\{.*\})? \S+$", line), line
+
+
+class TestQuantileEstimate:
+    """直方图分位数估算测试"""
+
+    def test_interpolates_within_bucket(self):
+        """测试在分位数所在桶内线性插值，落在 +Inf 桶时返回最大有限上限"""
+        bounds = (0.1, 0.5, 1.0)
+        assert estimate_quantile(0.5, bounds, [0, 0, 0, 0]) == 0.0
+        assert estimate_quantile(0.5, bounds, [10, 0, 0, 0]) == 0.05
+        assert estimate_quantile(0.5, bounds, [5, 10, 5, 0]) == 0.1 + 0.4 * 5 / 10
+        assert estimate_quantile(0.99, bounds, [90, 0, 0, 10]) == 1.0
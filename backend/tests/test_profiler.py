@@ -0,0 +1,132 @@
+"""
+性能分析测试
+
+覆盖管理员请求的单请求采样分析、非管理员和未开启时不做分析，以及后台采样定期写入热点调用栈。
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from config import settings
+from tests.conftest import TestingSessionLocal
+from utils.cache import user_profile_cache
+from utils.profiler import BackgroundProfiler, PROFILE_HEADER, StackSampler
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    """开启单请求分析，结果写入临时目录"""
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 0.5)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def admin_user(authenticated_user: Dict[str, Any]) -> Dict[str, Any]:
+    """把认证用户设为管理员"""
+    with TestingSessionLocal() as db:
+        db.execute(text("UPDATE users SET is_admin = true WHERE id = :id"), {"id": authenticated_user["user"]["id"]})
+        db.commit()
+    user_profile_cache.clear()
+    return authenticated_user
+
+
+def read_folded(path) -> Dict[str, int]:
+    stacks = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    return stacks
+
+
+def busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestRequestProfiling:
+    """单请求分析测试"""
+
+    def test_admin_request_writes_folded_profile(self, client: TestClient, admin_user: Dict[str, Any], profile_dir):
+        """测试管理员带标记的请求写入折叠栈文件并在响应头返回文件名"""
+        response = client.get(
+            "/api/transactions/statistics/overview", headers={**admin_user["headers"], PROFILE_HEADER: "1"}
+        )
+        assert response.status_code == 200
+        profile_name = response.headers[PROFILE_HEADER]
+        assert profile_name.startswith("request-GET-api_transactions_statistics_overview-")
+
+        stacks = read_folded(profile_dir / profile_name)
+        assert sum(stacks.values()) > 0
+        assert all(";" in stack and "(" in stack for stack in stacks)
+
+        # 查询参数同样可以开启
+        response = client.get("/api/cards/?__profile=1", headers=admin_user["headers"])
+        assert PROFILE_HEADER in response.headers
+
+    def test_flag_ignored_for_non_admin_or_when_disabled(
+        self, client: TestClient, authenticated_user: Dict[str, Any], profile_dir, monkeypatch
+    ):
+        """测试非管理员的分析标记被忽略，未开启时管理员请求也不分析"""
+        headers = {**authenticated_user["headers"], PROFILE_HEADER: "1"}
+        response = client.get("/api/cards/", headers=headers)
+        assert response.status_code == 200
+        assert PROFILE_HEADER not in response.headers
+
+        monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+        with TestingSessionLocal() as db:
+            db.execute(text("UPDATE users SET is_admin = true WHERE id = :id"), {"id": authenticated_user["user"]["id"]})
+            db.commit()
+        user_profile_cache.clear()
+        response = client.get("/api/cards/", headers=headers)
+        assert PROFILE_HEADER not in response.headers
+        assert list(profile_dir.iterdir()) == []
+
+
+class TestSampling:
+    """调用栈采样测试"""
+
+    def test_sampler_skips_idle_threads(self):
+        """测试采样包含繁忙线程的调用栈，跳过等待中的线程"""
+        idle = threading.Event()
+        waiter = threading.Thread(target=idle.wait, name="idle-waiter", daemon=True)
+        worker = threading.Thread(target=busy_wait, args=(0.2,), name="busy-worker_1", daemon=True)
+        waiter.start()
+        worker.start()
+        try:
+            sampler = StackSampler(0.001, "test")
+            sampler.sample()
+            stacks = sampler.take()
+        finally:
+            idle.set()
+            worker.join()
+
+        assert any(stack.startswith("busy-worker;") and "busy_wait (" in stack for stack in stacks)
+        assert not any(stack.startswith("idle-waiter") for stack in stacks)
+        assert sampler.take() == {}
+
+    def test_background_profiler_flushes_hot_stacks(self, tmp_path, monkeypatch):
+        """测试后台采样定期写入热点调用栈，停止时写入剩余结果"""
+        monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+        profiler = BackgroundProfiler(interval=0.001, flush_seconds=0.1)
+        profiler.start()
+        try:
+            busy_wait(0.25)
+        finally:
+            profiler.stop()
+
+        files = sorted(tmp_path.glob("background-*.folded"))
+        assert len(files) >= 2
+        hot = {}
+        for path in files:
+            for stack, count in read_folded(path).items():
+                hot[stack] = hot.get(stack, 0) + count
+        assert any("busy_wait (" in stack for stack in hot)
+        assert not any(thread.name.startswith("profiler") for thread in threading.enumerate())
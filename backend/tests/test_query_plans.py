@@ -0,0 +1,205 @@
+"""
+查询计划基准测试
+
+在合成数据上调用各服务方法，记录其实际发出的SELECT语句，分别在索引调整前
+（迁移 c7f4a2e9d136 删除的旧索引）和调整后的索引下执行 EXPLAIN ANALYZE，
+打印执行计划、使用的索引和耗时对比。所有数据和索引变更都在测试会话的事务中完成，
+结束时回滚。
+
+    BENCHMARK_ROWS=200000 python -m pytest tests/test_query_plans.py -m slow -s
+"""
+
+import importlib.util
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import UUID
+
+import pytest
+from sqlalchemy import Text, cast, event, func, insert, select, text, true
+from sqlalchemy.orm import Session
+
+from db_models.cards import CreditCard
+from services.annual_fee_service import AnnualFeeService
+from services.cards_service import CardsService
+from services.transactions_service import TransactionsService
+from tests.conftest import engine
+from tests.test_transactions_performance import BENCHMARK_ROWS, generate_transactions_server_side
+
+# 调整后新增的索引：(索引名, 表名, 创建语句)
+NEW_INDEXES = [
+    (
+        "idx_transactions_user_date_id", "transactions",
+        "CREATE INDEX idx_transactions_user_date_id ON transactions (user_id, transaction_date DESC, id DESC)"
+    ),
+    (
+        "idx_credit_cards_user_created", "credit_cards",
+        "CREATE INDEX idx_credit_cards_user_created ON credit_cards (user_id, created_at DESC) WHERE is_deleted = false"
+    ),
+]
+
+INDEX_PATTERN = re.compile(r"(?:Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)")
+EXECUTION_TIME_PATTERN = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+def load_legacy_indexes() -> List[Tuple[str, str, List[str]]]:
+    """从索引调整迁移中读取调整前的索引定义"""
+    path = next(Path(__file__).parent.parent.joinpath("alembic", "versions").glob("*_c7f4a2e9d136_*.py"))
+    spec = importlib.util.spec_from_file_location("index_overhaul_migration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.LEGACY_INDEXES
+
+
+def generate_deleted_cards_server_side(db: Session, card_id: str, count: int):
+    """复制指定信用卡生成大量已软删除的卡片，模拟长期使用后积累的删除记录"""
+    table = CreditCard.__table__
+    series = func.generate_series(1, count).table_valued("i").render_derived(name="series")
+    overrides = {
+        "id": func.gen_random_uuid(),
+        "card_number": func.concat("8", func.lpad(cast(series.c.i, Text), 18, "0")),
+        "is_deleted": true(),
+        "created_at": func.now() - func.make_interval(0, 0, 0, 0, 0, series.c.i),
+    }
+    db.execute(
+        insert(table).from_select(
+            [column.name for column in table.columns],
+            select(*(overrides.get(column.name, column) for column in table.columns))
+            .select_from(table.join(series, true()))
+            .where(table.c.id == card_id)
+        )
+    )
+
+
+def capture_selects(func: Callable[[], Any]) -> List[Tuple[str, Any]]:
+    """执行服务方法，返回其发出的SELECT语句及参数"""
+    statements: List[Tuple[str, Any]] = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+    return statements
+
+
+def resolve_parent_indexes(db: Session, names: set) -> set:
+    """将分区上的索引名解析为分区表父索引名，非分区索引保持原名"""
+    if not names:
+        return set()
+    rows = db.execute(
+        text(
+            "SELECT child.relname, COALESCE(parent.relname, child.relname) "
+            "FROM pg_class child "
+            "LEFT JOIN pg_inherits inh ON inh.inhrelid = child.oid "
+            "LEFT JOIN pg_class parent ON parent.oid = inh.inhparent "
+            "WHERE child.relname = ANY(:names) AND child.relkind IN ('i', 'I')"
+        ),
+        {"names": list(names)},
+    ).all()
+    resolved = dict(rows)
+    return {resolved.get(name, name) for name in names}
+
+
+def explain_analyze(db: Session, statement: str, parameters: Any) -> Tuple[List[str], float]:
+    """执行 EXPLAIN ANALYZE，返回执行计划各行和执行耗时（毫秒）"""
+    rows = db.connection().exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters).all()
+    plan = [row[0] for row in rows]
+    match = EXECUTION_TIME_PATTERN.search(plan[-1])
+    return plan, float(match.group(1)) if match else 0.0
+
+
+@pytest.mark.slow
+class TestQueryPlans:
+    """服务查询执行计划对比"""
+
+    def test_explain_service_queries_before_and_after(
+        self, db_session: Session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """打印各服务查询在索引调整前后的执行计划，调整后列表查询应使用新的复合索引和部分索引"""
+        user_id = UUID(authenticated_user["user"]["id"])
+        card_id = UUID(test_card["id"])
+
+        start_time = time.time()
+        generate_transactions_server_side(db_session, str(user_id), str(card_id), BENCHMARK_ROWS)
+        generate_deleted_cards_server_side(db_session, str(card_id), max(BENCHMARK_ROWS // 100, 1000))
+        db_session.execute(text("ANALYZE transactions"))
+        db_session.execute(text("ANALYZE credit_cards"))
+        print(f"\n生成 {BENCHMARK_ROWS} 条交易记录耗时: {time.time() - start_time:.2f}秒")
+
+        transactions = TransactionsService(db_session)
+        cards = CardsService(db_session)
+        annual_fees = AnnualFeeService(db_session)
+        partial_start, partial_end = datetime(2024, 1, 1, 0, 0, 1), datetime(2024, 3, 31, 12, 0, 0)
+        service_calls: Dict[str, Callable[[], Any]] = {
+            "交易列表（分页）": lambda: transactions.get_transactions(user_id, skip=0, limit=20),
+            "交易列表（按卡片）": lambda: transactions.get_transactions(user_id, card_id=card_id, limit=20),
+            "交易列表（时间范围）": lambda: transactions.get_transactions(
+                user_id, start_date=partial_start, end_date=partial_end, limit=20
+            ),
+            "交易列表（游标）": lambda: transactions.get_transactions_by_cursor(user_id, limit=20),
+            "交易统计（明细聚合）": lambda: transactions.get_transaction_statistics(
+                user_id, start_date=partial_start, end_date=partial_end
+            ),
+            "分类统计（明细聚合）": lambda: transactions.get_category_statistics(
+                user_id, start_date=partial_start, end_date=partial_end
+            ),
+            "信用卡列表": lambda: cards.get_cards(user_id),
+            "信用卡列表（含年费）": lambda: cards.get_cards_with_annual_fee(user_id),
+            "年费减免评估": lambda: annual_fees.evaluate_annual_fee_waivers(2024, user_id=user_id),
+        }
+        queries = [
+            (label, statement, parameters)
+            for label, call in service_calls.items()
+            for statement, parameters in capture_selects(call)
+        ]
+
+        legacy_indexes = load_legacy_indexes()
+
+        def use_legacy_indexes():
+            for index_name, _, _ in NEW_INDEXES:
+                db_session.execute(text(f"DROP INDEX {index_name}"))
+            for index_name, table_name, columns in legacy_indexes:
+                db_session.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({', '.join(columns)})"))
+
+        def use_new_indexes():
+            for index_name, _, _ in legacy_indexes:
+                db_session.execute(text(f"DROP INDEX {index_name}"))
+            for _, _, create_statement in NEW_INDEXES:
+                db_session.execute(text(create_statement))
+
+        results: Dict[str, List[Tuple[List[str], float]]] = {}
+        for phase, apply_indexes in (("调整前", use_legacy_indexes), ("调整后", use_new_indexes)):
+            apply_indexes()
+            db_session.execute(text("ANALYZE transactions"))
+            db_session.execute(text("ANALYZE credit_cards"))
+            results[phase] = [explain_analyze(db_session, statement, parameters) for _, statement, parameters in queries]
+
+        print(f"\n{'查询':<24}{'调整前(ms)':>12}{'调整后(ms)':>12}  调整后使用的索引")
+        for index, (label, statement, _) in enumerate(queries):
+            (before_plan, before_ms), (after_plan, after_ms) = results["调整前"][index], results["调整后"][index]
+            used = sorted(
+                resolve_parent_indexes(db_session, set(INDEX_PATTERN.findall("\n".join(after_plan))))
+            ) or ["(顺序扫描)"]
+            print(f"{label:<24}{before_ms:>12.2f}{after_ms:>12.2f}  {', '.join(used)}")
+        for phase, plans in results.items():
+            for (label, statement, _), (plan, _) in zip(queries, plans):
+                print(f"\n==== {phase} | {label} ====\n{statement}\n" + "\n".join(plan))
+
+        def indexes_used(label: str) -> set:
+            # 分区表的执行计划引用各分区上的索引，按 pg_inherits 还原为父表索引名后再比较
+            return resolve_parent_indexes(db_session, {
+                name
+                for (query_label, _, _), (plan, _) in zip(queries, results["调整后"])
+                if query_label == label
+                for name in INDEX_PATTERN.findall("\n".join(plan))
+            })
+
+        assert "idx_transactions_user_date_id" in indexes_used("交易列表（游标）")
+        assert "idx_credit_cards_user_created" in indexes_used("信用卡列表")
@@ -0,0 +1,146 @@
+"""
+请求SQL查询记录测试
+
+覆盖每个请求的SQL语句计数、重复语句（N+1）检测、按路由的查询预算，以及 query_recorders fixture。
+"""
+
+import logging
+from typing import Any, Dict, List
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from starlette.requests import Request
+
+from db_models.cards import CreditCard
+from tests.conftest import TestingSessionLocal, async_engine, create_test_transaction
+from utils.query_recorder import QueryBudget, QueryBudgetExceededError, attach_query_recorder, query_budget, statement_shape
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/test", "headers": []})
+
+
+class TestQueryRecorder:
+    """查询记录器测试"""
+
+    def test_counts_statements_per_endpoint(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any], query_recorders
+    ):
+        """测试记录器的计数与实际执行的语句一致，接口之间互不累计"""
+        statements: List[str] = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", record_statement)
+        try:
+            response = client.get(f"/api/cards/{test_card['id']}", headers=authenticated_user["headers"])
+            assert response.status_code == 200
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", record_statement)
+        client.get("/api/cards/", headers=authenticated_user["headers"])
+
+        (detail_endpoint, detail), (list_endpoint, listing) = query_recorders
+        assert detail_endpoint == "GET /api/cards/{card_id}"
+        assert detail.count == len(statements) > 0
+        assert detail.repeated(1) == []
+        assert list_endpoint == "GET /api/cards/"
+        assert listing.count > 0
+
+    def test_connection_released_stops_recording(self):
+        """测试连接归还连接池后，其他会话的语句不再计入请求的记录器"""
+        request = make_request()
+        with TestingSessionLocal() as db:
+            recorder = attach_query_recorder(request, db)
+            db.execute(select(CreditCard.id).limit(1))
+            db.execute(select(CreditCard.id).limit(1))
+        assert recorder.count == 2
+
+        with TestingSessionLocal() as other:
+            other.execute(select(CreditCard.id).limit(1))
+        assert recorder.count == 2
+
+    def test_detects_repeated_statement_shapes(self, caplog):
+        """测试同一形状的语句重复执行超过阈值时记录疑似N+1查询"""
+        request = make_request()
+        with TestingSessionLocal() as db:
+            recorder = attach_query_recorder(request, db)
+            for _ in range(query_budget.repeat_threshold + 1):
+                db.execute(select(CreditCard).where(CreditCard.id == uuid4()))
+            db.execute(select(CreditCard).where(CreditCard.id.in_([uuid4(), uuid4()])))
+            db.execute(select(CreditCard).where(CreditCard.id.in_([uuid4(), uuid4(), uuid4()])))
+
+        repeated = recorder.repeated(query_budget.repeat_threshold)
+        assert len(repeated) == 1 and repeated[0][1] == query_budget.repeat_threshold + 1
+        # IN 列表长度不同的语句视为同一形状
+        assert sorted(recorder.shapes().values()) == [2, query_budget.repeat_threshold + 1]
+        assert statement_shape("SELECT 1 WHERE id IN (%(id_1_1)s,\n %(id_1_2)s)") == "SELECT 1 WHERE id IN (?)"
+
+        with caplog.at_level(logging.WARNING, logger="utils.query_recorder"):
+            query_budget.check(request, "/test")
+        assert any("疑似N+1查询: GET /test" in record.getMessage() for record in caplog.records)
+
+
+class TestQueryBudget:
+    """按路由的查询预算测试"""
+
+    def test_parse_budgets(self):
+        """测试解析按路由的预算配置"""
+        assert QueryBudget.parse("get /api/cards/{card_id}=3, POST /api/transactions/=8") == {
+            "GET /api/cards/{card_id}": 3,
+            "POST /api/transactions/": 8,
+        }
+        with pytest.raises(ValueError):
+            QueryBudget.parse("/api/cards/=3")
+        with pytest.raises(ValueError):
+            QueryBudget.parse("GET /api/cards/=-1")
+
+    def test_exceeding_route_budget(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any], monkeypatch, caplog
+    ):
+        """测试超出路由预算时 raise 模式报错，log 模式记录警告并正常返回"""
+        monkeypatch.setattr(query_budget, "budgets", {"GET /api/cards/{card_id}": 0})
+        url = f"/api/cards/{test_card['id']}"
+
+        monkeypatch.setattr(query_budget, "mode", "raise")
+        with pytest.raises(QueryBudgetExceededError, match="超过查询预算 0"):
+            client.get(url, headers=authenticated_user["headers"])
+
+        monkeypatch.setattr(query_budget, "mode", "log")
+        with caplog.at_level(logging.WARNING, logger="utils.query_recorder"):
+            response = client.get(url, headers=authenticated_user["headers"])
+        assert response.status_code == 200
+        assert any("GET /api/cards/{card_id} 执行了" in record.getMessage() for record in caplog.records)
+
+        # 其他路由仍使用默认预算
+        assert client.get("/api/cards/", headers=authenticated_user["headers"]).status_code == 200
+
+
+class TestEndpointQueryCounts:
+    """常用接口的查询次数"""
+
+    def test_common_endpoints_stay_within_query_counts(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any], query_recorders
+    ):
+        """测试常用接口的SQL语句数不超过当前水平，且没有重复执行的语句"""
+        headers = authenticated_user["headers"]
+        create_test_transaction(client, headers, test_card["id"], {"amount": 10.00})
+        client.get("/api/transactions/", headers=headers)
+        client.get("/api/transactions/statistics/overview", headers=headers)
+        client.get("/api/cards/", headers=headers)
+        client.get(f"/api/cards/{test_card['id']}", headers=headers)
+
+        expected = {
+            "POST /api/transactions/": 7,
+            "GET /api/transactions/": 2,
+            "GET /api/transactions/statistics/overview": 1,
+            "GET /api/cards/": 2,
+            "GET /api/cards/{card_id}": 1,
+        }
+        counts = {endpoint: recorder.count for endpoint, recorder in query_recorders}
+        assert counts.keys() == expected.keys()
+        for endpoint, limit in expected.items():
+            assert counts[endpoint] <= limit, f"{endpoint} 执行了 {counts[endpoint]} 条SQL语句"
+        assert all(recorder.repeated(1) == [] for _, recorder in query_recorders)
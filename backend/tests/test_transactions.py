@@ -9,9 +9,19 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, Any
 from fastapi.testclient import TestClient
-from uuid import uuid4
+from uuid import UUID, uuid4
 
-from tests.conftest import create_test_transaction, assert_response_success, assert_response_error
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import update
+
+from db_models.transactions import Transaction as TransactionDB, TransactionType
+from models.response import ApiResponse
+from models.transactions import Transaction
+from services.transaction_rollup_service import TransactionRollupService
+from services.transactions_service import TransactionsService
+from tests.conftest import TestingSessionLocal, create_test_transaction, assert_response_success, assert_response_error
+from utils.response import ResponseUtil, RowSerializer
 
 
 class TestTransactionCRUD:
@@ -194,6 +204,216 @@ class TestTransactionCRUD:
         assert len(data["items"]) == 1
         assert "星巴克" in data["items"][0]["merchant_name"]
 
+    def test_keyword_search_substring_case_insensitive_and_updated(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试搜索分词支持任意子串、不区分大小写，并随交易更新"""
+        headers = authenticated_user["headers"]
+        transaction = create_test_transaction(client, headers, test_card["id"], {
+            "merchant_name": "Starbucks 星巴克咖啡",
+            "location": "北京国贸"
+        })
+        
+        for keyword in ["BUCKS", "巴克咖", "克", "国贸"]:
+            response = client.get(f"/api/transactions/?keyword={keyword}", headers=headers)
+            assert len(assert_response_success(response)["items"]) == 1, keyword
+        
+        response = client.put(
+            f"/api/transactions/{transaction['id']}", json={"merchant_name": "瑞幸咖啡"}, headers=headers
+        )
+        assert_response_success(response)
+        
+        response = client.get("/api/transactions/?keyword=星巴克", headers=headers)
+        assert len(assert_response_success(response)["items"]) == 0
+        response = client.get("/api/transactions/?merchant_name=瑞幸", headers=headers)
+        assert len(assert_response_success(response)["items"]) == 1
+
+    def test_suggest_merchants_ranked(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试商户自动补全按完全匹配、前缀匹配、交易笔数排序"""
+        headers = authenticated_user["headers"]
+        merchants = ["Costa咖啡"] * 3 + ["星巴克咖啡"] * 2 + ["咖啡之翼", "咖啡", "全家便利店"]
+        for merchant in merchants:
+            create_test_transaction(client, headers, test_card["id"], {"merchant_name": merchant})
+        
+        response = client.get("/api/transactions/merchants/suggest?q=咖啡", headers=headers)
+        suggestions = assert_response_success(response)
+        
+        assert [item["merchant_name"] for item in suggestions] == ["咖啡", "咖啡之翼", "Costa咖啡", "星巴克咖啡"]
+        assert suggestions[2]["transaction_count"] == 3
+
+    def test_import_transactions(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试批量导入交易记录，逐条返回错误"""
+        rows = [
+            {
+                "card_id": test_card["id"],
+                "transaction_type": "expense",
+                "amount": 120.00,
+                "transaction_date": "2024-07-01T10:00:00",
+                "category": "dining",
+                "points_earned": None,
+                "points_rate": 2.0
+            },
+            {
+                "card_id": test_card["id"],
+                "transaction_type": "expense",
+                "amount": -5,
+                "transaction_date": "2024-07-02T10:00:00"
+            },
+            {
+                "card_id": str(uuid4()),
+                "transaction_type": "expense",
+                "amount": 50.00,
+                "transaction_date": "2024-07-03T10:00:00"
+            },
+            {
+                "card_id": test_card["id"],
+                "transaction_type": "refund",
+                "amount": 30.00,
+                "transaction_date": "2024-07-04T10:00:00"
+            },
+        ]
+        
+        response = client.post(
+            "/api/transactions/import",
+            json={"transactions": rows},
+            headers=authenticated_user["headers"]
+        )
+        
+        data = assert_response_success(response)
+        assert data["total"] == 4
+        assert data["success_count"] == 2
+        assert data["error_count"] == 2
+        assert [error["index"] for error in data["errors"]] == [1, 2]
+        assert "amount" in data["errors"][0]["error"]
+        
+        response = client.get(
+            "/api/transactions/?start_date=2024-07-01T00:00:00&end_date=2024-07-31T23:59:59",
+            headers=authenticated_user["headers"]
+        )
+        items = assert_response_success(response)["items"]
+        assert len(items) == 2
+        dining = next(item for item in items if item["category"] == "dining")
+        assert float(dining["points_earned"]) == 240.0
+        
+        # 月度汇总同步更新
+        trend = assert_response_success(client.get(
+            "/api/transactions/statistics/monthly-trend?year=2024",
+            headers=authenticated_user["headers"]
+        ))
+        assert trend[6]["transaction_count"] == 2
+        assert float(trend[6]["income_amount"]) == 30.0
+
+    def test_merchant_ids_normalized_and_interned(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试商户名称规范化后解析为同一商户ID，并在提交后写入驻留缓存"""
+        from services.merchant_service import merchant_id_cache, normalize_merchant_name
+        
+        headers = authenticated_user["headers"]
+        merchant_name = f"Blue  Bottle {uuid4().hex[:6]}"
+        created = create_test_transaction(client, headers, test_card["id"], {"merchant_name": merchant_name})
+        merchant_id = created["merchant_id"]
+        assert merchant_id is not None
+        assert merchant_id_cache.get(normalize_merchant_name(merchant_name)) == merchant_id
+        
+        # 全角、大小写、多余空白不同的写法归为同一商户
+        variants = [merchant_name.upper(), f"  {merchant_name.replace('B', 'Ｂ')} ", merchant_name.replace("  ", " ")]
+        rows = [
+            {
+                "card_id": test_card["id"],
+                "transaction_type": "expense",
+                "amount": 10.00,
+                "transaction_date": "2024-08-01T10:00:00",
+                "merchant_name": variant
+            }
+            for variant in [*variants, "另一家商户", None]
+        ]
+        response = client.post("/api/transactions/import", json={"transactions": rows}, headers=headers)
+        assert assert_response_success(response)["success_count"] == 5
+        
+        items = assert_response_success(client.get(
+            "/api/transactions/?start_date=2024-08-01T00:00:00&end_date=2024-08-01T23:59:59&page_size=20",
+            headers=headers
+        ))["items"]
+        merchant_ids = {item["merchant_name"]: item["merchant_id"] for item in items}
+        assert all(merchant_ids[variant] == merchant_id for variant in variants)
+        assert merchant_ids["另一家商户"] not in (None, merchant_id)
+        assert merchant_ids[None] is None
+        
+        # 修改商户名称时重新解析商户ID
+        response = client.put(
+            f"/api/transactions/{created['id']}",
+            json={"merchant_name": "另一家商户"},
+            headers=headers
+        )
+        assert assert_response_success(response)["merchant_id"] == merchant_ids["另一家商户"]
+
+    def test_export_transactions_csv_and_ndjson(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试流式导出CSV和NDJSON"""
+        import csv
+        import io
+        import json
+        
+        headers = authenticated_user["headers"]
+        for i, category in enumerate(["dining", "shopping", "dining"]):
+            create_test_transaction(client, headers, test_card["id"], {
+                "amount": 10.50 + i,
+                "category": category,
+                "merchant_name": f"导出商户,{i}",
+                "transaction_date": f"2024-08-0{i + 1}T09:00:00"
+            })
+        
+        response = client.get("/api/transactions/export?format=csv", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 3
+        assert rows[0]["merchant_name"] == "导出商户,2"
+        assert rows[0]["amount"] == "12.50"
+        assert rows[0]["category"] == "dining"
+        assert rows[0]["transaction_date"] == "2024-08-03T09:00:00"
+        
+        response = client.get("/api/transactions/export?format=ndjson&category=dining", headers=headers)
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 2
+        assert all(line["category"] == "dining" for line in lines)
+        assert lines[-1]["is_installment"] is False
+        
+        response = client.get("/api/transactions/export?format=xml", headers=headers)
+        assert response.status_code == 422
+
+    def test_export_transactions_query_error_returns_json(
+        self, client: TestClient, authenticated_user: Dict[str, Any], monkeypatch
+    ):
+        """测试导出查询失败时返回500错误响应，而不是截断的导出文件"""
+        from sqlalchemy.orm import Session as OrmSession
+        
+        original_execute = OrmSession.execute
+        
+        def failing_execute(self, statement, *args, **kwargs):
+            # 只让导出使用的服务端游标查询失败
+            if getattr(statement, "get_execution_options", None) and statement.get_execution_options().get("stream_results"):
+                raise RuntimeError("connection lost")
+            return original_execute(self, statement, *args, **kwargs)
+        
+        monkeypatch.setattr(OrmSession, "execute", failing_execute)
+        response = client.get("/api/transactions/export?format=csv", headers=authenticated_user["headers"])
+        
+        assert response.status_code == 500
+        assert response.headers["content-type"].startswith("application/json")
+        assert "content-disposition" not in response.headers
+        body = response.json()
+        assert body["success"] is False
+        assert body["message"] == "导出交易记录失败"
+
     def test_get_transaction_detail(
         self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
     ):
@@ -344,6 +564,13 @@ class TestTransactionStatistics:
         assert "points_earned" in data
         assert data["total_transactions"] == 4
 
+        # 验证收支拆分和分类统计（分类仅统计消费交易）
+        assert float(data["total_amount"]) == 1750.00
+        assert float(data["expense_amount"]) == 700.00
+        assert float(data["income_amount"]) == 1050.00
+        category_amounts = {item["category"]: item["amount"] for item in data["categories"]}
+        assert category_amounts == {"shopping": 500.00, "dining": 200.00}
+
     def test_get_category_statistics(
         self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
     ):
@@ -379,6 +606,38 @@ class TestTransactionStatistics:
             assert "average_amount" in category_stat
             assert "percentage" in category_stat
 
+    def test_uncategorized_transactions_counted_as_other(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试未分类（NULL）的交易在汇总表和明细两种统计路径下都计入“其他”"""
+        headers = authenticated_user["headers"]
+        create_test_transaction(client, headers, test_card["id"], {
+            "amount": 100.00, "category": "other", "transaction_date": "2024-06-08T14:30:00"
+        })
+        with TestingSessionLocal() as db:
+            transaction_id = uuid4()
+            db.add(TransactionDB(
+                id=transaction_id, user_id=UUID(authenticated_user["user"]["id"]), card_id=UUID(test_card["id"]),
+                transaction_type=TransactionType.EXPENSE, amount=Decimal("100.00"),
+                transaction_date=datetime(2024, 6, 8, 15, 0)
+            ))
+            db.flush()
+            # ORM插入时会使用列默认值，未分类需要单独置为NULL
+            db.execute(update(TransactionDB).where(TransactionDB.id == transaction_id).values(category=None))
+            TransactionRollupService(db).apply_transactions([transaction_id])
+            db.commit()
+
+        # 整月范围读取月度汇总表，其余范围聚合交易明细
+        for query in ("start_date=2024-06-01T00:00:00&end_date=2024-06-30T23:59:59.999999",
+                      "start_date=2024-06-08T00:00:00&end_date=2024-06-08T23:59:59"):
+            response = client.get(f"/api/transactions/statistics/categories?{query}", headers=headers)
+            data = assert_response_success(response)
+            assert [(item["category"], item["transaction_count"]) for item in data] == [("other", 2)]
+
+        response = client.get("/api/transactions/statistics/overview?start_date=2024-06-08T00:00:00", headers=headers)
+        data = assert_response_success(response)
+        assert [(item["category"], item["count"]) for item in data["categories"]] == [("other", 2)]
+
     def test_get_monthly_trend(
         self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
     ):
@@ -415,6 +674,407 @@ class TestTransactionStatistics:
             assert trend["year"] == 2024
 
 
+    def test_get_transaction_trend_gap_fill_and_granularity(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试任意范围的交易趋势：左闭右开区间、空周期补0、按周和季度分组"""
+        headers = authenticated_user["headers"]
+        for date, transaction_type, amount in [
+            ("2024-01-01T00:00:00", "expense", 100.00),
+            ("2024-01-03T09:00:00", "expense", 50.00),
+            ("2024-01-03T18:00:00", "refund", 20.00),
+            ("2024-01-05T00:00:00", "expense", 999.00),  # 恰好等于结束时间，不计入
+        ]:
+            create_test_transaction(client, headers, test_card["id"], {
+                "transaction_type": transaction_type,
+                "amount": amount,
+                "transaction_date": date
+            })
+
+        response = client.get(
+            "/api/transactions/statistics/trend"
+            "?start_date=2024-01-01T00:00:00&end_date=2024-01-05T00:00:00&granularity=day",
+            headers=headers
+        )
+        data = assert_response_success(response)
+        assert [point["period_start"][:10] for point in data] == [
+            "2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"
+        ]
+        assert [point["transaction_count"] for point in data] == [1, 0, 2, 0]
+        assert float(data[2]["expense_amount"]) == 50.00
+        assert float(data[2]["income_amount"]) == 20.00
+        assert float(data[1]["total_amount"]) == 0
+
+        # 2024-01-01 是周一；第一个周期从开始时间所在周期的开始算起
+        response = client.get(
+            "/api/transactions/statistics/trend"
+            "?start_date=2023-12-28T00:00:00&end_date=2024-01-15T00:00:00&granularity=week",
+            headers=headers
+        )
+        data = assert_response_success(response)
+        assert [point["period_start"][:10] for point in data] == ["2023-12-25", "2024-01-01", "2024-01-08"]
+        assert [point["transaction_count"] for point in data] == [0, 4, 0]
+
+        response = client.get(
+            "/api/transactions/statistics/trend"
+            "?start_date=2024-01-01T00:00:00&end_date=2025-01-01T00:00:00&granularity=quarter",
+            headers=headers
+        )
+        data = assert_response_success(response)
+        assert [point["period_start"][:10] for point in data] == [
+            "2024-01-01", "2024-04-01", "2024-07-01", "2024-10-01"
+        ]
+        assert float(data[0]["expense_amount"]) == 1149.00
+
+        # 结束时间早于开始时间、周期数过多均返回400
+        response = client.get(
+            "/api/transactions/statistics/trend"
+            "?start_date=2024-02-01T00:00:00&end_date=2024-01-01T00:00:00",
+            headers=headers
+        )
+        assert response.status_code == 400
+        response = client.get(
+            "/api/transactions/statistics/trend"
+            "?start_date=2000-01-01T00:00:00&end_date=2024-01-01T00:00:00&granularity=day",
+            headers=headers
+        )
+        assert response.status_code == 400
+
+
+    def test_statistics_follow_create_update_delete(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试月度汇总随交易增删改同步更新，整月统计与明细统计一致"""
+        headers = authenticated_user["headers"]
+        march = create_test_transaction(client, headers, test_card["id"], {
+            "amount": 300.00, "category": "dining", "transaction_date": "2024-03-10T12:00:00"
+        })
+        april = create_test_transaction(client, headers, test_card["id"], {
+            "amount": 150.00, "category": "shopping", "transaction_date": "2024-04-20T12:00:00"
+        })
+        create_test_transaction(client, headers, test_card["id"], {
+            "transaction_type": "payment", "amount": 80.00, "transaction_date": "2024-04-25T12:00:00"
+        })
+        
+        def monthly(month: int) -> Dict[str, Any]:
+            response = client.get("/api/transactions/statistics/monthly-trend?year=2024", headers=headers)
+            return assert_response_success(response)[month - 1]
+        
+        assert monthly(3)["transaction_count"] == 1
+        assert float(monthly(4)["expense_amount"]) == 150.0
+        assert float(monthly(4)["income_amount"]) == 80.0
+        
+        # 修改金额和月份：3月的交易移到5月
+        response = client.put(
+            f"/api/transactions/{march['id']}",
+            json={"amount": 500.00, "transaction_date": "2024-05-01T08:00:00"},
+            headers=headers
+        )
+        assert_response_success(response)
+        assert monthly(3)["transaction_count"] == 0
+        assert float(monthly(5)["expense_amount"]) == 500.0
+        
+        # 删除4月的消费
+        response = client.delete(f"/api/transactions/{april['id']}", headers=headers)
+        assert_response_success(response)
+        assert float(monthly(4)["expense_amount"]) == 0.0
+        assert monthly(4)["transaction_count"] == 1
+        
+        # 整月范围（汇总表）与非整月范围（明细）得到相同结果
+        rollup_overview = assert_response_success(client.get(
+            "/api/transactions/statistics/overview?start_date=2024-04-01T00:00:00&end_date=2024-05-31T23:59:59.999999",
+            headers=headers
+        ))
+        detail_overview = assert_response_success(client.get(
+            "/api/transactions/statistics/overview?start_date=2024-04-01T00:00:01&end_date=2024-05-31T23:59:59",
+            headers=headers
+        ))
+        assert rollup_overview == detail_overview
+        assert rollup_overview["total_transactions"] == 2
+        assert float(rollup_overview["expense_amount"]) == 500.0
+        
+        categories = assert_response_success(client.get(
+            "/api/transactions/statistics/categories?start_date=2024-01-01T00:00:00&end_date=2024-12-31T23:59:59.999999",
+            headers=headers
+        ))
+        assert [(item["category"], float(item["total_amount"])) for item in categories] == [("dining", 500.0)]
+
+    def test_statistics_month_end_boundary_with_sub_second_timestamp(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试月末最后一秒内的交易：结束时间为23:59:59时不计入，与列表接口一致；time.max 时由汇总表计入"""
+        headers = authenticated_user["headers"]
+        create_test_transaction(client, headers, test_card["id"], {
+            "amount": 100.00, "transaction_date": "2024-07-15T10:00:00"
+        })
+        create_test_transaction(client, headers, test_card["id"], {
+            "amount": 40.00, "transaction_date": "2024-07-31T23:59:59.500000"
+        })
+        
+        period = "start_date=2024-07-01T00:00:00&end_date=2024-07-31T23:59:59"
+        overview = assert_response_success(
+            client.get(f"/api/transactions/statistics/overview?{period}", headers=headers)
+        )
+        listed = assert_response_success(client.get(f"/api/transactions/?{period}", headers=headers))
+        assert overview["total_transactions"] == listed["pagination"]["total"] == 1
+        assert float(overview["expense_amount"]) == 100.0
+        
+        full_month = assert_response_success(client.get(
+            "/api/transactions/statistics/overview?start_date=2024-07-01T00:00:00&end_date=2024-07-31T23:59:59.999999",
+            headers=headers
+        ))
+        assert full_month["total_transactions"] == 2
+        assert float(full_month["expense_amount"]) == 140.0
+
+
+    def test_rebuild_rollups_matches_incremental(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试全量重建的月度汇总与增量维护结果一致"""
+        from db_models.transactions import TransactionMonthlyRollup
+        from services.transaction_rollup_service import TransactionRollupService
+        
+        headers = authenticated_user["headers"]
+        for month, amount in [(1, 100.00), (1, 50.00), (6, 70.00)]:
+            create_test_transaction(client, headers, test_card["id"], {
+                "amount": amount, "transaction_date": f"2024-{month:02d}-15T10:00:00"
+            })
+        user_id = authenticated_user["user"]["id"]
+        
+        def snapshot():
+            rows = db_session.query(TransactionMonthlyRollup).filter(
+                TransactionMonthlyRollup.user_id == user_id
+            ).all()
+            return sorted(
+                (row.year, row.month, row.transaction_type.value, row.category.value,
+                 row.transaction_count, row.total_amount, row.points_earned)
+                for row in rows
+            )
+        
+        incremental = snapshot()
+        assert [(row[1], row[4], float(row[5])) for row in incremental] == [(1, 2, 150.0), (6, 1, 70.0)]
+        
+        assert TransactionRollupService(db_session).rebuild(user_id) == 2
+        assert snapshot() == incremental
+
+    def test_merchant_ranking_with_period_deltas(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试商户消费排行按金额和笔数排序，计算环比，并随交易修改删除同步更新"""
+        from db_models.transactions import TransactionMerchantMonthlyRollup
+        from services.transaction_rollup_service import TransactionRollupService
+        
+        headers = authenticated_user["headers"]
+        transactions = [
+            ("星巴克", 3, 40.00), ("星巴克", 3, 40.00), ("星巴克", 4, 30.00), ("星巴克", 4, 30.00), ("星巴克", 4, 30.00),
+            ("Apple Store", 4, 500.00), ("Apple Store", 2, 100.00), ("ｓｔａｒｂｕｃｋｓ", 4, 20.00),
+        ]
+        created = [
+            create_test_transaction(client, headers, test_card["id"], {
+                "merchant_name": merchant, "amount": amount, "transaction_date": f"2024-{month:02d}-15T10:00:00"
+            })
+            for merchant, month, amount in transactions
+        ]
+        create_test_transaction(client, headers, test_card["id"], {
+            "transaction_type": "refund", "merchant_name": "星巴克", "amount": 10.00,
+            "transaction_date": "2024-04-16T10:00:00"
+        })
+        
+        def ranking(**params) -> Dict[str, Any]:
+            query = "&".join(f"{key}={value}" for key, value in params.items())
+            return assert_response_success(
+                client.get(f"/api/transactions/statistics/merchants?{query}", headers=headers)
+            )
+        
+        # 2024年3-4月对比1-2月
+        data = ranking(year=2024, month=4, months=2)
+        assert (data["period_start"], data["previous_period_start"]) == ("2024-03", "2024-01")
+        assert data["merchant_count"] == 3
+        assert float(data["total_amount"]) == 690.0
+        assert [item["merchant_name"] for item in data["top_by_amount"]] == ["Apple Store", "星巴克", "ｓｔａｒｂｕｃｋｓ"]
+        assert [item["merchant_name"] for item in data["top_by_count"]] == ["星巴克", "Apple Store", "ｓｔａｒｂｕｃｋｓ"]
+        apple = data["top_by_amount"][0]
+        assert apple["transaction_count"] == 1
+        assert apple["previous_transaction_count"] == 1
+        assert float(apple["amount_change"]) == 400.0
+        assert apple["amount_change_rate"] == 400.0
+        assert data["top_by_count"][0]["amount_change_rate"] is None
+        
+        # 4月对比3月，限制返回数量
+        data = ranking(year=2024, month=4, limit=1)
+        assert len(data["top_by_amount"]) == len(data["top_by_count"]) == 1
+        starbucks = data["top_by_count"][0]
+        assert (starbucks["transaction_count"], starbucks["previous_transaction_count"]) == (3, 2)
+        assert starbucks["count_change"] == 1
+        assert float(starbucks["amount_change"]) == 10.0
+        
+        # 修改商户、删除交易后排行同步更新
+        response = client.put(
+            f"/api/transactions/{created[5]['id']}", json={"merchant_name": "星巴克"}, headers=headers
+        )
+        assert_response_success(response)
+        assert_response_success(client.delete(f"/api/transactions/{created[7]['id']}", headers=headers))
+        data = ranking(year=2024, month=4)
+        assert [(item["merchant_name"], item["transaction_count"]) for item in data["top_by_amount"]] == [("星巴克", 4)]
+        assert float(data["total_amount"]) == 590.0
+        
+        # 全量重建与增量维护结果一致
+        user_id = authenticated_user["user"]["id"]
+        
+        def snapshot():
+            rows = db_session.query(TransactionMerchantMonthlyRollup).filter(
+                TransactionMerchantMonthlyRollup.user_id == user_id
+            ).all()
+            return sorted((row.merchant_id, row.year, row.month, row.transaction_count, row.total_amount) for row in rows)
+        
+        incremental = snapshot()
+        TransactionRollupService(db_session).rebuild(user_id)
+        assert snapshot() == incremental
+
+class TestTransactionPartitioning:
+    """交易表年度分区测试"""
+
+    def test_year_range_query_prunes_to_one_partition(self, db_session):
+        """测试按年份半开区间过滤的查询只扫描对应年份的分区"""
+        from sqlalchemy import text
+        
+        plan = "\n".join(db_session.execute(text(
+            "EXPLAIN SELECT count(*) FROM transactions WHERE transaction_date >= :start AND transaction_date < :end"
+        ), {"start": datetime(2024, 1, 1), "end": datetime(2025, 1, 1)}).scalars())
+        
+        assert "transactions_y2024" in plan
+        assert "transactions_y2025" not in plan
+        assert "transactions_default" not in plan
+
+    def test_ensure_moves_default_rows_and_detach(
+        self, db_session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试新建分区时迁出默认分区中的数据，解除挂载后交易不再出现在查询中"""
+        from uuid import UUID
+        from sqlalchemy import text
+        from models.transactions import TransactionCreate, TransactionUpdate
+        from services.transactions_service import TransactionsService
+        from services.transaction_partition_service import TransactionPartitionService
+        
+        user_id = UUID(authenticated_user["user"]["id"])
+        service = TransactionsService(db_session)
+        partitions = TransactionPartitionService(db_session)
+        created = service.create_transaction(user_id, TransactionCreate(
+            card_id=test_card["id"], transaction_type="expense", amount=Decimal("88.00"),
+            transaction_date=datetime(2099, 5, 1, 10, 0, 0), merchant_name="远期商户"
+        ))
+        
+        def partition_of(transaction_id) -> str:
+            return db_session.execute(
+                text("SELECT tableoid::regclass::text FROM transactions WHERE id = :id"), {"id": transaction_id}
+            ).scalar()
+        
+        assert partition_of(created.id) == "transactions_default"
+        
+        assert partitions.ensure_partitions(2099, 2099) == ["transactions_y2099"]
+        assert partitions.ensure_partitions(2099, 2099) == []
+        assert partition_of(created.id) == "transactions_y2099"
+        assert "transactions_y2099" in {partition["name"] for partition in partitions.list_partitions()}
+        
+        # 分区对服务透明，修改交易时间时数据在分区间移动
+        service.update_transaction(created.id, user_id, TransactionUpdate(transaction_date=datetime(2024, 5, 1)))
+        assert partition_of(created.id) == "transactions_y2024"
+        service.update_transaction(created.id, user_id, TransactionUpdate(transaction_date=datetime(2099, 6, 1)))
+        items, _ = service.get_transactions(user_id, start_date=datetime(2099, 1, 1))
+        assert [item.id for item in items] == [created.id]
+        
+        assert partitions.detach_partition(2099) == "transactions_y2099"
+        items, _ = service.get_transactions(user_id, start_date=datetime(2099, 1, 1))
+        assert items == []
+        assert db_session.execute(text("SELECT count(*) FROM transactions_y2099")).scalar() == 1
+        
+        with pytest.raises(Exception):
+            partitions.detach_partition(2099)
+
+
+class TestTransactionAnnualFeeProgress:
+    """交易对年费减免进度的影响测试"""
+
+    def _create_annual_fee_card(
+        self, client: TestClient, headers: Dict[str, str], card_data: Dict[str, Any], fee_type: str
+    ) -> str:
+        card_data.update({
+            "annual_fee_enabled": True,
+            "fee_type": fee_type,
+            "base_fee": 200.00,
+            "waiver_condition_value": 1000,
+            "annual_fee_month": 12,
+            "annual_fee_day": 31
+        })
+        response = client.post("/api/cards/", json=card_data, headers=headers)
+        return assert_response_success(response)["id"]
+
+    def _current_progress(self, db_session, card_id: str) -> float:
+        from db_models.annual_fee import AnnualFeeRecord
+        record = db_session.query(AnnualFeeRecord).filter(
+            AnnualFeeRecord.card_id == card_id,
+            AnnualFeeRecord.fee_year == datetime.now().year
+        ).one()
+        db_session.refresh(record)
+        return float(record.current_progress)
+
+    @pytest.mark.parametrize("fee_type, expected_after_create, expected_after_delete", [
+        ("transaction_amount", 350.0, 150.0),
+        ("transaction_count", 2.0, 1.0),
+    ])
+    def test_progress_updated_on_create_and_delete(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any],
+        test_card_data: Dict[str, Any], fee_type: str,
+        expected_after_create: float, expected_after_delete: float
+    ):
+        """测试创建消费累加进度、删除消费重新计算进度"""
+        headers = authenticated_user["headers"]
+        card_id = self._create_annual_fee_card(client, headers, test_card_data, fee_type)
+        this_year = datetime.now().year
+        
+        first = create_test_transaction(client, headers, card_id, {
+            "amount": 200.00, "transaction_date": f"{this_year}-01-10T10:00:00"
+        })
+        create_test_transaction(client, headers, card_id, {
+            "amount": 150.00, "transaction_date": f"{this_year}-01-11T10:00:00"
+        })
+        # 还款不计入进度
+        create_test_transaction(client, headers, card_id, {
+            "transaction_type": "payment", "amount": 500.00, "transaction_date": f"{this_year}-01-12T10:00:00"
+        })
+        assert self._current_progress(db_session, card_id) == expected_after_create
+        
+        response = client.delete(f"/api/transactions/{first['id']}", headers=headers)
+        assert_response_success(response)
+        assert self._current_progress(db_session, card_id) == expected_after_delete
+
+    def test_progress_recalculated_on_update_and_scoped_to_transaction_year(
+        self, client: TestClient, db_session, authenticated_user: Dict[str, Any], test_card_data: Dict[str, Any]
+    ):
+        """测试修改金额、状态、日期后重新计算进度，往年补录的消费不计入当年进度"""
+        headers = authenticated_user["headers"]
+        card_id = self._create_annual_fee_card(client, headers, test_card_data, "transaction_amount")
+        this_year = datetime.now().year
+        
+        transaction = create_test_transaction(client, headers, card_id, {
+            "amount": 200.00, "transaction_date": f"{this_year}-01-10T10:00:00"
+        })
+        create_test_transaction(client, headers, card_id, {
+            "amount": 300.00, "transaction_date": f"{this_year - 1}-12-30T10:00:00"
+        })
+        assert self._current_progress(db_session, card_id) == 200.0
+        
+        for update, expected in [
+            ({"amount": 260.00}, 260.0),
+            ({"status": "cancelled"}, 0.0),
+            ({"status": "completed"}, 260.0),
+            ({"transaction_date": f"{this_year - 1}-06-01T10:00:00"}, 0.0),
+        ]:
+            response = client.put(f"/api/transactions/{transaction['id']}", json=update, headers=headers)
+            assert_response_success(response)
+            assert self._current_progress(db_session, card_id) == expected
+
+
 class TestTransactionAuth:
     """交易接口权限测试"""
 
@@ -535,6 +1195,74 @@ class TestTransactionEdgeCases:
         assert len(data["items"]) == 10
         assert data["pagination"]["page"] == 2
 
+    def test_get_transactions_cursor_pagination(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试游标分页：同一交易时间的记录按ID稳定翻页，不重复不遗漏"""
+        created_ids = set()
+        for i in range(12):
+            transaction = create_test_transaction(
+                client, authenticated_user["headers"], test_card["id"], {
+                    "amount": 100.00 + i,
+                    # 前8条共用同一交易时间，验证 (transaction_date, id) 作为排序键
+                    "transaction_date": "2024-06-08T14:30:00" if i < 8 else f"2024-06-{10 + i}T09:00:00"
+                }
+            )
+            created_ids.add(transaction["id"])
+        
+        seen_ids = []
+        cursor = None
+        pages = 0
+        while True:
+            url = "/api/transactions/cursor?page_size=5"
+            if cursor:
+                url += f"&cursor={cursor}"
+            data = assert_response_success(client.get(url, headers=authenticated_user["headers"]))
+            pages += 1
+            seen_ids.extend(item["id"] for item in data["items"])
+            assert data["pagination"]["total"] is None
+            cursor = data["pagination"]["next_cursor"]
+            assert data["pagination"]["has_more"] == (cursor is not None)
+            if not cursor:
+                break
+        
+        assert pages == 3
+        assert len(seen_ids) == len(set(seen_ids)) == 12
+        assert set(seen_ids) == created_ids
+        
+        # 最新的交易排在最前
+        first_page = assert_response_success(client.get(
+            "/api/transactions/cursor?page_size=1&total_mode=exact",
+            headers=authenticated_user["headers"]
+        ))
+        assert first_page["items"][0]["transaction_date"].startswith("2024-06-21")
+        assert first_page["pagination"]["total"] == 12
+        assert first_page["pagination"]["total_is_estimated"] is False
+
+    def test_get_transactions_cursor_estimated_total_and_invalid_cursor(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试游标分页的估算总数与无效游标"""
+        create_test_transaction(client, authenticated_user["headers"], test_card["id"], {
+            "merchant_name": "100% 便利店"
+        })
+        
+        response = client.get(
+            "/api/transactions/cursor?total_mode=estimated&keyword=100%25"
+            f"&card_id={test_card['id']}&transaction_type=expense",
+            headers=authenticated_user["headers"]
+        )
+        data = assert_response_success(response)
+        assert len(data["items"]) == 1
+        assert isinstance(data["pagination"]["total"], int)
+        assert data["pagination"]["total_is_estimated"] is True
+        
+        response = client.get(
+            "/api/transactions/cursor?cursor=not-a-cursor",
+            headers=authenticated_user["headers"]
+        )
+        assert_response_error(response, 400)
+
     def test_statistics_with_date_range(
         self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
     ):
@@ -557,4 +1285,53 @@ class TestTransactionEdgeCases:
         )
         
         data = assert_response_success(response)
-        assert data["total_transactions"] == 1 
\ No newline at end of file
+        assert data["total_transactions"] == 1 
+
+
+class TestTransactionListSerialization:
+    """交易列表按行序列化测试"""
+
+    def test_row_serialization_matches_model_dump(
+        self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试行序列化输出与经过Pydantic模型的分页响应一致"""
+        headers = authenticated_user["headers"]
+        create_test_transaction(client, headers, test_card["id"], {"amount": 10.50, "points_rate": 1.5})
+        create_test_transaction(client, headers, test_card["id"], {
+            "amount": 3000.00, "is_installment": True, "installment_count": 12,
+            "merchant_name": None, "notes": "分期付款", "category": "shopping",
+        })
+        user_id = UUID(authenticated_user["user"]["id"])
+
+        with TestingSessionLocal() as db:
+            service = TransactionsService(db)
+            rows, total = service.get_transactions(user_id, as_rows=True)
+            transactions, _ = service.get_transactions(user_id)
+            cursor_rows, next_cursor, _ = service.get_transactions_by_cursor(user_id, limit=1, as_rows=True)
+            cursor_transactions, _, _ = service.get_transactions_by_cursor(user_id, limit=1)
+
+        fast = orjson.loads(ResponseUtil.fast_paginated(Transaction, rows, total, 1, 20).body)
+        expected = ResponseUtil.paginated(transactions, total, 1, 20).model_dump(mode="json")
+        assert fast.pop("timestamp") and expected.pop("timestamp")
+        assert fast == expected
+        assert fast["data"]["items"][0]["amount"] == "3000.00"
+
+        fast = orjson.loads(ResponseUtil.fast_cursor_paginated(Transaction, cursor_rows, next_cursor, 1).body)
+        expected = ResponseUtil.cursor_paginated(cursor_transactions, next_cursor, 1).model_dump(mode="json")
+        assert fast.pop("timestamp") and expected.pop("timestamp")
+        assert fast == expected
+        assert fast["data"]["pagination"]["has_more"] is True
+
+        # 接口返回的内容与响应模型定义一致
+        response = client.get("/api/transactions/cursor?page_size=1", headers=headers)
+        assert response.headers["content-type"] == "application/json"
+        item = assert_response_success(response)["items"][0]
+        assert Transaction.model_validate(item).model_dump(mode="json") == item
+
+    def test_nested_model_not_supported(self):
+        """测试包含嵌套模型字段的响应模型不能按行序列化"""
+        class Wrapper(BaseModel):
+            response: ApiResponse
+
+        with pytest.raises(TypeError, match="Wrapper.response"):
+            RowSerializer(Wrapper)
@@ -4,12 +4,70 @@
 测试交易接口在大量数据情况下的性能表现。
 """
 
+import asyncio
+import os
 import pytest
 import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Dict, Any
+from uuid import UUID, uuid4
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
 from fastapi.testclient import TestClient
+from sqlalchemy import insert, or_, text
+from sqlalchemy.orm import Session
 
+from db_models.transactions import Transaction as TransactionDB, TransactionType, TransactionCategory
+from main import app
+from models.transactions import Transaction
+from services.transactions_service import TransactionsService
+from services.transaction_rollup_service import TransactionRollupService
 from tests.conftest import create_test_transaction, assert_response_success
+from utils.response import ResponseUtil
+
+
+# 搜索基准测试的合成数据行数，可通过环境变量调整
+BENCHMARK_ROWS = int(os.getenv("BENCHMARK_ROWS", "1000000"))
+
+
+def generate_transactions_server_side(db: Session, user_id: str, card_id: str, count: int):
+    """在数据库端用 generate_series 生成大量交易记录，每10000条中有1条商户为“Blue Bottle 蓝瓶咖啡”"""
+    db.execute(text("""
+        INSERT INTO transactions (
+            id, user_id, card_id, transaction_type, amount, transaction_date, merchant_name,
+            description, category, status, points_earned, is_installment, created_at, updated_at, is_deleted
+        )
+        SELECT gen_random_uuid(), :user_id, :card_id, 'EXPENSE', 100 + i % 50,
+               TIMESTAMP '2024-01-01 12:00:00' + i * INTERVAL '1 minute',
+               CASE WHEN i % 10000 = 0 THEN 'Blue Bottle 蓝瓶咖啡' ELSE '商户' || (i % 5000) || '号店' END,
+               '日常消费 ' || (i % 97), 'OTHER', 'COMPLETED', 10, FALSE, NOW(), NOW(), FALSE
+        FROM generate_series(1, :count) AS i
+    """), {"user_id": user_id, "card_id": card_id, "count": count})
+
+
+def bulk_insert_transactions(db: Session, user_id: str, card_id: str, count: int, start_index: int = 0):
+    """直接批量插入交易记录，用于构造大数据量测试场景"""
+    categories = list(TransactionCategory)
+    transaction_types = [TransactionType.EXPENSE, TransactionType.PAYMENT, TransactionType.REFUND]
+    base_date = datetime(2024, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(start_index, start_index + count):
+        rows.append({
+            "id": uuid4(),
+            "user_id": UUID(user_id),
+            "card_id": UUID(card_id),
+            "transaction_type": transaction_types[i % len(transaction_types)],
+            "amount": Decimal("100.00") + i % 50,
+            "transaction_date": base_date + timedelta(minutes=i * 7),
+            "merchant_name": f"商户{i % 200}",
+            "category": categories[i % len(categories)],
+            "points_earned": Decimal("10.00"),
+            "is_installment": False,
+        })
+    db.execute(insert(TransactionDB), rows)
+    TransactionRollupService(db).apply_transactions([row["id"] for row in rows])
 
 
 @pytest.mark.slow
@@ -76,6 +134,48 @@ class TestTransactionPerformance:
         assert duration < 2.0, f"查询时间过长: {duration:.4f}秒"
         assert len(data["items"]) == 50
 
+    def test_list_page_serialization_cost(
+        self, db_session: Session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """对比每页100条交易记录经Pydantic模型与按行序列化为JSON的耗时，按行序列化应更快"""
+        user_id = UUID(authenticated_user["user"]["id"])
+        bulk_insert_transactions(db_session, str(user_id), test_card["id"], 100)
+        service = TransactionsService(db_session)
+        orm_rows = service._build_transactions_query(user_id=user_id).limit(100).all()
+        rows, total = service.get_transactions(user_id, limit=100, as_rows=True)
+        assert len(orm_rows) == len(rows) == 100
+        route = next(route for route in app.routes if route.path == "/api/transactions/" and "GET" in route.methods)
+        loop = asyncio.new_event_loop()
+
+        def model_path() -> bytes:
+            # 原路径：ORM对象校验为模型，FastAPI 再按 response_model 校验并序列化
+            transactions = [Transaction.model_validate(row) for row in orm_rows]
+            content = ResponseUtil.paginated(transactions, total, 1, 100)
+            return JSONResponse(
+                loop.run_until_complete(serialize_response(field=route.response_field, response_content=content))
+            ).body
+
+        def row_path() -> bytes:
+            return ResponseUtil.fast_paginated(Transaction, rows, total, 1, 100).body
+
+        def per_page(func, repeat: int = 200) -> float:
+            func()
+            start_time = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            return (time.perf_counter() - start_time) / repeat
+
+        try:
+            model_time = per_page(model_path)
+        finally:
+            loop.close()
+        row_time = per_page(row_path)
+        print(f"\n每页100条交易记录序列化耗时:")
+        print(f"  Pydantic模型: {model_time * 1000:.2f}ms")
+        print(f"  按行序列化: {row_time * 1000:.2f}ms（{model_time / row_time:.1f}倍）")
+
+        assert row_time * 3 < model_time, f"按行序列化未明显降低耗时: {row_time:.4f}s vs {model_time:.4f}s"
+
     def test_search_transactions_performance(
         self, client: TestClient, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
     ):
@@ -210,4 +310,121 @@ class TestTransactionPerformance:
         print(f"  成功率: {success_count/20*100:.1f}%")
         
         # 断言大部分操作成功
-        assert success_count >= 18, f"并发操作成功率过低: {success_count}/20" 
\ No newline at end of file
+        assert success_count >= 18, f"并发操作成功率过低: {success_count}/20" 
+
+    def test_statistics_memory_flat_as_rows_grow(
+        self, db_session: Session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试统计聚合在SQL中完成，内存占用不随交易记录数增长"""
+        user_id = authenticated_user["user"]["id"]
+        service = TransactionsService(db_session)
+        
+        def measure_peak_memory():
+            tracemalloc.start()
+            try:
+                statistics = service.get_transaction_statistics(user_id=UUID(user_id))
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return statistics, peak
+        
+        bulk_insert_transactions(db_session, user_id, test_card["id"], 2000)
+        small_statistics, small_peak = measure_peak_memory()
+        
+        bulk_insert_transactions(db_session, user_id, test_card["id"], 18000, start_index=2000)
+        large_statistics, large_peak = measure_peak_memory()
+        
+        print(f"\n统计聚合内存峰值:")
+        print(f"  {small_statistics.total_transactions} 条记录: {small_peak / 1024:.1f} KB")
+        print(f"  {large_statistics.total_transactions} 条记录: {large_peak / 1024:.1f} KB")
+        
+        assert small_statistics.total_transactions == 2000
+        assert large_statistics.total_transactions == 20000
+        # 记录数增长10倍，内存峰值应基本保持不变
+        assert large_peak < small_peak * 2, f"内存占用随记录数增长: {small_peak} -> {large_peak}"
+
+    def test_export_memory_flat_as_rows_grow(
+        self, db_session: Session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试流式导出按批读取，内存峰值不随导出记录数增长"""
+        user_id = authenticated_user["user"]["id"]
+        service = TransactionsService(db_session)
+        
+        def measure_export():
+            tracemalloc.start()
+            try:
+                start_time = time.time()
+                exported_bytes = 0
+                exported_lines = 0
+                for chunk in service.export_transactions(user_id=UUID(user_id)):
+                    exported_bytes += len(chunk.encode("utf-8"))
+                    exported_lines += chunk.count("\n")
+                duration = time.time() - start_time
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            print(f"  {exported_lines - 1} 条记录: 导出 {exported_bytes / 1024:.1f} KB, "
+                  f"内存峰值 {peak / 1024:.1f} KB, 耗时 {duration:.2f}秒")
+            return exported_lines - 1, peak
+        
+        print(f"\n流式导出:")
+        bulk_insert_transactions(db_session, user_id, test_card["id"], 2000)
+        small_count, small_peak = measure_export()
+        
+        bulk_insert_transactions(db_session, user_id, test_card["id"], 18000, start_index=2000)
+        large_count, large_peak = measure_export()
+        
+        assert small_count == 2000
+        assert large_count == 20000
+        # 记录数增长10倍，内存峰值应基本保持不变
+        assert large_peak < small_peak * 2, f"导出内存占用随记录数增长: {small_peak} -> {large_peak}"
+
+    def test_keyword_search_uses_token_index(
+        self, db_session: Session, authenticated_user: Dict[str, Any], test_card: Dict[str, Any]
+    ):
+        """测试关键词搜索在大表上使用分词GIN索引，明显快于只用ILIKE的顺序扫描"""
+        user_id = authenticated_user["user"]["id"]
+        service = TransactionsService(db_session)
+        keyword = "蓝瓶咖啡"
+        
+        start_time = time.time()
+        generate_transactions_server_side(db_session, user_id, test_card["id"], BENCHMARK_ROWS)
+        db_session.execute(text("ANALYZE transactions"))
+        print(f"\n生成 {BENCHMARK_ROWS} 条交易记录耗时: {time.time() - start_time:.2f}秒")
+        
+        def best_of(func, repeat: int = 3):
+            timings = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                result = func()
+                timings.append(time.perf_counter() - start_time)
+            return result, min(timings)
+        
+        def indexed_search():
+            query = service._build_transactions_query(user_id=UUID(user_id), keyword=keyword)
+            return query.count()
+        
+        def ilike_only_search():
+            keyword_filter = f"%{keyword}%"
+            return db_session.query(TransactionDB).filter(
+                TransactionDB.user_id == UUID(user_id),
+                or_(
+                    TransactionDB.merchant_name.ilike(keyword_filter),
+                    TransactionDB.description.ilike(keyword_filter),
+                    TransactionDB.notes.ilike(keyword_filter),
+                    TransactionDB.location.ilike(keyword_filter)
+                )
+            ).count()
+        
+        indexed_count, indexed_time = best_of(indexed_search)
+        ilike_count, ilike_time = best_of(ilike_only_search)
+        suggestions, suggest_time = best_of(lambda: service.suggest_merchants(UUID(user_id), "蓝瓶"))
+        
+        print(f"关键词“{keyword}”搜索 {BENCHMARK_ROWS} 条记录:")
+        print(f"  分词索引: {indexed_time * 1000:.1f}ms, 命中 {indexed_count} 条")
+        print(f"  仅ILIKE: {ilike_time * 1000:.1f}ms, 命中 {ilike_count} 条")
+        print(f"  商户自动补全: {suggest_time * 1000:.1f}ms")
+        
+        assert indexed_count == ilike_count == BENCHMARK_ROWS // 10000
+        assert suggestions[0].merchant_name == "Blue Bottle 蓝瓶咖啡"
+        assert indexed_time * 5 < ilike_time, f"分词索引未明显加速搜索: {indexed_time:.3f}s vs {ilike_time:.3f}s"
@@ -6,10 +6,17 @@
 
 import pytest
 import logging
+import threading
 from typing import Dict, Any
 from fastapi.testclient import TestClient
 from uuid import uuid4
 
+from passlib.context import CryptContext
+
+from db_models.users import User
+from utils.cache import user_profile_cache
+from utils.password_hasher import password_hasher
+
 logger = logging.getLogger(__name__)
 
 
@@ -298,6 +305,25 @@ class TestUserProfile:
         assert updated_profile["bio"] == update_data["bio"]
         assert updated_profile["gender"] == update_data["gender"]
     
+    def test_profile_cache_hit_and_invalidated_on_update(self, client: TestClient, authenticated_user: Dict[str, Any], test_db):
+        """测试认证用户资料缓存命中，且更新资料后缓存失效"""
+        headers = authenticated_user["headers"]
+        client.get("/api/auth/profile", headers=headers)
+        
+        hits_before = user_profile_cache.stats()["hits"]
+        response = client.get("/api/auth/profile", headers=headers)
+        assert response.status_code == 200
+        assert user_profile_cache.stats()["hits"] == hits_before + 1
+        
+        response = client.put("/api/auth/profile", json={"nickname": "缓存失效测试"}, headers=headers)
+        assert response.status_code == 200
+        
+        response = client.get("/api/auth/profile", headers=headers)
+        assert response.json()["data"]["nickname"] == "缓存失效测试"
+        
+        health = client.get("/health").json()["data"]
+        assert health["user_cache"]["misses"] > 0
+    
     def test_update_profile_unauthorized(self, client: TestClient, test_db):
         """测试未认证更新用户资料失败"""
         update_data = {"nickname": "新昵称"}
@@ -388,6 +414,32 @@ class TestPasswordManagement:
             result = response.json()
             assert result["success"] is False
 
+    def test_login_rehashes_password_when_cost_changes(self, client: TestClient, test_user_data: Dict[str, Any], db_session, monkeypatch, test_db):
+        """测试哈希成本变更后登录时自动升级密码哈希"""
+        monkeypatch.setattr(password_hasher, "context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4))
+        response = client.post("/api/auth/register", json=test_user_data)
+        assert response.json()["success"] is True
+        user_id = response.json()["data"]["id"]
+        
+        monkeypatch.setattr(password_hasher, "context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=5))
+        login_data = {"username": test_user_data["username"], "password": test_user_data["password"]}
+        response = client.post("/api/auth/login/username", json=login_data)
+        assert response.json()["success"] is True
+        
+        user = db_session.query(User).filter(User.id == user_id).first()
+        assert user.password_hash.startswith("$2b$05$")
+    
+    def test_login_returns_429_when_hash_pool_saturated(self, client: TestClient, test_user: Dict[str, Any], monkeypatch, test_db):
+        """测试密码哈希工作池已满时返回429"""
+        monkeypatch.setattr(password_hasher, "_slots", threading.BoundedSemaphore(1))
+        password_hasher._slots.acquire()
+        
+        login_data = {"username": test_user["username"], "password": test_user["password"]}
+        response = client.post("/api/auth/login/username", json=login_data)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+        assert password_hasher.stats()["rejected"] > 0
+
 
 class TestVerificationCode:
     """验证码测试类"""
@@ -9,20 +9,18 @@ import secrets
 import random
 import string
 from datetime import datetime, timedelta, UTC
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 import bcrypt
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+
+from utils.password_hasher import pwd_context, password_hasher
 
 # JWT配置
 SECRET_KEY = "your-secret-key-here"  # 生产环境应该从环境变量读取
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 24 * 60  # 24小时
 
-# 密码上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class AuthUtils:
     """认证工具类"""
@@ -33,6 +31,7 @@ class AuthUtils:
         生成密码哈希值
         
         使用bcrypt算法对密码进行哈希处理，确保密码安全存储。
+        计算在密码哈希工作池中执行，池满时抛出 PasswordHasherBusyError。
         
         参数:
         - password: 明文密码
@@ -40,7 +39,7 @@ class AuthUtils:
         返回:
         - 密码哈希值
         """
-        return pwd_context.hash(password)
+        return password_hasher.hash(password)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -56,7 +55,69 @@ class AuthUtils:
         返回:
         - 密码是否匹配
         """
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hasher.verify(plain_password, hashed_password)
+
+    @staticmethod
+    def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码并检查是否需要重新哈希
+        
+        当 PASSWORD_HASH_ROUNDS 变更后，旧哈希验证通过时返回按新成本生成的哈希值。
+        
+        参数:
+        - plain_password: 明文密码
+        - hashed_password: 哈希密码
+        
+        返回:
+        - (密码是否匹配, 新哈希值或None)
+        """
+        return password_hasher.verify_and_update(plain_password, hashed_password)
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """
+        生成密码哈希值（async def 接口使用）
+        
+        在事件循环中等待密码哈希工作池的结果，不占用 run_sync 的线程。
+        
+        参数:
+        - password: 明文密码
+        
+        返回:
+        - 密码哈希值
+        """
+        return await password_hasher.hash_async(password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """
+        验证密码（async def 接口使用）
+        
+        参数:
+        - plain_password: 明文密码
+        - hashed_password: 哈希密码
+        
+        返回:
+        - 密码是否匹配
+        """
+        return await password_hasher.verify_async(plain_password, hashed_password)
+
+    @staticmethod
+    async def verify_and_update_password_async(
+        plain_password: str,
+        hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码并检查是否需要重新哈希（async def 接口使用）
+        
+        参数:
+        - plain_password: 明文密码
+        - hashed_password: 哈希密码
+        
+        返回:
+        - (密码是否匹配, 新哈希值或None)
+        """
+        return await password_hasher.verify_and_update_async(plain_password, hashed_password)
 
     @staticmethod
     def create_access_token(
@@ -0,0 +1,299 @@
+"""
+缓存工具
+
+提供进程内 TTL/LRU 缓存，认证用户资料缓存（进程内缓存 + 可选 Redis 二级缓存），
+以及写后读主库的用户固定标记（进程内 + 可选 Redis 共享）。
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, TypeVar
+
+from config import settings
+from models.users import UserProfile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """
+    线程安全的进程内 TTL/LRU 缓存
+
+    条目超过 ttl_seconds 后失效；条目数超过 max_size 时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """获取缓存值，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: T) -> None:
+        """写入缓存值"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """删除缓存值"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def create_redis_client(redis_url: str):
+    """创建超时较短的Redis客户端，Redis不可用时请求不会被长时间阻塞"""
+    import redis
+
+    return redis.Redis.from_url(
+        redis_url,
+        socket_timeout=0.2,
+        socket_connect_timeout=0.2
+    )
+
+
+class UserProfileCache:
+    """
+    认证用户资料缓存
+
+    get_current_user 在每个需要认证的请求中都会读取用户资料，缓存后可省去一次数据库查询。
+    查询顺序为进程内缓存 -> Redis（启用时）-> 数据库；用户资料变更时由服务层显式失效。
+
+    多进程部署时，失效操作只能清除当前进程的进程内缓存和 Redis，其他进程的进程内缓存
+    最长在 USER_CACHE_TTL_SECONDS 后过期，因此该TTL应保持较短。
+    """
+
+    KEY_PREFIX = "user_profile:"
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_size: int = 10000,
+        ttl_seconds: int = 60,
+        redis_url: Optional[str] = None
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self._local: TTLCache[UserProfile] = TTLCache(max_size, ttl_seconds)
+        self._redis_url = redis_url
+        self._redis = None
+        self._counter_lock = threading.Lock()
+        self._counters = {"hits": 0, "local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    # ==================== 缓存读写 ====================
+
+    def get(self, user_id: Any) -> Optional[UserProfile]:
+        """
+        获取缓存的用户资料
+
+        Returns:
+            UserProfile或None（未命中或缓存未启用）
+        """
+        if not self.enabled:
+            return None
+
+        key = str(user_id)
+        profile = self._local.get(key)
+        if profile is not None:
+            self._count("hits", "local_hits")
+            return profile
+
+        profile = self._get_from_redis(key)
+        if profile is not None:
+            self._local.set(key, profile)
+            self._count("hits", "redis_hits")
+            return profile
+
+        self._count("misses")
+        return None
+
+    def set(self, profile: UserProfile) -> None:
+        """写入用户资料"""
+        if not self.enabled:
+            return
+
+        key = str(profile.id)
+        self._local.set(key, profile)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.setex(self.KEY_PREFIX + key, self.ttl_seconds, profile.model_dump_json())
+            except Exception as e:
+                logger.warning(f"写入Redis用户缓存失败: {str(e)}")
+
+    def invalidate(self, user_id: Any) -> None:
+        """使指定用户的缓存失效"""
+        if not self.enabled:
+            return
+
+        key = str(user_id)
+        self._local.delete(key)
+        self._count("invalidations")
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.delete(self.KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"删除Redis用户缓存失败: {str(e)}")
+
+    def clear(self) -> None:
+        """清空进程内缓存并重置计数"""
+        self._local.clear()
+        with self._counter_lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+    # ==================== 统计信息 ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._counter_lock:
+            counters = dict(self._counters)
+
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "redis_enabled": self._redis_url is not None,
+            "size": len(self._local),
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def redis_status(self) -> str:
+        """Redis二级缓存状态，用于健康检查"""
+        if self._redis_url is None or not self.enabled:
+            return "not_configured"
+
+        client = self._get_redis()
+        try:
+            client.ping()
+            return "connected"
+        except Exception as e:
+            logger.warning(f"Redis连接检查失败: {str(e)}")
+            return "error"
+
+    # ==================== 辅助方法 ====================
+
+    def _count(self, *names: str) -> None:
+        with self._counter_lock:
+            for name in names:
+                self._counters[name] += 1
+
+    def _get_redis(self):
+        """延迟创建Redis客户端，未启用Redis时返回None"""
+        if self._redis_url is None:
+            return None
+
+        if self._redis is None:
+            self._redis = create_redis_client(self._redis_url)
+        return self._redis
+
+    def _get_from_redis(self, key: str) -> Optional[UserProfile]:
+        """从Redis读取用户资料，Redis不可用时视为未命中"""
+        client = self._get_redis()
+        if client is None:
+            return None
+
+        try:
+            data = client.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"读取Redis用户缓存失败: {str(e)}")
+            return None
+
+        return UserProfile.model_validate_json(data) if data else None
+
+
+class PrimaryPinStore:
+    """
+    写后读主库的用户固定标记
+
+    用户提交写入后在 ttl_seconds 秒内读主库。标记同时写入进程内缓存和 Redis（启用时），
+    多进程部署时其他进程通过 Redis 得知该用户刚写入过；Redis 不可用时只在写入的进程内生效。
+    """
+
+    KEY_PREFIX = "primary_pin:"
+
+    def __init__(self, ttl_seconds: float, max_size: int = 100000, redis_url: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self._local: TTLCache[bool] = TTLCache(max_size, ttl_seconds)
+        self._redis_url = redis_url
+        self._redis = None
+
+    def pin(self, user_id: Any) -> None:
+        """固定用户到主库"""
+        key = str(user_id)
+        self._local.set(key, True)
+
+        client = self._get_redis()
+        if client is not None and self.ttl_seconds > 0:
+            try:
+                client.set(self.KEY_PREFIX + key, 1, px=int(self.ttl_seconds * 1000))
+            except Exception as e:
+                logger.warning(f"写入Redis主库固定标记失败: {str(e)}")
+
+    def is_pinned(self, user_id: Any) -> bool:
+        """用户是否仍固定在主库"""
+        key = str(user_id)
+        if self._local.get(key) is not None:
+            return True
+
+        client = self._get_redis()
+        if client is None:
+            return False
+        try:
+            return bool(client.exists(self.KEY_PREFIX + key))
+        except Exception as e:
+            logger.warning(f"读取Redis主库固定标记失败: {str(e)}")
+            return False
+
+    def clear(self) -> None:
+        """清空进程内标记"""
+        self._local.clear()
+
+    def _get_redis(self):
+        """延迟创建Redis客户端，未启用Redis时返回None"""
+        if self._redis_url is None:
+            return None
+
+        if self._redis is None:
+            self._redis = create_redis_client(self._redis_url)
+        return self._redis
+
+
+# 全局用户资料缓存
+user_profile_cache = UserProfileCache(
+    enabled=settings.USER_CACHE_ENABLED,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.USER_CACHE_REDIS_ENABLED else None
+)
@@ -0,0 +1,67 @@
+"""
+并发工具
+
+为 async def 接口提供有界线程池，将同步的数据库访问、CPU密集型计算等
+阻塞调用移出事件循环，避免单个慢请求阻塞同一进程内的其他请求。
+"""
+
+import functools
+import logging
+from typing import Any, Callable, TypeVar
+
+import anyio
+from anyio.lowlevel import RunVar
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 每个事件循环独立的线程并发上限
+_sync_limiter: RunVar[anyio.CapacityLimiter] = RunVar("_sync_limiter")
+
+
+def get_sync_limiter() -> anyio.CapacityLimiter:
+    """
+    获取同步调用线程池的并发限制器
+
+    上限由 SYNC_WORKER_THREADS 配置，超出上限的调用在事件循环中排队等待，
+    不会无限制地创建线程或数据库连接。
+    """
+    try:
+        return _sync_limiter.get()
+    except LookupError:
+        limiter = anyio.CapacityLimiter(settings.SYNC_WORKER_THREADS)
+        _sync_limiter.set(limiter)
+        return limiter
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在有界线程池中执行同步函数
+
+    用于在 async def 接口中调用同步服务方法，例如：
+        card = await run_sync(service.create_card, card_data, user_id)
+
+    Args:
+        func: 同步函数
+        args/kwargs: 函数参数
+
+    Returns:
+        函数返回值
+    """
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=get_sync_limiter()
+    )
+
+
+def get_thread_pool_stats() -> dict:
+    """获取当前事件循环中同步调用线程池的使用情况"""
+    limiter = get_sync_limiter()
+    return {
+        "total": int(limiter.total_tokens),
+        "borrowed": limiter.borrowed_tokens,
+        "waiting": limiter.statistics().tasks_waiting,
+    }
@@ -0,0 +1,255 @@
+"""
+数据库连接池
+
+按 DB_POOL_PROFILE 选择连接池，并统计各引擎连接池的使用情况：
+- queue：进程内 QueuePool，适合直连 PostgreSQL。每个工作进程最多持有
+  DB_POOL_SIZE + DB_MAX_OVERFLOW 个连接，``start.py --workers N`` 时总连接数为其 N 倍
+- pgbouncer：NullPool，检出时新建连接、归还时关闭，由事务模式的 PgBouncer 复用服务端连接；
+  异步引擎同时关闭 asyncpg 的预编译语句缓存（事务模式下预编译语句不能跨事务复用）
+
+连接检查（pre-ping）在 DB_POOL_PRE_PING_INTERVAL 为0时每次检出都执行；大于0时只检查
+空闲超过该秒数的连接，繁忙时省去每次检出的一次往返。
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 检出等待耗时分布统计的桶上限（毫秒）
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class _MeteredPoolMixin:
+    """记录检出等待耗时和超时次数的连接池"""
+
+    _metrics: Optional["PoolMetrics"] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self._metrics is not None:
+                self._metrics.record_timeout()
+            raise
+        if self._metrics is not None:
+            self._metrics.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() 会以相同参数重建连接池，统计对象随之沿用
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    """带统计的 QueuePool"""
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """带统计的异步引擎 QueuePool"""
+
+
+class MeteredNullPool(_MeteredPoolMixin, NullPool):
+    """带统计的 NullPool"""
+
+
+def pool_options(is_async: bool = False) -> Dict[str, Any]:
+    """
+    获取当前连接池模式对应的 create_engine 参数
+
+    Args:
+        is_async: 是否用于 create_async_engine
+
+    Returns:
+        Dict: 连接池相关的引擎参数
+    """
+    if settings.DB_POOL_PROFILE == "pgbouncer":
+        options: Dict[str, Any] = {"poolclass": MeteredNullPool}
+        if is_async:
+            # 语句名称唯一，避免 PgBouncer 把不同客户端的预编译语句分配到同一服务端连接时重名
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    options = {
+        "poolclass": MeteredAsyncQueuePool if is_async else MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_INTERVAL == 0,
+    }
+    if is_async:
+        # 连接常驻进程内时，asyncpg 在每个连接上缓存服务端预编译语句，热点查询只需发送参数
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+    return options
+
+
+class PoolMetrics:
+    """
+    连接池统计
+
+    记录检出次数、检出等待耗时分布、超时次数，以及当前打开连接的存活时长和空闲连接检查结果。
+    """
+
+    def __init__(self, engine: Engine, pre_ping_interval: float = 0):
+        self.engine = engine
+        self.pre_ping_interval = pre_ping_interval
+        self._lock = threading.Lock()
+        self._connected_at: Dict[int, float] = {}
+        self._checkouts = 0
+        self._timeouts = 0
+        self._pings = 0
+        self._ping_failures = 0
+        self._wait = {"total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(WAIT_BUCKETS_MS) + 1)}
+
+    # ==================== 事件记录 ====================
+
+    def record_wait(self, elapsed_ms: float) -> None:
+        bucket = len(WAIT_BUCKETS_MS)
+        for index, upper_bound in enumerate(WAIT_BUCKETS_MS):
+            if elapsed_ms <= upper_bound:
+                bucket = index
+                break
+
+        with self._lock:
+            self._checkouts += 1
+            self._wait["total_ms"] += elapsed_ms
+            self._wait["max_ms"] = max(self._wait["max_ms"], elapsed_ms)
+            self._wait["buckets"][bucket] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self._connected_at[id(dbapi_connection)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record=None) -> None:
+        with self._lock:
+            self._connected_at.pop(id(dbapi_connection), None)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        """检出空闲超过 pre_ping_interval 秒的连接时先检查连接，失效时由连接池重新建立"""
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < self.pre_ping_interval:
+            return
+
+        with self._lock:
+            self._pings += 1
+        try:
+            self.engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            with self._lock:
+                self._ping_failures += 1
+            logger.warning(f"空闲连接检查失败，重新建立连接: {str(e)}")
+            raise exc.DisconnectionError() from e
+
+    # ==================== 统计信息 ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """获取连接池使用情况、检出等待耗时和连接存活时长"""
+        pool = self.engine.pool
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - connected_at for connected_at in self._connected_at.values()]
+            checkouts = self._checkouts
+            wait = {
+                "avg_ms": round(self._wait["total_ms"] / checkouts, 3) if checkouts else 0.0,
+                "max_ms": round(self._wait["max_ms"], 3),
+                "total_ms": round(self._wait["total_ms"], 3),
+                "buckets": dict(zip([*map(str, WAIT_BUCKETS_MS), "+Inf"], self._wait["buckets"])),
+            }
+            pre_ping = {"interval_seconds": self.pre_ping_interval, "pings": self._pings, "failures": self._ping_failures}
+            timeouts = self._timeouts
+
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else None
+            usage = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "capacity": capacity,
+                "saturation": round(pool.checkedout() / capacity, 4) if capacity else None,
+            }
+        else:
+            # NullPool 不保留空闲连接，打开的连接都处于检出状态
+            usage = {
+                "size": 0,
+                "checked_in": 0,
+                "checked_out": len(ages),
+                "overflow": 0,
+                "capacity": None,
+                "saturation": None,
+            }
+
+        return {
+            "pool_class": type(pool).__name__,
+            **usage,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait": wait,
+            "connections": {
+                "open": len(ages),
+                "max_age_seconds": round(max(ages), 1) if ages else 0.0,
+                "avg_age_seconds": round(sum(ages) / len(ages), 1) if ages else 0.0,
+            },
+            "pre_ping": pre_ping,
+        }
+
+
+# 各引擎的连接池统计，键为引擎名称（primary、replica-0、async 等）
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """
+    为引擎的连接池注册统计和空闲连接检查
+
+    Args:
+        engine: 同步引擎（异步引擎传入其 sync_engine）
+        name: 引擎名称，用于健康检查输出
+
+    Returns:
+        PoolMetrics: 该引擎的连接池统计
+    """
+    pre_ping_interval = 0
+    if settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_INTERVAL > 0 and isinstance(engine.pool, QueuePool):
+        pre_ping_interval = settings.DB_POOL_PRE_PING_INTERVAL
+
+    metrics = PoolMetrics(engine, pre_ping_interval)
+    engine.pool._metrics = metrics
+    event.listen(engine, "connect", metrics._on_connect)
+    event.listen(engine, "close", metrics._on_close)
+    event.listen(engine, "close_detached", metrics._on_close)
+    event.listen(engine, "checkin", metrics._on_checkin)
+    if pre_ping_interval:
+        event.listen(engine, "checkout", metrics._on_checkout)
+
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有引擎的连接池统计，用于健康检查"""
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
@@ -2,12 +2,105 @@
 日志配置工具
 
 提供统一的日志配置，确保所有日志都能正确记录到文件和控制台。
+
+LOG_ASYNC 开启时（默认），根日志器只挂一个 QueueHandler：请求协程和工作线程只把日志记录放入
+有界队列，由 QueueListener 的后台线程格式化并写入按大小轮转的日志文件和控制台，
+不在事件循环上做阻塞的文件写入。队列满时丢弃记录并计数，不阻塞调用方。
+
+LOG_SAMPLING 按日志器名称前缀对 INFO 及以下级别的日志抽样（如 ``services=0.1,access=1``），
+WARNING 及以上级别始终保留。日志参数应以 ``logger.info("... %s", value)`` 形式传入，
+消息在后台线程中才格式化，被抽样丢弃或低于级别的日志不产生格式化开销。
 """
 
+import atexit
 import logging
-import os
+import logging.handlers
+import queue
+import threading
 from pathlib import Path
-from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import settings
+
+
+class SamplingFilter(logging.Filter):
+    """
+    按日志器名称前缀抽样 INFO 及以下级别的日志
+
+    抽样是确定性的：采样率为0.1时每10条保留1条，便于按比例估算被丢弃的日志量。
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # 最长前缀优先匹配
+        self.rates = dict(sorted(rates.items(), key=lambda item: len(item[0]), reverse=True))
+        self._credit: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _rate_for(self, name: str) -> Optional[str]:
+        for prefix in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return prefix
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        prefix = self._rate_for(record.name)
+        if prefix is None:
+            return True
+
+        with self._lock:
+            credit = self._credit.get(prefix, 0.0) + self.rates[prefix]
+            if credit >= 1:
+                self._credit[prefix] = credit - 1
+                return True
+            self._credit[prefix] = credit
+            self.dropped += 1
+            return False
+
+    @staticmethod
+    def parse(value: str) -> Dict[str, float]:
+        """
+        解析 ``名称前缀=采样率`` 逗号分隔的抽样配置
+
+        Raises:
+            ValueError: 格式错误或采样率不在0到1之间
+        """
+        rates = {}
+        for item in filter(None, (part.strip() for part in value.split(","))):
+            name, separator, rate = item.partition("=")
+            if not separator or not name.strip():
+                raise ValueError(f"日志抽样配置格式错误: {item}")
+            rate = float(rate)
+            if not 0 <= rate <= 1:
+                raise ValueError(f"日志采样率必须在0到1之间: {item}")
+            rates[name.strip()] = rate
+        return rates
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    非阻塞的队列日志处理器
+
+    不在调用方线程中格式化消息，日志记录原样入队，由后台线程格式化；
+    队列满时丢弃记录并计数。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 同一进程内的线程队列不需要序列化记录，消息和异常堆栈留给写入线程格式化
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
 class LogConfig:
@@ -17,26 +110,33 @@ class LogConfig:
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
     
-    # 日志文件设置
-    LOG_DIR = 'logs'
-    LOG_FILE = 'app.log'
+    # 当前的异步写入组件，未开启 LOG_ASYNC 时为None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _queue_handler: Optional[NonBlockingQueueHandler] = None
+    _sampling_filter: Optional[SamplingFilter] = None
     
     @classmethod
-    def setup_logging(cls, log_level=logging.INFO):
+    def setup_logging(cls, log_level=None, async_mode: Optional[bool] = None):
         """
         设置日志配置
         
         Args:
-            log_level: 日志级别，默认INFO
+            log_level: 日志级别，默认取 LOG_LEVEL
+            async_mode: 是否经队列由后台线程写日志，默认取 LOG_ASYNC
         """
+        log_level = log_level or logging.getLevelName(settings.LOG_LEVEL.upper())
+        async_mode = settings.LOG_ASYNC if async_mode is None else async_mode
+        
         # 确保日志目录存在
-        log_dir = Path(cls.LOG_DIR)
-        log_dir.mkdir(exist_ok=True)
+        log_file_path = Path(settings.LOG_FILE)
+        log_file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 清除现有的处理器，避免重复
+        # 停止之前的后台写入线程并清除现有的处理器，避免重复
+        cls.stop_logging()
         root_logger = logging.getLogger()
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
+            handler.close()
         
         # 创建格式化器
         formatter = logging.Formatter(
@@ -44,10 +144,11 @@ class LogConfig:
             datefmt=cls.DATE_FORMAT
         )
         
-        # 创建文件处理器
-        log_file_path = log_dir / cls.LOG_FILE
-        file_handler = logging.FileHandler(
-            log_file_path, 
+        # 创建按大小轮转的文件处理器
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file_path,
+            maxBytes=settings.LOG_MAX_SIZE,
+            backupCount=settings.LOG_BACKUP_COUNT,
             encoding='utf-8'
         )
         file_handler.setLevel(log_level)
@@ -58,19 +159,57 @@ class LogConfig:
         console_handler.setLevel(log_level)
         console_handler.setFormatter(formatter)
         
+        # 抽样过滤器挂在入口处理器上，被丢弃的日志不入队
+        cls._sampling_filter = SamplingFilter(SamplingFilter.parse(settings.LOG_SAMPLING))
+        
         # 配置根日志器
         root_logger.setLevel(log_level)
-        root_logger.addHandler(file_handler)
-        root_logger.addHandler(console_handler)
+        if async_mode:
+            cls._queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+            cls._queue_handler.addFilter(cls._sampling_filter)
+            cls._listener = logging.handlers.QueueListener(
+                cls._queue_handler.queue, file_handler, console_handler, respect_handler_level=True
+            )
+            cls._listener.start()
+            root_logger.addHandler(cls._queue_handler)
+        else:
+            for handler in (file_handler, console_handler):
+                handler.addFilter(cls._sampling_filter)
+                root_logger.addHandler(handler)
         
         # 记录日志配置启动信息
         logger = logging.getLogger(__name__)
         logger.info("日志系统初始化完成")
-        logger.info(f"日志文件: {log_file_path.absolute()}")
-        logger.info(f"日志级别: {logging.getLevelName(log_level)}")
+        logger.info("日志文件: %s", log_file_path.absolute())
+        logger.info("日志级别: %s，写入方式: %s", logging.getLevelName(log_level), "后台线程" if async_mode else "同步")
         
         return logger
 
+    @classmethod
+    def stop_logging(cls):
+        """停止后台写入线程，写完队列中剩余的日志"""
+        if cls._listener is not None:
+            cls._listener.stop()
+            for handler in cls._listener.handlers:
+                handler.close()
+            cls._listener = None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """
+        获取日志管道统计
+
+        Returns:
+            Dict: 写入方式、队列积压、队列满丢弃数和抽样丢弃数
+        """
+        queue_handler = cls._queue_handler if cls._listener is not None else None
+        return {
+            "async": queue_handler is not None,
+            "queue_size": queue_handler.queue.qsize() if queue_handler else 0,
+            "queue_dropped": queue_handler.dropped if queue_handler else 0,
+            "sampled_out": cls._sampling_filter.dropped if cls._sampling_filter else 0,
+        }
+
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
         """
@@ -85,19 +224,38 @@ class LogConfig:
         return logging.getLogger(name)
 
     @classmethod
-    def log_request(cls, method: str, url: str, status_code: int, duration: float = None):
+    def log_request(
+        cls,
+        method: str,
+        path: str,
+        status_code: int,
+        duration: float,
+        query: str = "",
+        client: str = None,
+        db_queries: int = 0,
+        db_duration: float = 0.0,
+    ):
         """
-        记录HTTP请求日志
+        记录HTTP请求访问日志
+        
+        每个请求在完成后记录一行 ``key=value`` 格式的访问日志，便于按字段检索和统计。
         
         Args:
             method: HTTP方法
-            url: 请求URL
+            path: 请求路径
             status_code: 状态码
             duration: 请求耗时（秒）
+            query: 查询字符串
+            client: 客户端地址
+            db_queries: 请求内执行的SQL次数
+            db_duration: 请求内执行SQL的耗时（秒）
         """
-        logger = cls.get_logger('request')
-        duration_str = f" - {duration:.3f}s" if duration else ""
-        logger.info(f"{method} {url} - {status_code}{duration_str}")
+        logger = cls.get_logger('access')
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                'method=%s path="%s" query="%s" status=%d duration_ms=%.1f db_queries=%d db_ms=%.1f client=%s',
+                method, path, query, status_code, duration * 1000, db_queries, db_duration * 1000, client or "-"
+            )
 
     @classmethod
     def log_error(cls, error: Exception, context: str = None):
@@ -123,9 +281,15 @@ class LogConfig:
             details: 操作详情
         """
         logger = cls.get_logger('business')
+        if not logger.isEnabledFor(logging.INFO):
+            return
         user_str = f" - 用户: {user_id}" if user_id else ""
         details_str = f" - 详情: {details}" if details else ""
-        logger.info(f"业务操作: {operation}{user_str}{details_str}")
+        logger.info("业务操作: %s%s%s", operation, user_str, details_str)
+
+
+# 进程退出时写完队列中剩余的日志
+atexit.register(LogConfig.stop_logging)
 
 
 def setup_uvicorn_logging():
@@ -139,6 +303,9 @@ def setup_uvicorn_logging():
     # 让uvicorn使用我们的日志配置
     uvicorn_logger.propagate = True
     uvicorn_access_logger.propagate = True
+    
+    # 访问日志由请求日志中间件记录，关闭uvicorn自带的访问日志避免每个请求记录两次
+    uvicorn_access_logger.disabled = True
 
 
 # 初始化日志配置
@@ -0,0 +1,442 @@
+"""
+运行指标
+
+进程内收集请求、数据库查询、连接池、缓存和密码哈希工作池的指标，由 /metrics 接口以
+Prometheus 文本格式输出，无需额外的采集组件：
+- 每个路由（按路由模板，而非实际路径，避免标签数量失控）的请求耗时直方图、请求数和
+  按直方图估算的 p50/p95/p99，以及正在处理的请求数
+- 通过引擎 before_cursor_execute / after_cursor_execute 事件统计SQL执行次数和耗时，
+  并按请求汇总每个请求的查询次数和查询耗时
+- 连接池检出等待、用户资料缓存命中率、密码哈希工作池排队深度、日志队列积压
+
+指标只在当前进程内累计，``start.py --workers N`` 多进程部署时每个进程各自输出。
+记录一次观测只是加锁后的几次整数加法，对请求耗时的影响可以忽略。
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+
+from utils.cache import user_profile_cache
+from utils.db_pool import WAIT_BUCKETS_MS, pool_metrics
+from utils.logger import LogConfig
+from utils.password_hasher import LATENCY_BUCKETS_MS, password_hasher
+
+# 请求耗时直方图的桶上限（秒）
+REQUEST_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 每个请求查询次数直方图的桶上限
+REQUEST_QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# 每个请求查询耗时直方图的桶上限（秒）
+REQUEST_QUERY_DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# 由直方图估算并输出的分位数
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 未匹配到路由的请求统一使用的路由标签
+UNMATCHED_ROUTE = "unmatched"
+
+# 响应时由 Starlette 追加 charset=utf-8
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _header(name: str, help_text: str, metric_type: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+
+
+def render_samples(
+    name: str,
+    help_text: str,
+    metric_type: str,
+    samples: Iterable[Tuple[Sequence[str], Sequence[str], float]],
+) -> List[str]:
+    """
+    输出一个指标的文本格式
+
+    Args:
+        samples: (标签名, 标签值, 数值) 序列
+    """
+    lines = _header(name, help_text, metric_type)
+    for label_names, label_values, value in samples:
+        lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+    return lines
+
+
+def render_histogram(
+    name: str,
+    help_text: str,
+    label_names: Sequence[str],
+    series: Iterable[Tuple[Sequence[str], Sequence[float], Sequence[int], float]],
+) -> List[str]:
+    """
+    输出直方图的文本格式
+
+    Args:
+        series: (标签值, 桶上限, 各桶计数（非累计，最后一个为 +Inf 桶）, 观测值总和) 序列
+    """
+    lines = _header(name, help_text, "histogram")
+    bucket_label_names = (*label_names, "le")
+    for label_values, bounds, counts, total in series:
+        cumulative = 0
+        for bound, count in zip((*bounds, float("inf")), counts):
+            cumulative += count
+            labels = _format_labels(bucket_label_names, (*label_values, _format_value(bound)))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(label_names, label_values)
+        lines.append(f"{name}_sum{labels} {_format_value(float(total))}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+    return lines
+
+
+def estimate_quantile(quantile: float, bounds: Sequence[float], counts: Sequence[int]) -> float:
+    """
+    按直方图估算分位数（与 Prometheus histogram_quantile 相同，在所在桶内线性插值）
+
+    Args:
+        bounds: 桶上限
+        counts: 各桶计数（非累计，最后一个为 +Inf 桶）
+
+    Returns:
+        float: 分位数估计值，落在 +Inf 桶时返回最大的有限桶上限
+    """
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+
+    rank = quantile * total
+    cumulative = 0
+    for index, count in enumerate(counts):
+        if cumulative + count >= rank and count:
+            if index == len(bounds):
+                return float(bounds[-1])
+            lower = bounds[index - 1] if index > 0 else 0.0
+            return lower + (bounds[index] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return float(bounds[-1])
+
+
+class Histogram:
+    """按标签分组的线程安全直方图"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: LabelValues, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self) -> List[Tuple[LabelValues, List[int], float]]:
+        with self._lock:
+            return [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+
+    def render(self) -> List[str]:
+        return render_histogram(
+            self.name,
+            self.help_text,
+            self.label_names,
+            ((labels, self.buckets, counts, total) for labels, counts, total in self.snapshot()),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """按标签分组的线程安全计数器"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: LabelValues, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, label_values: LabelValues) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return render_samples(
+            self.name, self.help_text, "counter", ((self.label_names, labels, value) for labels, value in values)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+# ==================== 数据库查询统计 ====================
+
+class RequestQueryStats:
+    """单个请求内执行的SQL次数和耗时"""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# 当前请求的查询统计。同步接口在线程池中执行时复制了请求的上下文，累加到同一个对象上
+_request_queries: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_queries", default=None)
+
+db_queries_total = Counter("db_queries_total", "Executed SQL statements", ("engine",))
+db_query_seconds_total = Counter("db_query_seconds_total", "Time spent executing SQL statements", ("engine",))
+
+
+def instrument_queries(engine: Engine, name: str) -> None:
+    """
+    通过游标执行事件统计引擎的SQL执行次数和耗时
+
+    Args:
+        engine: 同步引擎（异步引擎传入其 sync_engine）
+        name: 引擎名称，与连接池统计一致
+    """
+    labels = (name,)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+        db_queries_total.inc(labels)
+        db_query_seconds_total.inc(labels, elapsed)
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+# ==================== 请求统计 ====================
+
+class RequestMetrics:
+    """HTTP请求指标"""
+
+    def __init__(self):
+        self.duration = Histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("method", "route"), REQUEST_DURATION_BUCKETS
+        )
+        self.requests = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+        self.queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per request", ("method", "route"),
+            REQUEST_QUERY_COUNT_BUCKETS
+        )
+        self.query_duration = Histogram(
+            "http_request_db_query_seconds", "Time spent executing SQL per request", ("method", "route"),
+            REQUEST_QUERY_DURATION_BUCKETS
+        )
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, method: str) -> RequestQueryStats:
+        """
+        开始统计一个请求：正在处理的请求数加一，并在当前上下文中开始累计SQL执行次数和耗时
+
+        Returns:
+            RequestQueryStats: 本请求的查询统计，结束时传给 finish
+        """
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + 1
+        stats = RequestQueryStats()
+        _request_queries.set(stats)
+        return stats
+
+    def finish(self, method: str, route: str, status_code: int, duration: float, stats: RequestQueryStats) -> None:
+        """结束统计一个请求，记录耗时、状态码和本请求的SQL执行情况"""
+        labels = (method, route)
+        with self._lock:
+            self._in_flight[method] -= 1
+        self.duration.observe(labels, duration)
+        self.requests.inc((method, route, str(status_code)))
+        self.queries.observe(labels, stats.count)
+        self.query_duration.observe(labels, stats.seconds)
+
+    def in_flight(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._in_flight)
+
+    def render(self) -> List[str]:
+        durations = self.duration.snapshot()
+        lines = self.duration.render()
+        lines += render_samples(
+            "http_request_duration_quantile_seconds",
+            "HTTP request latency quantiles estimated from http_request_duration_seconds",
+            "gauge",
+            (
+                (("method", "route", "quantile"), (*labels, str(quantile)),
+                 estimate_quantile(quantile, self.duration.buckets, counts))
+                for labels, counts, _ in durations
+                for quantile in QUANTILES
+            ),
+        )
+        lines += self.requests.render()
+        lines += render_samples(
+            "http_requests_in_flight", "HTTP requests being processed", "gauge",
+            ((("method",), (method,), count) for method, count in sorted(self.in_flight().items())),
+        )
+        lines += self.queries.render()
+        lines += self.query_duration.render()
+        return lines
+
+    def clear(self) -> None:
+        for metric in (self.duration, self.requests, self.queries, self.query_duration):
+            metric.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def route_template(request: Request) -> str:
+    """
+    获取请求匹配的路由模板（如 /api/cards/{card_id}），未匹配到路由时返回 unmatched
+
+    需要在路由处理之后调用。
+    """
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+
+    # 文档页等非 APIRoute 路由不会写入 scope["route"]，按处理函数查找
+    endpoint = request.scope.get("endpoint")
+    if endpoint is not None:
+        for candidate in request.app.router.routes:
+            if getattr(candidate, "endpoint", None) is endpoint:
+                return candidate.path
+    return UNMATCHED_ROUTE
+
+
+# ==================== 输出 ====================
+
+def render_metrics() -> str:
+    """
+    输出全部指标的 Prometheus 文本格式
+
+    Returns:
+        str: /metrics 响应内容
+    """
+    lines = request_metrics.render()
+    lines += db_queries_total.render()
+    lines += db_query_seconds_total.render()
+
+    # 连接池
+    pools = sorted((name, metrics.stats()) for name, metrics in pool_metrics.items())
+    pool_label = ("pool",)
+    for metric, help_text, key in (
+        ("db_pool_checked_out", "Connections checked out from the pool", "checked_out"),
+        ("db_pool_checked_in", "Idle connections in the pool", "checked_in"),
+        ("db_pool_overflow", "Overflow connections in use", "overflow"),
+        ("db_pool_capacity", "Maximum connections the pool may open", "capacity"),
+        ("db_pool_saturation", "Checked out connections divided by capacity", "saturation"),
+    ):
+        lines += render_samples(
+            metric, help_text, "gauge",
+            ((pool_label, (name,), stats[key]) for name, stats in pools if stats[key] is not None),
+        )
+    lines += render_samples(
+        "db_pool_open_connections", "Open database connections", "gauge",
+        ((pool_label, (name,), stats["connections"]["open"]) for name, stats in pools),
+    )
+    lines += render_samples(
+        "db_pool_timeouts_total", "Pool checkouts that timed out", "counter",
+        ((pool_label, (name,), stats["timeouts"]) for name, stats in pools),
+    )
+    lines += render_histogram(
+        "db_pool_checkout_wait_seconds", "Time spent waiting for a pool connection", pool_label,
+        (
+            ((name,), [bound / 1000 for bound in WAIT_BUCKETS_MS], list(stats["wait"]["buckets"].values()),
+             stats["wait"]["total_ms"] / 1000)
+            for name, stats in pools
+        ),
+    )
+
+    # 用户资料缓存
+    cache = user_profile_cache.stats()
+    lines += render_samples(
+        "user_cache_lookups_total", "User profile cache lookups", "counter",
+        [
+            (("result",), ("local_hit",), cache["local_hits"]),
+            (("result",), ("redis_hit",), cache["redis_hits"]),
+            (("result",), ("miss",), cache["misses"]),
+        ],
+    )
+    lines += render_samples("user_cache_hit_ratio", "User profile cache hit ratio", "gauge", [((), (), cache["hit_rate"])])
+    lines += render_samples("user_cache_entries", "User profiles cached in process", "gauge", [((), (), cache["size"])])
+
+    # 密码哈希工作池
+    hasher = password_hasher.stats()
+    lines += render_samples(
+        "password_hasher_in_flight", "Password hash tasks running or queued", "gauge", [((), (), hasher["in_flight"])]
+    )
+    lines += render_samples(
+        "password_hasher_queue_depth", "Password hash tasks waiting for a worker", "gauge",
+        [((), (), max(hasher["in_flight"] - hasher["workers"], 0))],
+    )
+    lines += render_samples(
+        "password_hasher_rejected_total", "Password hash tasks rejected because the pool was full", "counter",
+        [((), (), hasher["rejected"])],
+    )
+    lines += render_histogram(
+        "password_hasher_duration_seconds", "Password hash and verify latency", ("operation",),
+        (
+            ((operation,), [bound / 1000 for bound in LATENCY_BUCKETS_MS], list(data["buckets"].values()),
+             data["total_ms"] / 1000)
+            for operation, data in sorted(hasher["latency"].items())
+        ),
+    )
+
+    # 日志管道
+    logging_stats = LogConfig.stats()
+    lines += render_samples(
+        "log_queue_size", "Log records waiting for the writer thread", "gauge", [((), (), logging_stats["queue_size"])]
+    )
+    lines += render_samples(
+        "log_records_dropped_total", "Log records dropped before being written", "counter",
+        [
+            (("reason",), ("queue_full",), logging_stats["queue_dropped"]),
+            (("reason",), ("sampled",), logging_stats["sampled_out"]),
+        ],
+    )
+
+    return "\n".join(lines) + "\n"
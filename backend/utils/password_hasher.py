@@ -0,0 +1,186 @@
+"""
+密码哈希工作池
+
+bcrypt 每次计算需要数百毫秒CPU时间，在专用的有界线程池中执行
+（bcrypt 计算期间释放GIL，线程池即可并行利用多核），并限制排队深度：
+池满时立即拒绝新任务，由接口返回 HTTP 429，避免登录高峰拖垮整个服务。
+async def 接口应使用 *_async 方法直接等待工作池结果，不占用 run_sync 的线程。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 耗时分布统计的桶上限（毫秒）
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500)
+
+
+class PasswordHasherBusyError(Exception):
+    """密码哈希工作池已满"""
+
+
+class PasswordHasher:
+    """
+    密码哈希工作池
+
+    同时执行的任务数不超过 max_workers，另有最多 max_queue 个任务排队；
+    超出部分抛出 PasswordHasherBusyError。
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_queue: int):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._latency = {
+            operation: {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+            for operation in ("hash", "verify")
+        }
+
+    # ==================== 密码操作 ====================
+
+    def hash(self, password: str) -> str:
+        """生成密码哈希值"""
+        return self._run("hash", self.context.hash, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        """验证密码"""
+        return self._run("verify", self.context.verify, password, hashed_password)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码，并在哈希参数（如 PASSWORD_HASH_ROUNDS）变更时生成新哈希
+
+        Returns:
+            (是否验证通过, 新哈希值或None)
+        """
+        return self._run("verify", self.context.verify_and_update, password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        """生成密码哈希值，在事件循环中等待工作池结果"""
+        return await asyncio.wrap_future(self._submit("hash", self.context.hash, password))
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        """验证密码，在事件循环中等待工作池结果"""
+        return await asyncio.wrap_future(self._submit("verify", self.context.verify, password, hashed_password))
+
+    async def verify_and_update_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """验证密码并在需要时生成新哈希，在事件循环中等待工作池结果"""
+        return await asyncio.wrap_future(
+            self._submit("verify", self.context.verify_and_update, password, hashed_password)
+        )
+
+    # ==================== 统计信息 ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """获取工作池使用情况和哈希耗时统计"""
+        with self._lock:
+            latency = {}
+            for operation, data in self._latency.items():
+                latency[operation] = {
+                    "count": data["count"],
+                    "avg_ms": round(data["total_ms"] / data["count"], 2) if data["count"] else 0.0,
+                    "max_ms": round(data["max_ms"], 2),
+                    "total_ms": round(data["total_ms"], 2),
+                    "buckets": dict(zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], data["buckets"])),
+                }
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "latency": latency,
+            }
+
+    # ==================== 辅助方法 ====================
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        """提交任务到工作池并阻塞等待结果，供同步调用方使用"""
+        return self._submit(operation, func, *args).result()
+
+    def _submit(self, operation: str, func: Callable[..., Any], *args: Any) -> Future:
+        """
+        提交任务到工作池，池满时抛出 PasswordHasherBusyError
+
+        排队名额在任务执行结束时释放，调用方放弃等待（如请求被取消）不会提前释放名额。
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"密码哈希工作池已满，拒绝{operation}请求")
+            raise PasswordHasherBusyError("服务繁忙，请稍后重试")
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(self._timed, operation, func, *args)
+        except BaseException:
+            self._release_slot()
+            raise
+        future.add_done_callback(lambda _: self._release_slot())
+        return future
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _timed(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        start_time = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            self._record_latency(operation, elapsed_ms)
+
+    def _record_latency(self, operation: str, elapsed_ms: float) -> None:
+        bucket = len(LATENCY_BUCKETS_MS)
+        for index, upper_bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= upper_bound:
+                bucket = index
+                break
+
+        with self._lock:
+            data = self._latency[operation]
+            data["count"] += 1
+            data["total_ms"] += elapsed_ms
+            data["max_ms"] = max(data["max_ms"], elapsed_ms)
+            data["buckets"][bucket] += 1
+
+
+# 密码上下文，哈希成本由 PASSWORD_HASH_ROUNDS 配置；成本变更后旧哈希在登录时自动升级
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS
+)
+
+# 全局密码哈希工作池
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
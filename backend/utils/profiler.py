@@ -0,0 +1,244 @@
+"""
+采样性能分析
+
+纯Python的采样分析器：后台线程按固定间隔读取各线程当前的调用栈（sys._current_frames），
+按调用栈聚合采样次数，输出 flamegraph.pl / speedscope 可直接读取的折叠栈格式
+（每行 ``线程;外层函数;...;内层函数 次数``）。
+
+- 单请求分析：PROFILING_ENABLED 开启后，管理员在请求中带上 ``X-Profile: 1`` 请求头或
+  ``__profile=1`` 查询参数，该请求执行期间以 PROFILING_INTERVAL_MS 间隔采样，结果写入
+  PROFILE_DIR，文件名通过 ``X-Profile`` 响应头返回。非管理员带上标记时按普通请求处理
+- 后台采样：PROFILING_BACKGROUND_ENABLED 开启后，以较低频率（PROFILING_BACKGROUND_INTERVAL_MS）
+  持续采样整个进程，每 PROFILING_FLUSH_SECONDS 秒把累计的热点调用栈写入 PROFILE_DIR
+
+采样的是进程内所有非空闲线程：请求的异步代码在事件循环线程上、同步代码在工作线程中执行，
+同一进程内并发的其他请求也会出现在单请求分析结果中。两个开关都关闭时不启动任何线程，
+中间件只多一次配置判断。
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Dict, Optional
+from uuid import uuid4
+
+from starlette.requests import Request
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 请求开启性能分析的请求头和查询参数
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "__profile"
+
+# 分析器自身的线程名前缀，采样时跳过
+_THREAD_NAME_PREFIX = "profiler"
+
+# 栈顶处于这些函数时视为线程空闲（等待锁、队列、IO事件），不计入采样
+_IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+_BACKEND_DIR = str(Path(__file__).resolve().parent.parent) + os.sep
+_SITE_PACKAGES = re.compile(r".*[/\\](?:site|dist)-packages[/\\]")
+_STDLIB = re.compile(r".*[/\\]lib[/\\]python\d+\.\d+[/\\]")
+_THREAD_NUMBER = re.compile(r"[\d_-]+$")
+
+
+def _frame_label(code: CodeType, cache: Dict[CodeType, str]) -> str:
+    label = cache.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_BACKEND_DIR):
+            path = path[len(_BACKEND_DIR):]
+        else:
+            path = _STDLIB.sub("", _SITE_PACKAGES.sub("", path))
+        name = getattr(code, "co_qualname", code.co_name)
+        label = cache[code] = f"{name} ({path}:{code.co_firstlineno})".replace(";", ",")
+    return label
+
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FUNCTIONS
+
+
+class StackSampler:
+    """
+    调用栈采样器
+
+    start 后由后台线程每 interval 秒采样一次，take 取出并清空已聚合的折叠栈。
+    """
+
+    def __init__(self, interval: float, name: str):
+        self.interval = interval
+        self.name = name
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._labels: Dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"{_THREAD_NAME_PREFIX}-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def take(self) -> Counter:
+        """取出并清空已聚合的折叠栈"""
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+        return stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """采样一次所有非空闲线程的调用栈"""
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            thread_name = thread_names.get(thread_id, "unknown")
+            if thread_name.startswith(_THREAD_NAME_PREFIX) or _is_idle(frame):
+                continue
+
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code, self._labels))
+                frame = frame.f_back
+            labels.append(_THREAD_NUMBER.sub("", thread_name) or thread_name)
+            stacks.append(";".join(reversed(labels)))
+
+        with self._lock:
+            self.samples += 1
+            self._stacks.update(stacks)
+
+
+def write_folded(stacks: Counter, prefix: str) -> Optional[Path]:
+    """
+    把折叠栈写入 PROFILE_DIR
+
+    Returns:
+        Optional[Path]: 写入的文件，没有采样到调用栈时返回None
+    """
+    if not stacks:
+        return None
+
+    profile_dir = Path(settings.PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    path = profile_dir / f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid4().hex[:8]}.folded"
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+# ==================== 单请求分析 ====================
+
+def profiling_requested(request: Request) -> bool:
+    """请求是否带有开启性能分析的标记"""
+    return request.headers.get(PROFILE_HEADER) == "1" or request.query_params.get(PROFILE_QUERY_PARAM) == "1"
+
+
+class RequestProfile:
+    """单个请求的性能分析"""
+
+    def __init__(self, request: Request):
+        self.request = request
+        self.sampler = StackSampler(settings.PROFILING_INTERVAL_MS / 1000, "request")
+        self.started_at = time.perf_counter()
+        self.sampler.start()
+
+    def finish(self) -> Optional[Path]:
+        """
+        停止采样并写入分析结果
+
+        Returns:
+            Optional[Path]: 折叠栈文件
+        """
+        self.sampler.stop()
+        duration_ms = (time.perf_counter() - self.started_at) * 1000
+        route = re.sub(r"[^\w-]+", "_", self.request.url.path).strip("_") or "root"
+        path = write_folded(self.sampler.take(), f"request-{self.request.method}-{route}")
+        logger.info(
+            "请求性能分析: %s %s 耗时 %.1fms，采样 %d 次，结果: %s",
+            self.request.method, self.request.url.path, duration_ms, self.sampler.samples, path
+        )
+        return path
+
+
+# ==================== 后台采样 ====================
+
+class BackgroundProfiler:
+    """
+    后台低频采样
+
+    持续采样整个进程，每 flush_seconds 秒把累计的折叠栈写入一个文件后重新累计。
+    """
+
+    def __init__(self, interval: float, flush_seconds: float):
+        self.sampler = StackSampler(interval, "background")
+        self.flush_seconds = flush_seconds
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._flusher is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self.sampler = StackSampler(self.sampler.interval, "background")
+        self.sampler.start()
+        self._flusher = threading.Thread(target=self._run, name=f"{_THREAD_NAME_PREFIX}-flush", daemon=True)
+        self._flusher.start()
+        logger.info("后台性能采样已启动: 间隔 %.0fms，每 %.0f 秒写入 %s",
+                    self.sampler.interval * 1000, self.flush_seconds, settings.PROFILE_DIR)
+
+    def stop(self) -> None:
+        """停止采样并写入剩余的采样结果"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._flusher.join()
+        self._flusher = None
+        self.sampler.stop()
+        self.flush()
+
+    def flush(self) -> Optional[Path]:
+        """写入累计的热点调用栈"""
+        try:
+            return write_folded(self.sampler.take(), f"background-{os.getpid()}")
+        except Exception as e:
+            logger.error(f"写入后台性能采样失败: {str(e)}")
+            return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+
+background_profiler = BackgroundProfiler(
+    settings.PROFILING_BACKGROUND_INTERVAL_MS / 1000, settings.PROFILING_FLUSH_SECONDS
+)
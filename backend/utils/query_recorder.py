@@ -0,0 +1,211 @@
+"""
+请求SQL查询记录
+
+get_db / get_async_db 为每个请求创建一个 QueryRecorder 挂到会话上（会话 info），会话开始事务时
+记录器传给所用的连接，引擎执行语句时按连接找到记录器计数，连接归还连接池时解除关联。
+一个请求中的主库会话、只读会话和异步会话共用同一个记录器。
+
+请求结束时请求日志中间件调用 QueryBudget.check：
+- 同一形状的语句（参数不同、IN 列表长度不同视为同一形状）在一个请求中执行超过
+  QUERY_REPEAT_THRESHOLD 次时记录疑似 N+1 查询的警告
+- 语句总数超过路由的查询预算（QUERY_BUDGETS 中按 ``方法 路由模板=次数`` 配置，
+  未配置的路由使用 QUERY_BUDGET_DEFAULT）时，QUERY_BUDGET_MODE=log 记录警告，
+  raise 抛出 QueryBudgetExceededError（开发和测试环境使用），off 不记录
+
+流式响应在发送过程中执行的查询不计入预算检查。
+"""
+
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Generator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+from starlette.requests import Request
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 会话 info 和连接 info 中记录器的键
+RECORDER_KEY = "query_recorder"
+
+# 参数占位符列表，如 IN (%(id_1_1)s::UUID, %(id_1_2)s::UUID)
+_PLACEHOLDER = r"(?:%\(\w+\)s|\$\d+)(?:::\w+(?:\[\])?)?"
+_PARAMETER_LIST = re.compile(rf"\({_PLACEHOLDER}(?:,\s*{_PLACEHOLDER})*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceededError(Exception):
+    """请求执行的SQL语句数超过路由的查询预算"""
+
+
+def statement_shape(statement: str) -> str:
+    """
+    获取语句形状：合并空白，参数占位符列表折叠为 (?)
+
+    同一查询在循环中以不同参数执行时形状相同。
+    """
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryRecorder:
+    """单个请求执行的SQL语句记录"""
+
+    def __init__(self):
+        self.count = 0
+        self._statements: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str) -> None:
+        with self._lock:
+            self.count += 1
+            self._statements[statement] += 1
+
+    def shapes(self) -> Counter:
+        """按语句形状汇总的执行次数"""
+        with self._lock:
+            statements = list(self._statements.items())
+        shapes: Counter = Counter()
+        for statement, count in statements:
+            shapes[statement_shape(statement)] += count
+        return shapes
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        获取执行次数超过阈值的语句形状（疑似 N+1 查询）
+
+        Returns:
+            List[Tuple[str, int]]: (语句形状, 执行次数)，按次数降序
+        """
+        return [(shape, count) for shape, count in self.shapes().most_common() if count > threshold]
+
+
+def attach_query_recorder(request: Request, session: Session) -> Optional[QueryRecorder]:
+    """
+    为请求的会话挂上查询记录器，QUERY_BUDGET_MODE=off 时不记录
+
+    Args:
+        request: 当前请求，同一请求的多个会话共用一个记录器
+        session: 同步会话（异步会话传入其 sync_session）
+
+    Returns:
+        Optional[QueryRecorder]: 本请求的查询记录器
+    """
+    if query_budget.mode == "off":
+        return None
+
+    recorder = getattr(request.state, RECORDER_KEY, None)
+    if recorder is None:
+        recorder = QueryRecorder()
+        setattr(request.state, RECORDER_KEY, recorder)
+    session.info[RECORDER_KEY] = recorder
+    return recorder
+
+
+@event.listens_for(Session, "after_begin")
+def _bind_recorder_to_connection(session, transaction, connection):
+    recorder = session.info.get(RECORDER_KEY)
+    if recorder is not None:
+        connection.info[RECORDER_KEY] = recorder
+
+
+@event.listens_for(Pool, "checkin")
+def _unbind_recorder(dbapi_connection, connection_record):
+    if connection_record is not None:
+        connection_record.info.pop(RECORDER_KEY, None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    recorder = conn.info.get(RECORDER_KEY)
+    if recorder is not None:
+        recorder.record(statement)
+
+
+class QueryBudget:
+    """按路由的查询预算"""
+
+    def __init__(self, default: int, budgets: Dict[str, int], repeat_threshold: int, mode: str):
+        self.default = default
+        self.budgets = budgets
+        self.repeat_threshold = repeat_threshold
+        self.mode = mode
+        self._captures: List[List[Tuple[str, QueryRecorder]]] = []
+
+    @staticmethod
+    def parse(value: str) -> Dict[str, int]:
+        """
+        解析 ``方法 路由模板=次数`` 逗号分隔的查询预算配置
+
+        Raises:
+            ValueError: 格式错误或次数为负数
+        """
+        budgets = {}
+        for item in filter(None, (part.strip() for part in value.split(","))):
+            route, separator, limit = item.rpartition("=")
+            method, _, path = route.strip().partition(" ")
+            if not separator or not method or not path.strip():
+                raise ValueError(f"查询预算配置格式错误: {item}")
+            limit = int(limit)
+            if limit < 0:
+                raise ValueError(f"查询预算不能为负数: {item}")
+            budgets[f"{method.upper()} {path.strip()}"] = limit
+        return budgets
+
+    def budget_for(self, method: str, route: str) -> int:
+        """获取路由的查询预算"""
+        return self.budgets.get(f"{method} {route}", self.default)
+
+    def check(self, request: Request, route: str) -> None:
+        """
+        检查请求的查询次数和重复语句
+
+        Raises:
+            QueryBudgetExceededError: QUERY_BUDGET_MODE=raise 且超出预算
+        """
+        recorder: Optional[QueryRecorder] = getattr(request.state, RECORDER_KEY, None)
+        if recorder is None:
+            return
+
+        endpoint = f"{request.method} {route}"
+        for capture in self._captures:
+            capture.append((endpoint, recorder))
+
+        for shape, count in recorder.repeated(self.repeat_threshold):
+            logger.warning("疑似N+1查询: %s 中同一语句执行 %d 次: %.300s", endpoint, count, shape)
+
+        budget = self.budget_for(request.method, route)
+        if recorder.count > budget:
+            message = f"{endpoint} 执行了 {recorder.count} 条SQL语句，超过查询预算 {budget}"
+            if self.mode == "raise":
+                raise QueryBudgetExceededError(message)
+            logger.warning(message)
+
+    @contextmanager
+    def capture(self) -> Generator[List[Tuple[str, QueryRecorder]], None, None]:
+        """
+        收集期间结束的请求的查询记录，供测试断言各接口的查询次数
+
+        Yields:
+            List[Tuple[str, QueryRecorder]]: (``方法 路由模板``, 查询记录器)，按请求结束顺序
+        """
+        records: List[Tuple[str, QueryRecorder]] = []
+        self._captures.append(records)
+        try:
+            yield records
+        finally:
+            self._captures.remove(records)
+
+
+query_budget = QueryBudget(
+    default=settings.QUERY_BUDGET_DEFAULT,
+    budgets=QueryBudget.parse(settings.QUERY_BUDGETS),
+    repeat_threshold=settings.QUERY_REPEAT_THRESHOLD,
+    mode=settings.QUERY_BUDGET_MODE,
+)
@@ -1,10 +1,98 @@
-from typing import Any, Optional, TypeVar, List
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type, TypeVar, List, Union, get_args, get_origin
+import orjson
 from fastapi import status
-from models.response import ApiResponse, ApiPagedResponse, PagedResponse, PaginationInfo
+from fastapi.responses import Response
+from pydantic import BaseModel
+from models.response import (
+    ApiResponse,
+    ApiPagedResponse,
+    PagedResponse,
+    PaginationInfo,
+    ApiCursorPagedResponse,
+    CursorPagedResponse,
+    CursorPaginationInfo,
+)
 import math
 
 T = TypeVar('T')
 
+# orjson 输出选项：零时区偏移输出为 Z，与 Pydantic 的 JSON 序列化一致
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+class RowSerializer:
+    """
+    按响应模型预编译的行序列化器
+    
+    创建时根据模型字段注解确定每个字段的转换方式（Decimal 输出字符串、float 字段转为浮点数），
+    UUID、datetime、枚举等类型由 orjson 直接输出。序列化时按 fields 顺序把SQL查询返回的行元组
+    转为字典，不构造ORM对象和Pydantic模型，输出与 model_dump(mode="json") 相同。
+    
+    行数据不再经过模型校验，只适用于字段类型由数据库列保证的查询结果。
+    """
+    
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields: Tuple[str, ...] = tuple(model.model_fields)
+        self._converters: List[Tuple[str, Callable[[Any], Any]]] = []
+        for name, field in model.model_fields.items():
+            converter = self._converter_for(name, field.annotation)
+            if converter is not None:
+                self._converters.append((name, converter))
+    
+    def _converter_for(self, name: str, annotation: Any) -> Optional[Callable[[Any], Any]]:
+        if get_origin(annotation) is Union:
+            types = [arg for arg in get_args(annotation) if arg is not type(None)]
+            annotation = types[0] if len(types) == 1 else Any
+        if annotation is Decimal:
+            return str
+        if annotation is float:
+            return float
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            raise TypeError(f"{self.model.__name__}.{name} 是嵌套模型，不支持按行序列化")
+        return None
+    
+    def item(self, row: Sequence[Any]) -> Dict[str, Any]:
+        """将一行（按 fields 顺序的元组）转为可直接输出JSON的字典"""
+        item = dict(zip(self.fields, row))
+        for name, converter in self._converters:
+            value = item[name]
+            if value is not None:
+                item[name] = converter(value)
+        return item
+    
+    def items(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """批量转换行"""
+        return [self.item(row) for row in rows]
+
+
+_row_serializers: Dict[Type[BaseModel], RowSerializer] = {}
+
+
+def row_serializer(model: Type[BaseModel]) -> RowSerializer:
+    """获取响应模型的行序列化器，每个模型只编译一次"""
+    serializer = _row_serializers.get(model)
+    if serializer is None:
+        serializer = _row_serializers[model] = RowSerializer(model)
+    return serializer
+
+
+def _json_response(data: Dict[str, Any], message: str) -> Response:
+    content = orjson.dumps(
+        {
+            "success": True,
+            "code": status.HTTP_200_OK,
+            "message": message,
+            "data": data,
+            "timestamp": datetime.now(),
+        },
+        option=_ORJSON_OPTIONS
+    )
+    return Response(content=content, media_type="application/json")
+
+
 class ResponseUtil:
     """
     API响应工具类
@@ -151,6 +239,112 @@ class ResponseUtil:
             data=paged_data
         )
     
+    @staticmethod
+    def cursor_paginated(
+        items: List[T],
+        next_cursor: Optional[str],
+        page_size: int,
+        total: Optional[int] = None,
+        total_is_estimated: bool = False,
+        message: str = "获取成功"
+    ) -> ApiCursorPagedResponse[T]:
+        """
+        游标分页响应
+        
+        用于返回游标分页数据，客户端使用 next_cursor 请求下一页。
+        
+        参数:
+        - items: 当前页的数据列表
+        - next_cursor: 下一页游标，没有更多数据时为None
+        - page_size: 每页大小
+        - total: 总记录数（可选）
+        - total_is_estimated: 总记录数是否为估算值
+        - message: 响应消息
+        """
+        pagination = CursorPaginationInfo(
+            size=page_size,
+            next_cursor=next_cursor,
+            has_more=next_cursor is not None,
+            total=total,
+            total_is_estimated=total_is_estimated and total is not None
+        )
+        
+        paged_data = CursorPagedResponse(
+            items=items,
+            pagination=pagination
+        )
+        
+        return ApiCursorPagedResponse(
+            success=True,
+            code=status.HTTP_200_OK,
+            message=message,
+            data=paged_data
+        )
+    
+    @staticmethod
+    def fast_paginated(
+        model: Type[BaseModel],
+        rows: Sequence[Sequence[Any]],
+        total: int,
+        page: int,
+        page_size: int,
+        message: str = "获取成功"
+    ) -> Response:
+        """
+        分页响应（行序列化）
+        
+        与 paginated 输出相同的JSON，但直接由SQL查询返回的行元组序列化为字节，
+        跳过Pydantic模型的构造和 response_model 的二次校验。
+        
+        参数:
+        - model: 列表项的响应模型，行的列顺序须与 row_serializer(model).fields 一致
+        - rows: 当前页的数据行
+        - 其余参数同 paginated
+        """
+        pages = math.ceil(total / page_size) if page_size > 0 else 0
+        
+        return _json_response(
+            {
+                "items": row_serializer(model).items(rows),
+                "pagination": {
+                    "total": total,
+                    "page": page,
+                    "size": page_size,
+                    "total_pages": pages,
+                },
+            },
+            message
+        )
+    
+    @staticmethod
+    def fast_cursor_paginated(
+        model: Type[BaseModel],
+        rows: Sequence[Sequence[Any]],
+        next_cursor: Optional[str],
+        page_size: int,
+        total: Optional[int] = None,
+        total_is_estimated: bool = False,
+        message: str = "获取成功"
+    ) -> Response:
+        """
+        游标分页响应（行序列化）
+        
+        与 cursor_paginated 输出相同的JSON，参数同 fast_paginated 和 cursor_paginated。
+        """
+        return _json_response(
+            {
+                "items": row_serializer(model).items(rows),
+                "pagination": {
+                    "size": page_size,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None,
+                    "total": total,
+                    "total_is_estimated": total_is_estimated and total is not None,
+                },
+            },
+            message
+        )
+    
     @staticmethod
     def calculate_skip(page: int, page_size: int) -> int:
         """
@@ -209,8 +209,8 @@ DECLARE
     v_start_date DATE;
     v_end_date DATE;
 BEGIN
-    -- 获取年费规则
-    SELECT r.id, r.fee_type, r.waiver_condition_value
+    -- 获取年费规则（ORM建表时枚举按名称存储为大写，统一转为小写比较）
+    SELECT r.id, lower(r.fee_type::TEXT), r.waiver_condition_value
     INTO v_rule_id, v_fee_type, v_waiver_value
     FROM credit_cards c
     JOIN annual_fee_rules r ON c.annual_fee_rule_id = r.id
@@ -221,9 +221,9 @@ BEGIN
         RETURN FALSE;
     END IF;
     
-    -- 计算考核周期
-    v_start_date := DATE(p_fee_year || '-01-01');
-    v_end_date := DATE(p_fee_year || '-12-31');
+    -- 计算考核周期 [当年1月1日, 次年1月1日)，只统计已完成的消费交易
+    v_start_date := make_date(p_fee_year, 1, 1);
+    v_end_date := make_date(p_fee_year + 1, 1, 1);
     
     -- 根据不同类型计算当前进度
     IF v_fee_type = 'transaction_count' THEN
@@ -232,7 +232,10 @@ BEGIN
         INTO v_current_progress
         FROM transactions
         WHERE card_id = p_card_id
-        AND transaction_date BETWEEN v_start_date AND v_end_date;
+        AND transaction_type = 'EXPENSE'
+        AND status = 'COMPLETED'
+        AND transaction_date >= v_start_date
+        AND transaction_date < v_end_date;
         
     ELSIF v_fee_type = 'transaction_amount' THEN
         -- 计算刷卡金额
@@ -240,7 +243,10 @@ BEGIN
         INTO v_current_progress
         FROM transactions
         WHERE card_id = p_card_id
-        AND transaction_date BETWEEN v_start_date AND v_end_date;
+        AND transaction_type = 'EXPENSE'
+        AND status = 'COMPLETED'
+        AND transaction_date >= v_start_date
+        AND transaction_date < v_end_date;
         
     ELSIF v_fee_type = 'points_exchange' THEN
         -- 积分兑换逻辑（这里假设用户主动兑换，需要额外的积分表来跟踪）